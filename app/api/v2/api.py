@@ -19,6 +19,8 @@ from .endpoints import (
     conversation_ws,
     feature_vote_router,
     chat_router,
+    metrics_router,
+    search_router,
 )
 
 api_router = APIRouter()
@@ -33,6 +35,7 @@ api_router.include_router(notification_router.router, prefix="/notifications", t
 api_router.include_router(notification_ws.router, tags=["Notifications"])
 api_router.include_router(conversation_ws.router, tags=["Conversations"])
 api_router.include_router(chat_router.router, prefix="/chat", tags=["Chat"])
+api_router.include_router(search_router.router, prefix="/search", tags=["Search"])
 api_router.include_router(ws_debug.router,prefix="/ws-test", tags=["WsDebug"])
 api_router.include_router(badge_router.router, prefix="/badges", tags=["Badges"])
 api_router.include_router(programming_router.router, prefix="/programming", tags=["Programming"])
@@ -42,3 +45,4 @@ api_router.include_router(resend_webhook_router.router, tags=["Webhooks"])
 api_router.include_router(legal_router.router)
 api_router.include_router(feature_vote_router.router, prefix="/feature-polls", tags=["FeatureVotes"])
 api_router.include_router(feature_vote_router.router, prefix="/feature-votes", tags=["FeatureVotes"])
+api_router.include_router(metrics_router.router, prefix="/internal/metrics", tags=["Internal"])
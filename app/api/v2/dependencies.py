@@ -169,3 +169,11 @@ def get_current_user_from_websocket(websocket: WebSocket, db: Session) -> User:
         raise last_unauthorized_error
 
     raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Could not validate credentials")
+
+
+def get_current_superuser(current_user: User = Depends(get_current_user)) -> User:
+    """Restrict an endpoint to administrators (internal tooling, metrics…)."""
+
+    if not current_user.is_superuser:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="superuser_required")
+    return current_user
@@ -11,12 +11,11 @@ import re
 import unicodedata
 from typing import List
 
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, status, UploadFile, File, Form
+from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, Query, status, UploadFile, File, Form
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
-from openai import OpenAI
 
-from app.core.config import settings
+from app.core.llm_clients import llm_clients
 from app.api.v2.dependencies import get_db, get_current_user
 from app.models.user import user_model
 from app.models.user.user_model import User
@@ -24,6 +23,8 @@ from app.models.capsule import capsule_model, granule_model, atom_model, utility
 from app.models.analytics.vector_store_model import VectorStore
 from app.schemas.capsule import capsule_schema
 from app.services.services.capsule_service import CapsuleService, get_capsule_by_path
+from app.services.capsule_job_service import CapsuleJobService, run_pdf_job
+from app.services.capsule_catalog_service import CapsuleCatalogService, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
 from app.services.classification_service import db_classifier
 from app.services.classification_feedback_service import (
     ClassificationFeedbackPayload,
@@ -32,6 +33,7 @@ from app.services.classification_feedback_service import (
 from app.services.capsule_addon.exercices.exercices_generator import ExerciseGeneratorService
 from app.models.progress.user_atomic_progress import UserAtomProgress
 from app.services.rag_utils import get_embedding
+from app.services.retrieval import invalidate_indexes
 from app.api.v2 import dependencies
 
 
@@ -52,14 +54,6 @@ from app.crud import badge_crud
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
-# --- Initialisation du client OpenAI ---
-try:
-    openai_client = OpenAI(api_key=settings.OPENAI_API_KEY)
-    logger.info("✅ Client OpenAI configuré.")
-except Exception as e:
-    openai_client = None
-    logger.error(f"❌ Erreur de configuration pour OpenAI: {e}")
-
 
 """
 ================================================================================
@@ -140,10 +134,11 @@ def create_generic_capsule(
 
 @router.post(
     "/from-pdf",
-    response_model=capsule_schema.CapsuleRead,
-    status_code=status.HTTP_201_CREATED,
+    response_model=capsule_schema.CapsuleJobRead,
+    status_code=status.HTTP_202_ACCEPTED,
 )
 async def create_capsule_from_pdf(
+    background_tasks: BackgroundTasks,
     pdf_file: UploadFile = File(...),
     title: str = Form(...),
     domain: str = Form(...),
@@ -152,6 +147,11 @@ async def create_capsule_from_pdf(
     db: Session = Depends(dependencies.get_db),
     current_user: User = Depends(dependencies.get_current_user),
 ):
+    """
+    Enregistre un job de génération et rend la main immédiatement: l'extraction,
+    le plan et la première molécule sont produits en tâche de fond. Suivre le job
+    via GET /capsules/jobs/{job_id} ou les événements websocket "capsule_job".
+    """
     if pdf_file.content_type not in {"application/pdf", "application/x-pdf"}:
         raise HTTPException(status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE, detail="unsupported_file_type")
 
@@ -160,15 +160,27 @@ async def create_capsule_from_pdf(
     if not file_bytes:
         raise HTTPException(status_code=400, detail="empty_pdf")
 
-    service = CapsuleService(db=db, user=current_user)
-    capsule = service.create_capsule_from_pdf_bytes(
-        pdf_bytes=file_bytes,
+    job = CapsuleJobService(db=db, user=current_user).create_pdf_job(
         title=title,
         domain=domain,
         area=area,
         main_skill=main_skill,
     )
-    return capsule
+    background_tasks.add_task(run_pdf_job, job.id, file_bytes)
+    return job
+
+
+@router.get(
+    "/jobs/{job_id}",
+    response_model=capsule_schema.CapsuleJobRead,
+    summary="Suivre un job de génération de capsule",
+)
+def get_capsule_job(
+    job_id: str,
+    db: Session = Depends(dependencies.get_db),
+    current_user: User = Depends(dependencies.get_current_user),
+):
+    return CapsuleJobService(db=db, user=current_user).get_job(job_id)
 
 
 # --- Endpoint de progression (JIT) ---
@@ -305,7 +317,11 @@ def get_my_capsules(
     db: Session = Depends(get_db),
     current_user: user_model.User = Depends(get_current_user)
 ):
-    """Récupère la liste des capsules auxquelles l'utilisateur actuel est inscrit."""
+    """
+    Récupère la liste des capsules auxquelles l'utilisateur actuel est inscrit.
+    Forme historique (arbre complet annoté) conservée pour les clients existants :
+    préférer /me/page pour les listes.
+    """
     enrollments = db.query(utility_models.UserCapsuleEnrollment).filter(utility_models.UserCapsuleEnrollment.user_id == current_user.id).all()
     service = CapsuleService(db=db, user=current_user)
     capsules = []
@@ -319,16 +335,49 @@ def get_public_capsules(
     db: Session = Depends(get_db),
     current_user: user_model.User = Depends(get_current_user)
 ):
-    """Récupère les capsules publiques auxquelles l'utilisateur N'EST PAS encore inscrit."""
+    """
+    Récupère les capsules publiques auxquelles l'utilisateur N'EST PAS encore inscrit.
+    Forme historique conservée pour les clients existants : préférer /public/page.
+    """
     enrolled_capsule_ids = {e.capsule_id for e in current_user.enrollments}
-    
+
     public_capsules = db.query(capsule_model.Capsule).filter(
         capsule_model.Capsule.is_public == True,
         ~capsule_model.Capsule.id.in_(enrolled_capsule_ids)
     ).all()
-    
+
     return public_capsules
 
+@router.get("/me/page", response_model=capsule_schema.CapsuleSummaryPage, summary="Lister les capsules de l'utilisateur (paginé)")
+def get_my_capsules_page(
+    domain: str | None = Query(default=None),
+    area: str | None = Query(default=None),
+    sort: str = Query(default="recent", description="recent | title"),
+    cursor: str | None = Query(default=None, description="Curseur renvoyé par la page précédente"),
+    limit: int = Query(default=DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: Session = Depends(get_db),
+    current_user: user_model.User = Depends(get_current_user)
+):
+    """Récupère, page par page, les capsules auxquelles l'utilisateur actuel est inscrit."""
+    return CapsuleCatalogService(db, current_user).list_enrolled(
+        domain=domain, area=area, sort=sort, cursor=cursor, limit=limit
+    )
+
+@router.get("/public/page", response_model=capsule_schema.CapsuleSummaryPage, summary="Lister les capsules publiques disponibles (paginé)")
+def get_public_capsules_page(
+    domain: str | None = Query(default=None),
+    area: str | None = Query(default=None),
+    sort: str = Query(default="recent", description="recent | title"),
+    cursor: str | None = Query(default=None, description="Curseur renvoyé par la page précédente"),
+    limit: int = Query(default=DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: Session = Depends(get_db),
+    current_user: user_model.User = Depends(get_current_user)
+):
+    """Récupère, page par page, les capsules publiques auxquelles l'utilisateur N'EST PAS encore inscrit."""
+    return CapsuleCatalogService(db, current_user).list_public(
+        domain=domain, area=area, sort=sort, cursor=cursor, limit=limit
+    )
+
 @router.post("/{capsule_id}/enroll", response_model=capsule_schema.CapsuleRead, summary="S'inscrire à une capsule")
 def enroll_in_capsule(
     capsule_id: int,
@@ -530,6 +579,9 @@ def create_molecule_content(
     system_msg = "Tu es un assistant pédagogique. Réponds STRICTEMENT au format JSON. Structure attendue : {\"lesson_text\": \"...markdown...\"}."
     user_msg = f"Génère une leçon complète et structurée pour la leçon « {molecule.title} » dans le contexte du cours « {capsule.title} »."
     
+    openai_client = llm_clients.openai()
+    if not openai_client:
+        raise HTTPException(status_code=503, detail="Le client OpenAI n'est pas configuré.")
     try:
         response = openai_client.chat.completions.create(model="gpt-5-mini-2025-08-07", messages=[{"role": "system", "content": system_msg}, {"role": "user", "content": user_msg}], response_format={"type": "json_object"})
         lesson_payload = json.loads(response.choices[0].message.content or "{}")
@@ -555,6 +607,7 @@ def create_molecule_content(
     db.add(new_vector)
 
     db.commit()
+    invalidate_indexes("vector_store")
     logger.info(f"Molécule '{molecule.title}' et son contenu sauvegardés.")
     
     return {"status": "created", "lesson": lesson_payload}
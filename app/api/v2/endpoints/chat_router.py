@@ -2,11 +2,13 @@
 
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
 
 from app.api.v2.dependencies import get_current_user, get_db
 from app.conversations.rooms import ChatRoom, build_rooms_for_user
+from app.conversations.schemas import ChannelDescriptor, ChatHistoryPage
+from app.conversations.store import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, load_page
 from app.models.user.user_model import User
 
 
@@ -21,3 +23,21 @@ def list_chat_rooms(
     """Return the chat rooms available to the authenticated user."""
 
     return build_rooms_for_user(db, current_user)
+
+
+@router.get("/history", response_model=ChatHistoryPage)
+def read_chat_history(
+    domain: str | None = Query(default=None, description="Salon/domain of the conversation"),
+    area: str | None = Query(default=None, description="Optional area tag of the conversation"),
+    before: str | None = Query(default=None, description="Cursor returned by the previous page"),
+    limit: int = Query(default=DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+) -> ChatHistoryPage:
+    """Return a page of a channel history, newest page first, messages oldest first."""
+
+    channel = ChannelDescriptor.from_params(domain=domain, area=area)
+    try:
+        return load_page(db, channel.key, before=before, limit=limit)
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="invalid_cursor")
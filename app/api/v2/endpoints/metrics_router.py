@@ -0,0 +1,24 @@
+# Fichier: backend/app/api/v2/endpoints/metrics_router.py
+"""Internal runtime metrics, restricted to superusers."""
+
+from app.api.v2.dependencies import get_current_superuser
+from app.core.websocket_fanout import fanout_metrics_snapshot
+from app.db.pool_metrics import pool_metrics_snapshot
+from app.models.user.user_model import User
+from fastapi import APIRouter, Depends
+
+router = APIRouter()
+
+
+@router.get("/db-pool", summary="État et activité des pools de connexions SQLAlchemy")
+def read_db_pool_metrics(current_user: User = Depends(get_current_superuser)) -> dict:
+    """Expose checkout wait time, connexions empruntées, overflow et invalidations."""
+
+    return pool_metrics_snapshot()
+
+
+@router.get("/websockets", summary="Files d'envoi des websockets de ce worker")
+def read_websocket_metrics(current_user: User = Depends(get_current_superuser)) -> dict:
+    """Expose connexions, profondeur des files, messages envoyés, perdus et évictions."""
+
+    return fanout_metrics_snapshot()
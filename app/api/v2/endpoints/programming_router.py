@@ -1,13 +1,13 @@
 from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
-import os
-import subprocess
-import tempfile
+from typing import Any
 import textwrap
 
 from app.api.v2.dependencies import get_current_user, get_db
 from app.models.user.user_model import User
+from app.services.code_execution import ExecutionLimits, ExecutionRejected, code_execution_pool
+from app.services.code_grading_service import CodeGradingService
 
 router = APIRouter()
 
@@ -23,6 +23,34 @@ class CodeExecutionResponse(BaseModel):
     stderr: str
     exit_code: int
     timed_out: bool
+    truncated: bool = False
+
+
+class CodeGradeRequest(BaseModel):
+    atom_id: int
+    code: str
+
+
+class CodeTestCaseResult(BaseModel):
+    index: int
+    input: str
+    expected: str
+    stdout: str
+    stderr: str
+    exit_code: int
+    passed: bool
+    timed_out: bool
+    truncated: bool
+    duration_ms: float
+
+
+class CodeGradeResponse(BaseModel):
+    atom_id: int
+    passed: int
+    total: int
+    is_correct: bool
+    cases: list[CodeTestCaseResult]
+    progress: dict[str, Any]
 
 
 @router.post("/execute", response_model=CodeExecutionResponse, summary="Exécuter un snippet de code")
@@ -36,34 +64,32 @@ def execute_code(
         raise HTTPException(status_code=400, detail="Seul Python est supporté pour le moment.")
 
     code = textwrap.dedent(payload.code)
-    stdin_data = payload.stdin or ""
-
-    with tempfile.NamedTemporaryFile(mode="w", suffix=".py", delete=False) as tmp:
-        tmp.write(code)
-        tmp_path = tmp.name
-
+    limits = ExecutionLimits.from_settings()
     try:
-        result = subprocess.run(
-            ["python3", tmp_path],
-            input=stdin_data.encode(),
-            capture_output=True,
-            timeout=5,
-        )
-        return CodeExecutionResponse(
-            stdout=result.stdout.decode(),
-            stderr=result.stderr.decode(),
-            exit_code=result.returncode,
-            timed_out=False,
+        result = code_execution_pool.run(
+            code, stdin=payload.stdin or "", user_id=current_user.id, limits=limits
         )
-    except subprocess.TimeoutExpired as exc:
-        return CodeExecutionResponse(
-            stdout=exc.stdout.decode() if exc.stdout else "",
-            stderr="Temps d'exécution dépassé (5s).",
-            exit_code=-1,
-            timed_out=True,
-        )
-    finally:
-        try:
-            os.unlink(tmp_path)
-        except OSError:
-            pass
+    except ExecutionRejected as exc:
+        raise HTTPException(status_code=exc.status_code, detail=exc.detail) from exc
+
+    stderr = result.stderr
+    if result.timed_out:
+        stderr = (stderr + "\n" if stderr else "") + f"Temps d'exécution dépassé ({limits.timeout_seconds:g}s)."
+    return CodeExecutionResponse(
+        stdout=result.stdout,
+        stderr=stderr,
+        exit_code=-1 if result.timed_out else result.exit_code,
+        timed_out=result.timed_out,
+        truncated=result.truncated,
+    )
+
+
+@router.post("/grade", response_model=CodeGradeResponse, summary="Corriger un challenge de code sur ses cas de test")
+def grade_code(
+    payload: CodeGradeRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Exécute la soumission sur chaque cas de test de l'atome et enregistre la réponse (progression, XP, SRS)."""
+    service = CodeGradingService(db=db, user=current_user)
+    return service.grade(payload.atom_id, textwrap.dedent(payload.code))
@@ -1,5 +1,5 @@
 """Endpoints de progression alignés sur l'architecture Capsule."""
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
 
 from app.api.v2.dependencies import get_db, get_current_user
@@ -7,14 +7,16 @@ from app.models.capsule.atom_model import Atom
 from datetime import datetime
 
 from app.models.capsule.utility_models import UserCapsuleProgress
-from app.models.progress.user_answer_log_model import UserAnswerLog
 from app.schemas.progress.progress_schema import (
     ActivityEndRequest,
     ActivityStartRequest,
+    AnswerBatchCreate,
     AnswerLogCreate,
     CapsuleProgressResponse,
     UserStatsResponse,
 )
+from app.services.answer_recording_service import AnswerRecordingService
+from app.services.coach_context_service import CoachContextService
 from app.services.progress_service import ProgressService
 from app.models.user.user_model import User
 from app.models.progress.user_atomic_progress import UserAtomProgress
@@ -58,6 +60,23 @@ def get_user_stats(
     return service.get_user_stats()
 
 
+@router.get("/reviews/due", summary="File paginée des révisions SRS à faire")
+def get_due_reviews(
+    limit: int = Query(20, ge=1, le=100),
+    cursor: str | None = None,
+    capsule_id: int | None = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+) -> dict:
+    """Retourne les molécules à réviser (échues ou en retard), la plus ancienne d'abord.
+
+    ``next_cursor`` permet de récupérer la page suivante.
+    """
+    return SRSService(db=db, user=current_user).due_queue(
+        limit=limit, cursor=cursor, capsule_id=capsule_id
+    )
+
+
 @router.post(
     "/atom/{atom_id}/complete",
     status_code=status.HTTP_200_OK,
@@ -131,59 +150,27 @@ def log_user_answer(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ) -> dict:
-    """Stocke la réponse brute de l'utilisateur pour diagnostic ou analytics."""
-    atom = db.get(Atom, payload.atom_id)
-    if not atom:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Atome introuvable")
+    """Stocke la réponse brute de l'utilisateur et met à jour progression, XP et SRS."""
+    service = AnswerRecordingService(db=db, user=current_user)
+    return service.record_answer(payload.atom_id, payload.is_correct, payload.user_answer)
 
-    answer_log = UserAnswerLog(
-        user_id=current_user.id,
-        atom_id=payload.atom_id,
-        is_correct=payload.is_correct,
-        user_answer_json=payload.user_answer,
-    )
-    db.add(answer_log)
-    db.flush()
-
-    srs_service = SRSService(db=db, user=current_user)
-    progress_entry = (
-        db.query(UserAtomProgress)
-        .filter_by(user_id=current_user.id, atom_id=payload.atom_id)
-        .first()
-    )
-    if not progress_entry:
-        progress_entry = UserAtomProgress(user_id=current_user.id, atom_id=payload.atom_id)
-        db.add(progress_entry)
-        db.flush([progress_entry])
 
-    progress_entry.attempts = (progress_entry.attempts or 0) + 1
-    progress_entry.last_attempt_at = datetime.utcnow()
-
-    capsule_service = CapsuleService(db=db, user=current_user)
-
-    if payload.is_correct:
-        progress_entry.success_count = (progress_entry.success_count or 0) + 1
-        progress_entry.status = 'completed'
-        if not progress_entry.completed_at:
-            progress_entry.completed_at = datetime.utcnow()
-        ProgressService(db=db, user_id=current_user.id).record_atom_completion(payload.atom_id)
-        srs_service.register_answer(atom, True)
-    else:
-        progress_entry.failure_count = (progress_entry.failure_count or 0) + 1
-        progress_entry.status = 'failed'
-        progress_entry.completed_at = None
-        srs_service.register_answer(atom, False)
-
-    db.commit()
-    db.refresh(progress_entry)
-
-    snapshot = capsule_service.completion_snapshot(atom.molecule)
+@router.post(
+    "/log-answers",
+    status_code=status.HTTP_201_CREATED,
+    summary="Enregistrer un lot de réponses en une seule transaction",
+)
+def log_user_answers(
+    payload: AnswerBatchCreate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+) -> dict:
+    """Applique les réponses dans l'ordre (quiz rapides, synchronisation hors-ligne).
 
-    return {
-        "status": progress_entry.status,
-        "is_correct": payload.is_correct,
-        **snapshot,
-    }
+    Retourne le statut de chaque réponse et l'instantané final par molécule.
+    """
+    service = AnswerRecordingService(db=db, user=current_user)
+    return service.record_answers(payload.answers)
 
 
 @router.post("/atom/{atom_id}/reset", summary="Réinitialiser la progression d'un atome")
@@ -213,6 +200,7 @@ def reset_atom_progress(
     srs_service = SRSService(db=db, user=current_user)
     srs_service.register_reset(atom.molecule)
     db.commit()
+    CoachContextService.invalidate_user_cache(current_user.id)
 
     capsule_service = CapsuleService(db=db, user=current_user)
     snapshot = capsule_service.completion_snapshot(atom.molecule)
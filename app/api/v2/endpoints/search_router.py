@@ -0,0 +1,25 @@
+# Fichier: backend/app/api/v2/endpoints/search_router.py
+
+from typing import List
+
+from app.api.v2.dependencies import get_current_user, get_db
+from app.models.user.user_model import User
+from app.search import SearchPage, search
+from app.search.service import DEFAULT_PAGE_SIZE, MAX_OFFSET, MAX_PAGE_SIZE
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+
+router = APIRouter()
+
+
+@router.get("", response_model=SearchPage, summary="Rechercher dans les capsules, leçons et notes")
+def search_content(
+    q: str = Query(..., min_length=1, max_length=200, description="Texte recherché"),
+    types: List[str] | None = Query(default=None, description="capsule | molecule | lesson | note"),
+    limit: int = Query(default=DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    offset: int = Query(default=0, ge=0, le=MAX_OFFSET),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+) -> SearchPage:
+    """Résultats classés: catalogue public, capsules de l'utilisateur et ses propres notes."""
+    return search(db, current_user, q, doc_types=types, limit=limit, offset=offset)
@@ -1,7 +1,6 @@
 import logging
 from typing import Any, Dict, Optional
 
-import stripe
 from fastapi import APIRouter, Depends, Request, HTTPException
 from sqlalchemy.orm import Session
 
@@ -12,7 +11,6 @@ from app.models.user.badge_model import Badge
 from app.crud import user_crud, badge_crud
 
 router = APIRouter()
-stripe.api_key = settings.STRIPE_SECRET_KEY
 
 logger = logging.getLogger(__name__)
 
@@ -111,12 +109,22 @@ def _set_subscription_to_canceled(db: Session, user: Optional[User]) -> None:
 
 # --- Helpers Stripe -------------------------------------------------------
 
+def _stripe():
+    """SDK Stripe, importé au premier appel: son import (~1 s) n'a pas à peser sur le démarrage."""
+
+    import stripe
+
+    stripe.api_key = settings.STRIPE_SECRET_KEY
+    return stripe
+
+
 def _cancel_active_subscriptions_for_customer(customer_id: Optional[str]) -> list[str]:
     """Annule toutes les souscriptions Stripe actives pour un client donné."""
 
     if not customer_id:
         return []
 
+    stripe = _stripe()
     canceled_ids: list[str] = []
     subscriptions = stripe.Subscription.list(customer=customer_id, status="all", limit=100)
 
@@ -229,6 +237,7 @@ async def cancel_subscription(
         _set_subscription_to_canceled(db, current_user)
         return {"status": "already_canceled", "canceled_subscriptions": []}
 
+    stripe = _stripe()
     try:
         canceled_ids = _cancel_active_subscriptions_for_customer(current_user.stripe_customer_id)
     except stripe.error.StripeError as exc:
@@ -253,7 +262,8 @@ async def create_checkout_session(
     db: Session = Depends(get_db)
 ):
     """Crée une session de paiement Stripe pour l'utilisateur actuel."""
-    
+    stripe = _stripe()
+
     # Crée un client Stripe pour l'utilisateur s'il n'en a pas déjà un
     if not current_user.stripe_customer_id:
         customer = stripe.Customer.create(email=current_user.email, name=current_user.username)
@@ -288,7 +298,8 @@ async def stripe_webhook(request: Request, db: Session = Depends(get_db)):
     """Écoute les événements de Stripe pour mettre à jour la BDD."""
     payload = await request.body()
     sig_header = request.headers.get('stripe-signature')
-    
+    stripe = _stripe()
+
     try:
         event = stripe.Webhook.construct_event(
             payload, sig_header, settings.STRIPE_WEBHOOK_SECRET
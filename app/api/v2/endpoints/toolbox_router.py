@@ -1,5 +1,7 @@
 # Fichier: backend/app/api/v2/endpoints/toolbox_router.py (NOUVEAU)
 from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
 from sqlalchemy.orm import Session
 from app.api.v2.dependencies import get_db, get_current_user
 from app.models.user.user_model import User
@@ -53,6 +55,43 @@ def handle_coach_request(
         ) from exc
 
 
+@router.post("/coach/stream")
+def stream_coach_request(
+    request: CoachRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Réponse du coach diffusée en Server-Sent Events (meta, token…, done | error).
+
+    L'énergie est réservée avant l'ouverture du flux (429 si épuisée) et
+    rendue si la génération échoue.
+    """
+    try:
+        turn = toolbox_crud.prepare_coach_turn(
+            db=db,
+            user=current_user,
+            message=request.message,
+            context=request.context,
+            history=request.history,
+            quick_action=request.quick_action,
+            selection=request.selection,
+            streaming=True,
+        )
+    except coach_energy_crud.CoachEnergyDepleted as exc:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail={"code": "coach_energy_depleted", "energy": exc.status},
+        ) from exc
+
+    return StreamingResponse(
+        toolbox_crud.stream_coach_reply(turn),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        # résumé du fil (appel LLM éventuel) après l'événement "done"
+        background=BackgroundTask(toolbox_crud.refresh_coach_memory, turn),
+    )
+
+
 @router.get("/coach/energy")
 def get_coach_energy(
     db: Session = Depends(get_db),
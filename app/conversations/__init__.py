@@ -3,6 +3,7 @@
 from .manager import conversation_ws_manager, ConversationWebSocketManager
 from .schemas import (
     ChannelDescriptor,
+    ChatHistoryPage,
     ConversationMessage,
     ConversationScope,
     MessageOptions,
@@ -13,6 +14,7 @@ __all__ = [
     "conversation_ws_manager",
     "ConversationWebSocketManager",
     "ChannelDescriptor",
+    "ChatHistoryPage",
     "ConversationMessage",
     "ConversationScope",
     "MessageOptions",
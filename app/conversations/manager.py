@@ -1,18 +1,34 @@
-"""In-memory manager responsible for conversation websocket state."""
+"""Manager responsible for conversation websocket state.
+
+Connections and the recent history live in the worker's memory; messages are
+published on the realtime backplane and every worker stores and broadcasts
+them, so subscribers connected to other workers receive them too. The worker
+that received a message from its author also appends it to the persistent
+:class:`~app.conversations.store.ConversationStore`, from which the recent
+history is reloaded after a restart.
+
+Each message is encoded once with the compiled ``ConversationMessage``
+serializer; that fragment is what travels on the backplane, what every
+subscriber receives, and the history sent on connection is the join of those
+fragments, cached per channel until the next message.
+"""
 
 from __future__ import annotations
 
 import asyncio
-import json
 import logging
 from collections import deque
-from typing import Deque, List, MutableMapping, MutableSet
+from typing import Deque, Dict, List, MutableMapping, Set, Tuple
 
 from fastapi import WebSocket
-from fastapi.encoders import jsonable_encoder
 from starlette.websockets import WebSocketState
 
+from app.core import serialization
+from app.core.backplane import Backplane, InProcessBackplane, get_backplane
+from app.core.websocket_fanout import ConnectionSender, FanoutMetrics, conversation_fanout_metrics
+
 from .schemas import ChannelDescriptor, ConversationMessage
+from .store import ConversationStore, conversation_store
 
 log = logging.getLogger("conversation_ws")
 
@@ -20,19 +36,42 @@ log = logging.getLogger("conversation_ws")
 class ConversationWebSocketManager:
     """Manage websocket connections and message history for conversations."""
 
-    def __init__(self, history_size: int = 200) -> None:
+    topic = "conversations"
+
+    def __init__(
+        self,
+        history_size: int = 200,
+        backplane: Backplane | None = None,
+        metrics: FanoutMetrics | None = None,
+        max_queue: int | None = None,
+        store: ConversationStore | None = None,
+    ) -> None:
         self._history_size = history_size
-        self._connections: MutableMapping[str, MutableSet[WebSocket]] = {}
-        self._messages: MutableMapping[str, Deque[ConversationMessage]] = {}
+        self._store = store
+        self._connections: MutableMapping[str, Dict[WebSocket, ConnectionSender]] = {}
+        self.metrics = metrics or FanoutMetrics(self.topic)
+        self._max_queue = max_queue
+        # (message, encoded JSON) pairs, newest last
+        self._messages: MutableMapping[str, Deque[Tuple[ConversationMessage, str]]] = {}
+        self._history_cache: Dict[str, str] = {}
+        self._loaded: Set[str] = set()
         self._lock = asyncio.Lock()
+        self.backplane = backplane or InProcessBackplane()
+        self.backplane.subscribe(self.topic, self._on_backplane_message)
 
     async def connect(self, channel: ChannelDescriptor, websocket: WebSocket) -> None:
         """Accept and register a websocket for the given channel."""
 
         await websocket.accept()
         key = channel.key
+        sender = ConnectionSender(
+            websocket,
+            self.metrics,
+            max_queue=self._max_queue,
+            on_close=lambda _sender: self._remove(key, websocket),
+        )
         async with self._lock:
-            self._connections.setdefault(key, set()).add(websocket)
+            self._connections.setdefault(key, {})[websocket] = sender
         log.info("[WS CONVERSATION CONNECT] channel=%s total=%s", key, await self.connection_count(channel))
 
     async def disconnect(self, channel: ChannelDescriptor, websocket: WebSocket) -> None:
@@ -40,12 +79,10 @@ class ConversationWebSocketManager:
 
         key = channel.key
         async with self._lock:
-            connections = self._connections.get(key)
-            if not connections:
-                return
-            connections.discard(websocket)
-            if not connections:
-                self._connections.pop(key, None)
+            sender = self._remove(key, websocket)
+        if sender is None:
+            return
+        sender.close()
         log.info("[WS CONVERSATION DISCONNECT] channel=%s remaining=%s", key, await self.connection_count(channel))
 
     async def connection_count(self, channel: ChannelDescriptor) -> int:
@@ -53,80 +90,130 @@ class ConversationWebSocketManager:
 
         key = channel.key
         async with self._lock:
-            return len(self._connections.get(key, set()))
+            return len(self._connections.get(key, {}))
 
     async def broadcast_message(self, channel: ChannelDescriptor, message: ConversationMessage) -> None:
-        """Store the message in history and broadcast it to every subscriber."""
+        """Persist the message and publish it; every worker stores and broadcasts it."""
 
-        await self._store_message(channel, message)
-        payload = {"type": "message", "payload": message.model_dump(mode="json")}
-        await self._broadcast(channel, payload)
+        if self._store is not None:
+            await self._store.append(channel.key, message)
+        await self.backplane.publish(
+            self.topic, {"channel": channel.key, "message": self._encode_message(message)}
+        )
+
+    async def _on_backplane_message(self, data: dict) -> None:
+        key = data["channel"]
+        fragment = data["message"]
+        message = ConversationMessage.model_validate_json(fragment)
+        await self._store_message(key, message, fragment)
+        await self._broadcast(key, '{"type":"message","payload":' + fragment + "}")
 
     async def send_history(self, channel: ChannelDescriptor, websocket: WebSocket) -> None:
-        """Send the cached history to a single websocket connection."""
+        """Send the recent history (one cached, pre-encoded frame) to a websocket."""
 
-        history = await self.history(channel)
-        payload = {
-            "type": "history",
-            "payload": [message.model_dump(mode="json") for message in history],
-        }
-        await self._send_payload(websocket, payload)
+        text_payload = await self._history_text(channel.key)
+        async with self._lock:
+            sender = self._connections.get(channel.key, {}).get(websocket)
+        if sender is None:
+            await self._send_text(websocket, text_payload)
+            return
+        # Same queue as the broadcasts so the history is not interleaved with them.
+        sender.offer(text_payload)
+        await asyncio.sleep(0)
 
     async def history(self, channel: ChannelDescriptor) -> List[ConversationMessage]:
-        """Return a copy of the cached history for a channel."""
+        """Return a copy of the recent history for a channel."""
 
         key = channel.key
+        await self._ensure_loaded(key)
         async with self._lock:
-            buffer = self._messages.get(key, deque(maxlen=self._history_size))
-            return list(buffer)
+            return [message for message, _ in self._messages.get(key, ())]
 
-    async def _store_message(self, channel: ChannelDescriptor, message: ConversationMessage) -> None:
-        key = channel.key
+    async def _history_text(self, key: str) -> str:
+        await self._ensure_loaded(key)
         async with self._lock:
-            buffer = self._messages.get(key)
-            if buffer is None:
-                buffer = deque(maxlen=self._history_size)
-                self._messages[key] = buffer
-            buffer.append(message)
+            text_payload = self._history_cache.get(key)
+            if text_payload is None:
+                fragments = [fragment for _, fragment in self._messages.get(key, ())]
+                text_payload = '{"type":"history","payload":[' + ",".join(fragments) + "]}"
+                self._history_cache[key] = text_payload
+            return text_payload
 
-    async def _broadcast(self, channel: ChannelDescriptor, payload: dict) -> None:
-        key = channel.key
-        websockets = await self._connections_snapshot(key)
-        if not websockets:
+    async def _ensure_loaded(self, key: str) -> None:
+        """Seed the in-memory history from the store the first time a channel is used."""
+
+        if self._store is None or key in self._loaded:
+            return
+        stored = await self._store.latest(key, self._history_size)
+        async with self._lock:
+            if key in self._loaded:
+                return
+            buffer = self._buffer(key)
+            known = {message.id for message, _ in buffer}
+            merged = [
+                (message, self._encode_message(message))
+                for message in stored
+                if message.id not in known
+            ]
+            merged.extend(buffer)
+            merged.sort(key=lambda item: item[0].created_at)
+            buffer.clear()
+            buffer.extend(merged)
+            self._loaded.add(key)
+            self._history_cache.pop(key, None)
+
+    async def _store_message(self, key: str, message: ConversationMessage, fragment: str) -> None:
+        async with self._lock:
+            self._buffer(key).append((message, fragment))
+            self._history_cache.pop(key, None)
+
+    def _buffer(self, key: str) -> Deque[Tuple[ConversationMessage, str]]:
+        buffer = self._messages.get(key)
+        if buffer is None:
+            buffer = deque(maxlen=self._history_size)
+            self._messages[key] = buffer
+        return buffer
+
+    async def _broadcast(self, key: str, text_payload: str) -> None:
+        senders = await self._senders_snapshot(key)
+        if not senders:
             return
-        text_payload = self._encode_payload(payload)
-        stale: list[WebSocket] = []
-        for websocket in websockets:
-            try:
-                if websocket.application_state != WebSocketState.CONNECTED:
-                    stale.append(websocket)
-                    continue
-                await websocket.send_text(text_payload)
-            except Exception:  # pragma: no cover - defensive
-                log.exception("[WS CONVERSATION SEND ERROR] channel=%s", key)
-                stale.append(websocket)
-        if stale:
-            async with self._lock:
-                connections = self._connections.get(key)
-                if connections:
-                    for websocket in stale:
-                        connections.discard(websocket)
-                    if not connections:
-                        self._connections.pop(key, None)
-
-    async def _connections_snapshot(self, key: str) -> List[WebSocket]:
+        # Enqueued for every subscriber without waiting: the writer tasks send
+        # concurrently and a full queue evicts its consumer.
+        for sender in senders:
+            if sender.websocket.application_state != WebSocketState.CONNECTED:
+                sender.close()
+                self._remove(key, sender.websocket)
+                continue
+            sender.offer(text_payload)
+        # Let the writers start right away.
+        await asyncio.sleep(0)
+
+    def _remove(self, key: str, websocket: WebSocket) -> ConnectionSender | None:
+        # Synchronous so writer tasks can call it when they stop.
+        connections = self._connections.get(key)
+        if not connections:
+            return None
+        sender = connections.pop(websocket, None)
+        if not connections:
+            self._connections.pop(key, None)
+        return sender
+
+    async def _senders_snapshot(self, key: str) -> List[ConnectionSender]:
         async with self._lock:
-            return list(self._connections.get(key, set()))
+            return list(self._connections.get(key, {}).values())
 
-    async def _send_payload(self, websocket: WebSocket, payload: dict) -> None:
-        text_payload = self._encode_payload(payload)
+    async def _send_text(self, websocket: WebSocket, text_payload: str) -> None:
         try:
             await websocket.send_text(text_payload)
         except Exception:  # pragma: no cover - defensive
             log.exception("[WS CONVERSATION SEND ERROR] single websocket")
 
-    def _encode_payload(self, payload: dict) -> str:
-        return json.dumps(jsonable_encoder(payload), ensure_ascii=False, separators=(",", ":"))
+    @staticmethod
+    def _encode_message(message: ConversationMessage) -> str:
+        return serialization.model_encoder(ConversationMessage)(message).decode("utf-8")
 
 
-conversation_ws_manager = ConversationWebSocketManager()
+conversation_ws_manager = ConversationWebSocketManager(
+    backplane=get_backplane(), metrics=conversation_fanout_metrics, store=conversation_store
+)
@@ -107,3 +107,12 @@ class ConversationMessage(BaseModel):
     created_at: datetime
     user: UserPublicInfo
     options: MessageOptions = Field(default_factory=MessageOptions)
+
+
+class ChatHistoryPage(BaseModel):
+    """One page of a channel history, oldest message first."""
+
+    messages: list[ConversationMessage]
+    next_cursor: str | None = Field(
+        default=None, description="Cursor of the next (older) page, null on the last page"
+    )
@@ -0,0 +1,171 @@
+"""Persistent, append-only history of the chat channels.
+
+Messages are buffered by the worker that received them from the client and
+written in batches (one multi-row INSERT per ``flush_interval`` or
+``batch_size`` messages), so a busy channel does not cost one transaction per
+message. History is read newest first with an opaque ``(created_at, id)``
+cursor served by the ``(channel_key, created_at)`` index.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import base64
+import logging
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+from app.db.session import SessionLocal
+from app.models.conversation.chat_message_model import ChatMessage
+from sqlalchemy import and_, insert, or_, select
+from sqlalchemy.orm import Session
+
+from .schemas import ChatHistoryPage, ConversationMessage
+
+log = logging.getLogger("conversation_store")
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+def _as_utc(value: datetime) -> datetime:
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def encode_cursor(created_at: datetime, message_id: str) -> str:
+    raw = f"{_as_utc(created_at).isoformat()}|{message_id}"
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, str]:
+    """Return ``(created_at, id)``; raises ``ValueError`` on a malformed cursor."""
+
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8")
+        created_at, message_id = raw.split("|", 1)
+        return _as_utc(datetime.fromisoformat(created_at)), message_id
+    except (UnicodeError, ValueError, TypeError) as exc:
+        raise ValueError("invalid cursor") from exc
+
+
+def load_page(
+    db: Session,
+    channel_key: str,
+    *,
+    before: str | None = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+) -> ChatHistoryPage:
+    """Return up to ``limit`` messages older than ``before``, oldest first."""
+
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    stmt = select(ChatMessage.id, ChatMessage.payload, ChatMessage.created_at).where(
+        ChatMessage.channel_key == channel_key
+    )
+    if before:
+        created_at, message_id = decode_cursor(before)
+        stmt = stmt.where(
+            or_(
+                ChatMessage.created_at < created_at,
+                and_(ChatMessage.created_at == created_at, ChatMessage.id < message_id),
+            )
+        )
+    rows = db.execute(
+        stmt.order_by(ChatMessage.created_at.desc(), ChatMessage.id.desc()).limit(limit + 1)
+    ).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id)
+    messages = [ConversationMessage.model_validate(row.payload) for row in reversed(rows)]
+    return ChatHistoryPage(messages=messages, next_cursor=next_cursor)
+
+
+class ConversationStore:
+    """Batched writer and reader of :class:`ChatMessage` rows."""
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = SessionLocal,
+        *,
+        batch_size: int = 100,
+        flush_interval: float = 0.05,
+    ) -> None:
+        self._session_factory = session_factory
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval
+        self._pending: List[Dict[str, object]] = []
+        self._flusher: Optional[asyncio.Task] = None
+        self._write_lock = asyncio.Lock()
+
+    async def append(self, channel_key: str, message: ConversationMessage) -> None:
+        """Buffer ``message``; it is written with the next batch."""
+
+        self._pending.append(
+            {
+                "id": message.id,
+                "channel_key": channel_key,
+                "user_id": message.user.id,
+                "content": message.content,
+                "payload": message.model_dump(mode="json"),
+                "created_at": _as_utc(message.created_at),
+            }
+        )
+        if len(self._pending) >= self._batch_size:
+            await self.flush()
+        elif self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.get_running_loop().create_task(self._flush_later())
+
+    async def flush(self) -> None:
+        """Write every buffered message in one INSERT."""
+
+        flusher, self._flusher = self._flusher, None
+        if flusher is not None and flusher is not asyncio.current_task():
+            flusher.cancel()
+        async with self._write_lock:
+            rows, self._pending = self._pending, []
+            if not rows:
+                return
+            try:
+                await asyncio.to_thread(self._write, rows)
+            except Exception:
+                log.exception("[CHAT STORE] écriture de %s messages impossible", len(rows))
+
+    async def latest(self, channel_key: str, limit: int) -> List[ConversationMessage]:
+        """Newest ``limit`` messages of a channel (buffered ones included), oldest first."""
+
+        page = await asyncio.to_thread(self._read_latest, channel_key, limit)
+        known = {message.id for message in page.messages}
+        pending = [
+            ConversationMessage.model_validate(row["payload"])
+            for row in self._pending
+            if row["channel_key"] == channel_key and row["id"] not in known
+        ]
+        return (page.messages + pending)[-limit:]
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self._flush_interval)
+        await self.flush()
+
+    def _write(self, rows: List[Dict[str, object]]) -> None:
+        with self._session_factory() as db:
+            db.execute(insert(ChatMessage), rows)
+            db.commit()
+
+    def _read_latest(self, channel_key: str, limit: int) -> ChatHistoryPage:
+        with self._session_factory() as db:
+            return load_page(db, channel_key, limit=limit)
+
+
+conversation_store = ConversationStore()
+
+
+__all__ = [
+    "ConversationStore",
+    "conversation_store",
+    "decode_cursor",
+    "encode_cursor",
+    "load_page",
+]
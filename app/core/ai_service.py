@@ -1,29 +1,24 @@
 # Fichier: nanshe/backend/app/core/ai_service.py (VERSION REFACTORISÉE)
 
+import functools
 import json
 import logging
-import requests
 from sqlalchemy.orm import Session
 from app.models.user.user_model import User
 
-from app.models.analytics.golden_examples_model import GoldenExample
 from app.models.analytics.ai_token_log_model import AITokenLog
 
-from openai import OpenAI
-
-
-
-from typing import List, Dict, Any, Optional
+from typing import TYPE_CHECKING, List, Dict, Any, Iterator, Optional
 
 from app.core.config import settings
 from app.core import prompt_manager
+from app.core.llm_clients import GEMINI, OLLAMA, llm_clients
 from app.utils.json_utils import safe_json_loads  # <-- util JSON robuste
-from app.core.embeddings import (
-    cosine_similarity,
-    ensure_dimension,
-    get_text_embedding as _compute_text_embedding,
-    normalize_vector,
-)
+from app.services.retrieval import fusion_weights, golden_example_index
+from app.core.embeddings import get_text_embedding as _compute_text_embedding
+
+if TYPE_CHECKING:  # pragma: no cover
+    import tiktoken
 
 logger = logging.getLogger(__name__)
 
@@ -40,14 +35,13 @@ class _SimpleEncoding:
         tokens = (text or "").split()
         return list(range(len(tokens)))
 
-try:  # pragma: no cover - optional dependency for precise token counting
-    import tiktoken  # type: ignore
-except ImportError:  # pragma: no cover - fallback when tiktoken is absent
-    tiktoken = None  # type: ignore
-
-
+@functools.lru_cache(maxsize=1)
 def _load_tiktoken_encoding() -> "tiktoken.Encoding | _SimpleEncoding":
-    if tiktoken is None:
+    # Chargé au premier comptage de jetons et non à l'import: l'encodage coûte
+    # plusieurs centaines de ms (voire un téléchargement) au démarrage à froid.
+    try:  # pragma: no cover - optional dependency for precise token counting
+        import tiktoken  # type: ignore
+    except ImportError:  # pragma: no cover - fallback when tiktoken is absent
         logger.warning(
             "Tiktoken n'est pas installé. Utilisation d'un tokenizeur approximatif pour le comptage des jetons."
         )
@@ -67,35 +61,17 @@ def _load_tiktoken_encoding() -> "tiktoken.Encoding | _SimpleEncoding":
             return _SimpleEncoding()
 
 
-encoding = _load_tiktoken_encoding()
-
 def _call_ai_with_rag_examples(db: Session, user: User, user_prompt: str, system_prompt_template: str, feature_name: str, example_type: str, model_choice: str, prompt_variables: dict) -> Dict[str, Any]:
-    prompt_embedding = normalize_vector(get_text_embedding(user_prompt))
-
-    rag_chunks: list[str] = []
-    if any(prompt_embedding):
-        candidates = (
-            db.query(GoldenExample)
-            .filter(GoldenExample.example_type == example_type)
-            .all()
-        )
-
-        scored: list[tuple[GoldenExample, float]] = []
-        for example in candidates:
-            raw_embedding = example.embedding or []
-            if not raw_embedding:
-                continue
-
-            aligned = normalize_vector(ensure_dimension(raw_embedding, len(prompt_embedding)))
-            similarity = cosine_similarity(prompt_embedding, aligned)
-            if similarity <= 0:
-                continue
-            scored.append((example, similarity))
-
-        top_examples = sorted(scored, key=lambda item: item[1], reverse=True)[:3]
-        for example, _ in top_examples:
-            if isinstance(example.content, str) and example.content.strip():
-                rag_chunks.append(example.content.strip())
+    # BM25 + embeddings fusionnés (RRF) sur l'index en mémoire des golden examples, puis MMR
+    hits = golden_example_index.retriever(db).search(
+        user_prompt,
+        limit=3,
+        filters={"example_type": example_type},
+        query_embedding=get_text_embedding(user_prompt),
+        weights=fusion_weights(),
+        mmr_lambda=settings.RAG_MMR_LAMBDA,
+    )
+    rag_chunks = [hit.document.text.strip() for hit in hits if hit.document.text.strip()]
 
     rag_examples = "\n\n".join(rag_chunks)
     final_system_prompt = prompt_manager.get_prompt(system_prompt_template, rag_examples=rag_examples, ensure_json=True, **prompt_variables)
@@ -166,17 +142,22 @@ def _segment_document(text: str) -> tuple[list[str], list[str]]:
 
     return outline, highlights
 
-def call_ai_and_log(db: Session, user: User, model_choice: str, system_prompt: str, user_prompt: str, feature_name: str) -> Dict[str, Any]:
-    prompt_tokens = len(encoding.encode(system_prompt + user_prompt))
-    response_data = _call_ai_model_json(user_prompt=user_prompt, model_choice=model_choice, system_prompt=system_prompt)
-    response_text = json.dumps(response_data)
+def log_ai_usage(db: Session, *, user_id: int, model_choice: str, prompt_text: str, response_text: str, feature_name: str) -> AITokenLog:
+    """Ajoute l'entrée AITokenLog d'un appel (sans commit)."""
+    encoding = _load_tiktoken_encoding()
+    prompt_tokens = len(encoding.encode(prompt_text))
     completion_tokens = len(encoding.encode(response_text))
     cost = 0.0
     if model_choice in MODEL_PRICING:
         prices = MODEL_PRICING[model_choice]
         cost = ((prompt_tokens / 1_000_000) * prices["input"]) + ((completion_tokens / 1_000_000) * prices["output"])
-    log_entry = AITokenLog(user_id=user.id, feature=feature_name, model_name=model_choice, prompt_tokens=prompt_tokens, completion_tokens=completion_tokens, cost_usd=cost)
+    log_entry = AITokenLog(user_id=user_id, feature=feature_name, model_name=model_choice, prompt_tokens=prompt_tokens, completion_tokens=completion_tokens, cost_usd=cost)
     db.add(log_entry)
+    return log_entry
+
+def call_ai_and_log(db: Session, user: User, model_choice: str, system_prompt: str, user_prompt: str, feature_name: str) -> Dict[str, Any]:
+    response_data = _call_ai_model_json(user_prompt=user_prompt, model_choice=model_choice, system_prompt=system_prompt)
+    log_ai_usage(db, user_id=user.id, model_choice=model_choice, prompt_text=system_prompt + user_prompt, response_text=json.dumps(response_data), feature_name=feature_name)
     db.commit()
     return response_data
 
@@ -189,6 +170,7 @@ def _summarize_text_for_prompt(db: Session, user: User, text_to_summarize: str,
         logger.error(f"Échec de la summarisation avec le prompt {prompt_name}: {e}")
 
 _GEMINI_MODEL = "gemini-1.5-pro-latest"
+_OPENAI_CHAT_MODEL = "gpt-5-mini-2025-08-07"
 _GEMINI_ENDPOINT = (
     f"https://generativelanguage.googleapis.com/v1beta/models/{_GEMINI_MODEL}:generateContent"
 )
@@ -198,13 +180,6 @@ if settings.GOOGLE_API_KEY:
 else:
     logger.warning("⚠️ Clé API Google Gemini absente. Les appels Gemini échoueront.")
 
-try:
-    openai_client = OpenAI(api_key=settings.OPENAI_API_KEY)
-    logger.info("✅ Client OpenAI configuré.")
-except Exception as e:
-    openai_client = None
-    logger.error(f"❌ Erreur de configuration pour OpenAI: {e}")
-
 def _call_gemini(prompt: str, temperature: Optional[float] = None) -> str:
     api_key = settings.GOOGLE_API_KEY
     if not api_key:
@@ -217,8 +192,10 @@ def _call_gemini(prompt: str, temperature: Optional[float] = None) -> str:
     if temperature is not None:
         payload["generationConfig"]["temperature"] = temperature
 
+    import requests  # importé à l'usage: ~150 ms évités au démarrage
+
     try:
-        response = requests.post(
+        response = llm_clients.http(GEMINI).post(
             _GEMINI_ENDPOINT,
             params={"key": api_key},
             json=payload,
@@ -254,25 +231,47 @@ def _inject_json_guard(system_prompt: str, user_prompt: str) -> str:
     return sp
 
 def _call_openai_llm(user_prompt: str, system_prompt: str = "", temperature: Optional[float] = None) -> str:
+    openai_client = llm_clients.openai()
     if not openai_client: raise ConnectionError("Le client OpenAI n'est pas configuré.")
     sp = _inject_json_guard(system_prompt, user_prompt)
     messages = [{"role": "system", "content": sp}, {"role": "user", "content": user_prompt}]
     try:
-        logger.info("Appel à l'API OpenAI avec le modèle gpt-5-mini-2025-08-07")
-        response = openai_client.chat.completions.create(model="gpt-5-mini-2025-08-07", messages=messages, response_format={"type": "json_object"})
+        logger.info(f"Appel à l'API OpenAI avec le modèle {_OPENAI_CHAT_MODEL}")
+        response = openai_client.chat.completions.create(model=_OPENAI_CHAT_MODEL, messages=messages, response_format={"type": "json_object"})
         return response.choices[0].message.content
     except Exception as e:
         logger.error(f"Une erreur API est survenue avec OpenAI : {e}")
         raise
 
+def stream_ai_text(model_choice: str, system_prompt: str, user_prompt: str) -> Iterator[str]:
+    """Génère la réponse texte du modèle au fil de l'eau (deltas de tokens).
+
+    Seul OpenAI diffuse réellement ; les autres fournisseurs renvoient la
+    réponse complète en un seul morceau.
+    """
+    if not model_choice.startswith("openai_"):
+        yield _call_ai_model(user_prompt=user_prompt, model_choice=model_choice, system_prompt=system_prompt)
+        return
+    openai_client = llm_clients.openai()
+    if not openai_client: raise ConnectionError("Le client OpenAI n'est pas configuré.")
+    messages = [{"role": "system", "content": system_prompt}, {"role": "user", "content": user_prompt}]
+    stream = openai_client.chat.completions.create(model=_OPENAI_CHAT_MODEL, messages=messages, stream=True)
+    for chunk in stream:
+        if not chunk.choices:
+            continue
+        delta = chunk.choices[0].delta.content
+        if delta:
+            yield delta
+
 def _call_local_llm(user_prompt: str, system_prompt: str = "", temperature: Optional[float] = None) -> str:
     if not settings.LOCAL_LLM_URL: raise ConnectionError("L'URL du LLM local (Ollama) n'est pas configurée.")
     full_url = f"{settings.LOCAL_LLM_URL.rstrip('/')}/api/chat"
     messages = [{"role": "system", "content": system_prompt}, {"role": "user", "content": user_prompt}]
     payload: Dict[str, Any] = {"model": "llama3:8b", "messages": messages, "format": "json", "stream": False}
     if temperature is not None: payload["options"] = {"temperature": temperature}
+    import requests  # importé à l'usage, comme pour Gemini
     try:
-        response = requests.post(full_url, json=payload, timeout=120)
+        response = llm_clients.http(OLLAMA).post(full_url, json=payload, timeout=120)
         response.raise_for_status()
         content = response.json().get("message", {}).get("content", "")
         if content and content.strip() not in ["{}", "[]"]: return content
@@ -343,13 +342,17 @@ def generate_learning_plan_from_document(
     area: str,
     main_skill: str,
     model_choice: str,
+    outline: Optional[List[str]] = None,
 ) -> dict | None:
+    # ``outline``: titres de sections du document entier (app.services.ingestion);
+    # ``document_text`` est alors un condensé échantillonné sur tout le document.
     excerpt = _truncate_for_prompt(document_text, max_chars=12000)
     if not excerpt:
         return None
 
     logger.info("IA Service: génération d'un plan contextualisé à partir d'un document pour '%s'", title)
-    outline, highlights = _segment_document(excerpt)
+    detected_outline, highlights = _segment_document(excerpt)
+    outline = outline or detected_outline
     outline_block = "\n".join(f"- {item}" for item in outline) if outline else "- Aucun heading extrait"
     highlight_block = "\n\n".join(
         f"[Extrait {idx+1}] {p[:320]}" for idx, p in enumerate(highlights)
@@ -0,0 +1,331 @@
+"""Publish/subscribe backplane shared by the websocket managers.
+
+Websocket connections live in the memory of the worker that accepted them.
+Every realtime event is therefore published on the backplane and each worker
+delivers it to the sockets it holds, so a badge awarded in worker A reaches
+a socket held by worker B.
+
+* :class:`InProcessBackplane` — single worker (default, tests).
+* :class:`PostgresBackplane` — ``LISTEN/NOTIFY`` on the application database.
+* :class:`RedisBackplane` — Redis ``PUBLISH/SUBSCRIBE`` (``redis`` package).
+
+Handlers are registered per topic with :meth:`Backplane.subscribe` and receive
+the JSON-compatible ``data`` dict given to :meth:`Backplane.publish`. Remote
+backplanes wrap it in one envelope per message and multiplex every topic on a
+single broker channel. When the broker connection drops they log it and
+reconnect in the background with exponential backoff.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import inspect
+import json
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+from app.core.config import settings
+
+log = logging.getLogger("backplane")
+
+Handler = Callable[[Dict[str, Any]], Awaitable[None]]
+
+DEFAULT_CHANNEL = "nanshe_realtime"
+# PostgreSQL rejects NOTIFY payloads of 8000 bytes or more.
+PG_NOTIFY_MAX_BYTES = 7999
+
+
+class Backplane:
+    """Base class: local handler registry and dispatch."""
+
+    # Reconnexion des backplanes distants: délai initial, doublé à chaque échec
+    reconnect_delay = 0.5
+    reconnect_max_delay = 30.0
+
+    def __init__(self) -> None:
+        self._handlers: Dict[str, List[Handler]] = {}
+
+    def subscribe(self, topic: str, handler: Handler) -> None:
+        self._handlers.setdefault(topic, []).append(handler)
+
+    def unsubscribe(self, topic: str, handler: Handler) -> None:
+        handlers = self._handlers.get(topic)
+        if handlers and handler in handlers:
+            handlers.remove(handler)
+            if not handlers:
+                self._handlers.pop(topic, None)
+
+    async def start(self) -> None:
+        """Open the broker connection (no-op for the in-process backplane)."""
+
+    async def close(self) -> None:
+        """Release the broker connection."""
+
+    async def publish(self, topic: str, data: Dict[str, Any]) -> None:
+        raise NotImplementedError
+
+    async def _dispatch(self, topic: str, data: Dict[str, Any]) -> None:
+        for handler in list(self._handlers.get(topic, ())):
+            try:
+                await handler(data)
+            except Exception:
+                log.exception("[BACKPLANE HANDLER ERROR] topic=%s", topic)
+
+    # ------------------------------------------------------------------
+    # Envelope helpers for remote backplanes
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _encode(topic: str, data: Dict[str, Any]) -> str:
+        return json.dumps({"topic": topic, "data": data}, ensure_ascii=False, separators=(",", ":"))
+
+    async def _dispatch_raw(self, raw: str | bytes) -> None:
+        try:
+            envelope = json.loads(raw)
+            topic, data = envelope["topic"], envelope["data"]
+        except (ValueError, KeyError, TypeError):
+            log.warning("[BACKPLANE] message ignoré (enveloppe invalide): %r", raw[:200])
+            return
+        await self._dispatch(topic, data)
+
+
+class InProcessBackplane(Backplane):
+    """Deliver published messages to the handlers of this process only."""
+
+    async def publish(self, topic: str, data: Dict[str, Any]) -> None:
+        await self._dispatch(topic, data)
+
+
+class PostgresBackplane(Backplane):
+    """Fan out through PostgreSQL ``LISTEN/NOTIFY``.
+
+    One dedicated asyncpg connection per worker listens on ``channel`` and
+    publishes with ``pg_notify``; it must bypass PgBouncer in transaction mode,
+    which does not keep ``LISTEN`` sessions (``REALTIME_BACKPLANE_URL``).
+    Payloads over the NOTIFY limit are delivered to this worker only.
+    Notifications sent while the connection is down are lost.
+    """
+
+    def __init__(self, dsn: str, channel: str = DEFAULT_CHANNEL) -> None:
+        super().__init__()
+        self._dsn = dsn
+        self.channel = channel
+        self._connection = None
+        self._lock = asyncio.Lock()
+        self._reconnector: Optional[asyncio.Task] = None
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def start(self) -> None:
+        if self._connection is not None and not self._connection.is_closed():
+            return
+        connection = await self._open_connection()
+        await connection.add_listener(self.channel, self._on_notify)
+        connection.add_termination_listener(self._on_terminate)
+        self._connection = connection
+        log.info("[BACKPLANE] LISTEN %s", self.channel)
+
+    async def _open_connection(self):
+        import asyncpg
+        from app.db.session import _prepare_asyncpg_connection
+
+        url, connect_args = _prepare_asyncpg_connection(self._dsn)
+        url = url.replace("postgresql+asyncpg://", "postgresql://", 1)
+        return await asyncpg.connect(url, **connect_args)
+
+    async def close(self) -> None:
+        reconnector, self._reconnector = self._reconnector, None
+        if reconnector is not None:
+            reconnector.cancel()
+        connection, self._connection = self._connection, None
+        if connection is not None:
+            await connection.close()
+
+    async def publish(self, topic: str, data: Dict[str, Any]) -> None:
+        payload = self._encode(topic, data)
+        if len(payload.encode("utf-8")) > PG_NOTIFY_MAX_BYTES:
+            log.warning(
+                "[BACKPLANE] payload trop volumineux pour NOTIFY, diffusion locale topic=%s", topic
+            )
+            await self._dispatch(topic, data)
+            return
+        import asyncpg
+
+        async with self._lock:
+            await self.start()
+            try:
+                await self._connection.execute("SELECT pg_notify($1, $2)", self.channel, payload)
+            except (asyncpg.InterfaceError, asyncpg.PostgresConnectionError, OSError):
+                # connexion perdue sans notification de fin: une nouvelle tentative
+                log.warning(
+                    "[BACKPLANE] connexion LISTEN perdue, reconnexion pour publier topic=%s", topic
+                )
+                self._drop_connection()
+                await self.start()
+                await self._connection.execute("SELECT pg_notify($1, $2)", self.channel, payload)
+
+    def _on_notify(self, _connection, _pid, _channel, payload: str) -> None:
+        task = asyncio.get_running_loop().create_task(self._dispatch_raw(payload))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def _on_terminate(self, connection) -> None:
+        if connection is not self._connection:
+            return  # fermeture volontaire ou connexion déjà remplacée
+        log.warning("[BACKPLANE] connexion LISTEN %s interrompue, reconnexion", self.channel)
+        self._connection = None
+        if self._reconnector is None or self._reconnector.done():
+            self._reconnector = asyncio.get_running_loop().create_task(self._reconnect())
+
+    def _drop_connection(self) -> None:
+        connection, self._connection = self._connection, None
+        if connection is not None and not connection.is_closed():
+            connection.terminate()
+
+    async def _reconnect(self) -> None:
+        delay = self.reconnect_delay
+        while True:
+            try:
+                async with self._lock:
+                    await self.start()
+                return
+            except Exception as exc:
+                log.warning(
+                    "[BACKPLANE] reconnexion LISTEN impossible (%s), nouvel essai dans %.1fs",
+                    exc,
+                    delay,
+                )
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self.reconnect_max_delay)
+
+
+class RedisBackplane(Backplane):
+    """Fan out through Redis ``PUBLISH/SUBSCRIBE``.
+
+    ``client`` is any ``redis.asyncio.Redis``-compatible object; by default one
+    is created from ``url`` (and closed by :meth:`close`). The reader task
+    re-subscribes after a connection error.
+    """
+
+    def __init__(
+        self, url: str | None = None, channel: str = DEFAULT_CHANNEL, client: Any = None
+    ) -> None:
+        super().__init__()
+        self._url = url
+        self.channel = channel
+        self._client = client
+        self._owns_client = client is None
+        self._pubsub = None
+        self._reader: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        if self._reader is not None:
+            return
+        if self._client is None:
+            import redis.asyncio as redis
+
+            self._client = redis.from_url(self._url)
+        await self._subscribe()
+        self._reader = asyncio.get_running_loop().create_task(self._read())
+
+    async def _subscribe(self) -> None:
+        pubsub = self._client.pubsub()
+        await pubsub.subscribe(self.channel)
+        self._pubsub = pubsub
+        log.info("[BACKPLANE] SUBSCRIBE %s", self.channel)
+
+    async def close(self) -> None:
+        reader, self._reader = self._reader, None
+        if reader is not None:
+            reader.cancel()
+            try:
+                await reader
+            except asyncio.CancelledError:
+                pass
+        pubsub, self._pubsub = self._pubsub, None
+        if pubsub is not None:
+            try:
+                await pubsub.unsubscribe(self.channel)
+            except Exception:
+                log.debug("[BACKPLANE] désabonnement Redis impossible", exc_info=True)
+            await _close_quietly(pubsub)
+        if self._owns_client and self._client is not None:
+            client, self._client = self._client, None
+            await _close_quietly(client)
+
+    async def publish(self, topic: str, data: Dict[str, Any]) -> None:
+        await self.start()
+        await self._client.publish(self.channel, self._encode(topic, data))
+
+    async def _read(self) -> None:
+        delay = self.reconnect_delay
+        while True:
+            try:
+                if self._pubsub is None:
+                    await self._subscribe()
+                async for message in self._pubsub.listen():
+                    delay = self.reconnect_delay
+                    if message.get("type") == "message":
+                        await self._dispatch_raw(message["data"])
+                raise ConnectionError("flux SUBSCRIBE terminé")
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                log.warning(
+                    "[BACKPLANE] lecture Redis interrompue (%s), réabonnement dans %.1fs",
+                    exc,
+                    delay,
+                )
+                pubsub, self._pubsub = self._pubsub, None
+                if pubsub is not None:
+                    await _close_quietly(pubsub)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self.reconnect_max_delay)
+
+
+async def _close_quietly(resource: Any) -> None:
+    close = getattr(resource, "aclose", None) or getattr(resource, "close", None)
+    if close is None:
+        return
+    try:
+        result = close()
+        if inspect.isawaitable(result):
+            await result
+    except Exception:
+        log.debug("[BACKPLANE] fermeture impossible", exc_info=True)
+
+
+def create_backplane(kind: str | None = None, url: str | None = None) -> Backplane:
+    """Build the backplane selected by ``REALTIME_BACKPLANE``."""
+
+    kind = (kind or settings.REALTIME_BACKPLANE).lower()
+    url = url or settings.REALTIME_BACKPLANE_URL
+    if kind == "memory":
+        return InProcessBackplane()
+    if kind == "postgres":
+        return PostgresBackplane(url or str(settings.DATABASE_URL))
+    if kind == "redis":
+        if not url:
+            raise ValueError("REALTIME_BACKPLANE_URL est requis pour le backplane redis")
+        return RedisBackplane(url)
+    raise ValueError(f"Backplane inconnu: {kind}")
+
+
+_backplane: Backplane | None = None
+
+
+def get_backplane() -> Backplane:
+    """Return the process-wide backplane shared by the websocket managers."""
+
+    global _backplane
+    if _backplane is None:
+        _backplane = create_backplane()
+    return _backplane
+
+
+__all__ = [
+    "Backplane",
+    "InProcessBackplane",
+    "PostgresBackplane",
+    "RedisBackplane",
+    "create_backplane",
+    "get_backplane",
+]
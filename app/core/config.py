@@ -48,16 +48,103 @@ class Settings(BaseSettings):
     # La clé secrète pour signer les JWTs.
     SECRET_KEY: str
 
+    # Pool de connexions SQLAlchemy (ignoré pour SQLite)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE_SECONDS: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    # Mode compatible PgBouncer (transaction pooling): NullPool côté SQLAlchemy
+    # et cache des prepared statements asyncpg désactivé.
+    DB_USE_PGBOUNCER: bool = False
+
     # Configuration des embeddings
     USE_REMOTE_EMBEDDINGS: bool = False
     OPENAI_EMBEDDING_MODEL: str = "text-embedding-3-small"
     EMBEDDING_DIMENSION: int = 384
+    # Retrieval RAG hybride: poids du classement vectoriel dans la fusion RRF
+    # (le lexical pèse 1). Par défaut 1.0 avec USE_REMOTE_EMBEDDINGS et 0 sinon:
+    # les embeddings locaux hachés captent la tournure des phrases plutôt que le
+    # sujet et dégradent le rappel (python -m scripts.benchmarks.rag_retrieval).
+    RAG_VECTOR_WEIGHT: Optional[float] = None
+    RAG_MMR_LAMBDA: float = 0.7
+    # Durée de vie des index RAG en mémoire: les écritures de ce worker les
+    # invalident aussitôt, ce délai borne le retard vis-à-vis des autres workers.
+    RAG_INDEX_TTL_SECONDS: float = 300.0
+    # Ingestion des documents sources (PDF): taille cible des passages, reprise
+    # entre passages consécutifs, taille des lots d'embeddings et nombre de
+    # passages injectés dans le prompt de chaque atome.
+    PDF_CHUNK_CHARS: int = 1200
+    PDF_CHUNK_OVERLAP_CHARS: int = 200
+    PDF_EMBED_BATCH_SIZE: int = 64
+    PDF_CHUNKS_PER_ATOM: int = 4
+    # Extraction du texte: au-delà de PDF_PARALLEL_MIN_PAGES pages, le document
+    # est découpé en plages de PDF_PAGES_PER_TASK pages réparties sur un pool de
+    # processus (PDF_EXTRACT_WORKERS, 0 = min(4, nombre de CPU)). Le texte
+    # extrait est mis en cache par empreinte SHA-256 du fichier.
+    PDF_MAX_PAGES: int = 1000
+    PDF_EXTRACT_TIMEOUT_SECONDS: float = 120.0
+    PDF_EXTRACT_WORKERS: int = 0
+    PDF_PAGES_PER_TASK: int = 8
+    PDF_PARALLEL_MIN_PAGES: int = 24
+    PDF_TEXT_CACHE_SIZE: int = 16
+    PDF_TEXT_CACHE_TTL_SECONDS: int = 3600
+    # Jobs de génération asynchrones (POST /capsules/from-pdf): fréquence maximale
+    # des mises à jour de progression, et délai sans nouvelle au-delà duquel un
+    # job non terminé est considéré comme interrompu (redémarrage du worker…).
+    CAPSULE_JOB_PROGRESS_INTERVAL_SECONDS: float = 1.0
+    CAPSULE_JOB_STALE_SECONDS: int = 900
+    # Exécution de code (POST /programming/execute): pool de CODE_EXEC_WORKERS
+    # processus sandboxés préchauffés, file d'attente bornée, exécutions
+    # simultanées par utilisateur, et limites de chaque exécution (durée réelle,
+    # temps CPU, mémoire, taille des fichiers écrits, sortie renvoyée).
+    CODE_EXEC_WORKERS: int = 2
+    CODE_EXEC_QUEUE_SIZE: int = 16
+    CODE_EXEC_QUEUE_TIMEOUT_SECONDS: float = 10.0
+    CODE_EXEC_PER_USER: int = 1
+    CODE_EXEC_TIMEOUT_SECONDS: float = 5.0
+    CODE_EXEC_CPU_SECONDS: int = 5
+    CODE_EXEC_MEMORY_MB: int = 256
+    CODE_EXEC_FILE_BYTES: int = 1_000_000
+    CODE_EXEC_OUTPUT_BYTES: int = 64_000
+    # Compte (nom ou uid) sous lequel s'exécutent les snippets quand le pool
+    # tourne en root. Sans seccomp, Landlock ou ce changement d'utilisateur, le
+    # pool refuse de servir, sauf repli explicite CODE_EXEC_ALLOW_UNCONFINED.
+    CODE_EXEC_SANDBOX_USER: str = "nobody"
+    CODE_EXEC_ALLOW_UNCONFINED: bool = False
+    # Démarre les workers au lancement plutôt qu'à la première exécution
+    # (serveur long; à laisser désactivé en serverless: démarrage à froid).
+    CODE_EXEC_PRESTART: bool = False
+    # Correction des challenges (POST /programming/grade): délai par cas de test
+    # et nombre maximal de cas exécutés; le budget du lot est la somme des délais.
+    CODE_GRADE_CASE_TIMEOUT_SECONDS: float = 2.0
+    CODE_GRADE_MAX_CASES: int = 50
+    # Clients LLM partagés (app.core.llm_clients): connexions HTTP gardées
+    # ouvertes par fournisseur REST (Gemini, Ollama).
+    LLM_HTTP_POOL_SIZE: int = 10
 
     # Coach IA energy configuration
     COACH_ENERGY_MAX: int = 15
     COACH_ENERGY_RECOVERY_MINUTES: int = 24 * 60  # full refill over 24 hours by default
     COACH_ENERGY_MESSAGE_COST: float = 1.0
 
+    # Backplane temps réel entre workers: "memory" | "postgres" | "redis".
+    # L'URL par défaut de "postgres" est DATABASE_URL (hors PgBouncer).
+    REALTIME_BACKPLANE: str = "memory"
+    REALTIME_BACKPLANE_URL: Optional[str] = None
+    # File d'envoi bornée par websocket: au-delà, le client lent est déconnecté.
+    WS_SEND_QUEUE_SIZE: int = 256
+    WS_CLOSE_TIMEOUT_SECONDS: float = 5.0
+    # Outbox des notifications: fréquence de relève, fenêtre de regroupement
+    # des rafales et catégories également envoyées par e-mail (ex: ["mentor"]).
+    NOTIFICATION_DISPATCH_INTERVAL_SECONDS: float = 2.0
+    NOTIFICATION_COALESCE_WINDOW_SECONDS: float = 0.25
+    NOTIFICATION_DISPATCH_BATCH_SIZE: int = 500
+    NOTIFICATION_EMAIL_CATEGORIES: List[str] = []
+    # Lignes livrées conservées ce délai puis supprimées par lots par le dispatcher.
+    NOTIFICATION_OUTBOX_RETENTION_SECONDS: float = 86400.0
+    NOTIFICATION_OUTBOX_PURGE_INTERVAL_SECONDS: float = 300.0
+
     class Config:
         env_file = ".env"
 
@@ -20,11 +20,7 @@ from functools import lru_cache
 from typing import Iterable, Sequence
 
 from app.core.config import settings
-
-try:  # pragma: no cover - imported lazily when available
-    from openai import OpenAI
-except Exception:  # pragma: no cover - keep import optional
-    OpenAI = None  # type: ignore
+from app.core.llm_clients import llm_clients
 
 logger = logging.getLogger(__name__)
 
@@ -33,14 +29,11 @@ _DEFAULT_ZERO_VECTOR: tuple[float, ...] = tuple(0.0 for _ in range(EMBEDDING_DIM
 
 _TOKEN_PATTERN = re.compile(r"[A-Za-zÀ-ÖØ-öø-ÿ0-9']+", re.UNICODE)
 
-_openai_client: OpenAI | None = None
-if settings.OPENAI_API_KEY and settings.USE_REMOTE_EMBEDDINGS and OpenAI is not None:
-    try:  # pragma: no cover - depends on environment
-        _openai_client = OpenAI(api_key=settings.OPENAI_API_KEY)
-        logger.info("✅ Client OpenAI pour les embeddings configuré.")
-    except Exception as exc:  # pragma: no cover - depends on environment
-        logger.warning("Impossible d'initialiser OpenAI pour les embeddings : %s", exc)
-        _openai_client = None
+def _openai_client():
+    """Shared OpenAI client, only when remote embeddings are enabled."""
+    if not (settings.OPENAI_API_KEY and settings.USE_REMOTE_EMBEDDINGS):
+        return None
+    return llm_clients.openai()
 
 
 def _tokenize(text: str) -> list[str]:
@@ -111,10 +104,11 @@ def _hashed_embedding(text: str) -> list[float]:
 
 
 def _call_openai_embedding(text: str) -> list[float]:
-    if not _openai_client:
+    client = _openai_client()
+    if not client:
         return []
     try:  # pragma: no cover - réseau externe
-        response = _openai_client.embeddings.create(
+        response = client.embeddings.create(
             model=settings.OPENAI_EMBEDDING_MODEL,
             input=text,
         )
@@ -154,6 +148,45 @@ def get_text_embedding(text: str, *, allow_remote: bool | None = None) -> list[f
     return list(_cached_embedding(text, bool(use_remote)))
 
 
+def _call_openai_embeddings(texts: Sequence[str]) -> list[list[float]]:
+    client = _openai_client()
+    if not client:
+        return []
+    try:  # pragma: no cover - réseau externe
+        response = client.embeddings.create(
+            model=settings.OPENAI_EMBEDDING_MODEL,
+            input=list(texts),
+        )
+        data = sorted(response.data, key=lambda item: item.index)
+        if len(data) != len(texts):
+            return []
+        return [_normalize(_project_dimension(item.embedding, EMBEDDING_DIMENSION)) for item in data]
+    except Exception as exc:  # pragma: no cover - dépend de l'API
+        logger.warning("Fallback hashing embeddings (OpenAI error: %s)", exc)
+        return []
+
+
+def get_text_embeddings(
+    texts: Sequence[str], *, allow_remote: bool | None = None, batch_size: int = 128
+) -> list[list[float]]:
+    """Embed many texts: one API request per ``batch_size`` texts when remote.
+
+    Unlike :func:`get_text_embedding` the results are not memoised, so that
+    ingesting a large document does not evict the cache of short queries.
+    """
+
+    use_remote = settings.USE_REMOTE_EMBEDDINGS if allow_remote is None else allow_remote
+    vectors: list[list[float]] = []
+    for start in range(0, len(texts), batch_size):
+        batch = [(text or "").strip() for text in texts[start : start + batch_size]]
+        remote = _call_openai_embeddings([text or " " for text in batch]) if use_remote else []
+        if remote:
+            vectors.extend(vector if text else list(_DEFAULT_ZERO_VECTOR) for text, vector in zip(batch, remote))
+        else:
+            vectors.extend(_hashed_embedding(text) if text else list(_DEFAULT_ZERO_VECTOR) for text in batch)
+    return vectors
+
+
 def cosine_similarity(vec_a: Sequence[float], vec_b: Sequence[float]) -> float:
     if not vec_a or not vec_b:
         return 0.0
@@ -191,5 +224,6 @@ __all__ = [
     "cosine_similarity",
     "ensure_dimension",
     "get_text_embedding",
+    "get_text_embeddings",
     "normalize_vector",
 ]
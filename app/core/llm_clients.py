@@ -0,0 +1,142 @@
+"""Process-wide registry of LLM provider clients.
+
+Clients are built on first use, one per provider and configuration, and then
+shared: the OpenAI SDK client keeps its HTTPX connection pool, and the REST
+providers (Gemini, the local Ollama server) share a pooled ``requests``
+session, so calls reuse open TLS connections instead of creating a client per
+builder or request. Nothing is imported or constructed when a module merely
+imports the registry.
+
+A provider that cannot be configured (no API key, SDK missing) yields
+``None``, as the module-level clients did; the failure is remembered until
+:meth:`LLMClientRegistry.reset`. Tests swap a provider for a local fake with
+:meth:`LLMClientRegistry.override`.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Hashable, Iterator, Optional, Tuple
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+ClientFactory = Callable[..., Any]
+
+OPENAI = "openai"
+GEMINI = "gemini"
+OLLAMA = "ollama"
+
+
+def _build_openai(**config: Any) -> Any:
+    from openai import OpenAI
+
+    config.setdefault("api_key", settings.OPENAI_API_KEY)
+    return OpenAI(**config)
+
+
+def _build_http_session(**config: Any) -> Any:
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_maxsize=config.get("pool_size", settings.LLM_HTTP_POOL_SIZE))
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+class LLMClientRegistry:
+    """Lazily built, shared clients keyed by provider and configuration."""
+
+    def __init__(self) -> None:
+        self._factories: Dict[str, ClientFactory] = {}
+        self._clients: Dict[Tuple[str, Hashable], Any] = {}
+        self._overrides: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def register(self, provider: str, factory: ClientFactory) -> None:
+        """Declare how to build ``provider`` clients (``factory(**config)``)."""
+
+        self._factories[provider] = factory
+
+    def get(self, provider: str, **config: Any) -> Optional[Any]:
+        """Return the shared client of ``provider`` for ``config``, building it on first use."""
+
+        if provider in self._overrides:
+            return self._overrides[provider]
+        key = (provider, tuple(sorted(config.items())))
+        try:
+            return self._clients[key]
+        except KeyError:
+            pass
+        with self._lock:
+            if key not in self._clients:
+                self._clients[key] = self._build(provider, config)
+            return self._clients[key]
+
+    def openai(self, **config: Any) -> Optional[Any]:
+        return self.get(OPENAI, **config)
+
+    def http(self, provider: str) -> Any:
+        """Pooled ``requests`` session of a REST provider (Gemini, Ollama)."""
+
+        return self.get(provider)
+
+    @contextmanager
+    def override(self, provider: str, client: Any) -> Iterator[Any]:
+        """Serve ``client`` for ``provider`` (whatever the configuration) inside the block."""
+
+        missing = object()
+        previous = self._overrides.get(provider, missing)
+        self._overrides[provider] = client
+        try:
+            yield client
+        finally:
+            if previous is missing:
+                self._overrides.pop(provider, None)
+            else:
+                self._overrides[provider] = previous
+
+    def reset(self) -> None:
+        """Close and forget every built client (settings changed, shutdown)."""
+
+        with self._lock:
+            clients, self._clients = self._clients, {}
+        for client in clients.values():
+            close = getattr(client, "close", None)
+            if callable(close):
+                try:
+                    close()
+                except Exception:  # pragma: no cover - fermeture best effort
+                    logger.debug("Fermeture du client LLM impossible", exc_info=True)
+
+    def _build(self, provider: str, config: Dict[str, Any]) -> Optional[Any]:
+        factory = self._factories.get(provider)
+        if factory is None:
+            raise KeyError(f"Fournisseur LLM inconnu: {provider}")
+        try:
+            client = factory(**config)
+        except Exception as exc:
+            logger.error("❌ Client %s indisponible: %s", provider, exc)
+            return None
+        logger.info("✅ Client %s configuré.", provider)
+        return client
+
+
+llm_clients = LLMClientRegistry()
+llm_clients.register(OPENAI, _build_openai)
+llm_clients.register(GEMINI, _build_http_session)
+llm_clients.register(OLLAMA, _build_http_session)
+
+
+__all__ = [
+    "GEMINI",
+    "LLMClientRegistry",
+    "OLLAMA",
+    "OPENAI",
+    "llm_clients",
+]
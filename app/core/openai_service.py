@@ -1,20 +1,11 @@
 import logging
 import json
-from openai import OpenAI
-from app.core.config import settings
+from app.core.llm_clients import llm_clients
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Initialize the OpenAI client
-try:
-    openai_client = OpenAI(api_key=settings.OPENAI_API_KEY)
-    logger.info("✅ Client OpenAI configuré avec succès.")
-except Exception as e:
-    openai_client = None
-    logger.error(f"❌ Erreur lors de la configuration du client OpenAI: {e}")
-
 def generate_json_with_gpt(prompt: str, model: str = "gpt-5-mini-2025-08-07") -> dict | None:
     """
     Génère un plan de cours structuré en JSON en utilisant un modèle OpenAI (GPT).
@@ -26,6 +17,7 @@ def generate_json_with_gpt(prompt: str, model: str = "gpt-5-mini-2025-08-07") ->
     Returns:
         Un dictionnaire Python représentant le plan de cours, ou None en cas d'erreur.
     """
+    openai_client = llm_clients.openai()
     if not openai_client:
         logger.error("Le client OpenAI n'est pas initialisé. Impossible de continuer.")
         return None
@@ -0,0 +1,118 @@
+"""Low-level PDF page text extraction, importable by pool workers.
+
+This module only depends on the PDF library: worker processes of
+:mod:`app.services.ingestion.pdf` import it on start-up, and pulling in the
+application (settings, ORM, LLM clients) there would cost about a second per
+worker. The library itself is imported on the first :func:`open_reader`, so
+importing the application does not pay for it.
+"""
+
+from __future__ import annotations
+
+import functools
+import logging
+import time
+from typing import TYPE_CHECKING, Any, List, Optional, Tuple
+
+if TYPE_CHECKING:  # pragma: no cover
+    from pypdf import PdfReader
+
+logger = logging.getLogger(__name__)
+
+# Côté worker: le dernier document ouvert, réutilisé par les plages suivantes
+_worker_reader: Optional[Tuple[str, "PdfReader"]] = None  # (empreinte, lecteur)
+
+
+class PdfUnavailableError(RuntimeError):
+    """No PDF library is installed."""
+
+
+class InvalidPdfError(ValueError):
+    """The bytes could not be parsed as a PDF."""
+
+
+@functools.lru_cache(maxsize=1)
+def _reader_class() -> Optional[Any]:
+    try:  # pragma: no cover - dépendance facultative en environnement de test
+        from pypdf import PdfReader  # type: ignore
+    except ImportError:  # pragma: no cover
+        try:
+            from PyPDF2 import PdfReader  # type: ignore
+        except ImportError:
+            return None
+    return PdfReader
+
+
+def __getattr__(name: str) -> Any:
+    # ``PdfReader`` reste exposé (``None`` sans bibliothèque PDF), chargé à la demande
+    if name == "PdfReader":
+        return _reader_class()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def open_reader(source) -> "PdfReader":
+    """``PdfReader`` over a path or binary stream; pages are parsed lazily."""
+
+    reader_class = _reader_class()
+    if reader_class is None:
+        raise PdfUnavailableError("pypdf is not installed")
+    try:
+        return reader_class(source)
+    except Exception as exc:
+        raise InvalidPdfError(str(exc)) from exc
+
+
+def page_count(reader: "PdfReader") -> int:
+    try:
+        return len(reader.pages)
+    except Exception as exc:
+        raise InvalidPdfError(str(exc)) from exc
+
+
+def extract_page(reader: "PdfReader", index: int) -> Optional[str]:
+    """Text of page ``index`` (0-based), or ``None`` if it is unreadable or empty."""
+
+    try:
+        text = reader.pages[index].extract_text() or ""
+    except Exception as exc:  # une page corrompue ne doit pas bloquer tout le document
+        logger.warning("[PDF] Page %s illisible: %s", index + 1, exc)
+        return None
+    if not text.strip():
+        logger.debug("[PDF] Page %s sans texte exploitable.", index + 1)
+        return None
+    return text
+
+
+def extract_range(
+    path: str, key: str, start: int, end: int, deadline: float
+) -> Tuple[List[Tuple[int, str]], bool]:
+    """Worker task: ``(number, text)`` of pages ``[start, end)`` of the file at ``path``.
+
+    ``key`` identifies the document (its content hash) so that a worker keeps
+    its reader open across the ranges of one document. The flag is ``False``
+    when ``deadline`` (epoch seconds) passed before the range was done.
+    """
+
+    global _worker_reader
+    if _worker_reader is None or _worker_reader[0] != key:
+        _worker_reader = (key, open_reader(path))
+    reader = _worker_reader[1]
+    pages: List[Tuple[int, str]] = []
+    for index in range(start, end):
+        if time.time() > deadline:
+            return pages, False
+        text = extract_page(reader, index)
+        if text is not None:
+            pages.append((index + 1, text))
+    return pages, True
+
+
+__all__ = [
+    "InvalidPdfError",
+    "PdfReader",
+    "PdfUnavailableError",
+    "extract_page",
+    "extract_range",
+    "open_reader",
+    "page_count",
+]
@@ -0,0 +1,83 @@
+"""Encode realtime events to JSON exactly once.
+
+Outgoing websocket events are encoded to UTF-8 JSON bytes a single time and
+the resulting frame is shared by every recipient. ``orjson`` is used when it
+is installed; the stdlib fallback produces the same compact output.
+
+Pydantic schemas get a serializer compiled once per type
+(:func:`model_encoder`), instead of ``model_dump`` + ``jsonable_encoder`` +
+``json.dumps`` on every message.
+"""
+
+from __future__ import annotations
+
+import json
+from datetime import date, datetime, time
+from decimal import Decimal
+from enum import Enum
+from functools import lru_cache
+from typing import Any, Callable
+from uuid import UUID
+
+from pydantic import BaseModel, TypeAdapter
+
+try:  # pragma: no cover - optional dependency, ~5x faster than the stdlib
+    import orjson  # type: ignore
+except ImportError:  # pragma: no cover - fallback when orjson is absent
+    orjson = None  # type: ignore
+
+
+def _default(value: Any) -> Any:
+    """Types the encoders do not know natively (same rules as the former ``jsonable_encoder``)."""
+
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, UUID):
+        return str(value)
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    raise TypeError(f"Type {type(value).__name__} is not JSON serializable")
+
+
+if orjson is not None:
+    _ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+    def dumps(value: Any) -> bytes:
+        """Encode ``value`` to compact UTF-8 JSON bytes."""
+
+        return orjson.dumps(value, default=_default, option=_ORJSON_OPTIONS)
+
+    loads = orjson.loads
+else:
+    _STDLIB_ENCODER = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"), default=_default)
+
+    def dumps(value: Any) -> bytes:
+        """Encode ``value`` to compact UTF-8 JSON bytes."""
+
+        return _STDLIB_ENCODER.encode(value).encode("utf-8")
+
+    loads = json.loads
+
+
+def dumps_text(value: Any) -> str:
+    """Encode ``value`` once for a websocket text frame."""
+
+    return dumps(value).decode("utf-8")
+
+
+@lru_cache(maxsize=None)
+def model_encoder(model_type: type) -> Callable[[Any], bytes]:
+    """Return the compiled JSON serializer of a pydantic schema (built once per type)."""
+
+    return TypeAdapter(model_type).dump_json
+
+
+BACKEND = "orjson" if orjson is not None else "json"
+
+__all__ = ["BACKEND", "dumps", "dumps_text", "loads", "model_encoder"]
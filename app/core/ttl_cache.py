@@ -0,0 +1,89 @@
+"""Small thread-safe in-process cache with per-entry expiry.
+
+Used for short-lived, per-user derived data (retention ratios, coach context…)
+that is cheap to recompute but requested on every call. Entries expire after
+``ttl_seconds`` and the cache keeps at most ``maxsize`` entries, evicting the
+oldest insertion first.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from typing import Any, Callable, Generic, Hashable, TypeVar
+
+V = TypeVar("V")
+
+_MISSING = object()
+_REGISTRY: "weakref.WeakSet[TTLCache]" = weakref.WeakSet()
+
+
+class TTLCache(Generic[V]):
+    """Mapping-like cache whose entries expire after a fixed delay."""
+
+    def __init__(self, ttl_seconds: float, maxsize: int = 4096) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.maxsize = maxsize
+        self._data: "OrderedDict[Hashable, tuple[float, V]]" = OrderedDict()
+        self._lock = threading.Lock()
+        _REGISTRY.add(self)
+
+    def get(self, key: Hashable, default: Any = None) -> V | Any:
+        """Return the cached value for ``key`` or ``default`` when absent/expired."""
+
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return default
+            return value
+
+    def set(self, key: Hashable, value: V) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+            self._data[key] = (time.monotonic() + self.ttl_seconds, value)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def get_or_set(self, key: Hashable, factory: Callable[[], V]) -> V:
+        """Return the cached value or compute, store and return ``factory()``."""
+
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = factory()
+            self.set(key, value)
+        return value
+
+    def invalidate(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def invalidate_where(self, predicate: Callable[[Hashable], bool]) -> None:
+        """Drop every entry whose key matches ``predicate`` (e.g. all keys of a user)."""
+
+        with self._lock:
+            for key in [key for key in self._data if predicate(key)]:
+                del self._data[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
+
+
+def clear_all_caches() -> None:
+    """Empty every live :class:`TTLCache` (test isolation, admin tooling)."""
+
+    for cache in list(_REGISTRY):
+        cache.clear()
+
+
+__all__ = ["TTLCache", "clear_all_caches"]
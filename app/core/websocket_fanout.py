@@ -0,0 +1,186 @@
+"""Back-pressured delivery to websocket connections.
+
+Each connection owns a bounded send queue drained by its own writer task
+(started when the queue fills up from empty, finished once it is drained), so
+a broadcast only enqueues the pre-encoded text for every subscriber and the
+writes then proceed concurrently: one slow client no longer stalls the rest
+of the channel. When a queue overflows the client is not keeping up; it is
+evicted (closed with ``1013 Try Again Later``) instead of buffering without
+bound, and the client reconnects and reloads the history.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import weakref
+from typing import Any, Callable
+
+from app.core.config import settings
+from fastapi import WebSocket
+from starlette import status
+from starlette.websockets import WebSocketState
+
+log = logging.getLogger("ws_fanout")
+
+
+class FanoutMetrics:
+    """Counters describing the send queues of one websocket manager."""
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self._senders: "weakref.WeakSet[ConnectionSender]" = weakref.WeakSet()
+        self.reset()
+
+    def reset(self) -> None:
+        """Reset every counter (mainly useful for tests)."""
+
+        self.enqueued = 0
+        self.sent = 0
+        self.dropped = 0
+        self.evictions = 0
+        self.send_errors = 0
+        self.peak_queue_depth = 0
+
+    def register(self, sender: "ConnectionSender") -> None:
+        self._senders.add(sender)
+
+    def record_enqueue(self, depth: int) -> None:
+        self.enqueued += 1
+        if depth > self.peak_queue_depth:
+            self.peak_queue_depth = depth
+
+    def snapshot(self) -> dict[str, Any]:
+        """Return a JSON-serialisable view of the counters and live queues."""
+
+        depths = [sender.depth for sender in self._senders if not sender.closed]
+        return {
+            "name": self.name,
+            "connections": len(depths),
+            "queued": sum(depths),
+            "max_queue_depth": max(depths, default=0),
+            "peak_queue_depth": self.peak_queue_depth,
+            "enqueued": self.enqueued,
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "evictions": self.evictions,
+            "send_errors": self.send_errors,
+        }
+
+
+class ConnectionSender:
+    """Bounded send queue of one websocket, drained by a writer task."""
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        metrics: FanoutMetrics,
+        *,
+        max_queue: int | None = None,
+        on_close: Callable[["ConnectionSender"], None] | None = None,
+    ) -> None:
+        self.websocket = websocket
+        self.metrics = metrics
+        self.closed = False
+        self._queue: asyncio.Queue[str] = asyncio.Queue(
+            maxsize=max_queue or settings.WS_SEND_QUEUE_SIZE
+        )
+        self._on_close = on_close
+        self._writer: asyncio.Task | None = None
+        metrics.register(self)
+
+    @property
+    def depth(self) -> int:
+        return self._queue.qsize()
+
+    def offer(self, text: str) -> bool:
+        """Enqueue ``text`` without waiting; evict the connection when its queue is full."""
+
+        if self.closed:
+            return False
+        try:
+            self._queue.put_nowait(text)
+        except asyncio.QueueFull:
+            self.metrics.dropped += 1
+            self.evict()
+            return False
+        self.metrics.record_enqueue(self._queue.qsize())
+        if self._writer is None or self._writer.done():
+            self._writer = asyncio.get_running_loop().create_task(self._drain())
+        return True
+
+    def evict(self) -> None:
+        """Drop a slow consumer: stop its writer and close the socket in the background."""
+
+        if self.closed:
+            return
+        self.metrics.evictions += 1
+        log.warning("[WS EVICT] slow consumer, queue=%s", self._queue.qsize())
+        self._stop()
+        asyncio.get_running_loop().create_task(self._close_socket())
+
+    def close(self) -> None:
+        """Stop the writer task; called by the manager when the socket disconnects."""
+
+        if self.closed:
+            return
+        self.closed = True
+        writer = self._writer
+        if writer is not None and not writer.done() and writer is not asyncio.current_task():
+            writer.cancel()
+
+    def _stop(self) -> None:
+        # Termination decided here (eviction, failed send): tell the manager.
+        if self.closed:
+            return
+        self.close()
+        if self._on_close is not None:
+            self._on_close(self)
+
+    async def _drain(self) -> None:
+        try:
+            while not self._queue.empty():
+                text = self._queue.get_nowait()
+                if self.websocket.application_state != WebSocketState.CONNECTED:
+                    self._stop()
+                    return
+                await self.websocket.send_text(text)
+                self.metrics.sent += 1
+            return
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            self.metrics.send_errors += 1
+            log.exception("[WS SEND ERROR]")
+        self._stop()
+
+    async def _close_socket(self) -> None:
+        try:
+            await asyncio.wait_for(
+                self.websocket.close(code=status.WS_1013_TRY_AGAIN_LATER),
+                timeout=settings.WS_CLOSE_TIMEOUT_SECONDS,
+            )
+        except Exception:
+            log.debug("[WS EVICT] close failed", exc_info=True)
+
+
+notification_fanout_metrics = FanoutMetrics("notifications")
+conversation_fanout_metrics = FanoutMetrics("conversations")
+
+
+def fanout_metrics_snapshot() -> dict[str, dict[str, Any]]:
+    """Snapshot of both websocket managers, keyed by manager name."""
+
+    return {
+        "notifications": notification_fanout_metrics.snapshot(),
+        "conversations": conversation_fanout_metrics.snapshot(),
+    }
+
+
+__all__ = [
+    "ConnectionSender",
+    "FanoutMetrics",
+    "conversation_fanout_metrics",
+    "fanout_metrics_snapshot",
+    "notification_fanout_metrics",
+]
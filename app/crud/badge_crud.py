@@ -5,8 +5,8 @@ from sqlalchemy.orm import Session
 
 from app.models.user.badge_model import Badge, UserBadge
 from app.schemas.user.badge_schema import BadgeRead, BadgeWithStatus
-from app.notifications.websocket_manager import notification_ws_manager
-from app.crud import notification_crud
+from app.notifications import outbox
+from app.notifications.outbox import notification_dispatcher
 from app.schemas.user.notification_schema import NotificationCreate
 from app.models.user.notification_model import NotificationCategory
 from app.models.user.user_model import User
@@ -55,30 +55,36 @@ def award_badge(db: Session, user_id: int, badge_slug: str) -> Optional[UserBadg
         user = db.query(User).get(user_id)
         if user and rule.reward_xp:
             user.xp_points = (user.xp_points or 0) + int(rule.reward_xp)
-    db.commit()
-    db.refresh(user_badge)
 
-    # Crée également une notification standard
-    notification_crud.create_notification(
+    # Notification standard + événement temps réel, commités avec le badge:
+    # la livraison (websocket, regroupement des rafales) revient au dispatcher.
+    outbox.add_notifications(
         db,
-        NotificationCreate(
-            user_id=user_id,
-            title=f"Badge obtenu : {badge.name}",
-            message=badge.description,
-            category=NotificationCategory.BADGE,
-            link="/badges",
-        ),
+        [
+            NotificationCreate(
+                user_id=user_id,
+                title=f"Badge obtenu : {badge.name}",
+                message=badge.description,
+                category=NotificationCategory.BADGE,
+                link="/badges",
+            )
+        ],
     )
-
-    payload = {
-        "type": "badge_awarded",
-        "badge": BadgeRead.model_validate(badge).model_dump(),
-        "awarded_at": user_badge.awarded_at.isoformat(),
-        # Métadonnées non critiques pour l'UI (pas stockées en DB)
-        "reward_xp": (rule.reward_xp if rule else 0),
-        "title": (rule.grants_title if rule else None),
-    }
-    notification_ws_manager.notify(user_id, payload)
+    db.refresh(user_badge)
+    outbox.enqueue_event(
+        db,
+        user_id,
+        {
+            "type": "badge_awarded",
+            "badge": BadgeRead.model_validate(badge).model_dump(mode="json"),
+            "awarded_at": user_badge.awarded_at.isoformat(),
+            # Métadonnées non critiques pour l'UI (pas stockées en DB)
+            "reward_xp": (rule.reward_xp if rule else 0),
+            "title": (rule.grants_title if rule else None),
+        },
+    )
+    db.commit()
+    notification_dispatcher.wake()
 
     # Meta-badge: 10 badges débloqués
     try:
@@ -124,6 +124,36 @@ def append_coach_message(
     return append_message(db, thread, role=CoachConversationRole.COACH, content=content, payload=payload)
 
 
+def append_exchange(
+    db: Session,
+    thread: CoachConversationThread,
+    *,
+    user_content: str,
+    coach_content: str,
+    user_payload: dict | None = None,
+    coach_payload: dict | None = None,
+) -> tuple[CoachConversationMessage, CoachConversationMessage]:
+    """Persist a user message and the coach reply in a single transaction."""
+
+    user_message = CoachConversationMessage(
+        thread_id=thread.id,
+        role=CoachConversationRole.USER,
+        content=user_content,
+        payload=user_payload,
+    )
+    coach_message = CoachConversationMessage(
+        thread_id=thread.id,
+        role=CoachConversationRole.COACH,
+        content=coach_content,
+        payload=coach_payload,
+    )
+    thread.updated_at = _now()
+
+    db.add_all([thread, user_message, coach_message])
+    db.commit()
+    return user_message, coach_message
+
+
 def list_threads_for_user(db: Session, user: User) -> list[CoachConversationThread]:
     """Return every conversation thread available to ``user`` sorted by recency."""
 
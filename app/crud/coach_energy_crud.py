@@ -4,11 +4,13 @@ from __future__ import annotations
 
 import math
 from datetime import datetime, timedelta, timezone
-from typing import Any, TypedDict
+from typing import TypedDict
 
+from sqlalchemy import DateTime, func, literal, select
 from sqlalchemy.orm import Session
 
 from app.core.config import settings
+from app.db.upsert import upsert_insert
 from app.models.toolbox.coach_energy_model import CoachEnergyWallet
 from app.models.user.user_model import SubscriptionStatus, User
 
@@ -54,57 +56,24 @@ def _regen_rate_per_second() -> float:
     return settings.COACH_ENERGY_MAX / (refill_minutes * 60)
 
 
-def _ensure_wallet(db: Session, user: User, now: datetime) -> CoachEnergyWallet:
-    wallet = db.query(CoachEnergyWallet).filter_by(user_id=user.id).first()
-    if wallet:
-        return wallet
-
-    wallet = CoachEnergyWallet(user_id=user.id, current_energy=settings.COACH_ENERGY_MAX, updated_at=now)
-    db.add(wallet)
-    db.flush()
-    return wallet
-
-
-def _regenerate(wallet: CoachEnergyWallet, now: datetime) -> None:
-    if wallet.updated_at is None:
-        wallet.updated_at = now
-        wallet.current_energy = max(wallet.current_energy, 0.0)
-        return
-
-    updated_at = _ensure_aware(wallet.updated_at, now)
-    elapsed = max((now - updated_at).total_seconds(), 0.0)
-    if elapsed <= 0:
-        return
-
-    rate = _regen_rate_per_second()
-    if rate <= 0:
-        return
-
-    regenerated = elapsed * rate
-    if regenerated <= 0:
-        return
-
-    wallet.current_energy = min(settings.COACH_ENERGY_MAX, wallet.current_energy + regenerated)
-    wallet.updated_at = now
+def _unlimited_status(cost: float | None = None) -> EnergyStatus:
+    return EnergyStatus(
+        current=float(settings.COACH_ENERGY_MAX),
+        max=float(settings.COACH_ENERGY_MAX),
+        percentage=1.0,
+        is_unlimited=True,
+        message_cost=float(settings.COACH_ENERGY_MESSAGE_COST if cost is None else cost),
+        seconds_until_full=None,
+        seconds_until_next_message=None,
+        next_message_available_at=None,
+    )
 
 
-def _compute_status(wallet: CoachEnergyWallet, now: datetime, is_unlimited: bool) -> EnergyStatus:
+def _compute_status(current_energy: float, now: datetime) -> EnergyStatus:
     max_energy = float(settings.COACH_ENERGY_MAX)
     message_cost = float(settings.COACH_ENERGY_MESSAGE_COST)
 
-    if is_unlimited:
-        return EnergyStatus(
-            current=max_energy,
-            max=max_energy,
-            percentage=1.0,
-            is_unlimited=True,
-            message_cost=message_cost,
-            seconds_until_full=None,
-            seconds_until_next_message=None,
-            next_message_available_at=None,
-        )
-
-    current = float(max(0.0, min(wallet.current_energy, max_energy)))
+    current = float(max(0.0, min(current_energy, max_energy)))
     rate = _regen_rate_per_second()
 
     missing = max_energy - current
@@ -130,60 +99,132 @@ def _compute_status(wallet: CoachEnergyWallet, now: datetime, is_unlimited: bool
     )
 
 
-def get_energy_status(db: Session, user: User, *, now: datetime | None = None) -> EnergyStatus:
-    """Return the current energy status without consuming it."""
+# ----------------------------------------------------------------------
+# SQL building blocks
+# ----------------------------------------------------------------------
+# PostgreSQL spells the scalar min/max LEAST/GREATEST, SQLite uses the
+# multi-argument forms of MIN/MAX.
+def _least(dialect: str, *values):
+    return func.least(*values) if dialect == "postgresql" else func.min(*values)
 
-    current_time = _now(now)
-    if _is_unlimited(user):
-        return EnergyStatus(
-            current=float(settings.COACH_ENERGY_MAX),
-            max=float(settings.COACH_ENERGY_MAX),
-            percentage=1.0,
-            is_unlimited=True,
-            message_cost=float(settings.COACH_ENERGY_MESSAGE_COST),
-            seconds_until_full=None,
-            seconds_until_next_message=None,
-            next_message_available_at=None,
+
+def _greatest(dialect: str, *values):
+    return func.greatest(*values) if dialect == "postgresql" else func.max(*values)
+
+
+def _elapsed_seconds(dialect: str, now: datetime):
+    """Seconds between the stored ``updated_at`` and ``now``, computed by the database."""
+
+    if dialect == "postgresql":
+        return func.extract("epoch", literal(now, DateTime(timezone=True)) - CoachEnergyWallet.updated_at)
+    # SQLite stores naive UTC timestamps; julianday() returns fractional days.
+    naive_now = now.astimezone(timezone.utc).replace(tzinfo=None)
+    return (
+        func.julianday(literal(naive_now, DateTime())) - func.julianday(CoachEnergyWallet.updated_at)
+    ) * 86400.0
+
+
+def _available_energy(dialect: str, now: datetime):
+    """``LEAST(max, current + rate * elapsed)`` evaluated against the stored row."""
+
+    regenerated = CoachEnergyWallet.current_energy + _regen_rate_per_second() * _greatest(
+        dialect, _elapsed_seconds(dialect, now), 0.0
+    )
+    return _least(dialect, float(settings.COACH_ENERGY_MAX), regenerated)
+
+
+def _regenerated_energy(current_energy: float, updated_at: datetime | None, now: datetime) -> float:
+    """Python twin of :func:`_available_energy` for read-only status checks."""
+
+    if updated_at is None:
+        return float(current_energy)
+    elapsed = max((now - _ensure_aware(updated_at, now)).total_seconds(), 0.0)
+    return min(float(settings.COACH_ENERGY_MAX), current_energy + elapsed * _regen_rate_per_second())
+
+
+def _read_energy(db: Session, user: User, now: datetime) -> float:
+    row = db.execute(
+        select(CoachEnergyWallet.current_energy, CoachEnergyWallet.updated_at).where(
+            CoachEnergyWallet.user_id == user.id
         )
+    ).first()
+    if row is None:
+        return float(settings.COACH_ENERGY_MAX)
+    return _regenerated_energy(row.current_energy, row.updated_at, now)
+
+
+def _delta_statement(db: Session, user_id: int, now: datetime, delta: float, require_available: bool):
+    """``INSERT ... ON CONFLICT DO UPDATE ... RETURNING`` adding ``delta`` to a wallet.
+
+    A missing wallet starts full; an existing one is regenerated from its
+    ``updated_at`` inside the database, so concurrent requests serialize on the
+    row lock instead of overwriting each other. With ``require_available`` the
+    update only applies when the regenerated balance covers ``-delta`` and no
+    row is returned otherwise.
+    """
+
+    dialect = db.get_bind().dialect.name
+    max_energy = float(settings.COACH_ENERGY_MAX)
+    available = _available_energy(dialect, now)
+    stmt = upsert_insert(db, CoachEnergyWallet).values(
+        user_id=user_id,
+        current_energy=min(max_energy, max_energy + delta),
+        updated_at=now,
+    )
+    return stmt.on_conflict_do_update(
+        index_elements=[CoachEnergyWallet.user_id],
+        set_={"current_energy": _least(dialect, max_energy, available + delta), "updated_at": now},
+        where=(available + delta >= 0) if require_available else None,
+    ).returning(CoachEnergyWallet.current_energy)
 
-    wallet = _ensure_wallet(db, user, current_time)
-    _regenerate(wallet, current_time)
-    db.add(wallet)
-    db.flush()
+
+def _apply_delta(db: Session, user: User, now: datetime, delta: float, require_available: bool) -> float | None:
+    """Run :func:`_delta_statement` in one round-trip and return the new energy."""
+
+    stmt = _delta_statement(db, user.id, now, delta, require_available)
+    row = db.execute(stmt).first()
     db.commit()
-    return _compute_status(wallet, current_time, False)
+    return None if row is None else float(row.current_energy)
+
+
+# ----------------------------------------------------------------------
+# Public API
+# ----------------------------------------------------------------------
+def get_energy_status(db: Session, user: User, *, now: datetime | None = None) -> EnergyStatus:
+    """Return the current energy status without consuming it (read-only)."""
+
+    if _is_unlimited(user):
+        return _unlimited_status()
+
+    current_time = _now(now)
+    return _compute_status(_read_energy(db, user, current_time), current_time)
 
 
 def consume_energy(db: Session, user: User, *, cost: float | None = None, now: datetime | None = None) -> EnergyStatus:
     """Consume coach energy for a user and return the updated status."""
 
-    current_time = _now(now)
     if cost is None:
         cost = float(settings.COACH_ENERGY_MESSAGE_COST)
-
     if _is_unlimited(user):
-        return EnergyStatus(
-            current=float(settings.COACH_ENERGY_MAX),
-            max=float(settings.COACH_ENERGY_MAX),
-            percentage=1.0,
-            is_unlimited=True,
-            message_cost=float(cost),
-            seconds_until_full=None,
-            seconds_until_next_message=None,
-            next_message_available_at=None,
-        )
+        return _unlimited_status(cost)
 
-    wallet = _ensure_wallet(db, user, current_time)
-    _regenerate(wallet, current_time)
+    current_time = _now(now)
+    remaining = None
+    if cost <= settings.COACH_ENERGY_MAX:
+        remaining = _apply_delta(db, user, current_time, -cost, require_available=True)
+    if remaining is None:
+        raise CoachEnergyDepleted(_compute_status(_read_energy(db, user, current_time), current_time))
+    return _compute_status(remaining, current_time)
 
-    if wallet.current_energy < cost:
-        status = _compute_status(wallet, current_time, False)
-        raise CoachEnergyDepleted(status)
 
-    wallet.current_energy = max(0.0, wallet.current_energy - cost)
-    wallet.updated_at = current_time
-    db.add(wallet)
-    db.flush()
-    db.commit()
+def refund_energy(db: Session, user: User, *, cost: float | None = None, now: datetime | None = None) -> EnergyStatus:
+    """Give back energy reserved for a message that could not be answered."""
+
+    if cost is None:
+        cost = float(settings.COACH_ENERGY_MESSAGE_COST)
+    if _is_unlimited(user):
+        return _unlimited_status(cost)
 
-    return _compute_status(wallet, current_time, False)
+    current_time = _now(now)
+    remaining = _apply_delta(db, user, current_time, cost, require_available=False)
+    return _compute_status(remaining, current_time)
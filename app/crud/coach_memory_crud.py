@@ -0,0 +1,118 @@
+"""Rolling memory of coach conversation threads.
+
+The coach prompt receives the last ``RECENT_MESSAGES`` messages of a thread
+verbatim plus a summary of everything older. The summary is folded
+incrementally with the ``toolbox.summarize_history`` prompt, and only once at
+least ``SUMMARY_EVERY`` messages have left the verbatim window. The prompt
+therefore holds the summary and at most ``RECENT_MESSAGES + SUMMARY_EVERY - 1``
+messages (each capped at ``MAX_MESSAGE_CHARS``), however long the thread is.
+"""
+
+from __future__ import annotations
+
+import logging
+
+from app.core import ai_service, prompt_manager
+from app.models.toolbox.coach_conversation_model import (
+    CoachConversationMemory,
+    CoachConversationMessage,
+    CoachConversationThread,
+)
+from app.models.user.user_model import User
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+RECENT_MESSAGES = 6
+SUMMARY_EVERY = 8
+MAX_MESSAGE_CHARS = 800
+SUMMARY_PROMPT = "toolbox.summarize_history"
+
+# Messages read per call. Threads that predate the memory table may hold more
+# unsummarized messages than this; only the latest ones are folded.
+_FETCH_LIMIT = RECENT_MESSAGES + 2 * SUMMARY_EVERY
+
+
+def _format_message(message: CoachConversationMessage) -> str:
+    content = message.content or ""
+    if len(content) > MAX_MESSAGE_CHARS:
+        content = content[:MAX_MESSAGE_CHARS].rstrip() + "…"
+    return f"{message.role.value}: {content}"
+
+
+def _load(
+    db: Session, thread: CoachConversationThread
+) -> tuple[CoachConversationMemory | None, list[CoachConversationMessage]]:
+    """Return the thread memory and its unsummarized messages, oldest first."""
+
+    memory = db.get(CoachConversationMemory, thread.id)
+    summarized_until = memory.summarized_until_id if memory else 0
+    messages = (
+        db.query(CoachConversationMessage)
+        .filter(
+            CoachConversationMessage.thread_id == thread.id,
+            CoachConversationMessage.id > summarized_until,
+        )
+        .order_by(CoachConversationMessage.id.desc())
+        .limit(_FETCH_LIMIT)
+        .all()
+    )
+    messages.reverse()
+    return memory, messages
+
+
+def build_prompt_history(db: Session, thread: CoachConversationThread) -> str:
+    """Render the thread memory (summary + recent messages) for the coach prompt."""
+
+    memory, messages = _load(db, thread)
+    lines: list[str] = []
+    if memory and memory.summary:
+        lines.append(f"Résumé des échanges précédents : {memory.summary}")
+    lines.extend(_format_message(message) for message in messages)
+    return "\n".join(lines)
+
+
+def refresh_summary(db: Session, user: User, thread: CoachConversationThread) -> bool:
+    """Fold messages older than the verbatim window into the summary when due.
+
+    Returns ``True`` when the summary was updated. A failing summarizer keeps
+    the previous summary; the messages are folded on a later turn.
+    """
+
+    memory, messages = _load(db, thread)
+    to_fold = messages[:-RECENT_MESSAGES]
+    if len(to_fold) < SUMMARY_EVERY:
+        return False
+
+    parts = []
+    if memory and memory.summary:
+        parts.append(f"Résumé précédent : {memory.summary}")
+    parts.extend(_format_message(message) for message in to_fold)
+    system_prompt = prompt_manager.get_prompt(
+        SUMMARY_PROMPT, text_to_summarize="\n".join(parts), ensure_json=True
+    )
+    try:
+        response = ai_service.call_ai_and_log(
+            db=db,
+            user=user,
+            model_choice="openai_gpt4o_mini",
+            system_prompt=system_prompt,
+            user_prompt="Effectue la tâche de résumé demandée.",
+            feature_name="coach_memory",
+        )
+    except Exception as exc:
+        logger.warning("Résumé de la conversation %s impossible: %s", thread.id, exc)
+        return False
+
+    summary = str(response.get("summary") or "").strip()
+    if not summary:
+        return False
+
+    if memory is None:
+        memory = CoachConversationMemory(thread_id=thread.id, summarized_messages=0)
+        db.add(memory)
+    memory.summary = summary
+    memory.summarized_until_id = to_fold[-1].id
+    memory.summarized_messages = (memory.summarized_messages or 0) + len(to_fold)
+    db.commit()
+    return True
@@ -4,28 +4,24 @@ from sqlalchemy.orm import Session
 from typing import List
 from app.models.user import notification_model
 from app.schemas.user import notification_schema
-from app.notifications.websocket_manager import notification_ws_manager
+from app.notifications import outbox
+from app.notifications.outbox import notification_dispatcher
 
 def create_notification(db: Session, notification: notification_schema.NotificationCreate) -> notification_model.Notification:
-    """Crée une nouvelle notification pour un utilisateur."""
-    db_notification = notification_model.Notification(
-        user_id=notification.user_id,
-        title=notification.title,
-        message=notification.message,
-        category=notification.category,
-        link=notification.link
-    )
-    db.add(db_notification)
+    """Crée une nouvelle notification pour un utilisateur (livrée en temps réel par l'outbox)."""
+    db_notification, = outbox.add_notifications(db, [notification])
     db.commit()
-    db.refresh(db_notification)
-    unread = get_unread_notifications_count(db, notification.user_id)
-    payload = notification_schema.NotificationRead.model_validate(db_notification).model_dump()
-    notification_ws_manager.notify(
-        notification.user_id,
-        {"type": "notification_created", "notification": payload, "unread_count": unread},
-    )
+    notification_dispatcher.wake()
     return db_notification
 
+def create_notifications(db: Session, notifications: List[notification_schema.NotificationCreate]) -> List[notification_model.Notification]:
+    """Crée plusieurs notifications en un seul INSERT et une seule transaction."""
+    db_notifications = outbox.add_notifications(db, notifications)
+    if db_notifications:
+        db.commit()
+        notification_dispatcher.wake()
+    return db_notifications
+
 def get_notifications_by_user(db: Session, user_id: int, skip: int = 0, limit: int = 100) -> List[notification_model.Notification]:
     """Récupère toutes les notifications d'un utilisateur, les plus récentes en premier."""
     return db.query(notification_model.Notification)\
@@ -51,17 +47,15 @@ def mark_as_read(db: Session, notification_id: int, user_id: int) -> notificatio
                         .first()
     if db_notification:
         db_notification.status = notification_model.NotificationStatus.READ
-        db.commit()
-        db.refresh(db_notification)
-        unread = get_unread_notifications_count(db, user_id)
-        notification_ws_manager.notify(
+        # unread_count est recalculé par le dispatcher au moment de la livraison
+        outbox.enqueue_event(
+            db,
             user_id,
-            {
-                "type": "notification_updated",
-                "notification_id": notification_id,
-                "unread_count": unread,
-            },
+            {"type": "notification_updated", "notification_id": notification_id, "unread_count": 0},
         )
+        db.commit()
+        db.refresh(db_notification)
+        notification_dispatcher.wake()
     return db_notification
 
 def mark_all_as_read(db: Session, user_id: int):
@@ -72,12 +66,7 @@ def mark_all_as_read(db: Session, user_id: int):
           notification_model.Notification.status == notification_model.NotificationStatus.UNREAD
       )\
       .update({"status": notification_model.NotificationStatus.READ})
+    outbox.enqueue_event(db, user_id, {"type": "notifications_cleared", "unread_count": 0})
     db.commit()
-    notification_ws_manager.notify(
-        user_id,
-        {
-            "type": "notifications_cleared",
-            "unread_count": 0,
-        },
-    )
+    notification_dispatcher.wake()
     return {"status": "success"}
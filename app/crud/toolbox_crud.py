@@ -3,15 +3,18 @@
 import json
 import logging
 import re
-from sqlalchemy import func
+from dataclasses import dataclass
+from typing import Callable, Iterator
+
 from sqlalchemy.orm import Session
 
 from app.core import ai_service
-from app.crud import coach_conversation_crud, coach_energy_crud
-from app.models.capsule import capsule_model, granule_model, molecule_model, atom_model
-from app.models.progress.user_answer_log_model import UserAnswerLog
+from app.crud import coach_conversation_crud, coach_energy_crud, coach_memory_crud
+from app.db.session import SessionLocal
+from app.models.capsule import capsule_model, molecule_model
+from app.models.toolbox.coach_conversation_model import CoachConversationThread
 from app.models.user.user_model import User
-from app.services.srs_service import SRSService
+from app.services.coach_context_service import CoachContext, CoachContextService
 
 logger = logging.getLogger(__name__)
 
@@ -97,19 +100,47 @@ def _extract_molecule_id(context: dict) -> int | None:
     return None
 
 
-def _format_recent_errors(errors: list[UserAnswerLog]) -> str:
-    if not errors:
-        return "Aucune erreur récente détectée."
+def _parse_order(value) -> int | None:
+    if value is None or value == "":
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        logger.debug("Ordre de granule/molécule illisible dans le contexte: %r", value)
+        return None
 
-    rows = []
-    for log in errors:
-        atom_title = getattr(log.atom, "title", "Exercice")
-        answer = json.dumps(log.user_answer_json, ensure_ascii=False)
-        rows.append(f"- {atom_title} → réponse {answer}")
-    return "\n".join(rows)
 
+_JSON_OUTPUT_INSTRUCTIONS = """
+Réponds exclusivement en JSON avec la structure suivante :
+{
+  "response": "Texte principal (max 4 phrases)",
+  "suggestions": ["Bullet point optionnel", "..."],
+  "next_steps": ["Action concrète à réaliser", "..."]
+}
+""".strip()
 
-def ask_coach(
+_STREAM_OUTPUT_INSTRUCTIONS = (
+    "Réponds directement en texte brut (max 4 phrases), sans JSON ni balises."
+)
+
+COACH_MODEL = "openai_gpt4o_mini"
+COACH_FALLBACK_RESPONSE = "Désolé, je ne parviens pas à répondre pour le moment."
+
+
+@dataclass
+class CoachTurn:
+    """Everything needed to answer a coach message once energy is reserved."""
+
+    user_id: int
+    thread_id: int
+    system_prompt: str
+    user_prompt: str
+    user_message: str
+    user_payload: dict
+    energy: coach_energy_crud.EnergyStatus
+
+
+def prepare_coach_turn(
     db: Session,
     user: User,
     message: str,
@@ -117,11 +148,38 @@ def ask_coach(
     history: list,
     quick_action: str | None = None,
     selection: dict | None = None,
-) -> dict:
-    """Produit une réponse contextualisée par capsule pour le coach IA."""
+    *,
+    streaming: bool = False,
+) -> CoachTurn:
+    """Réserve l'énergie et construit le prompt du coach pour ``message``.
+
+    Lève ``CoachEnergyDepleted`` avant tout appel au LLM si l'énergie manque.
+    L'énergie réservée (déjà commitée) est rendue si la suite échoue.
+    """
 
     energy_status = coach_energy_crud.consume_energy(db, user)
+    try:
+        return _build_coach_turn(
+            db, user, energy_status, message, context, history, quick_action, selection, streaming=streaming
+        )
+    except Exception:
+        db.rollback()
+        coach_energy_crud.refund_energy(db, user, cost=energy_status["message_cost"])
+        raise
+
 
+def _build_coach_turn(
+    db: Session,
+    user: User,
+    energy_status: coach_energy_crud.EnergyStatus,
+    message: str,
+    context: dict,
+    history: list,
+    quick_action: str | None,
+    selection: dict | None,
+    *,
+    streaming: bool,
+) -> CoachTurn:
     capsule_id = _extract_capsule_id(context or {})
     capsule = db.get(capsule_model.Capsule, capsule_id) if capsule_id else None
 
@@ -131,81 +189,49 @@ def ask_coach(
         granule = getattr(molecule, "granule", None)
         capsule = getattr(granule, "capsule", None)
 
-    weak_topics: list[str] = []
-    recent_errors: list[UserAnswerLog] = []
-    focus_description = ""
-    srs_digest = {"reviews": "", "errors": ""}
-
+    coach_context = None
     if capsule:
-        # Identifier les molécules qui posent problème (basé sur les erreurs récentes)
-        weak_topics_query = (
-            db.query(molecule_model.Molecule.title, func.count(UserAnswerLog.id))
-            .join(atom_model.Atom, molecule_model.Molecule.atoms)
-            .join(UserAnswerLog, UserAnswerLog.atom_id == atom_model.Atom.id)
-            .join(granule_model.Granule)
-            .filter(
-                UserAnswerLog.user_id == user.id,
-                granule_model.Granule.capsule_id == capsule.id,
-                UserAnswerLog.is_correct.is_(False),
-            )
-            .group_by(molecule_model.Molecule.title)
-            .order_by(func.count(UserAnswerLog.id).desc())
-            .limit(3)
-            .all()
-        )
-        weak_topics = [f"{title} ({errors} erreurs)" for title, errors in weak_topics_query]
-
-        # Récupérer les exercices récemment échoués
-        recent_errors = (
-            db.query(UserAnswerLog)
-            .join(atom_model.Atom)
-            .join(molecule_model.Molecule)
-            .join(granule_model.Granule)
-            .filter(
-                UserAnswerLog.user_id == user.id,
-                granule_model.Granule.capsule_id == capsule.id,
-                UserAnswerLog.is_correct.is_(False),
-            )
-            .order_by(UserAnswerLog.created_at.desc())
-            .limit(5)
-            .all()
+        coach_context = CoachContextService(db=db, user=user).get_context(
+            capsule.id,
+            granule_order=_parse_order(context.get("granuleOrder") or context.get("levelOrder")),
+            molecule_order=_parse_order(context.get("moleculeOrder") or context.get("chapterIndex")),
         )
 
-        granule_order = context.get("granuleOrder") or context.get("levelOrder")
-        molecule_order = context.get("moleculeOrder") or context.get("chapterIndex")
-        if granule_order and molecule_order:
-            try:
-                granule = (
-                    db.query(granule_model.Granule)
-                    .filter_by(capsule_id=capsule.id, order=int(granule_order))
-                    .first()
-                )
-                focus_molecule = (
-                    db.query(molecule_model.Molecule)
-                    .filter_by(granule_id=granule.id if granule else None, order=int(molecule_order))
-                    .first()
-                )
-                if focus_molecule:
-                    focus_description = f"Travail en cours sur la leçon '{focus_molecule.title}'."
-            except (ValueError, TypeError):
-                logger.debug("Impossible d'interpréter granule/molecule depuis le contexte: %s", context)
-
-        srs_service = SRSService(db=db, user=user)
-        srs_digest = srs_service.coach_digest(capsule_id=capsule.id)
-
     capsule_details = (
         f"Capsule : {capsule.title} — Domaine {capsule.domain} / Aire {capsule.area} — Compétence {capsule.main_skill}."
         if capsule
         else "Capsule non identifiée (mode générique)."
     )
 
-    weak_topics_text = "\n".join(weak_topics) if weak_topics else "Aucun sujet faible identifié pour l'instant."
-    recent_errors_text = _format_recent_errors(recent_errors)
+    if coach_context is None:
+        coach_context = CoachContext(
+            weak_topics="Aucun sujet faible identifié pour l'instant.",
+            recent_errors="Aucune erreur récente détectée.",
+            focus_description="",
+            srs_reviews="",
+            srs_errors="",
+        )
 
-    history_text = "\n".join(
-        f"{msg.get('author', 'user')}: {msg.get('message', '')}"
-        for msg in (history or [])
+    location, location_capsule_id, location_molecule_id = coach_conversation_crud.determine_location(
+        capsule=capsule,
+        molecule=molecule,
     )
+    thread = coach_conversation_crud.get_or_create_thread(
+        db,
+        user,
+        location=location,
+        capsule_id=location_capsule_id,
+        molecule_id=location_molecule_id,
+    )
+
+    # Bounded memory of the thread; the client-side history is only used for
+    # threads that have no stored messages yet.
+    history_text = coach_memory_crud.build_prompt_history(db, thread)
+    if not history_text:
+        history_text = "\n".join(
+            f"{msg.get('author', 'user')}: {msg.get('message', '')}"
+            for msg in (history or [])[-coach_memory_crud.RECENT_MESSAGES:]
+        )
 
     selection_text = ''
     if selection and selection.get('text'):
@@ -219,7 +245,7 @@ def ask_coach(
     system_prompt = f"""
 Tu es un coach IA bienveillant aidant un apprenant sur la capsule suivante :
 {capsule_details}
-{focus_description}
+{coach_context.focus_description}
 {quick_action_text}
 {selection_text}
 
@@ -227,81 +253,174 @@ Contexte sur l'historique de discussion :
 {history_text or 'Aucun historique.'}
 
 Points faibles détectés :
-{weak_topics_text}
+{coach_context.weak_topics}
 
 Erreurs récentes :
-{recent_errors_text}
+{coach_context.recent_errors}
 
 SRS à traiter :
-{srs_digest['reviews']}
+{coach_context.srs_reviews}
 
 Carnet d'erreurs synthétique :
-{srs_digest['errors']}
+{coach_context.srs_errors}
 
 Donne des conseils courts, concrets et motivants.
-Réponds exclusivement en JSON avec la structure suivante :
-{{
-  "response": "Texte principal (max 4 phrases)",
-  "suggestions": ["Bullet point optionnel", "..."],
-  "next_steps": ["Action concrète à réaliser", "..."]
-}}
+{_STREAM_OUTPUT_INSTRUCTIONS if streaming else _JSON_OUTPUT_INSTRUCTIONS}
 """.strip()
 
-    location, location_capsule_id, location_molecule_id = coach_conversation_crud.determine_location(
-        capsule=capsule,
-        molecule=molecule,
-    )
-    thread = coach_conversation_crud.get_or_create_thread(
-        db,
-        user,
-        location=location,
-        capsule_id=location_capsule_id,
-        molecule_id=location_molecule_id,
-    )
-
     user_message_content = message.strip()
     if not user_message_content:
         user_message_content = message
 
-    coach_conversation_crud.append_user_message(
-        db,
-        thread,
-        content=user_message_content,
-        payload={
+    return CoachTurn(
+        user_id=user.id,
+        thread_id=thread.id,
+        system_prompt=system_prompt,
+        user_prompt=message,
+        user_message=user_message_content,
+        user_payload={
             "context": context,
             "quick_action": quick_action,
             "selection": selection,
         },
+        energy=energy_status,
     )
 
+
+def ask_coach(
+    db: Session,
+    user: User,
+    message: str,
+    context: dict,
+    history: list,
+    quick_action: str | None = None,
+    selection: dict | None = None,
+) -> dict:
+    """Produit une réponse contextualisée par capsule pour le coach IA."""
+
+    turn = prepare_coach_turn(db, user, message, context, history, quick_action, selection)
+    thread = db.get(CoachConversationThread, turn.thread_id)
+
     try:
         response_data = ai_service.call_ai_and_log(
             db=db,
             user=user,
-            model_choice="openai_gpt4o_mini",
-            system_prompt=system_prompt,
-            user_prompt=message,
+            model_choice=COACH_MODEL,
+            system_prompt=turn.system_prompt,
+            user_prompt=turn.user_prompt,
             feature_name="coach_ia",
         )
         response_text = response_data.get("response", json.dumps(response_data, ensure_ascii=False))
-        coach_conversation_crud.append_coach_message(
-            db,
-            thread,
-            content=response_text,
-            payload={"raw_response": response_data},
-        )
-        return {"response": response_text, "energy": energy_status, "thread_id": thread.id}
+        coach_payload = {"raw_response": response_data}
     except Exception as exc:
         logger.error("Coach IA indisponible: %s", exc, exc_info=True)
-        fallback = "Désolé, je ne parviens pas à répondre pour le moment."
-        coach_conversation_crud.append_coach_message(
-            db,
-            thread,
-            content=fallback,
-            payload={"error": str(exc)},
+        response_text = COACH_FALLBACK_RESPONSE
+        coach_payload = {"error": str(exc)}
+
+    coach_conversation_crud.append_exchange(
+        db,
+        thread,
+        user_content=turn.user_message,
+        user_payload=turn.user_payload,
+        coach_content=response_text,
+        coach_payload=coach_payload,
+    )
+    if "raw_response" in coach_payload:
+        coach_memory_crud.refresh_summary(db, user, thread)
+    return {"response": response_text, "energy": turn.energy, "thread_id": turn.thread_id}
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
+
+
+def stream_coach_reply(
+    turn: CoachTurn,
+    *,
+    session_factory: Callable[[], Session] = SessionLocal,
+) -> Iterator[str]:
+    """Stream the coach answer as Server-Sent Events.
+
+    Emits ``meta`` (thread and reserved energy), one ``token`` event per
+    delta, then ``done``. Both messages are persisted in one transaction once
+    the answer is complete; the thread summary is refreshed afterwards by
+    :func:`refresh_coach_memory`. If the provider fails (``error`` event) or the
+    client disconnects, nothing is persisted and the reserved energy is
+    refunded. The request session is closed by then, so the generator opens
+    its own sessions.
+    """
+
+    completed = False
+    try:
+        yield _sse("meta", {"thread_id": turn.thread_id, "energy": turn.energy})
+        chunks: list[str] = []
+        try:
+            for delta in ai_service.stream_ai_text(
+                model_choice=COACH_MODEL,
+                system_prompt=turn.system_prompt,
+                user_prompt=turn.user_prompt,
+            ):
+                chunks.append(delta)
+                yield _sse("token", {"delta": delta})
+            response_text = "".join(chunks).strip()
+            if not response_text:
+                raise ValueError("Réponse vide du coach")
+        except Exception as exc:
+            logger.error("Flux du coach IA interrompu: %s", exc, exc_info=True)
+            completed = True
+            energy = _refund_turn(turn, session_factory)
+            yield _sse("error", {"code": "coach_unavailable", "energy": energy})
+            return
+
+        with session_factory() as db:
+            user = db.get(User, turn.user_id)
+            thread = db.get(CoachConversationThread, turn.thread_id)
+            ai_service.log_ai_usage(
+                db,
+                user_id=turn.user_id,
+                model_choice=COACH_MODEL,
+                prompt_text=turn.system_prompt + turn.user_prompt,
+                response_text=response_text,
+                feature_name="coach_ia",
+            )
+            coach_conversation_crud.append_exchange(
+                db,
+                thread,
+                user_content=turn.user_message,
+                user_payload=turn.user_payload,
+                coach_content=response_text,
+                coach_payload={"streamed": True},
+            )
+            completed = True
+        yield _sse(
+            "done",
+            {"response": response_text, "thread_id": turn.thread_id, "energy": turn.energy},
         )
-        return {
-            "response": fallback,
-            "energy": energy_status,
-            "thread_id": thread.id,
-        }
+    finally:
+        if not completed:
+            _refund_turn(turn, session_factory)
+
+
+def refresh_coach_memory(turn: CoachTurn, *, session_factory: Callable[[], Session] = SessionLocal) -> None:
+    """Fold the thread of ``turn`` into its summary when due (may call the LLM).
+
+    Run after the response (``BackgroundTask`` of ``/coach/stream``) so the
+    client never waits for the summarizer once ``done`` is sent.
+    """
+
+    try:
+        with session_factory() as db:
+            user = db.get(User, turn.user_id)
+            thread = db.get(CoachConversationThread, turn.thread_id)
+            if user is not None and thread is not None:
+                coach_memory_crud.refresh_summary(db, user, thread)
+    except Exception:
+        logger.exception("Mise à jour de la mémoire du fil %s impossible", turn.thread_id)
+
+
+def _refund_turn(turn: CoachTurn, session_factory: Callable[[], Session]):
+    if turn.energy["is_unlimited"]:
+        return turn.energy
+    with session_factory() as db:
+        user = db.get(User, turn.user_id)
+        return coach_energy_crud.refund_energy(db, user, cost=turn.energy["message_cost"])
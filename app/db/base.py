@@ -4,14 +4,16 @@ from app.db.base_class import Base
 
 # Utilisateurs et notifications
 from app.models.user.user_model import User
-from app.models.user.notification_model import Notification
+from app.models.user.notification_model import Notification, NotificationOutbox
 from app.models.user.badge_model import Badge, UserBadge
 
 # Capsule & contenu pédagogique
 from app.models.capsule.capsule_model import Capsule
+from app.models.capsule.capsule_job_model import CapsuleJob
 from app.models.capsule.granule_model import Granule
 from app.models.capsule.molecule_model import Molecule
 from app.models.capsule.atom_model import Atom
+from app.models.capsule.document_chunk_model import DocumentChunk
 from app.models.capsule.language_roadmap_model import (
     LanguageRoadmap,
     LanguageRoadmapLevel,
@@ -43,21 +45,27 @@ from app.models.analytics.ai_token_log_model import AITokenLog
 from app.models.toolbox.molecule_note_model import MoleculeNote
 from app.models.toolbox.coach_energy_model import CoachEnergyWallet
 from app.models.toolbox.coach_conversation_model import (
+    CoachConversationMemory,
     CoachConversationMessage,
     CoachConversationThread,
 )
 from app.models.vote.feature_vote_model import FeaturePoll, FeaturePollOption, FeaturePollVote
+from app.models.conversation.chat_message_model import ChatMessage
+from app.models.search.search_document_model import SearchDocument
 
 __all__ = (
     "Base",
     "User",
     "Notification",
+    "NotificationOutbox",
     "Badge",
     "UserBadge",
     "Capsule",
+    "CapsuleJob",
     "Granule",
     "Molecule",
     "Atom",
+    "DocumentChunk",
     "LanguageRoadmap",
     "LanguageRoadmapLevel",
     "Skill",
@@ -83,7 +91,10 @@ __all__ = (
     "CoachEnergyWallet",
     "CoachConversationThread",
     "CoachConversationMessage",
+    "CoachConversationMemory",
     "FeaturePoll",
     "FeaturePollOption",
     "FeaturePollVote",
+    "ChatMessage",
+    "SearchDocument",
 )
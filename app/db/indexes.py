@@ -0,0 +1,31 @@
+# Fichier: backend/app/db/indexes.py
+"""Create indexes declared on the models but missing from existing tables."""
+
+from __future__ import annotations
+
+import logging
+
+from app.db.base_class import Base
+from sqlalchemy import inspect
+from sqlalchemy.engine import Connection
+
+logger = logging.getLogger(__name__)
+
+
+def create_missing_indexes(connection: Connection) -> None:
+    """Create every model index absent from the database.
+
+    ``metadata.create_all`` skips tables that already exist, so an index added
+    to a model afterwards would never reach an existing database. This runs at
+    startup right after ``create_all``.
+    """
+
+    inspector = inspect(connection)
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {index["name"] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name and index.name not in existing:
+                logger.info("Création de l'index manquant %s sur %s", index.name, table.name)
+                index.create(connection)
@@ -0,0 +1,170 @@
+# Fichier: backend/app/db/pool_metrics.py
+"""Instrumentation of the SQLAlchemy connection pools.
+
+The default pool events expose checkouts, checkins and invalidations but not
+the time a request spends *waiting* for a connection.  We therefore build a
+thin subclass of the configured pool class whose ``_do_get`` is timed, and
+register the regular pool event listeners for everything else.  Snapshots are
+exposed through the internal metrics endpoint so the pool can be sized against
+real concurrency.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import Pool
+
+
+class PoolMetrics:
+    """Thread-safe counters describing the activity of one connection pool."""
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self._lock = threading.Lock()
+        self._engine: Engine | None = None
+        self.reset()
+
+    def reset(self) -> None:
+        """Reset every counter (mainly useful for tests)."""
+
+        with self._lock:
+            self.connects = 0
+            self.checkouts = 0
+            self.checkins = 0
+            self.checked_out = 0
+            self.peak_checked_out = 0
+            self.invalidations = 0
+            self.soft_invalidations = 0
+            self.checkout_timeouts = 0
+            self.wait_count = 0
+            self.wait_total_ms = 0.0
+            self.wait_max_ms = 0.0
+            self.wait_last_ms = 0.0
+
+    # ------------------------------------------------------------------
+    # Recording helpers
+    # ------------------------------------------------------------------
+    def record_wait(self, elapsed_s: float, *, timed_out: bool = False) -> None:
+        """Record the time spent waiting for a connection from the pool."""
+
+        elapsed_ms = elapsed_s * 1000.0
+        with self._lock:
+            self.wait_count += 1
+            self.wait_total_ms += elapsed_ms
+            self.wait_last_ms = elapsed_ms
+            if elapsed_ms > self.wait_max_ms:
+                self.wait_max_ms = elapsed_ms
+            if timed_out:
+                self.checkout_timeouts += 1
+
+    def _on_connect(self, *_: Any) -> None:
+        with self._lock:
+            self.connects += 1
+
+    def _on_checkout(self, *_: Any) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.checked_out += 1
+            if self.checked_out > self.peak_checked_out:
+                self.peak_checked_out = self.checked_out
+
+    def _on_checkin(self, *_: Any) -> None:
+        with self._lock:
+            self.checkins += 1
+            if self.checked_out > 0:
+                self.checked_out -= 1
+
+    def _on_invalidate(self, *_: Any) -> None:
+        with self._lock:
+            self.invalidations += 1
+
+    def _on_soft_invalidate(self, *_: Any) -> None:
+        with self._lock:
+            self.soft_invalidations += 1
+
+    # ------------------------------------------------------------------
+    # Wiring
+    # ------------------------------------------------------------------
+    def attach(self, engine: Engine) -> None:
+        """Register the pool event listeners on ``engine``."""
+
+        self._engine = engine
+        event.listen(engine, "connect", self._on_connect)
+        event.listen(engine, "checkout", self._on_checkout)
+        event.listen(engine, "checkin", self._on_checkin)
+        event.listen(engine, "invalidate", self._on_invalidate)
+        event.listen(engine, "soft_invalidate", self._on_soft_invalidate)
+
+    def snapshot(self) -> dict[str, Any]:
+        """Return a JSON-serialisable view of the counters and pool state."""
+
+        pool = self._engine.pool if self._engine is not None else None
+        with self._lock:
+            average_wait = self.wait_total_ms / self.wait_count if self.wait_count else 0.0
+            data: dict[str, Any] = {
+                "name": self.name,
+                "pool_class": type(pool).__name__ if pool is not None else None,
+                "connects": self.connects,
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "checked_out": self.checked_out,
+                "peak_checked_out": self.peak_checked_out,
+                "invalidations": self.invalidations,
+                "soft_invalidations": self.soft_invalidations,
+                "checkout_timeouts": self.checkout_timeouts,
+                "checkout_wait_ms": {
+                    "count": self.wait_count,
+                    "avg": round(average_wait, 3),
+                    "max": round(self.wait_max_ms, 3),
+                    "last": round(self.wait_last_ms, 3),
+                },
+            }
+
+        # QueuePool exposes its live state; NullPool/StaticPool do not.
+        for key, attribute in (
+            ("size", "size"),
+            ("pool_checked_out", "checkedout"),
+            ("overflow", "overflow"),
+            ("idle", "checkedin"),
+        ):
+            method = getattr(pool, attribute, None)
+            data[key] = method() if callable(method) else None
+        return data
+
+
+def timed_pool_class(base: type[Pool], metrics: PoolMetrics) -> type[Pool]:
+    """Return a subclass of ``base`` recording checkout wait times in ``metrics``.
+
+    A subclass (rather than patching the pool instance) survives
+    :meth:`Pool.recreate`, which SQLAlchemy calls on ``engine.dispose()``.
+    """
+
+    def _do_get(self):  # type: ignore[no-untyped-def]
+        started = time.perf_counter()
+        try:
+            connection = base._do_get(self)
+        except exc.TimeoutError:
+            metrics.record_wait(time.perf_counter() - started, timed_out=True)
+            raise
+        metrics.record_wait(time.perf_counter() - started)
+        return connection
+
+    return type(f"Timed{base.__name__}", (base,), {"_do_get": _do_get})
+
+
+sync_pool_metrics = PoolMetrics("sync")
+async_pool_metrics = PoolMetrics("async")
+
+
+def pool_metrics_snapshot() -> dict[str, dict[str, Any]]:
+    """Snapshot of both application pools, keyed by engine name."""
+
+    return {
+        "sync": sync_pool_metrics.snapshot(),
+        "async": async_pool_metrics.snapshot(),
+    }
@@ -7,8 +7,15 @@ from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, Asyn
 from sqlalchemy import create_engine
 from sqlalchemy.engine.url import make_url
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, Pool, QueuePool
 
 from app.core.config import settings
+from app.db.pool_metrics import (
+    PoolMetrics,
+    async_pool_metrics,
+    sync_pool_metrics,
+    timed_pool_class,
+)
 
 
 def _create_ssl_context(
@@ -92,24 +99,83 @@ def _prepare_asyncpg_connection(url: str) -> tuple[str, dict[str, object]]:
     sanitized_url = parsed_url.set(query=query).render_as_string(hide_password=False)
     return sanitized_url, connect_args
 
+def _disable_asyncpg_statement_cache(
+    url: str, connect_args: dict[str, object]
+) -> tuple[str, dict[str, object]]:
+    """Disable prepared statement caches so asyncpg works behind PgBouncer.
+
+    In transaction pooling mode PgBouncer may hand each transaction a different
+    server connection, so named prepared statements cached by asyncpg (driver
+    level) and by SQLAlchemy's asyncpg dialect (``prepared_statement_cache_size``)
+    would point to statements that do not exist on the new backend.
+    """
+
+    try:
+        parsed_url = make_url(url)
+    except Exception:
+        return url, connect_args
+
+    if not parsed_url.drivername.startswith("postgresql+asyncpg"):
+        return url, connect_args
+
+    query = dict(parsed_url.query)
+    query["prepared_statement_cache_size"] = "0"
+    sanitized_url = parsed_url.set(query=query).render_as_string(hide_password=False)
+    return sanitized_url, {**connect_args, "statement_cache_size": 0}
+
+
+def _build_pool_options(url: str, default_pool: type[Pool], metrics: PoolMetrics) -> dict[str, object]:
+    """Translate the ``DB_*`` settings into ``create_engine`` keyword arguments.
+
+    SQLite keeps SQLAlchemy's own pool selection (``:memory:`` databases rely on
+    ``SingletonThreadPool``/``StaticPool`` which reject the sizing options). In
+    PgBouncer mode the pooling is delegated to the bouncer, hence ``NullPool``.
+    """
+
+    if url.startswith("sqlite"):
+        return {}
+
+    if settings.DB_USE_PGBOUNCER:
+        return {
+            "poolclass": timed_pool_class(NullPool, metrics),
+            "pool_pre_ping": False,
+        }
+
+    return {
+        "poolclass": timed_pool_class(default_pool, metrics),
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+
 # --- Moteur Asynchrone (pour SQLAdmin) ---
 # Lit l'URL complète "postgresql+asyncpg://..." de votre .env
 _async_url, _async_connect_args = _prepare_asyncpg_connection(str(settings.DATABASE_URL))
+if settings.DB_USE_PGBOUNCER:
+    _async_url, _async_connect_args = _disable_asyncpg_statement_cache(
+        _async_url, _async_connect_args
+    )
 
 async_engine = create_async_engine(
     _async_url,
     echo=False,
     future=True,
     connect_args=_async_connect_args,
+    **_build_pool_options(_async_url, AsyncAdaptedQueuePool, async_pool_metrics),
 )
+async_pool_metrics.attach(async_engine.sync_engine)
 
 # --- Moteur Synchrone (pour votre API existante) ---
 # On retire "+asyncpg" pour que SQLAlchemy utilise le pilote synchrone par défaut (psycopg2)
 sync_db_url = str(settings.DATABASE_URL).replace("+asyncpg", "")
 sync_engine = create_engine(
     sync_db_url,
-    pool_pre_ping=True
+    **_build_pool_options(sync_db_url, QueuePool, sync_pool_metrics),
 )
+sync_pool_metrics.attach(sync_engine)
 
 # Fabrique de sessions pour votre API (synchrone)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=sync_engine)
@@ -0,0 +1,26 @@
+# Fichier: backend/app/db/upsert.py
+"""Dialect-aware ``INSERT ... ON CONFLICT`` helper.
+
+PostgreSQL (production) and SQLite (tests, local runs) both support
+``ON CONFLICT DO UPDATE`` with the same SQLAlchemy API, but the construct
+lives in each dialect module.
+"""
+
+from __future__ import annotations
+
+from typing import Any
+
+from sqlalchemy.orm import Session
+
+
+def upsert_insert(db: Session, model: Any):
+    """Return an ``insert()`` for ``model`` exposing ``on_conflict_do_update``."""
+
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:  # pragma: no cover - only PostgreSQL and SQLite are deployed
+        raise NotImplementedError(f"ON CONFLICT n'est pas supporté pour le dialecte {dialect}")
+    return insert(model)
@@ -1,14 +1,23 @@
 import logging
 import os
 import re
+import sys
+import threading
 
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.applications import Starlette
 from starlette.middleware.sessions import SessionMiddleware
+from starlette.types import ASGIApp, Receive, Scope, Send
 
 # Imports de l'application
+from app.conversations.store import conversation_store
+from app.core.backplane import get_backplane
 from app.core.config import settings
+from app.core.llm_clients import llm_clients
+from app.notifications.outbox import notification_dispatcher
 from app.db.base_class import Base
+from app.db.indexes import create_missing_indexes
 from app.api.v2.api import api_router
 from sqlalchemy import or_
 
@@ -16,28 +25,6 @@ from app.core.security import verify_password, get_password_hash
 from app.models.user.user_model import User
 from app.db.session import async_engine, SessionLocal
 
-# Imports pour SQLAdmin
-from sqladmin.authentication import AuthenticationBackend
-from app.admin import (
-    AITokenLogAdmin,
-    AtomAdmin,
-    BackOfficeAdmin,
-    BadgeAdmin,
-    CapsuleAdmin,
-    DashboardView,
-    EmailTokenAdmin,
-    FeedbackAdmin,
-    GranuleAdmin,
-    MoleculeAdmin,
-    NotificationAdmin,
-    UserActivityLogAdmin,
-    UserAdmin,
-    UserAnswerLogAdmin,
-    UserBadgeAdmin,
-    UserCapsuleEnrollmentAdmin,
-    UserCapsuleProgressAdmin,
-)
-
 # --- Configuration du logging ---
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -149,50 +136,107 @@ app.add_middleware(CORSMiddleware, **cors_kwargs)
 
 
 # --- Initialisation de l'Admin ---
-class AdminAuth(AuthenticationBackend):
-    async def login(self, request: Request) -> bool:
-        form = await request.form()
-        username = form.get("username")
-        password = form.get("password")
-
-        with SessionLocal() as db:
-            user = db.query(User).filter(User.username == username).first()
-
-        if user and user.is_superuser and verify_password(password, user.hashed_password):
-            request.session.update({"token": "admin_logged_in", "user": user.username})
+def _build_admin() -> ASGIApp:
+    """Back-office SQLAdmin (vues, templates, authentification), construit à la première requête /admin."""
+
+    from sqladmin.authentication import AuthenticationBackend
+
+    from app.admin import (
+        AITokenLogAdmin,
+        AtomAdmin,
+        BackOfficeAdmin,
+        BadgeAdmin,
+        CapsuleAdmin,
+        DashboardView,
+        EmailTokenAdmin,
+        FeedbackAdmin,
+        GranuleAdmin,
+        MoleculeAdmin,
+        NotificationAdmin,
+        UserActivityLogAdmin,
+        UserAdmin,
+        UserAnswerLogAdmin,
+        UserBadgeAdmin,
+        UserCapsuleEnrollmentAdmin,
+        UserCapsuleProgressAdmin,
+    )
+
+    class AdminAuth(AuthenticationBackend):
+        async def login(self, request: Request) -> bool:
+            form = await request.form()
+            username = form.get("username")
+            password = form.get("password")
+
+            with SessionLocal() as db:
+                user = db.query(User).filter(User.username == username).first()
+
+            if user and user.is_superuser and verify_password(password, user.hashed_password):
+                request.session.update({"token": "admin_logged_in", "user": user.username})
+                return True
+            return False
+
+        async def logout(self, request: Request) -> bool:
+            request.session.clear()
             return True
-        return False
-
-    async def logout(self, request: Request) -> bool:
-        request.session.clear()
-        return True
-
-    async def authenticate(self, request: Request) -> bool:
-        return "token" in request.session
 
-authentication_backend = AdminAuth(secret_key=settings.SECRET_KEY)
-admin = BackOfficeAdmin(
-    app,
-    async_engine,
-    authentication_backend=authentication_backend,
-    base_url="/admin",
-)
-admin.add_view(DashboardView)
-admin.add_view(UserAdmin)
-admin.add_view(CapsuleAdmin)
-admin.add_view(GranuleAdmin)
-admin.add_view(MoleculeAdmin)
-admin.add_view(AtomAdmin)
-admin.add_view(UserCapsuleEnrollmentAdmin)
-admin.add_view(UserCapsuleProgressAdmin)
-admin.add_view(UserActivityLogAdmin)
-admin.add_view(UserAnswerLogAdmin)
-admin.add_view(AITokenLogAdmin)
-admin.add_view(FeedbackAdmin)
-admin.add_view(NotificationAdmin)
-admin.add_view(EmailTokenAdmin)
-admin.add_view(BadgeAdmin)
-admin.add_view(UserBadgeAdmin)
+        async def authenticate(self, request: Request) -> bool:
+            return "token" in request.session
+
+    # L'application hôte est factice: c'est _LazyAdmin qui est monté sur /admin
+    admin = BackOfficeAdmin(
+        Starlette(),
+        async_engine,
+        authentication_backend=AdminAuth(secret_key=settings.SECRET_KEY),
+        base_url="/admin",
+    )
+    admin.add_view(DashboardView)
+    admin.add_view(UserAdmin)
+    admin.add_view(CapsuleAdmin)
+    admin.add_view(GranuleAdmin)
+    admin.add_view(MoleculeAdmin)
+    admin.add_view(AtomAdmin)
+    admin.add_view(UserCapsuleEnrollmentAdmin)
+    admin.add_view(UserCapsuleProgressAdmin)
+    admin.add_view(UserActivityLogAdmin)
+    admin.add_view(UserAnswerLogAdmin)
+    admin.add_view(AITokenLogAdmin)
+    admin.add_view(FeedbackAdmin)
+    admin.add_view(NotificationAdmin)
+    admin.add_view(EmailTokenAdmin)
+    admin.add_view(BadgeAdmin)
+    admin.add_view(UserBadgeAdmin)
+    return admin.admin
+
+
+class _LazyAdmin:
+    """Montage /admin qui n'importe SQLAdmin et les vues qu'à la première requête.
+
+    Le back-office (SQLAdmin, Jinja, toutes les ModelView) pèse sur chaque
+    démarrage à froid alors que seule l'équipe s'en sert.
+    """
+
+    def __init__(self) -> None:
+        self._app: ASGIApp | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def app(self) -> ASGIApp:
+        if self._app is None:
+            with self._lock:
+                if self._app is None:
+                    self._app = _build_admin()
+        return self._app
+
+    @property
+    def routes(self) -> list:
+        # url_for("admin:...") des templates résout les routes du montage
+        return self.app.routes
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await self.app(scope, receive, send)
+
+
+app.mount("/admin", _LazyAdmin(), name="admin")
 app.include_router(api_router, prefix="/api/v2")
 
 
@@ -202,8 +246,34 @@ async def startup():
     logger.info("Vérification et création des tables de la base de données...")
     async with async_engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(create_missing_indexes)
     logger.info("✅ Les tables de la base de données sont prêtes.")
 
+    # Index de recherche plein texte (tsvector/GIN ou FTS5) + indexation incrémentale.
+    # Le catalogue existant est indexé hors démarrage: python -m scripts.reindex_search --if-empty
+    from app.search import ensure_search_schema, search_indexer
+
+    try:
+        async with async_engine.begin() as conn:
+            await conn.run_sync(ensure_search_schema)
+    except Exception:
+        logger.exception("Index de recherche indisponible (extensions unaccent/pg_trgm ?)")
+    search_indexer.install()
+
+    # Backplane temps réel (LISTEN/SUBSCRIBE) pour les websockets multi-workers
+    await get_backplane().start()
+    # Livraison asynchrone de l'outbox des notifications
+    await notification_dispatcher.start()
+    # Workers sandboxés de /programming/execute: démarrés à la première exécution,
+    # ou dès maintenant si CODE_EXEC_PRESTART (serveur long)
+    if settings.CODE_EXEC_PRESTART:
+        from app.services.code_execution import code_execution_pool
+
+        try:
+            code_execution_pool.start()
+        except Exception:
+            logger.exception("Pool d'exécution de code indisponible (démarrage différé à la première requête)")
+
     # --- Création de l'administrateur par défaut ---
     default_admin_identifier = "nanshe@admin.com"
     default_admin_password = "password"
@@ -232,6 +302,21 @@ async def startup():
         else:
             logger.info("Administrateur par défaut déjà présent.")
 
+@app.on_event("shutdown")
+async def shutdown():
+    await conversation_store.flush()
+    await notification_dispatcher.stop()
+    await get_backplane().close()
+    # pools arrêtés seulement s'ils ont servi (modules chargés à la demande)
+    pdf = sys.modules.get("app.services.ingestion.pdf")
+    if pdf is not None:
+        pdf.shutdown_pdf_pool()
+    execution = sys.modules.get("app.services.code_execution.pool")
+    if execution is not None:
+        execution.code_execution_pool.shutdown()
+    llm_clients.reset()
+
+
 # --- Route Racine ---
 @app.get("/")
 def read_root():
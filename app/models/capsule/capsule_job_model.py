@@ -0,0 +1,54 @@
+"""Background generation jobs of capsules built from an uploaded document."""
+
+from __future__ import annotations
+
+import enum
+import uuid
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from app.db.base_class import Base
+from sqlalchemy import JSON, DateTime, ForeignKey, Integer, String, func
+from sqlalchemy import Enum as EnumSQL
+from sqlalchemy.orm import Mapped, mapped_column
+
+
+class CapsuleJobStatus(str, enum.Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
+class CapsuleJob(Base):
+    """Une génération de capsule depuis un PDF, suivie étape par étape.
+
+    The upload request only creates this row; the pipeline (extract → chunk →
+    plan → first molecule) runs in the background and records the current
+    ``stage``, page progress and the duration of each stage in ``timings``
+    (seconds, keyed by stage). ``error`` holds the API error code on failure.
+    """
+
+    __tablename__ = "capsule_jobs"
+
+    id: Mapped[str] = mapped_column(String(32), primary_key=True, default=lambda: uuid.uuid4().hex)
+    user_id: Mapped[int] = mapped_column(
+        ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True
+    )
+    capsule_id: Mapped[Optional[int]] = mapped_column(
+        ForeignKey("capsules.id", ondelete="SET NULL"), nullable=True
+    )
+    status: Mapped[CapsuleJobStatus] = mapped_column(
+        EnumSQL(CapsuleJobStatus, name="capsule_job_status_enum"),
+        default=CapsuleJobStatus.QUEUED,
+        nullable=False,
+    )
+    stage: Mapped[Optional[str]] = mapped_column(String(32), nullable=True)
+    pages_done: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    pages_total: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    timings: Mapped[Dict[str, float]] = mapped_column(JSON, default=dict, nullable=False)
+    params: Mapped[Dict[str, Any]] = mapped_column(JSON, default=dict, nullable=False)
+    error: Mapped[Optional[str]] = mapped_column(String(100), nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    updated_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+    finished_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
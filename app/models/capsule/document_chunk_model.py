@@ -0,0 +1,35 @@
+"""Passages of the document a capsule was generated from."""
+
+from __future__ import annotations
+
+from typing import List, Optional
+
+from app.db.base_class import Base
+from sqlalchemy import JSON, ForeignKey, Index, Integer, String, Text
+from sqlalchemy.orm import Mapped, mapped_column
+
+
+class DocumentChunk(Base):
+    """Un passage du PDF (ou du texte) source d'une capsule.
+
+    ``page_start``/``char_start`` and ``page_end``/``char_end`` locate the
+    passage in the extracted text of its first and last page (1-based pages,
+    0-based character offsets, end exclusive). Consecutive chunks of a section
+    overlap slightly; ``heading`` is the section title the chunk belongs to.
+    """
+
+    __tablename__ = "document_chunks"
+    __table_args__ = (Index("ix_document_chunks_capsule_position", "capsule_id", "position"),)
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    capsule_id: Mapped[int] = mapped_column(
+        ForeignKey("capsules.id", ondelete="CASCADE"), nullable=False
+    )
+    position: Mapped[int] = mapped_column(Integer, nullable=False)
+    heading: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
+    text: Mapped[str] = mapped_column(Text, nullable=False)
+    page_start: Mapped[int] = mapped_column(Integer, nullable=False)
+    page_end: Mapped[int] = mapped_column(Integer, nullable=False)
+    char_start: Mapped[int] = mapped_column(Integer, nullable=False)
+    char_end: Mapped[int] = mapped_column(Integer, nullable=False)
+    embedding: Mapped[Optional[List[float]]] = mapped_column(JSON, nullable=True)
@@ -14,7 +14,7 @@ class Granule(Base):
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     title: Mapped[str] = mapped_column(String(255), nullable=False)
     order: Mapped[int] = mapped_column(Integer, nullable=False)
-    capsule_id: Mapped[int] = mapped_column(Integer, ForeignKey("capsules.id"))
+    capsule_id: Mapped[int] = mapped_column(Integer, ForeignKey("capsules.id"), index=True)
 
     # --- Relations ---
     capsule: Mapped["Capsule"] = relationship(back_populates="granules")
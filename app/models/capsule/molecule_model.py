@@ -17,7 +17,7 @@ class Molecule(Base):
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     title: Mapped[str] = mapped_column(String(255), nullable=False)
     order: Mapped[int] = mapped_column(Integer, nullable=False)
-    granule_id: Mapped[int] = mapped_column(Integer, ForeignKey("granules.id"))
+    granule_id: Mapped[int] = mapped_column(Integer, ForeignKey("granules.id"), index=True)
     generation_status: Mapped[GenerationStatus] = mapped_column(
         EnumSQL(GenerationStatus, name="molecule_generation_status_enum"),
         default=GenerationStatus.COMPLETED,
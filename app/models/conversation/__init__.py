@@ -0,0 +1,5 @@
+"""Models related to the community chat channels."""
+
+from .chat_message_model import ChatMessage
+
+__all__ = ["ChatMessage"]
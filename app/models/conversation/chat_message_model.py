@@ -0,0 +1,31 @@
+"""Append-only store of the messages posted in chat channels."""
+
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Optional
+
+from app.db.base_class import Base
+from sqlalchemy import JSON, DateTime, ForeignKey, Index, Integer, String, Text
+from sqlalchemy.orm import Mapped, mapped_column
+
+
+class ChatMessage(Base):
+    """Message d'un salon de discussion (``ChannelDescriptor.key``).
+
+    ``payload`` holds the ``ConversationMessage`` exactly as broadcast, so the
+    history is served without joining users; ``user_id`` and ``content`` are
+    kept as columns for moderation queries.
+    """
+
+    __tablename__ = "chat_messages"
+    __table_args__ = (Index("ix_chat_messages_channel_created", "channel_key", "created_at"),)
+
+    id: Mapped[str] = mapped_column(String(64), primary_key=True)
+    channel_key: Mapped[str] = mapped_column(String(255), nullable=False)
+    user_id: Mapped[Optional[int]] = mapped_column(
+        Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True
+    )
+    content: Mapped[str] = mapped_column(Text, nullable=False)
+    payload: Mapped[dict] = mapped_column(JSON, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
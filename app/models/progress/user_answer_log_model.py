@@ -1,6 +1,6 @@
 # Fichier: backend/app/models/progress/user_answer_log_model.py (CORRIGÉ)
 
-from sqlalchemy import Integer, String, Boolean, JSON, ForeignKey, DateTime, func
+from sqlalchemy import Integer, String, Boolean, JSON, ForeignKey, DateTime, Index, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from app.db.base_class import Base
 from typing import Dict, Any, TYPE_CHECKING
@@ -29,4 +29,10 @@ class UserAnswerLog(Base):
 
     # --- Relations ---
     user: Mapped["User"] = relationship(back_populates="answer_logs")
-    atom: Mapped["Atom"] = relationship()
\ No newline at end of file
+    atom: Mapped["Atom"] = relationship()
+
+    __table_args__ = (
+        # Error journal / retention windows: WHERE user_id = ? AND is_correct = ?
+        # AND created_at >= ? ORDER BY created_at DESC
+        Index("ix_user_answer_log_user_correct_created", "user_id", "is_correct", "created_at"),
+    )
@@ -4,7 +4,7 @@ from __future__ import annotations
 
 from datetime import datetime
 
-from sqlalchemy import DateTime, Float, ForeignKey, Integer, String, UniqueConstraint, func
+from sqlalchemy import DateTime, Float, ForeignKey, Index, Integer, String, UniqueConstraint, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.db.base_class import Base
@@ -48,6 +48,8 @@ class UserMoleculeReview(Base):
 
     __table_args__ = (
         UniqueConstraint("user_id", "molecule_id", name="uq_user_molecule_review"),
+        # Due-queue scans: WHERE user_id = ? AND next_review_at <= now ORDER BY next_review_at
+        Index("ix_user_molecule_reviews_user_next_review", "user_id", "next_review_at"),
     )
 
 
@@ -0,0 +1,5 @@
+"""Models of the search index."""
+
+from .search_document_model import SearchDocument
+
+__all__ = ["SearchDocument"]
@@ -0,0 +1,42 @@
+"""Denormalised rows of the full-text search index."""
+
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Optional
+
+from app.db.base_class import Base
+from sqlalchemy import Boolean, DateTime, Index, Integer, String, Text, UniqueConstraint, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+
+class SearchDocument(Base):
+    """Un document indexé (capsule, molécule, leçon ou note).
+
+    The text is copied from the source rows so a query never joins the
+    content tables. The full-text structure depends on the dialect and is
+    created by ``app.search.backends`` next to this table: a generated
+    ``search_vector`` column with GIN indexes on PostgreSQL, an FTS5 virtual
+    table on SQLite. ``owner_id``/``is_public`` carry the visibility: notes
+    are private to their author, catalog rows follow their capsule.
+    """
+
+    __tablename__ = "search_documents"
+    __table_args__ = (
+        UniqueConstraint("doc_type", "doc_id", name="uq_search_documents_doc"),
+        Index("ix_search_documents_capsule", "capsule_id"),
+        Index("ix_search_documents_owner", "owner_id"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    doc_type: Mapped[str] = mapped_column(String(20), nullable=False)
+    doc_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    capsule_id: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    molecule_id: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    owner_id: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    is_public: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False)
+    title: Mapped[str] = mapped_column(String(255), nullable=False)
+    body: Mapped[str] = mapped_column(Text, nullable=False, default="")
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
+    )
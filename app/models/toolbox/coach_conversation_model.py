@@ -57,6 +57,12 @@ class CoachConversationThread(Base):
         cascade="all, delete-orphan",
         order_by="CoachConversationMessage.created_at",
     )
+    memory = relationship(
+        "CoachConversationMemory",
+        back_populates="thread",
+        uselist=False,
+        cascade="all, delete-orphan",
+    )
 
     @staticmethod
     def build_location_key(
@@ -98,3 +104,24 @@ class CoachConversationMessage(Base):
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
 
     thread = relationship("CoachConversationThread", back_populates="messages")
+
+
+class CoachConversationMemory(Base):
+    """Rolling summary of the turns of a thread that are no longer sent verbatim."""
+
+    __tablename__ = "coach_conversation_memories"
+
+    thread_id: Mapped[int] = mapped_column(
+        Integer,
+        ForeignKey("coach_conversation_threads.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    summary: Mapped[str] = mapped_column(Text, nullable=False, default="")
+    # Highest message id folded into ``summary``; later messages are kept verbatim.
+    summarized_until_id: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    summarized_messages: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False
+    )
+
+    thread = relationship("CoachConversationThread", back_populates="memory")
@@ -1,7 +1,7 @@
 # Fichier: nanshev3/backend/app/models/user/notification_model.py
 
 import enum
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, func, Enum
+from sqlalchemy import JSON, Column, Integer, String, ForeignKey, DateTime, func, Enum, Index
 from sqlalchemy.orm import relationship
 from app.db.base_class import Base
 from app.models.user.user_model import User
@@ -35,6 +35,29 @@ class Notification(Base):
 
     user = relationship("User", back_populates="notifications")
 
+
+class NotificationOutbox(Base):
+    """Événement temps réel à livrer, écrit dans la transaction de l'appelant.
+
+    Le dispatcher (``app.notifications.outbox``) lit les lignes non livrées par
+    lots, regroupe les rafales par utilisateur puis les diffuse; la requête qui
+    a produit l'événement n'attend jamais la livraison.
+    """
+
+    __tablename__ = "notification_outbox"
+    __table_args__ = (
+        Index("ix_notification_outbox_pending", "dispatched_at", "id"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    # Notification persistée associée (None pour les événements purement temps réel)
+    notification_id = Column(Integer, ForeignKey("notifications.id", ondelete="SET NULL"), nullable=True)
+    kind = Column(String(50), nullable=False)
+    payload = Column(JSON, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    dispatched_at = Column(DateTime(timezone=True), nullable=True)
+
 # N'oubliez pas d'ajouter cette relation dans votre modèle User (user_model.py)
 # à l'intérieur de la classe User:
 # notifications = relationship("Notification", back_populates="user", cascade="all, delete-orphan")
\ No newline at end of file
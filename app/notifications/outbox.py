@@ -0,0 +1,394 @@
+"""Transactional outbox of the realtime notifications.
+
+Producers (badges, capsule broadcasts, read receipts) only add
+:class:`NotificationOutbox` rows to the caller's session: the event is
+committed atomically with the change that caused it and the request returns
+without touching a websocket, the backplane or an SMTP server.
+
+:class:`NotificationDispatcher` runs in every worker. It is woken up after a
+commit (or polls every ``NOTIFICATION_DISPATCH_INTERVAL_SECONDS``), waits a
+short coalescing window so bursts accumulate, then claims the pending rows in
+one ``SELECT ... FOR UPDATE SKIP LOCKED`` and marks them dispatched in one
+``UPDATE``. Events are grouped per user: a single event keeps its usual shape,
+several become one ``notifications_batch`` frame (five badges, one toast).
+Delivery is at most once; a lost toast is cheaper than a duplicated one and
+the notifications themselves are already persisted.
+
+Dispatched rows are kept ``NOTIFICATION_OUTBOX_RETENTION_SECONDS``, then
+deleted in batches by the dispatcher (:func:`purge_dispatched`, at most every
+``NOTIFICATION_OUTBOX_PURGE_INTERVAL_SECONDS``) so the table and the claim
+query stay small.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.user.notification_model import (
+    Notification,
+    NotificationOutbox,
+    NotificationStatus,
+)
+from app.models.user.user_model import User
+from app.notifications.websocket_manager import (
+    NotificationWebSocketManager,
+    notification_ws_manager,
+)
+from app.schemas.user.notification_schema import NotificationCreate, NotificationRead
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.orm import Session
+
+log = logging.getLogger("notification_outbox")
+
+NOTIFICATION_CREATED = "notification_created"
+BATCH_EVENT = "notifications_batch"
+
+
+# ----------------------------------------------------------------------
+# Producers (caller's transaction, never commit)
+# ----------------------------------------------------------------------
+def enqueue_event(db: Session, user_id: int, payload: Dict[str, Any]) -> NotificationOutbox:
+    """Queue a realtime-only event (``payload["type"]`` is the websocket event type)."""
+
+    entry = NotificationOutbox(user_id=user_id, kind=payload["type"], payload=payload)
+    db.add(entry)
+    return entry
+
+
+def add_notifications(
+    db: Session, notifications: Sequence[NotificationCreate]
+) -> List[Notification]:
+    """Persist ``notifications`` and queue their ``notification_created`` events.
+
+    Both tables are written with one batched INSERT each; nothing is committed.
+    """
+
+    if not notifications:
+        return []
+    rows = db.scalars(
+        insert(Notification).returning(Notification),
+        [
+            {
+                "user_id": item.user_id,
+                "title": item.title,
+                "message": item.message,
+                "category": item.category,
+                "link": item.link,
+                "status": NotificationStatus.UNREAD,
+            }
+            for item in notifications
+        ],
+    ).all()
+    db.execute(
+        insert(NotificationOutbox),
+        [
+            {"user_id": row.user_id, "notification_id": row.id, "kind": NOTIFICATION_CREATED}
+            for row in rows
+        ],
+    )
+    return rows
+
+
+# ----------------------------------------------------------------------
+# Dispatcher
+# ----------------------------------------------------------------------
+@dataclass
+class Delivery:
+    """Coalesced output of one dispatch round for one user."""
+
+    user_id: int
+    event: Dict[str, Any]
+    email: Optional[str] = None
+    digest: List[Dict[str, Any]] = field(default_factory=list)
+
+
+def _coalesce(events: List[Dict[str, Any]], unread_count: int) -> Dict[str, Any]:
+    if len(events) == 1:
+        return events[0]
+    return {"type": BATCH_EVENT, "events": events, "unread_count": unread_count}
+
+
+def collect_pending(
+    db: Session,
+    *,
+    limit: int | None = None,
+    email_categories: Sequence[str] | None = None,
+) -> List[Delivery]:
+    """Claim up to ``limit`` pending outbox rows and build one delivery per user."""
+
+    limit = limit or settings.NOTIFICATION_DISPATCH_BATCH_SIZE
+    email_categories = set(
+        settings.NOTIFICATION_EMAIL_CATEGORIES if email_categories is None else email_categories
+    )
+    entries = (
+        db.execute(
+            select(NotificationOutbox)
+            .where(NotificationOutbox.dispatched_at.is_(None))
+            .order_by(NotificationOutbox.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        .scalars()
+        .all()
+    )
+    if not entries:
+        db.rollback()
+        return []
+
+    user_ids = {entry.user_id for entry in entries}
+    notification_ids = [
+        entry.notification_id for entry in entries if entry.notification_id is not None
+    ]
+    notifications: Dict[int, Notification] = {}
+    if notification_ids:
+        notifications = {
+            row.id: row
+            for row in db.execute(
+                select(Notification).where(Notification.id.in_(notification_ids))
+            ).scalars()
+        }
+    unread: Dict[int, int] = dict(
+        db.execute(
+            select(Notification.user_id, func.count(Notification.id))
+            .where(
+                Notification.user_id.in_(user_ids), Notification.status == NotificationStatus.UNREAD
+            )
+            .group_by(Notification.user_id)
+        ).all()
+    )
+
+    events: Dict[int, List[Dict[str, Any]]] = {}
+    digests: Dict[int, List[Dict[str, Any]]] = {}
+    for entry in entries:
+        unread_count = unread.get(entry.user_id, 0)
+        if entry.kind == NOTIFICATION_CREATED:
+            notification = notifications.get(entry.notification_id)
+            if notification is None:
+                continue
+            payload = NotificationRead.model_validate(notification).model_dump(mode="json")
+            event = {
+                "type": NOTIFICATION_CREATED,
+                "notification": payload,
+                "unread_count": unread_count,
+            }
+            if notification.category.value in email_categories:
+                digests.setdefault(entry.user_id, []).append(payload)
+        else:
+            event = dict(entry.payload or {})
+            if "unread_count" in event:
+                # l'état au moment de la livraison, pas celui de l'écriture
+                event["unread_count"] = unread_count
+        events.setdefault(entry.user_id, []).append(event)
+
+    db.execute(
+        update(NotificationOutbox)
+        .where(NotificationOutbox.id.in_([entry.id for entry in entries]))
+        .values(dispatched_at=datetime.now(timezone.utc))
+    )
+    emails: Dict[int, str] = {}
+    if digests:
+        emails = dict(
+            db.execute(select(User.id, User.email).where(User.id.in_(digests.keys()))).all()
+        )
+    db.commit()
+
+    return [
+        Delivery(
+            user_id=user_id,
+            event=_coalesce(user_events, unread.get(user_id, 0)),
+            email=emails.get(user_id),
+            digest=digests.get(user_id, []),
+        )
+        for user_id, user_events in events.items()
+    ]
+
+
+def purge_dispatched(
+    db: Session,
+    *,
+    older_than: timedelta | None = None,
+    batch_size: int | None = None,
+    now: datetime | None = None,
+) -> int:
+    """Delete rows dispatched more than ``older_than`` ago, ``batch_size`` per statement.
+
+    Each batch is committed on its own so the deletion never holds a long
+    transaction; returns the number of rows deleted.
+    """
+
+    if older_than is None:
+        older_than = timedelta(seconds=settings.NOTIFICATION_OUTBOX_RETENTION_SECONDS)
+    batch_size = batch_size or settings.NOTIFICATION_DISPATCH_BATCH_SIZE
+    cutoff = (now or datetime.now(timezone.utc)) - older_than
+    expired = (
+        select(NotificationOutbox.id)
+        .where(
+            NotificationOutbox.dispatched_at.is_not(None), NotificationOutbox.dispatched_at < cutoff
+        )
+        .order_by(NotificationOutbox.dispatched_at, NotificationOutbox.id)
+        .limit(batch_size)
+    )
+    deleted = 0
+    while True:
+        ids = db.execute(expired).scalars().all()
+        if not ids:
+            db.rollback()
+            return deleted
+        db.execute(delete(NotificationOutbox).where(NotificationOutbox.id.in_(ids)))
+        db.commit()
+        deleted += len(ids)
+        if len(ids) < batch_size:
+            return deleted
+
+
+class NotificationDispatcher:
+    """Background task delivering the outbox of this worker's database."""
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = SessionLocal,
+        *,
+        manager: NotificationWebSocketManager | None = None,
+        send_digest: Callable[..., Any] | None = None,
+        interval: float | None = None,
+        coalesce_window: float | None = None,
+        purge_interval: float | None = None,
+    ) -> None:
+        self._session_factory = session_factory
+        self.manager = manager or notification_ws_manager
+        self._send_digest = send_digest
+        self._interval = (
+            settings.NOTIFICATION_DISPATCH_INTERVAL_SECONDS if interval is None else interval
+        )
+        self._coalesce_window = (
+            settings.NOTIFICATION_COALESCE_WINDOW_SECONDS
+            if coalesce_window is None
+            else coalesce_window
+        )
+        self._purge_interval = (
+            settings.NOTIFICATION_OUTBOX_PURGE_INTERVAL_SECONDS
+            if purge_interval is None
+            else purge_interval
+        )
+        self._next_purge = 0.0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        if self._task is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._task = self._loop.create_task(self._run())
+        log.info("[OUTBOX] dispatcher démarré")
+
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        # livre ce qui a été commité avant l'arrêt
+        await self.dispatch_once()
+        self._loop = None
+
+    def wake(self) -> None:
+        """Signal new outbox rows; safe from request threads and from the event loop."""
+
+        loop, wakeup = self._loop, self._wakeup
+        if loop is None or wakeup is None or loop.is_closed():
+            return
+        try:
+            loop.call_soon_threadsafe(wakeup.set)
+        except RuntimeError:  # boucle arrêtée entre-temps
+            pass
+
+    async def dispatch_once(self) -> int:
+        """Deliver one batch of pending rows; returns the number of users reached."""
+
+        try:
+            deliveries = await asyncio.to_thread(self._collect)
+        except Exception:
+            log.exception("[OUTBOX] lecture des événements impossible")
+            return 0
+        await self.deliver(deliveries)
+        return len(deliveries)
+
+    async def purge(self) -> int:
+        """Delete the expired dispatched rows; returns how many were removed."""
+
+        try:
+            deleted = await asyncio.to_thread(self._purge)
+        except Exception:
+            log.exception("[OUTBOX] purge des événements livrés impossible")
+            return 0
+        if deleted:
+            log.info("[OUTBOX] %s événements livrés supprimés", deleted)
+        return deleted
+
+    async def deliver(self, deliveries: Sequence[Delivery]) -> None:
+        for delivery in deliveries:
+            try:
+                await self.manager.notify_async(delivery.user_id, delivery.event)
+            except Exception:
+                log.exception("[OUTBOX] diffusion impossible user=%s", delivery.user_id)
+        digests = [delivery for delivery in deliveries if delivery.digest and delivery.email]
+        if digests:
+            await asyncio.gather(*(self._email(delivery) for delivery in digests))
+
+    async def _email(self, delivery: Delivery) -> None:
+        send_digest = self._send_digest
+        if send_digest is None:
+            from app.services.email.email_service import send_notification_digest as send_digest
+        try:
+            await send_digest(delivery.email, delivery.digest)
+        except Exception:
+            log.exception("[OUTBOX] e-mail de notification impossible user=%s", delivery.user_id)
+
+    def _collect(self) -> List[Delivery]:
+        with self._session_factory() as db:
+            return collect_pending(db)
+
+    def _purge(self) -> int:
+        with self._session_factory() as db:
+            return purge_dispatched(db)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self._interval)
+                # laisse la rafale se terminer avant de lire
+                await asyncio.sleep(self._coalesce_window)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            while await self.dispatch_once():
+                pass
+            if time.monotonic() >= self._next_purge:
+                self._next_purge = time.monotonic() + self._purge_interval
+                await self.purge()
+
+
+notification_dispatcher = NotificationDispatcher()
+
+
+__all__ = [
+    "BATCH_EVENT",
+    "Delivery",
+    "NotificationDispatcher",
+    "add_notifications",
+    "collect_pending",
+    "enqueue_event",
+    "notification_dispatcher",
+    "purge_dispatched",
+]
@@ -1,30 +1,52 @@
 # app/notifications/websocket_manager.py
 import asyncio
 import logging
-import json
-from typing import Dict, Set
-from enum import Enum
-from uuid import UUID
-from decimal import Decimal
-from datetime import datetime
+from typing import Dict, Optional, Set
 
 import anyio
 from fastapi import WebSocket
-from fastapi.encoders import jsonable_encoder
 from starlette.websockets import WebSocketState
 
+from app.core import serialization
+from app.core.backplane import Backplane, InProcessBackplane, get_backplane
+from app.core.websocket_fanout import ConnectionSender, FanoutMetrics, notification_fanout_metrics
+
 log = logging.getLogger("ws")
 
 class NotificationWebSocketManager:
-    def __init__(self) -> None:
+    """Sockets de notification de ce worker; la diffusion passe par le backplane."""
+
+    topic = "notifications"
+
+    def __init__(
+        self,
+        backplane: Backplane | None = None,
+        metrics: FanoutMetrics | None = None,
+        max_queue: Optional[int] = None,
+    ) -> None:
         self.connections: Dict[int, Set[WebSocket]] = {}
+        # Une file d'envoi bornée + une tâche d'écriture par socket
+        self._senders: Dict[WebSocket, ConnectionSender] = {}
+        self.metrics = metrics or FanoutMetrics(self.topic)
+        self._max_queue = max_queue
+        self.backplane = backplane or InProcessBackplane()
+        self.backplane.subscribe(self.topic, self._on_backplane_message)
 
     async def connect(self, user_id: int, websocket: WebSocket) -> None:
         await websocket.accept()
+        self._senders[websocket] = ConnectionSender(
+            websocket,
+            self.metrics,
+            max_queue=self._max_queue,
+            on_close=lambda _sender: self.disconnect(user_id, websocket),
+        )
         self.connections.setdefault(user_id, set()).add(websocket)
         log.info(f"[WS CONNECT] user={user_id} total_sockets_for_user={len(self.connections[user_id])}")
 
     def disconnect(self, user_id: int, websocket: WebSocket) -> None:
+        sender = self._senders.pop(websocket, None)
+        if sender is not None:
+            sender.close()
         conns = self.connections.get(user_id)
         if not conns:
             return
@@ -35,45 +57,39 @@ class NotificationWebSocketManager:
 
     def _json_safe(self, payload: dict) -> str:
         # Encodage robuste : Enums -> .value, datetime -> isoformat, UUID -> str, Decimal -> float
-        enc = jsonable_encoder(
-            payload,
-            custom_encoder={
-                Enum: lambda e: getattr(e, "value", str(e)),
-                datetime: lambda d: d.isoformat(),
-                UUID: str,
-                Decimal: float,
-            },
-        )
-        # dumps ici évite les erreurs dans ws.send_json
-        return json.dumps(enc, ensure_ascii=False, separators=(",", ":"))
+        return serialization.dumps_text(payload)
 
     async def _send(self, user_id: int, payload: dict) -> None:
-        websockets = list(self.connections.get(user_id, []))
-        log.info(f"[WS SEND] user={user_id} sockets={len(websockets)} type={payload.get('type')}")
-        if not websockets:
-            return
-
-        # ⚠️ sérialise AVANT la boucle pour éviter de drop la socket sur erreur
+        # ⚠️ sérialise une seule fois AVANT la publication : le même texte part
+        # vers toutes les sockets, et une erreur d'encodage ne drop aucune socket
         try:
-            text = self._json_safe(payload)
+            frame = self._json_safe(payload)
         except Exception as e:
             log.exception(f"[WS ENCODE ERROR] user={user_id}: {e} payload={payload!r}")
             return
+        await self.backplane.publish(
+            self.topic, {"user_id": user_id, "type": payload.get("type"), "frame": frame}
+        )
+
+    async def _on_backplane_message(self, data: dict) -> None:
+        await self._deliver(int(data["user_id"]), data["frame"], data.get("type"))
+
+    async def _deliver(self, user_id: int, frame: str, event_type: str | None = None) -> None:
+        """Dépose un message déjà encodé dans la file des sockets de ``user_id`` tenues par ce worker."""
+
+        websockets = list(self.connections.get(user_id, []))
+        log.info(f"[WS SEND] user={user_id} sockets={len(websockets)} type={event_type}")
+        if not websockets:
+            return
 
-        dead = []
         for ws in websockets:
-            try:
-                if ws.application_state != WebSocketState.CONNECTED:
-                    dead.append(ws)
-                    continue
-                # on envoie du texte déjà sérialisé
-                await ws.send_text(text)
-            except Exception as e:
-                log.exception(f"[WS SEND ERROR] user={user_id}: {e}")
-                dead.append(ws)
-
-        for ws in dead:
-            self.disconnect(user_id, ws)
+            sender = self._senders.get(ws)
+            if sender is None or ws.application_state != WebSocketState.CONNECTED:
+                self.disconnect(user_id, ws)
+                continue
+            sender.offer(frame)
+        # laisse les tâches d'écriture partir tout de suite
+        await asyncio.sleep(0)
 
     async def notify_async(self, user_id: int, payload: dict) -> None:
         await self._send(user_id, payload)
@@ -92,4 +108,4 @@ class NotificationWebSocketManager:
             asyncio.run(self._send(user_id, payload))
 
 
-notification_ws_manager = NotificationWebSocketManager()
+notification_ws_manager = NotificationWebSocketManager(get_backplane(), notification_fanout_metrics)
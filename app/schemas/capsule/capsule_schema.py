@@ -2,6 +2,7 @@ from datetime import datetime
 from pydantic import BaseModel, Field, model_validator
 from typing import List, Optional, Dict, Any
 
+from app.models.capsule.capsule_job_model import CapsuleJobStatus
 from app.models.capsule.capsule_model import GenerationStatus
 
 # ==============================================================================
@@ -105,6 +106,29 @@ class CapsuleRead(BaseModel):
     class Config:
         from_attributes = True
 
+class CapsuleSummary(BaseModel):
+    """Ligne du catalogue (/capsules/me, /capsules/public): colonnes projetées, sans l'arbre."""
+    id: int
+    title: str
+    domain: str
+    area: str
+    main_skill: str
+    is_public: bool
+    generation_status: str
+    granule_count: int = 0
+    molecule_count: int = 0
+    user_xp: int = 0
+    xp_target: int
+    xp_percent: float = 0.0
+
+
+class CapsuleSummaryPage(BaseModel):
+    """Une page du catalogue, paginée par curseur (keyset)."""
+    items: List[CapsuleSummary]
+    next_cursor: Optional[str] = Field(
+        default=None, description="Curseur de la page suivante, null sur la dernière page"
+    )
+
 # ==============================================================================
 # SECTION 3: SCHÉMAS DE PROGRESSION & UTILITAIRES
 # ==============================================================================
@@ -268,3 +292,26 @@ class ClassificationFeedbackResponse(BaseModel):
     added_to_training: bool
     taxonomy: ClassificationOptionsResponse
     created_at: datetime
+
+
+# ==============================================================================
+# SECTION 7: JOBS DE GÉNÉRATION ASYNCHRONES
+# ==============================================================================
+
+
+class CapsuleJobRead(BaseModel):
+    """État d'une génération de capsule depuis un PDF (polling et événements websocket)."""
+    id: str
+    status: CapsuleJobStatus
+    stage: Optional[str] = None
+    pages_done: int = 0
+    pages_total: Optional[int] = None
+    timings: Dict[str, float] = {}
+    capsule_id: Optional[int] = None
+    error: Optional[str] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
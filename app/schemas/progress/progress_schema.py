@@ -1,5 +1,6 @@
 """Schémas Pydantic pour les endpoints de progression capsule-first."""
 from pydantic import BaseModel, Field
+from datetime import datetime
 from typing import Dict, Any, List, Optional
 
 
@@ -25,6 +26,21 @@ class AnswerLogCreate(BaseModel):
     user_answer: Dict[str, Any] = Field(..., alias="answer")
 
 
+class AnswerBatchItem(BaseModel):
+    """Réponse individuelle d'un lot, horodatée côté client."""
+
+    atom_id: int
+    is_correct: bool
+    user_answer: Dict[str, Any] = Field(default_factory=dict, alias="answer")
+    answered_at: Optional[datetime] = None
+
+
+class AnswerBatchCreate(BaseModel):
+    """Lot ordonné de réponses (sessions de quiz rapides, synchronisation hors-ligne)."""
+
+    answers: List[AnswerBatchItem] = Field(..., min_length=1, max_length=200)
+
+
 class CapsuleProgressResponse(BaseModel):
     """Structure de réponse renvoyée après mise à jour de progression."""
 
@@ -0,0 +1,17 @@
+"""Full-text search over capsules, molecules, lessons and personal notes."""
+
+from .backends import ensure_search_schema, get_search_backend
+from .indexer import reindex_all, reindex_if_empty, search_indexer
+from .schemas import SearchHit, SearchPage
+from .service import search
+
+__all__ = [
+    "SearchHit",
+    "SearchPage",
+    "ensure_search_schema",
+    "get_search_backend",
+    "reindex_all",
+    "reindex_if_empty",
+    "search",
+    "search_indexer",
+]
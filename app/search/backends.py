@@ -0,0 +1,316 @@
+"""Dialect-specific full-text index over ``search_documents``.
+
+* :class:`PostgresSearchBackend` — a generated, weighted ``tsvector`` column
+  (French and English configurations, both with ``unaccent``) under a GIN
+  index, plus a ``pg_trgm`` GIN index on titles for typo-tolerant matches.
+  Ranking is ``ts_rank_cd`` (or the title similarity for fuzzy-only hits);
+  snippets are built with ``ts_headline`` for the returned page only.
+* :class:`SqliteSearchBackend` — an FTS5 table (``unicode61`` with diacritics
+  removed) kept in sync by the indexer, ranked with ``bm25``; every query
+  term is matched as a prefix.
+
+Both answer from their index: no query scans the documents table.
+"""
+
+from __future__ import annotations
+
+import logging
+import re
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from app.db.upsert import upsert_insert
+from app.models.search.search_document_model import SearchDocument
+from sqlalchemy import (
+    bindparam,
+    cast,
+    column,
+    delete,
+    func,
+    literal,
+    literal_column,
+    or_,
+    select,
+    table,
+    text,
+    tuple_,
+)
+from sqlalchemy.dialects.postgresql import REGCONFIG, TSVECTOR
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+log = logging.getLogger("search")
+
+Key = Tuple[str, int]
+
+_WRITE_COLUMNS = ("capsule_id", "molecule_id", "owner_id", "is_public", "title", "body")
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+
+class SearchBackend:
+    """Shared write path (upsert into ``search_documents``) and visibility rules."""
+
+    dialect = ""
+
+    def ensure_schema(self, connection: Connection) -> None:
+        """Create the dialect-specific index structures (idempotent)."""
+
+    def write(self, db: Session, documents: Sequence[Dict[str, Any]]) -> None:
+        if not documents:
+            return
+        stmt = upsert_insert(db, SearchDocument)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["doc_type", "doc_id"],
+            set_={name: getattr(stmt.excluded, name) for name in _WRITE_COLUMNS}
+            | {"updated_at": func.now()},
+        )
+        db.execute(stmt, list(documents))
+
+    def delete(self, db: Session, keys: Sequence[Key]) -> None:
+        if keys:
+            db.execute(
+                delete(SearchDocument).where(
+                    tuple_(SearchDocument.doc_type, SearchDocument.doc_id).in_(keys)
+                )
+            )
+
+    def search(
+        self,
+        db: Session,
+        query: str,
+        *,
+        user_id: int,
+        doc_types: Optional[Sequence[str]] = None,
+        limit: int = 20,
+        offset: int = 0,
+    ) -> List[Dict[str, Any]]:
+        raise NotImplementedError
+
+    @staticmethod
+    def _filters(user_id: int, doc_types: Optional[Sequence[str]]) -> list:
+        filters = [or_(SearchDocument.is_public.is_(True), SearchDocument.owner_id == user_id)]
+        if doc_types:
+            filters.append(SearchDocument.doc_type.in_(list(doc_types)))
+        return filters
+
+    @staticmethod
+    def _hit(row: Any) -> Dict[str, Any]:
+        return {
+            "doc_type": row.doc_type,
+            "doc_id": row.doc_id,
+            "capsule_id": row.capsule_id,
+            "molecule_id": row.molecule_id,
+            "title": row.title,
+            "snippet": row.snippet or "",
+            "score": float(row.score or 0.0),
+        }
+
+
+class PostgresSearchBackend(SearchBackend):
+    dialect = "postgresql"
+
+    CONFIGS = ("nanshe_fr", "nanshe_en")
+    _SOURCES = {"nanshe_fr": "french", "nanshe_en": "english"}
+    _VECTOR = literal_column("search_documents.search_vector", type_=TSVECTOR)
+
+    def ensure_schema(self, connection: Connection) -> None:
+        connection.execute(text("CREATE EXTENSION IF NOT EXISTS unaccent"))
+        connection.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        for name, source in self._SOURCES.items():
+            connection.execute(
+                text(
+                    f"""
+                    DO $$ BEGIN
+                        IF NOT EXISTS (SELECT 1 FROM pg_ts_config WHERE cfgname = '{name}') THEN
+                            CREATE TEXT SEARCH CONFIGURATION {name} (COPY = {source});
+                            ALTER TEXT SEARCH CONFIGURATION {name}
+                                ALTER MAPPING FOR hword, hword_part, word
+                                WITH unaccent, {source}_stem;
+                        END IF;
+                    END $$;
+                    """
+                )
+            )
+        vector = " || ".join(
+            f"setweight(to_tsvector('{name}'::regconfig, coalesce(title, '')), 'A') || "
+            f"setweight(to_tsvector('{name}'::regconfig, coalesce(body, '')), 'B')"
+            for name in self.CONFIGS
+        )
+        connection.execute(
+            text(
+                "ALTER TABLE search_documents ADD COLUMN IF NOT EXISTS search_vector tsvector "
+                f"GENERATED ALWAYS AS ({vector}) STORED"
+            )
+        )
+        connection.execute(
+            text(
+                "CREATE INDEX IF NOT EXISTS ix_search_documents_vector "
+                "ON search_documents USING gin (search_vector)"
+            )
+        )
+        connection.execute(
+            text(
+                "CREATE INDEX IF NOT EXISTS ix_search_documents_title_trgm "
+                "ON search_documents USING gin (title gin_trgm_ops)"
+            )
+        )
+
+    def _tsquery(self, query: str):
+        q = bindparam("q", query)
+        fr, en = (
+            func.websearch_to_tsquery(cast(literal(name), REGCONFIG), q) for name in self.CONFIGS
+        )
+        return fr.op("||")(en)
+
+    def search(self, db, query, *, user_id, doc_types=None, limit=20, offset=0):
+        if not _TOKEN.search(query or ""):
+            return []
+        tsquery = self._tsquery(query)
+        similarity = func.similarity(SearchDocument.title, bindparam("q", query))
+        score = func.greatest(func.ts_rank_cd(self._VECTOR, tsquery), similarity)
+        ranked = (
+            select(SearchDocument.id, score.label("score"))
+            .where(
+                or_(
+                    self._VECTOR.op("@@")(tsquery),
+                    SearchDocument.title.op("%")(bindparam("q", query)),
+                ),
+                *self._filters(user_id, doc_types),
+            )
+            .order_by(score.desc(), SearchDocument.id)
+            .limit(limit)
+            .offset(offset)
+            .subquery()
+        )
+        snippet = func.ts_headline(
+            cast(literal(self.CONFIGS[0]), REGCONFIG),
+            SearchDocument.body,
+            tsquery,
+            "StartSel=<mark>, StopSel=</mark>, MaxWords=24, MinWords=8, MaxFragments=1",
+        )
+        rows = db.execute(
+            select(
+                SearchDocument.doc_type,
+                SearchDocument.doc_id,
+                SearchDocument.capsule_id,
+                SearchDocument.molecule_id,
+                SearchDocument.title,
+                snippet.label("snippet"),
+                ranked.c.score,
+            )
+            .join(ranked, ranked.c.id == SearchDocument.id)
+            .order_by(ranked.c.score.desc(), SearchDocument.id),
+            {"q": query},
+        ).all()
+        return [self._hit(row) for row in rows]
+
+
+class SqliteSearchBackend(SearchBackend):
+    dialect = "sqlite"
+
+    FTS_TABLE = "search_documents_fts"
+    _FTS = literal_column(FTS_TABLE)
+    _FTS_TABLE = table(FTS_TABLE, column("rowid"))
+
+    def ensure_schema(self, connection: Connection) -> None:
+        connection.execute(
+            text(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {self.FTS_TABLE} "
+                "USING fts5(title, body, tokenize = 'unicode61 remove_diacritics 2')"
+            )
+        )
+
+    def write(self, db, documents):
+        if not documents:
+            return
+        super().write(db, documents)
+        rows = db.execute(
+            select(SearchDocument.id, SearchDocument.title, SearchDocument.body).where(
+                tuple_(SearchDocument.doc_type, SearchDocument.doc_id).in_(
+                    [(doc["doc_type"], doc["doc_id"]) for doc in documents]
+                )
+            )
+        ).all()
+        self._drop_fts(db, [row.id for row in rows])
+        db.execute(
+            text(f"INSERT INTO {self.FTS_TABLE} (rowid, title, body) VALUES (:id, :title, :body)"),
+            [{"id": row.id, "title": row.title, "body": row.body} for row in rows],
+        )
+
+    def delete(self, db, keys):
+        if not keys:
+            return
+        ids = db.scalars(
+            select(SearchDocument.id).where(
+                tuple_(SearchDocument.doc_type, SearchDocument.doc_id).in_(keys)
+            )
+        ).all()
+        self._drop_fts(db, ids)
+        super().delete(db, keys)
+
+    def _drop_fts(self, db, ids: Sequence[int]) -> None:
+        if ids:
+            db.execute(
+                text(f"DELETE FROM {self.FTS_TABLE} WHERE rowid IN :ids").bindparams(
+                    bindparam("ids", expanding=True)
+                ),
+                {"ids": list(ids)},
+            )
+
+    @staticmethod
+    def match_expression(query: str) -> str:
+        """Every token as a quoted prefix term (implicit AND)."""
+
+        return " ".join(f'"{token}"*' for token in _TOKEN.findall(query or ""))
+
+    def search(self, db, query, *, user_id, doc_types=None, limit=20, offset=0):
+        match = self.match_expression(query)
+        if not match:
+            return []
+        bm25 = func.bm25(self._FTS, 3.0, 1.0)
+        rows = db.execute(
+            select(
+                SearchDocument.doc_type,
+                SearchDocument.doc_id,
+                SearchDocument.capsule_id,
+                SearchDocument.molecule_id,
+                SearchDocument.title,
+                func.snippet(self._FTS, 1, "<mark>", "</mark>", "…", 16).label("snippet"),
+                (-bm25).label("score"),
+            )
+            .select_from(self._FTS_TABLE)
+            .join(SearchDocument, SearchDocument.id == self._FTS_TABLE.c.rowid)
+            .where(text(f"{self.FTS_TABLE} MATCH :match"), *self._filters(user_id, doc_types))
+            .order_by(bm25, SearchDocument.id)
+            .limit(limit)
+            .offset(offset),
+            {"match": match},
+        ).all()
+        return [self._hit(row) for row in rows]
+
+
+_BACKENDS = {
+    PostgresSearchBackend.dialect: PostgresSearchBackend(),
+    SqliteSearchBackend.dialect: SqliteSearchBackend(),
+}
+
+
+def get_search_backend(dialect: str) -> SearchBackend:
+    try:
+        return _BACKENDS[dialect]
+    except KeyError:  # pragma: no cover - only PostgreSQL and SQLite are deployed
+        raise NotImplementedError(f"Recherche non supportée pour le dialecte {dialect}")
+
+
+def ensure_search_schema(connection: Connection) -> None:
+    """Create the full-text structures of the current dialect (startup hook)."""
+
+    get_search_backend(connection.dialect.name).ensure_schema(connection)
+
+
+__all__ = [
+    "PostgresSearchBackend",
+    "SearchBackend",
+    "SqliteSearchBackend",
+    "ensure_search_schema",
+    "get_search_backend",
+]
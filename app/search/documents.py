@@ -0,0 +1,199 @@
+"""Turn capsules, molecules, lesson atoms and notes into search documents."""
+
+from __future__ import annotations
+
+from typing import Any, Dict, Iterable, List
+
+from app.models.capsule.atom_model import Atom, AtomContentType
+from app.models.capsule.capsule_model import Capsule
+from app.models.capsule.granule_model import Granule
+from app.models.capsule.molecule_model import Molecule
+from app.models.toolbox.molecule_note_model import MoleculeNote
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+CAPSULE = "capsule"
+MOLECULE = "molecule"
+LESSON = "lesson"
+NOTE = "note"
+DOC_TYPES = (CAPSULE, MOLECULE, LESSON, NOTE)
+
+# Le corps indexé d'une leçon est tronqué: au-delà, le classement ne bouge plus
+MAX_BODY_CHARS = 20_000
+_SKIPPED_KEYS = {
+    "id",
+    "type",
+    "url",
+    "image",
+    "image_url",
+    "audio",
+    "audio_url",
+    "language",
+    "lang",
+}
+
+
+def lesson_text(content: Any) -> str:
+    """Concatenate the human-readable strings of an ``Atom.content`` payload."""
+
+    parts: List[str] = []
+    size = 0
+
+    def _walk(value: Any) -> None:
+        nonlocal size
+        if size >= MAX_BODY_CHARS:
+            return
+        if isinstance(value, str):
+            text = value.strip()
+            if text:
+                parts.append(text)
+                size += len(text) + 1
+        elif isinstance(value, dict):
+            for key, item in value.items():
+                if key not in _SKIPPED_KEYS:
+                    _walk(item)
+        elif isinstance(value, (list, tuple)):
+            for item in value:
+                _walk(item)
+
+    _walk(content)
+    return "\n".join(parts)[:MAX_BODY_CHARS]
+
+
+def _document(doc_type: str, doc_id: int, **values: Any) -> Dict[str, Any]:
+    values.setdefault("capsule_id", None)
+    values.setdefault("molecule_id", None)
+    values["body"] = values.get("body") or ""
+    values["title"] = (values.get("title") or "")[:255]
+    return {"doc_type": doc_type, "doc_id": doc_id, **values}
+
+
+def capsule_documents(db: Session, ids: Iterable[int]) -> List[Dict[str, Any]]:
+    rows = db.execute(
+        select(
+            Capsule.id,
+            Capsule.title,
+            Capsule.domain,
+            Capsule.area,
+            Capsule.main_skill,
+            Capsule.is_public,
+            Capsule.creator_id,
+        ).where(Capsule.id.in_(list(ids)))
+    ).all()
+    return [
+        _document(
+            CAPSULE,
+            row.id,
+            capsule_id=row.id,
+            owner_id=row.creator_id,
+            is_public=bool(row.is_public),
+            title=row.title,
+            body=" ".join(filter(None, [row.main_skill, row.domain, row.area])),
+        )
+        for row in rows
+    ]
+
+
+def molecule_documents(db: Session, ids: Iterable[int]) -> List[Dict[str, Any]]:
+    rows = db.execute(
+        select(
+            Molecule.id,
+            Molecule.title,
+            Capsule.id.label("capsule_id"),
+            Capsule.is_public,
+            Capsule.creator_id,
+        )
+        .join(Granule, Molecule.granule_id == Granule.id)
+        .join(Capsule, Granule.capsule_id == Capsule.id)
+        .where(Molecule.id.in_(list(ids)))
+    ).all()
+    return [
+        _document(
+            MOLECULE,
+            row.id,
+            capsule_id=row.capsule_id,
+            molecule_id=row.id,
+            owner_id=row.creator_id,
+            is_public=bool(row.is_public),
+            title=row.title,
+        )
+        for row in rows
+    ]
+
+
+def lesson_documents(db: Session, ids: Iterable[int]) -> List[Dict[str, Any]]:
+    rows = db.execute(
+        select(
+            Atom.id,
+            Atom.title,
+            Atom.content,
+            Atom.molecule_id,
+            Capsule.id.label("capsule_id"),
+            Capsule.is_public,
+            Capsule.creator_id,
+        )
+        .join(Molecule, Atom.molecule_id == Molecule.id)
+        .join(Granule, Molecule.granule_id == Granule.id)
+        .join(Capsule, Granule.capsule_id == Capsule.id)
+        .where(Atom.id.in_(list(ids)), Atom.content_type == AtomContentType.LESSON)
+    ).all()
+    return [
+        _document(
+            LESSON,
+            row.id,
+            capsule_id=row.capsule_id,
+            molecule_id=row.molecule_id,
+            owner_id=row.creator_id,
+            is_public=bool(row.is_public),
+            title=row.title,
+            body=lesson_text(row.content),
+        )
+        for row in rows
+    ]
+
+
+def note_documents(db: Session, ids: Iterable[int]) -> List[Dict[str, Any]]:
+    rows = db.execute(
+        select(
+            MoleculeNote.id,
+            MoleculeNote.user_id,
+            MoleculeNote.molecule_id,
+            MoleculeNote.title,
+            MoleculeNote.content,
+            Granule.capsule_id,
+        )
+        .outerjoin(Molecule, MoleculeNote.molecule_id == Molecule.id)
+        .outerjoin(Granule, Molecule.granule_id == Granule.id)
+        .where(MoleculeNote.id.in_(list(ids)))
+    ).all()
+    return [
+        _document(
+            NOTE,
+            row.id,
+            capsule_id=row.capsule_id,
+            molecule_id=row.molecule_id,
+            owner_id=row.user_id,
+            is_public=False,
+            title=row.title,
+            body=row.content,
+        )
+        for row in rows
+    ]
+
+
+BUILDERS = {
+    CAPSULE: (Capsule, capsule_documents),
+    MOLECULE: (Molecule, molecule_documents),
+    LESSON: (Atom, lesson_documents),
+    NOTE: (MoleculeNote, note_documents),
+}
+
+__all__ = [
+    "BUILDERS",
+    "CAPSULE",
+    "DOC_TYPES",
+    "LESSON",
+    "MOLECULE",
+    "NOTE",
+    "lesson_text",
+]
@@ -0,0 +1,167 @@
+"""Incremental maintenance of the search index.
+
+:meth:`SearchIndexer.install` hooks the ORM sessions: ``after_flush`` records
+which capsules, molecules, atoms and notes were written or deleted, and
+``after_commit`` re-indexes exactly those rows in a short transaction of its
+own. Indexing therefore never fails or slows down the business transaction
+beyond a few batched statements; a missed update is repaired by
+:func:`reindex_all`.
+
+Rows written before the index existed are picked up by
+:func:`reindex_if_empty` at application start-up, or on demand with
+``python -m scripts.reindex_search``.
+"""
+
+from __future__ import annotations
+
+import logging
+from typing import Dict, Iterable, Optional, Set
+
+from app.models.capsule.atom_model import Atom
+from app.models.capsule.capsule_model import Capsule
+from app.models.capsule.molecule_model import Molecule
+from app.models.search.search_document_model import SearchDocument
+from app.models.toolbox.molecule_note_model import MoleculeNote
+from sqlalchemy import event, select, update
+from sqlalchemy.orm import Session
+
+from .backends import get_search_backend
+from .documents import BUILDERS, CAPSULE, LESSON, MOLECULE, NOTE
+
+log = logging.getLogger("search")
+
+_TRACKED = {Capsule: CAPSULE, Molecule: MOLECULE, Atom: LESSON, MoleculeNote: NOTE}
+_PENDING_KEY = "search_index_pending"
+_BATCH = 500
+
+
+def apply_changes(db: Session, upserts: Dict[str, Set[int]], deletes: Dict[str, Set[int]]) -> None:
+    """Re-index ``upserts`` and drop ``deletes`` (``{doc_type: ids}``); no commit."""
+
+    backend = get_search_backend(db.get_bind().dialect.name)
+    delete_keys = [(doc_type, doc_id) for doc_type, ids in deletes.items() for doc_id in ids]
+    for doc_type, ids in upserts.items():
+        _, build = BUILDERS[doc_type]
+        ids = sorted(ids)
+        for start in range(0, len(ids), _BATCH):
+            chunk = ids[start : start + _BATCH]
+            documents = build(db, chunk)
+            backend.write(db, documents)
+            # un atome qui n'est plus une leçon (ou dont la capsule a disparu) sort de l'index
+            found = {doc["doc_id"] for doc in documents}
+            delete_keys.extend((doc_type, doc_id) for doc_id in chunk if doc_id not in found)
+        if doc_type == CAPSULE:
+            _propagate_visibility(db, ids)
+    backend.delete(db, delete_keys)
+
+
+def _propagate_visibility(db: Session, capsule_ids: Iterable[int]) -> None:
+    rows = db.execute(
+        select(Capsule.id, Capsule.is_public, Capsule.creator_id).where(
+            Capsule.id.in_(list(capsule_ids))
+        )
+    ).all()
+    for row in rows:
+        db.execute(
+            update(SearchDocument)
+            .where(
+                SearchDocument.capsule_id == row.id,
+                SearchDocument.doc_type.in_([MOLECULE, LESSON]),
+                (SearchDocument.is_public != bool(row.is_public))
+                | (SearchDocument.owner_id != row.creator_id),
+            )
+            .values(is_public=bool(row.is_public), owner_id=row.creator_id)
+        )
+
+
+def reindex_all(db: Session) -> int:
+    """Rebuild every document (initial fill, repair); returns the number of sources scanned."""
+
+    total = 0
+    for model, doc_type in _TRACKED.items():
+        ids = set(db.scalars(select(model.id)).all())
+        stale = (
+            set(
+                db.scalars(
+                    select(SearchDocument.doc_id).where(SearchDocument.doc_type == doc_type)
+                ).all()
+            )
+            - ids
+        )
+        apply_changes(db, {doc_type: ids}, {doc_type: stale})
+        total += len(ids)
+    db.commit()
+    return total
+
+
+def reindex_if_empty(db: Session) -> Optional[int]:
+    """Fill the index from the existing rows when it has no document yet; ``None`` otherwise."""
+
+    if db.scalar(select(SearchDocument.id).limit(1)) is not None:
+        return None
+    return reindex_all(db)
+
+
+class SearchIndexer:
+    """ORM session hooks feeding :func:`apply_changes`."""
+
+    def __init__(self) -> None:
+        self.installed = False
+
+    def install(self) -> None:
+        if self.installed:
+            return
+        event.listen(Session, "after_flush", self._collect)
+        event.listen(Session, "after_commit", self._apply)
+        event.listen(Session, "after_rollback", self._discard)
+        self.installed = True
+
+    def uninstall(self) -> None:
+        if not self.installed:
+            return
+        event.remove(Session, "after_flush", self._collect)
+        event.remove(Session, "after_commit", self._apply)
+        event.remove(Session, "after_rollback", self._discard)
+        self.installed = False
+
+    @staticmethod
+    def _collect(session: Session, _flush_context) -> None:
+        upserts, deletes = session.info.setdefault(_PENDING_KEY, ({}, {}))
+        for obj in session.new.union(session.dirty):
+            doc_type = _TRACKED.get(type(obj))
+            if doc_type and obj.id is not None:
+                upserts.setdefault(doc_type, set()).add(obj.id)
+        for obj in session.deleted:
+            doc_type = _TRACKED.get(type(obj))
+            if doc_type and obj.id is not None:
+                deletes.setdefault(doc_type, set()).add(obj.id)
+                upserts.get(doc_type, set()).discard(obj.id)
+
+    @staticmethod
+    def _discard(session: Session) -> None:
+        session.info.pop(_PENDING_KEY, None)
+
+    @staticmethod
+    def _apply(session: Session) -> None:
+        pending = session.info.pop(_PENDING_KEY, None)
+        if not pending or not any(pending):
+            return
+        # Sessions async (admin SQLAdmin): ``after_commit`` s'exécute dans leur
+        # greenlet, la session d'indexation peut donc emprunter le même moteur.
+        bind = session.get_bind()
+        upserts, deletes = pending
+        try:
+            with Session(bind=bind) as index_session:
+                apply_changes(index_session, upserts, deletes)
+                index_session.commit()
+        except Exception:
+            log.exception(
+                "[SEARCH] indexation incrémentale impossible: %s",
+                {k: len(v) for k, v in upserts.items()},
+            )
+
+
+search_indexer = SearchIndexer()
+
+
+__all__ = ["SearchIndexer", "apply_changes", "reindex_all", "reindex_if_empty", "search_indexer"]
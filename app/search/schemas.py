@@ -0,0 +1,28 @@
+"""Response schemas of the search endpoint."""
+
+from __future__ import annotations
+
+from typing import List, Optional
+
+from pydantic import BaseModel, Field
+
+
+class SearchHit(BaseModel):
+    """Un résultat classé: ``doc_type`` vaut capsule, molecule, lesson ou note."""
+
+    doc_type: str
+    doc_id: int
+    capsule_id: Optional[int] = None
+    molecule_id: Optional[int] = None
+    title: str
+    snippet: str = ""
+    score: float
+
+
+class SearchPage(BaseModel):
+    """One page of ranked results."""
+
+    items: List[SearchHit]
+    next_offset: Optional[int] = Field(
+        default=None, description="Offset of the next page, null on the last page"
+    )
@@ -0,0 +1,44 @@
+"""Ranked, paginated search over the documents visible to a user."""
+
+from __future__ import annotations
+
+from typing import Optional, Sequence
+
+from app.models.user.user_model import User
+from fastapi import HTTPException, status
+from sqlalchemy.orm import Session
+
+from .backends import get_search_backend
+from .documents import DOC_TYPES
+from .schemas import SearchHit, SearchPage
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 50
+MAX_OFFSET = 500
+
+
+def search(
+    db: Session,
+    user: User,
+    query: str,
+    *,
+    doc_types: Optional[Sequence[str]] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    offset: int = 0,
+) -> SearchPage:
+    """Return the ``limit`` best hits after ``offset`` (public catalog + the user's own content)."""
+
+    if doc_types and any(doc_type not in DOC_TYPES for doc_type in doc_types):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="invalid_type")
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    # le classement n'a plus de sens loin dans la liste: on borne la profondeur
+    offset = max(0, min(offset, MAX_OFFSET))
+    backend = get_search_backend(db.get_bind().dialect.name)
+    hits = backend.search(
+        db, query, user_id=user.id, doc_types=doc_types, limit=limit + 1, offset=offset
+    )
+    next_offset = offset + limit if len(hits) > limit and offset + limit <= MAX_OFFSET else None
+    return SearchPage(items=[SearchHit(**hit) for hit in hits[:limit]], next_offset=next_offset)
+
+
+__all__ = ["DEFAULT_PAGE_SIZE", "MAX_OFFSET", "MAX_PAGE_SIZE", "search"]
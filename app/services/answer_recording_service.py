@@ -0,0 +1,543 @@
+"""Consolidated write path for learner answers.
+
+Logging an answer touches the answer log, the atom progress, the SRS schedule
+of the molecule, the capsule XP and the completion snapshot returned to the
+client.  Instead of letting each helper query and flush on its own, this
+service loads everything with two queries (capsule structure joined with the
+learner's atom progress, then capsule XP and SRS schedules), applies every
+mutation in memory and writes the result back with one statement per table,
+using ``INSERT ... ON CONFLICT`` for the rows protected by a unique constraint.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional, Sequence
+
+from app.db.upsert import upsert_insert
+from app.models.capsule.atom_model import Atom
+from app.models.capsule.granule_model import Granule
+from app.models.capsule.molecule_model import Molecule
+from app.models.capsule.utility_models import UserCapsuleProgress
+from app.models.progress.user_answer_log_model import UserAnswerLog
+from app.models.progress.user_atomic_progress import UserAtomProgress
+from app.models.progress.user_molecule_review_model import UserMoleculeReview
+from app.models.user.user_model import User
+from app.schemas.progress.progress_schema import AnswerBatchItem
+from app.services.coach_context_service import CoachContextService
+from app.services.progress_service import (
+    TOTAL_XP,
+    award_completion_badges,
+    calculate_capsule_xp_distribution,
+)
+from app.services.services.capsule_service import CapsuleService
+from app.services.srs_service import SRSService
+from fastapi import HTTPException, status
+from sqlalchemy import and_, func, insert, select, update
+from sqlalchemy.orm import Session, aliased
+
+SCHEDULE_FIELDS = (
+    "next_review_at",
+    "last_review_at",
+    "last_error_at",
+    "interval_days",
+    "ease_factor",
+    "streak",
+    "review_count",
+    "success_count",
+    "total_errors",
+    "total_resets",
+    "last_outcome",
+)
+
+
+@dataclass
+class _LearnerState:
+    """In-memory projection of every row an answer may touch."""
+
+    capsules: Dict[int, SimpleNamespace] = field(default_factory=dict)
+    molecules: Dict[int, SimpleNamespace] = field(default_factory=dict)
+    atoms: Dict[int, SimpleNamespace] = field(default_factory=dict)
+    progress: Dict[int, SimpleNamespace] = field(default_factory=dict)
+    capsule_progress: Dict[int, SimpleNamespace] = field(default_factory=dict)
+    schedules: Dict[int, SimpleNamespace] = field(default_factory=dict)
+    xp_distributions: Dict[int, Dict[int, int]] = field(default_factory=dict)
+
+    # Pending writes
+    answer_logs: List[dict] = field(default_factory=list)
+    progress_deltas: Dict[int, Dict[str, int]] = field(default_factory=dict)
+    dirty_schedules: set[int] = field(default_factory=set)
+    dirty_capsules: set[int] = field(default_factory=set)
+    xp_awarded: bool = False
+
+
+class AnswerRecordingService:
+    """Record learner answers with a bounded number of database round-trips."""
+
+    def __init__(self, db: Session, user: User):
+        self.db = db
+        self.user = user
+        self.user_id = user.id
+        self._capsule_service = CapsuleService(db=db, user=user)
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+    def record_answer(
+        self,
+        atom_id: int,
+        is_correct: bool,
+        user_answer: Dict[str, Any],
+        answered_at: Optional[datetime] = None,
+    ) -> dict:
+        """Persist one answer and return the updated completion snapshot."""
+
+        state = self._load_state([atom_id])
+        progress = self._apply_answer(
+            state,
+            atom_id,
+            is_correct,
+            user_answer,
+            answered_at or datetime.utcnow(),
+        )
+        self._write_state(state)
+        result = {
+            "status": progress.status,
+            "is_correct": is_correct,
+            **self._snapshot(state, state.atoms[atom_id].molecule),
+        }
+        self._finalize(state)
+        return result
+
+    def record_answers(self, answers: Sequence[AnswerBatchItem]) -> dict:
+        """Persist an ordered batch of answers in a single transaction.
+
+        Answers are applied in the order received, so SRS schedules go through
+        the same sequence of updates as individual calls would, but each
+        touched schedule and atom progress row is written once. Client
+        timestamps are kept for the answer log and the schedule, clamped to the
+        server clock.
+        """
+
+        state = self._load_state(list(dict.fromkeys(item.atom_id for item in answers)))
+        now = datetime.utcnow()
+
+        results: List[dict] = []
+        touched_molecules: Dict[int, SimpleNamespace] = {}
+        for item in answers:
+            answered_at = self._normalize_client_timestamp(item.answered_at, now)
+            progress = self._apply_answer(
+                state, item.atom_id, item.is_correct, item.user_answer, answered_at
+            )
+            results.append(
+                {"atom_id": item.atom_id, "is_correct": item.is_correct, "status": progress.status}
+            )
+            molecule = state.atoms[item.atom_id].molecule
+            touched_molecules.setdefault(molecule.id, molecule)
+
+        self._write_state(state)
+        molecules = []
+        for molecule_id, molecule in touched_molecules.items():
+            schedule = state.schedules[molecule_id]
+            molecules.append(
+                {
+                    "molecule_id": molecule_id,
+                    "next_review_at": schedule.next_review_at.isoformat()
+                    if schedule.next_review_at
+                    else None,
+                    "interval_days": round(schedule.interval_days or 0, 2),
+                    "streak": schedule.streak or 0,
+                    **self._snapshot(state, molecule),
+                }
+            )
+        self._finalize(state)
+
+        return {"processed": len(results), "answers": results, "molecules": molecules}
+
+    # ------------------------------------------------------------------
+    # Loading
+    # ------------------------------------------------------------------
+    def _load_state(self, atom_ids: List[int]) -> _LearnerState:
+        state = _LearnerState()
+        self._load_structure(state, atom_ids)
+
+        missing = [atom_id for atom_id in atom_ids if atom_id not in state.atoms]
+        if missing:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Atome introuvable")
+
+        self._load_schedules_and_xp(state)
+        return state
+
+    def _load_structure(self, state: _LearnerState, atom_ids: List[int]) -> None:
+        """Load the capsule trees of ``atom_ids`` joined with the learner's atom progress."""
+
+        target_atom = aliased(Atom)
+        target_molecule = aliased(Molecule)
+        target_granule = aliased(Granule)
+        capsule_ids = (
+            select(target_granule.capsule_id)
+            .join(target_molecule, target_molecule.granule_id == target_granule.id)
+            .join(target_atom, target_atom.molecule_id == target_molecule.id)
+            .where(target_atom.id.in_(atom_ids))
+        )
+
+        stmt = (
+            select(
+                Granule.capsule_id.label("capsule_id"),
+                Granule.id.label("granule_id"),
+                Granule.order.label("granule_order"),
+                Molecule.id.label("molecule_id"),
+                Molecule.order.label("molecule_order"),
+                Atom.id.label("atom_id"),
+                Atom.order.label("atom_order"),
+                Atom.content_type.label("content_type"),
+                Atom.is_bonus.label("is_bonus"),
+                UserAtomProgress.id.label("progress_id"),
+                UserAtomProgress.status.label("status"),
+                UserAtomProgress.attempts.label("attempts"),
+                UserAtomProgress.success_count.label("success_count"),
+                UserAtomProgress.failure_count.label("failure_count"),
+                UserAtomProgress.reset_count.label("reset_count"),
+                UserAtomProgress.completed_at.label("completed_at"),
+                UserAtomProgress.xp_awarded.label("xp_awarded"),
+            )
+            .select_from(Granule)
+            .outerjoin(Molecule, Molecule.granule_id == Granule.id)
+            .outerjoin(Atom, Atom.molecule_id == Molecule.id)
+            .outerjoin(
+                UserAtomProgress,
+                and_(
+                    UserAtomProgress.atom_id == Atom.id,
+                    UserAtomProgress.user_id == self.user_id,
+                ),
+            )
+            .where(Granule.capsule_id.in_(capsule_ids))
+        )
+
+        granules: Dict[int, SimpleNamespace] = {}
+        for row in self.db.execute(stmt):
+            capsule = state.capsules.get(row.capsule_id)
+            if capsule is None:
+                capsule = SimpleNamespace(id=row.capsule_id, granules=[])
+                state.capsules[row.capsule_id] = capsule
+
+            granule = granules.get(row.granule_id)
+            if granule is None:
+                granule = SimpleNamespace(
+                    id=row.granule_id, order=row.granule_order, capsule=capsule, molecules=[]
+                )
+                granules[row.granule_id] = granule
+                capsule.granules.append(granule)
+
+            if row.molecule_id is None:
+                continue
+            molecule = state.molecules.get(row.molecule_id)
+            if molecule is None:
+                molecule = SimpleNamespace(
+                    id=row.molecule_id, order=row.molecule_order, granule=granule, atoms=[]
+                )
+                state.molecules[row.molecule_id] = molecule
+                granule.molecules.append(molecule)
+
+            if row.atom_id is None:
+                continue
+            atom = SimpleNamespace(
+                id=row.atom_id,
+                order=row.atom_order,
+                content_type=row.content_type,
+                is_bonus=bool(row.is_bonus),
+                molecule=molecule,
+            )
+            state.atoms[row.atom_id] = atom
+            molecule.atoms.append(atom)
+
+            if row.progress_id is not None:
+                state.progress[row.atom_id] = SimpleNamespace(
+                    exists=True,
+                    status=row.status,
+                    attempts=row.attempts or 0,
+                    success_count=row.success_count or 0,
+                    failure_count=row.failure_count or 0,
+                    reset_count=row.reset_count or 0,
+                    completed_at=row.completed_at,
+                    last_attempt_at=None,
+                    xp_awarded=bool(row.xp_awarded),
+                )
+
+    def _load_schedules_and_xp(self, state: _LearnerState) -> None:
+        """Load capsule XP rows and SRS schedules of the touched molecules in one query."""
+
+        capsule_ids = list(state.capsules)
+        molecule_ids = list(state.molecules)
+        stmt = (
+            select(
+                UserCapsuleProgress.id.label("capsule_progress_id"),
+                UserCapsuleProgress.capsule_id.label("capsule_id"),
+                UserCapsuleProgress.xp.label("xp"),
+                UserCapsuleProgress.bonus_xp.label("bonus_xp"),
+                UserMoleculeReview.molecule_id.label("molecule_id"),
+                *(getattr(UserMoleculeReview, name).label(name) for name in SCHEDULE_FIELDS),
+            )
+            .select_from(User)
+            .outerjoin(
+                UserCapsuleProgress,
+                and_(
+                    UserCapsuleProgress.user_id == User.id,
+                    UserCapsuleProgress.capsule_id.in_(capsule_ids),
+                ),
+            )
+            .outerjoin(
+                UserMoleculeReview,
+                and_(
+                    UserMoleculeReview.user_id == User.id,
+                    UserMoleculeReview.molecule_id.in_(molecule_ids),
+                ),
+            )
+            .where(User.id == self.user_id)
+        )
+
+        for row in self.db.execute(stmt):
+            if row.capsule_progress_id is not None and row.capsule_id not in state.capsule_progress:
+                state.capsule_progress[row.capsule_id] = SimpleNamespace(
+                    id=row.capsule_progress_id,
+                    xp=row.xp or 0,
+                    bonus_xp=row.bonus_xp or 0,
+                    xp_delta=0,
+                    bonus_delta=0,
+                )
+            if row.molecule_id is not None and row.molecule_id not in state.schedules:
+                state.schedules[row.molecule_id] = SimpleNamespace(
+                    **{name: getattr(row, name) for name in SCHEDULE_FIELDS}
+                )
+
+    # ------------------------------------------------------------------
+    # In-memory mutations
+    # ------------------------------------------------------------------
+    def _apply_answer(
+        self,
+        state: _LearnerState,
+        atom_id: int,
+        is_correct: bool,
+        user_answer: Dict[str, Any],
+        answered_at: datetime,
+    ) -> SimpleNamespace:
+        atom = state.atoms[atom_id]
+        molecule = atom.molecule
+        capsule = molecule.granule.capsule
+
+        progress = state.progress.get(atom_id)
+        if progress is None:
+            progress = SimpleNamespace(
+                exists=False,
+                status="not_started",
+                attempts=0,
+                success_count=0,
+                failure_count=0,
+                reset_count=0,
+                completed_at=None,
+                last_attempt_at=None,
+                xp_awarded=False,
+            )
+            state.progress[atom_id] = progress
+
+        delta = state.progress_deltas.setdefault(
+            atom_id, {"attempts": 0, "success_count": 0, "failure_count": 0}
+        )
+        progress.attempts += 1
+        delta["attempts"] += 1
+        progress.last_attempt_at = answered_at
+
+        if is_correct:
+            progress.success_count += 1
+            delta["success_count"] += 1
+            progress.status = "completed"
+            if not progress.xp_awarded:
+                self._award_xp(state, capsule, atom)
+                progress.xp_awarded = True
+                progress.completed_at = answered_at
+            elif not progress.completed_at:
+                progress.completed_at = answered_at
+        else:
+            progress.failure_count += 1
+            delta["failure_count"] += 1
+            progress.status = "failed"
+            progress.completed_at = None
+
+        schedule = state.schedules.get(molecule.id)
+        if schedule is None:
+            schedule = SimpleNamespace(
+                next_review_at=answered_at,
+                last_review_at=None,
+                last_error_at=None,
+                interval_days=1.0,
+                ease_factor=SRSService.DEFAULT_EASE_FACTOR,
+                streak=0,
+                review_count=0,
+                success_count=0,
+                total_errors=0,
+                total_resets=sum(
+                    state.progress[item.id].reset_count
+                    for item in molecule.atoms
+                    if item.id in state.progress
+                ),
+                last_outcome=None,
+            )
+            state.schedules[molecule.id] = schedule
+        SRSService.apply_answer(schedule, is_correct, answered_at)
+        state.dirty_schedules.add(molecule.id)
+
+        state.answer_logs.append(
+            {
+                "user_id": self.user_id,
+                "atom_id": atom_id,
+                "is_correct": is_correct,
+                "user_answer_json": user_answer,
+                "created_at": answered_at,
+            }
+        )
+        return progress
+
+    def _award_xp(
+        self, state: _LearnerState, capsule: SimpleNamespace, atom: SimpleNamespace
+    ) -> None:
+        """Mirror :meth:`ProgressService.record_atom_completion` on the projection."""
+
+        distribution = state.xp_distributions.get(capsule.id)
+        if distribution is None:
+            distribution, _ = calculate_capsule_xp_distribution(capsule)
+            state.xp_distributions[capsule.id] = distribution
+
+        capsule_progress = state.capsule_progress.get(capsule.id)
+        if capsule_progress is None:
+            capsule_progress = SimpleNamespace(id=None, xp=0, bonus_xp=0, xp_delta=0, bonus_delta=0)
+            state.capsule_progress[capsule.id] = capsule_progress
+
+        xp_to_award = distribution.get(atom.id, 0)
+        if atom.is_bonus:
+            capsule_progress.bonus_xp += xp_to_award
+            capsule_progress.bonus_delta += xp_to_award
+        else:
+            xp_delta = min(xp_to_award, max(0, TOTAL_XP - capsule_progress.xp))
+            capsule_progress.xp += xp_delta
+            capsule_progress.xp_delta += xp_delta
+
+        state.dirty_capsules.add(capsule.id)
+        state.xp_awarded = True
+
+    # ------------------------------------------------------------------
+    # Writing
+    # ------------------------------------------------------------------
+    def _write_state(self, state: _LearnerState) -> None:
+        """Write every pending mutation, one statement per table."""
+
+        if state.answer_logs:
+            self.db.execute(insert(UserAnswerLog), state.answer_logs)
+
+        if state.progress_deltas:
+            rows = []
+            for atom_id, delta in state.progress_deltas.items():
+                progress = state.progress[atom_id]
+                rows.append(
+                    {
+                        "user_id": self.user_id,
+                        "atom_id": atom_id,
+                        "status": progress.status,
+                        "strength": 0.0,
+                        "attempts": delta["attempts"],
+                        "success_count": delta["success_count"],
+                        "failure_count": delta["failure_count"],
+                        "reset_count": progress.reset_count,
+                        "last_attempt_at": progress.last_attempt_at,
+                        "completed_at": progress.completed_at,
+                        "xp_awarded": progress.xp_awarded,
+                    }
+                )
+            stmt = upsert_insert(self.db, UserAtomProgress).values(rows)
+            # Counters are incremented server-side so concurrent answers add up.
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["user_id", "atom_id"],
+                set_={
+                    "attempts": func.coalesce(UserAtomProgress.attempts, 0)
+                    + stmt.excluded.attempts,
+                    "success_count": func.coalesce(UserAtomProgress.success_count, 0)
+                    + stmt.excluded.success_count,
+                    "failure_count": func.coalesce(UserAtomProgress.failure_count, 0)
+                    + stmt.excluded.failure_count,
+                    "status": stmt.excluded.status,
+                    "last_attempt_at": stmt.excluded.last_attempt_at,
+                    "completed_at": stmt.excluded.completed_at,
+                    "xp_awarded": stmt.excluded.xp_awarded,
+                },
+            )
+            self.db.execute(stmt)
+
+        if state.dirty_schedules:
+            now = datetime.utcnow()
+            rows = [
+                {
+                    "user_id": self.user_id,
+                    "molecule_id": molecule_id,
+                    "updated_at": now,
+                    **{
+                        name: getattr(state.schedules[molecule_id], name)
+                        for name in SCHEDULE_FIELDS
+                    },
+                }
+                for molecule_id in state.dirty_schedules
+            ]
+            stmt = upsert_insert(self.db, UserMoleculeReview).values(rows)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["user_id", "molecule_id"],
+                set_={
+                    name: getattr(stmt.excluded, name) for name in (*SCHEDULE_FIELDS, "updated_at")
+                },
+            )
+            self.db.execute(stmt)
+
+        for capsule_id in state.dirty_capsules:
+            capsule_progress = state.capsule_progress[capsule_id]
+            if capsule_progress.id is None:
+                self.db.execute(
+                    insert(UserCapsuleProgress).values(
+                        user_id=self.user_id,
+                        capsule_id=capsule_id,
+                        skill_id=1,
+                        xp=capsule_progress.xp,
+                        bonus_xp=capsule_progress.bonus_xp,
+                    )
+                )
+            elif capsule_progress.xp_delta or capsule_progress.bonus_delta:
+                self.db.execute(
+                    update(UserCapsuleProgress)
+                    .where(UserCapsuleProgress.id == capsule_progress.id)
+                    .values(
+                        xp=UserCapsuleProgress.xp + capsule_progress.xp_delta,
+                        bonus_xp=UserCapsuleProgress.bonus_xp + capsule_progress.bonus_delta,
+                    )
+                    .execution_options(synchronize_session=False)
+                )
+
+    def _finalize(self, state: _LearnerState) -> None:
+        self.db.commit()
+        SRSService.invalidate_user_cache(self.user_id)
+        CoachContextService.invalidate_user_cache(self.user_id)
+        if state.xp_awarded:
+            award_completion_badges(self.db, self.user_id)
+
+    @staticmethod
+    def _normalize_client_timestamp(value: Optional[datetime], now: datetime) -> datetime:
+        """Convert a client timestamp to naive UTC, never later than ``now``."""
+
+        if value is None:
+            return now
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return min(value, now)
+
+    def _snapshot(self, state: _LearnerState, molecule: SimpleNamespace) -> dict:
+        return self._capsule_service.completion_snapshot_from_state(molecule, state.progress)
+
+
+__all__ = ["AnswerRecordingService"]
@@ -10,9 +10,63 @@ from app.models.capsule.capsule_model import Capsule
 from app.models.capsule.molecule_model import Molecule
 from typing import Dict, Any, Optional, List
 from app.models.capsule.atom_model import Atom, AtomContentType
+from app.services.ingestion import format_passages, load_chunk_retriever, retrieve_passages
 
 logger = logging.getLogger(__name__)
 
+
+def normalize_sample_tests(raw_tests: Any, default: list[dict[str, str]]) -> list[dict[str, str]]:
+    """``[{"input", "output"}]`` test cases from the formats the model produces; ``default`` if none."""
+
+    if isinstance(raw_tests, dict):
+        if "tests" in raw_tests and isinstance(raw_tests["tests"], list):
+            raw_tests = raw_tests["tests"]
+        elif "samples" in raw_tests and isinstance(raw_tests["samples"], list):
+            raw_tests = raw_tests["samples"]
+        else:
+            raw_tests = list(raw_tests.values())
+
+    normalized: list[dict[str, str]] = []
+    if isinstance(raw_tests, list):
+        for entry in raw_tests:
+            if isinstance(entry, dict):
+                input_value = entry.get("input") if "input" in entry else entry.get("stdin")
+                output_value = (
+                    entry.get("output")
+                    if "output" in entry
+                    else entry.get("expected")
+                )
+            elif isinstance(entry, (tuple, list)) and len(entry) >= 2:
+                input_value, output_value = entry[0], entry[1]
+            else:
+                continue
+
+            input_str = _stringify_test_field(input_value)
+            output_str = _stringify_test_field(output_value)
+
+            if input_str is None or output_str is None:
+                continue
+
+            normalized.append({"input": input_str, "output": output_str})
+
+    if normalized:
+        return normalized
+    return [dict(item) for item in default]
+
+
+def _stringify_test_field(value: Any) -> str | None:
+    if value is None:
+        return ""
+    if isinstance(value, str):
+        return value.strip("\n")
+    if isinstance(value, (int, float, bool)):
+        return str(value)
+    try:
+        return json.dumps(value, ensure_ascii=False)
+    except TypeError:
+        return str(value)
+
+
 class AtomService:
     """
     Service dédié à la création et à la gestion des Atomes.
@@ -30,6 +84,10 @@ class AtomService:
         self.user = user
         self.capsule = capsule
         self.source_material: Dict[str, Any] | None = source_material or None
+        # Index des passages du document source, chargé au premier besoin
+        self._chunk_retriever: Any = None
+        self._chunk_retriever_loaded = False
+        self._passages_by_molecule: Dict[int, Optional[str]] = {}
 
     def create_atom_content(self, atom_type: AtomContentType, molecule: Molecule, context_atoms: list[Atom], difficulty: Optional[str] = None) -> Dict[str, Any] | None:
         """Aiguille vers la bonne méthode de création en fonction du type d'atome."""
@@ -264,7 +322,7 @@ class AtomService:
             if excerpt_text:
                 segments.append(f"Extraits du support:\n{excerpt_text}")
 
-        source_excerpt = self._get_source_excerpt()
+        source_excerpt = self._get_source_excerpt(molecule)
         if source_excerpt:
             segments.append(f"Sélection de passages bruts:\n{source_excerpt}")
 
@@ -273,7 +331,7 @@ class AtomService:
         return "\n\n".join(segments)
 
     def _get_chapter_metadata(self, molecule: Molecule) -> Optional[Dict[str, Any]]:
-        plan = self.capsule.learning_plan_json or {}
+        plan = getattr(self.capsule, "learning_plan_json", None) or {}
         levels = plan.get("levels")
         if not isinstance(levels, list):
             return None
@@ -286,8 +344,12 @@ class AtomService:
         except (IndexError, AttributeError, TypeError):
             return None
 
-    def _get_source_excerpt(self, max_chars: int = 4000) -> Optional[str]:
-        if not self.source_material:
+    def _get_source_excerpt(self, molecule: Optional[Molecule] = None, max_chars: int = 4000) -> Optional[str]:
+        if molecule is not None and getattr(molecule, "id", None) is not None:
+            passages = self._get_relevant_passages(molecule, max_chars)
+            if passages:
+                return passages
+        if not self.source_material or self.source_material.get("chunked"):
             return None
         text = self.source_material.get("text")
         if not isinstance(text, str):
@@ -295,6 +357,27 @@ class AtomService:
         snippet = text.strip()[:max_chars]
         return snippet or None
 
+    def _get_relevant_passages(self, molecule: Molecule, max_chars: int) -> Optional[str]:
+        """Les passages du document source les plus proches du chapitre (top-k)."""
+        if molecule.id in self._passages_by_molecule:
+            return self._passages_by_molecule[molecule.id]
+        if not self._chunk_retriever_loaded:
+            self._chunk_retriever = load_chunk_retriever(self.db, self.capsule.id)
+            self._chunk_retriever_loaded = True
+        passages = None
+        if self._chunk_retriever is not None:
+            query_parts = [molecule.title]
+            chapter_meta = self._get_chapter_metadata(molecule)
+            if isinstance(chapter_meta, dict):
+                query_parts.append(chapter_meta.get("chapter_summary") or "")
+                query_parts.extend(
+                    point for point in chapter_meta.get("key_points") or [] if isinstance(point, str)
+                )
+            hits = retrieve_passages(self._chunk_retriever, "\n".join(filter(None, query_parts)))
+            passages = format_passages(hits, max_chars) or None
+        self._passages_by_molecule[molecule.id] = passages
+        return passages
+
     def _create_code_example_content(self, molecule: Molecule, context_atoms: list[Atom]) -> Dict[str, Any] | None:
         lesson_text = self._extract_lesson_text(context_atoms)
         language = self._language_from_capsule()
@@ -462,7 +545,7 @@ class AtomService:
             "description": base.get("description") or fallback["description"],
             "language": language,
             "starter_code": dedent(base.get("starter_code") or fallback["starter_code"]).strip("\n"),
-            "sample_tests": self._normalize_sample_tests(base.get("sample_tests"), fallback["sample_tests"]),
+            "sample_tests": normalize_sample_tests(base.get("sample_tests"), fallback["sample_tests"]),
             "hints": self._normalize_string_list(base.get("hints"), fallback["hints"]),
         }
 
@@ -473,46 +556,6 @@ class AtomService:
 
         return normalized
 
-    def _normalize_sample_tests(
-        self,
-        raw_tests: Any,
-        default: list[dict[str, str]],
-    ) -> list[dict[str, str]]:
-        if isinstance(raw_tests, dict):
-            if "tests" in raw_tests and isinstance(raw_tests["tests"], list):
-                raw_tests = raw_tests["tests"]
-            elif "samples" in raw_tests and isinstance(raw_tests["samples"], list):
-                raw_tests = raw_tests["samples"]
-            else:
-                raw_tests = list(raw_tests.values())
-
-        normalized: list[dict[str, str]] = []
-        if isinstance(raw_tests, list):
-            for entry in raw_tests:
-                if isinstance(entry, dict):
-                    input_value = entry.get("input") if "input" in entry else entry.get("stdin")
-                    output_value = (
-                        entry.get("output")
-                        if "output" in entry
-                        else entry.get("expected")
-                    )
-                elif isinstance(entry, (tuple, list)) and len(entry) >= 2:
-                    input_value, output_value = entry[0], entry[1]
-                else:
-                    continue
-
-                input_str = self._stringify_test_field(input_value)
-                output_str = self._stringify_test_field(output_value)
-
-                if input_str is None or output_str is None:
-                    continue
-
-                normalized.append({"input": input_str, "output": output_str})
-
-        if normalized:
-            return normalized
-        return [dict(item) for item in default]
-
     def _normalize_string_list(self, value: Any, default: list[str]) -> list[str]:
         items: list[str] = []
         if isinstance(value, list):
@@ -527,18 +570,6 @@ class AtomService:
             return items
         return list(default)
 
-    def _stringify_test_field(self, value: Any) -> str | None:
-        if value is None:
-            return ""
-        if isinstance(value, str):
-            return value.strip("\n")
-        if isinstance(value, (int, float, bool)):
-            return str(value)
-        try:
-            return json.dumps(value, ensure_ascii=False)
-        except TypeError:
-            return str(value)
-
     def _fallback_code_challenge(self, language: str, lesson_title: str) -> Dict[str, Any]:
         language = (language or "python").lower()
         if language != "python":
@@ -0,0 +1,203 @@
+"""Capsule catalog: the list views of ``/capsules/me`` and ``/capsules/public``.
+
+A page is one query projecting the columns the cards display (no granule /
+molecule / atom tree, no ``learning_plan_json``); the structure counts and the
+user's XP are correlated subqueries evaluated for the page rows only. Pages
+are keyset-paginated with an opaque cursor holding the sort key of the last
+row, so page N costs the same as page 1. The annotated tree is built by the
+detail route only (``CapsuleService.annotate_capsule``).
+"""
+
+from __future__ import annotations
+
+import base64
+import json
+from typing import Any, Optional, Sequence
+
+from app.models.capsule.capsule_model import Capsule
+from app.models.capsule.granule_model import Granule
+from app.models.capsule.molecule_model import Molecule
+from app.models.capsule.utility_models import UserCapsuleEnrollment, UserCapsuleProgress
+from app.models.user.user_model import User
+from app.schemas.capsule.capsule_schema import CapsuleSummary, CapsuleSummaryPage
+from app.services.progress_service import TOTAL_XP
+from fastapi import HTTPException, status
+from sqlalchemy import and_, exists, func, or_, select
+from sqlalchemy.orm import Session
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+SORT_RECENT = "recent"
+SORT_TITLE = "title"
+SORTS = (SORT_RECENT, SORT_TITLE)
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    raw = json.dumps(list(values), separators=(",", ":"), ensure_ascii=False)
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str, size: int) -> list:
+    """Return the cursor values; raises ``ValueError`` on a malformed cursor."""
+
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8"))
+    except (UnicodeError, ValueError, TypeError) as exc:
+        raise ValueError("invalid cursor") from exc
+    if not isinstance(values, list) or len(values) != size:
+        raise ValueError("invalid cursor")
+    return values
+
+
+class CapsuleCatalogService:
+    """Paginated, projected capsule lists for one user."""
+
+    def __init__(self, db: Session, user: User):
+        self.db = db
+        self.user = user
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+    def list_enrolled(
+        self,
+        *,
+        domain: Optional[str] = None,
+        area: Optional[str] = None,
+        sort: str = SORT_RECENT,
+        cursor: Optional[str] = None,
+        limit: int = DEFAULT_PAGE_SIZE,
+    ) -> CapsuleSummaryPage:
+        """Capsules the user is enrolled in; ``recent`` = most recently enrolled first."""
+
+        stmt = (
+            self._projection()
+            .add_columns(UserCapsuleEnrollment.id.label("enrollment_id"))
+            .join(UserCapsuleEnrollment, UserCapsuleEnrollment.capsule_id == Capsule.id)
+            .where(UserCapsuleEnrollment.user_id == self.user.id)
+        )
+        return self._page(
+            stmt, UserCapsuleEnrollment.id, "enrollment_id", domain, area, sort, cursor, limit
+        )
+
+    def list_public(
+        self,
+        *,
+        domain: Optional[str] = None,
+        area: Optional[str] = None,
+        sort: str = SORT_RECENT,
+        cursor: Optional[str] = None,
+        limit: int = DEFAULT_PAGE_SIZE,
+    ) -> CapsuleSummaryPage:
+        """Public capsules the user is NOT enrolled in yet; ``recent`` = newest first."""
+
+        enrolled = exists().where(
+            UserCapsuleEnrollment.capsule_id == Capsule.id,
+            UserCapsuleEnrollment.user_id == self.user.id,
+        )
+        stmt = self._projection().where(Capsule.is_public.is_(True), ~enrolled)
+        return self._page(stmt, Capsule.id, "id", domain, area, sort, cursor, limit)
+
+    # ------------------------------------------------------------------
+    # Helpers
+    # ------------------------------------------------------------------
+    def _projection(self):
+        granule_count = (
+            select(func.count(Granule.id)).where(Granule.capsule_id == Capsule.id).scalar_subquery()
+        )
+        molecule_count = (
+            select(func.count(Molecule.id))
+            .join(Granule, Molecule.granule_id == Granule.id)
+            .where(Granule.capsule_id == Capsule.id)
+            .scalar_subquery()
+        )
+        user_xp = (
+            select(func.max(UserCapsuleProgress.xp))
+            .where(
+                UserCapsuleProgress.capsule_id == Capsule.id,
+                UserCapsuleProgress.user_id == self.user.id,
+            )
+            .scalar_subquery()
+        )
+        return select(
+            Capsule.id,
+            Capsule.title,
+            Capsule.domain,
+            Capsule.area,
+            Capsule.main_skill,
+            Capsule.is_public,
+            Capsule.generation_status,
+            granule_count.label("granule_count"),
+            molecule_count.label("molecule_count"),
+            user_xp.label("user_xp"),
+        )
+
+    def _page(
+        self, stmt, recent_key, recent_label, domain, area, sort, cursor, limit
+    ) -> CapsuleSummaryPage:
+        if sort not in SORTS:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="invalid_sort")
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        if domain:
+            stmt = stmt.where(Capsule.domain == domain)
+        if area:
+            stmt = stmt.where(Capsule.area == area)
+
+        try:
+            if sort == SORT_RECENT:
+                if cursor:
+                    (last_key,) = decode_cursor(cursor, 1)
+                    stmt = stmt.where(recent_key < int(last_key))
+                stmt = stmt.order_by(recent_key.desc())
+            else:
+                if cursor:
+                    last_title, last_id = decode_cursor(cursor, 2)
+                    stmt = stmt.where(
+                        or_(
+                            Capsule.title > str(last_title),
+                            and_(Capsule.title == str(last_title), Capsule.id > int(last_id)),
+                        )
+                    )
+                stmt = stmt.order_by(Capsule.title.asc(), Capsule.id.asc())
+        except (ValueError, TypeError):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="invalid_cursor")
+
+        rows = self.db.execute(stmt.limit(limit + 1)).all()
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]
+            next_cursor = encode_cursor(
+                [getattr(last, recent_label)] if sort == SORT_RECENT else [last.title, last.id]
+            )
+        return CapsuleSummaryPage(
+            items=[self._summary(row) for row in rows], next_cursor=next_cursor
+        )
+
+    @staticmethod
+    def _summary(row) -> CapsuleSummary:
+        user_xp = row.user_xp or 0
+        return CapsuleSummary(
+            id=row.id,
+            title=row.title,
+            domain=row.domain,
+            area=row.area,
+            main_skill=row.main_skill,
+            is_public=row.is_public,
+            generation_status=getattr(row.generation_status, "value", row.generation_status),
+            granule_count=row.granule_count or 0,
+            molecule_count=row.molecule_count or 0,
+            user_xp=user_xp,
+            xp_target=TOTAL_XP,
+            xp_percent=min(1.0, user_xp / TOTAL_XP) if TOTAL_XP else 0.0,
+        )
+
+
+__all__ = [
+    "CapsuleCatalogService",
+    "DEFAULT_PAGE_SIZE",
+    "MAX_PAGE_SIZE",
+    "SORTS",
+    "decode_cursor",
+    "encode_cursor",
+]
@@ -0,0 +1,270 @@
+"""Asynchronous generation of capsules from uploaded PDFs.
+
+``POST /capsules/from-pdf`` only validates the upload and creates a
+:class:`CapsuleJob`; :func:`run_pdf_job` then runs the pipeline (extract →
+chunk → plan → first molecule) as a background task. The job row records the
+current stage, page progress and how long each stage took, and every update
+is also queued as a ``capsule_job`` websocket event through the notification
+outbox. Clients poll ``GET /capsules/jobs/{id}`` or listen to the events; no
+request holds a connection for the whole pipeline.
+
+Extraction and chunking are interleaved (pages are chunked and embedded as
+they are extracted): ``timings["extract"]`` is the time spent waiting for
+pages and ``timings["chunk"]`` the rest of the ingestion.
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, TypeVar
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.capsule.capsule_job_model import CapsuleJob, CapsuleJobStatus
+from app.models.capsule.capsule_model import GenerationStatus
+from app.models.user.user_model import SubscriptionStatus, User
+from app.notifications.outbox import enqueue_event, notification_dispatcher
+from app.schemas.capsule.capsule_schema import CapsuleJobRead
+from app.services.services.capsule_service import CapsuleService
+from fastapi import HTTPException, status
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+JOB_EVENT = "capsule_job"
+STAGES = ("extract", "chunk", "plan", "first_molecule")
+_UNFINISHED = (CapsuleJobStatus.QUEUED, CapsuleJobStatus.RUNNING)
+
+T = TypeVar("T")
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def serialize_job(job: CapsuleJob) -> Dict[str, Any]:
+    return CapsuleJobRead.model_validate(job).model_dump(mode="json")
+
+
+class CapsuleJobProgress:
+    """Stage, page progress and timings of one running job.
+
+    Each update is written in a short transaction of its own session, so the
+    pipeline's session (which keeps the chunks of the document uncommitted
+    until ingestion ends) is never committed early. Page progress is written
+    at most every ``CAPSULE_JOB_PROGRESS_INTERVAL_SECONDS``.
+    """
+
+    def __init__(
+        self,
+        job_id: str,
+        user_id: int,
+        session_factory: Callable[[], Session] = SessionLocal,
+        *,
+        min_interval: Optional[float] = None,
+        clock: Callable[[], float] = time.perf_counter,
+    ) -> None:
+        self.job_id = job_id
+        self.user_id = user_id
+        self._session_factory = session_factory
+        self._min_interval = (
+            settings.CAPSULE_JOB_PROGRESS_INTERVAL_SECONDS if min_interval is None else min_interval
+        )
+        self._clock = clock
+        self.timings: Dict[str, float] = {}
+        self._nested = 0.0  # temps compté par timed() (déduit de l'étape englobante)
+        self._current: Optional[str] = None
+        self._extracting = False
+        self._last_pages_write = float("-inf")
+        self.capsule_id: Optional[int] = None
+
+    # ------------------------------------------------------------------
+    # Hooks appelés par CapsuleService
+    # ------------------------------------------------------------------
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Time the block as stage ``name`` and publish it as the current stage."""
+
+        previous = self._current
+        self._current = name
+        # les pages encore en cours d'extraction restent affichées comme telles
+        self._write(stage="extract" if self._extracting else name)
+        started, nested = self._clock(), self._nested
+        try:
+            yield
+        finally:
+            elapsed = self._clock() - started - (self._nested - nested)
+            self._add_timing(name, elapsed)
+            self._current = previous
+
+    def timed(self, name: str, iterable: Iterable[T]) -> Iterator[T]:
+        """Yield from ``iterable``, counting the time spent producing items as stage ``name``."""
+
+        self._extracting = True
+        iterator = iter(iterable)
+        try:
+            while True:
+                started = self._clock()
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+                finally:
+                    elapsed = self._clock() - started
+                    self._nested += elapsed
+                    self._add_timing(name, elapsed)
+                yield item
+        finally:
+            self._extracting = False
+            if self._current:
+                self._write(stage=self._current)
+
+    def pages(self, done: int, total: int) -> None:
+        """Progress callback of the PDF extraction."""
+
+        if done < total and self._clock() - self._last_pages_write < self._min_interval:
+            return
+        self._last_pages_write = self._clock()
+        self._write(pages_done=done, pages_total=total)
+
+    def attach_capsule(self, capsule_id: int) -> None:
+        self.capsule_id = capsule_id
+        self._write(capsule_id=capsule_id)
+
+    # ------------------------------------------------------------------
+    # Cycle de vie
+    # ------------------------------------------------------------------
+    def start(self) -> None:
+        self._write(status=CapsuleJobStatus.RUNNING, stage=STAGES[0])
+
+    def complete(self, capsule_id: int) -> None:
+        self._write(
+            status=CapsuleJobStatus.COMPLETED, stage=None, capsule_id=capsule_id, finished_at=_now()
+        )
+
+    def fail(self, error: str, *, capsule_id: Optional[int] = None) -> None:
+        self._write(
+            status=CapsuleJobStatus.FAILED,
+            error=error[:100],
+            capsule_id=capsule_id,
+            finished_at=_now(),
+        )
+
+    def _add_timing(self, name: str, seconds: float) -> None:
+        self.timings[name] = round(self.timings.get(name, 0.0) + max(0.0, seconds), 3)
+
+    def _write(self, **changes: Any) -> None:
+        try:
+            with self._session_factory() as db:
+                job = db.get(CapsuleJob, self.job_id)
+                if job is None:
+                    return
+                for key, value in changes.items():
+                    setattr(job, key, value)
+                job.timings = dict(self.timings)
+                job.updated_at = _now()
+                db.flush()
+                enqueue_event(db, self.user_id, {"type": JOB_EVENT, "job": serialize_job(job)})
+                db.commit()
+        except Exception:  # le suivi ne doit jamais faire échouer la génération
+            logger.exception("[JOB] Mise à jour impossible du job %s", self.job_id)
+            return
+        notification_dispatcher.wake()
+
+
+class CapsuleJobService:
+    """Creation and lookup of one user's generation jobs."""
+
+    def __init__(self, db: Session, user: User):
+        self.db = db
+        self.user = user
+
+    def create_pdf_job(self, *, title: str, domain: str, area: str, main_skill: str) -> CapsuleJob:
+        is_premium = (
+            getattr(self.user, "subscription_status", SubscriptionStatus.FREE)
+            == SubscriptionStatus.PREMIUM
+        )
+        if not (getattr(self.user, "is_superuser", False) or is_premium):
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="premium_required")
+        job = CapsuleJob(
+            user_id=self.user.id,
+            params={"title": title, "domain": domain, "area": area, "main_skill": main_skill},
+            updated_at=_now(),
+        )
+        self.db.add(job)
+        self.db.commit()
+        self.db.refresh(job)
+        logger.info("[JOB] Job %s créé pour l'utilisateur %s.", job.id, self.user.id)
+        return job
+
+    def get_job(self, job_id: str) -> CapsuleJob:
+        job = self.db.get(CapsuleJob, job_id)
+        if job is None or job.user_id != self.user.id:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="job_not_found")
+        if job.status in _UNFINISHED and self._is_stale(job):
+            # le worker qui exécutait le job a disparu (redémarrage, déploiement…)
+            job.status = CapsuleJobStatus.FAILED
+            job.error = "job_interrupted"
+            job.finished_at = _now()
+            self.db.commit()
+            self.db.refresh(job)
+        return job
+
+    @staticmethod
+    def _is_stale(job: CapsuleJob) -> bool:
+        last = job.updated_at or job.created_at
+        if last is None:
+            return False
+        if last.tzinfo is None:  # SQLite ne conserve pas le fuseau
+            last = last.replace(tzinfo=timezone.utc)
+        return (_now() - last).total_seconds() > settings.CAPSULE_JOB_STALE_SECONDS
+
+
+def run_pdf_job(
+    job_id: str,
+    pdf_bytes: bytes,
+    session_factory: Callable[[], Session] = SessionLocal,
+) -> None:
+    """Background task: build the capsule of job ``job_id`` from ``pdf_bytes``."""
+
+    with session_factory() as db:
+        job = db.get(CapsuleJob, job_id)
+        user = db.get(User, job.user_id) if job else None
+        if job is None or user is None:
+            logger.error("[JOB] Job %s ou utilisateur introuvable.", job_id)
+            return
+        params = dict(job.params or {})
+        progress = CapsuleJobProgress(job_id, user.id, session_factory)
+        progress.start()
+        try:
+            service = CapsuleService(db=db, user=user, stages=progress)
+            capsule = service.create_capsule_from_pdf_bytes(
+                pdf_bytes=pdf_bytes, progress=progress.pages, **params
+            )
+        except Exception as exc:
+            if not isinstance(exc, HTTPException):
+                logger.exception("[JOB] Échec du job %s", job_id)
+            db.rollback()
+            error = str(exc.detail) if isinstance(exc, HTTPException) else "generation_failed"
+            progress.fail(error, capsule_id=progress.capsule_id)
+            return
+        if capsule.generation_status == GenerationStatus.FAILED:
+            progress.fail("plan_generation_failed", capsule_id=capsule.id)
+            return
+        logger.info(
+            "[JOB] Job %s terminé: capsule %s, étapes %s", job_id, capsule.id, progress.timings
+        )
+        progress.complete(capsule.id)
+
+
+__all__ = [
+    "CapsuleJobProgress",
+    "CapsuleJobService",
+    "JOB_EVENT",
+    "STAGES",
+    "run_pdf_job",
+    "serialize_job",
+]
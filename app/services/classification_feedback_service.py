@@ -10,6 +10,7 @@ from app.models.analytics.classification_feedback_model import ClassificationFee
 from app.models.analytics.vector_store_model import VectorStore
 from app.models.user.user_model import User
 from app.services.rag_utils import get_embedding
+from app.services.retrieval import invalidate_indexes
 from app.core import ai_service
 
 
@@ -122,6 +123,7 @@ class ClassificationFeedbackService:
         )
         self.db.add(vector_entry)
         self.db.commit()
+        invalidate_indexes("vector_store")
         self.db.refresh(feedback)
         self.db.refresh(vector_entry)
 
@@ -0,0 +1,241 @@
+"""Learner context injected into the coach prompt.
+
+Each coach message used to re-run the weak-topics aggregation, the recent
+errors lookup, the focus lesson lookups and a full SRS digest before the LLM
+call. The context only changes when the learner answers, so it is now built
+with one ``UNION ALL`` statement and cached per (user, capsule) for a short
+time; answer logging drops the learner's entries.
+"""
+
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, List
+
+from app.core.ttl_cache import TTLCache
+from app.models.capsule.atom_model import Atom
+from app.models.capsule.granule_model import Granule
+from app.models.capsule.molecule_model import Molecule
+from app.models.user.user_model import User
+from app.services.srs_service import SRSService, _as_naive_utc
+from sqlalchemy import (
+    JSON,
+    CompoundSelect,
+    DateTime,
+    Integer,
+    String,
+    cast,
+    func,
+    literal,
+    null,
+    select,
+    union_all,
+)
+from sqlalchemy.orm import Session
+
+WEAK_TOPICS_LIMIT = 3
+RECENT_ERRORS_LIMIT = 5
+DIGEST_LIMIT = 3
+
+# Consecutive chat turns of a session reuse the context; answer logging
+# invalidates it, the TTL only bounds staleness across workers.
+_COACH_CONTEXT_CACHE: TTLCache["CoachContext"] = TTLCache(ttl_seconds=120)
+
+
+@dataclass(frozen=True)
+class CoachContext:
+    """Prompt snippets describing the learner's state on a capsule."""
+
+    weak_topics: str
+    recent_errors: str
+    focus_description: str
+    srs_reviews: str
+    srs_errors: str
+
+
+class CoachContextService:
+    """Builds and caches :class:`CoachContext` for a learner."""
+
+    def __init__(self, db: Session, user: User):
+        self.db = db
+        self.user = user
+        self.user_id = user.id
+
+    def get_context(
+        self,
+        capsule_id: int,
+        granule_order: int | None = None,
+        molecule_order: int | None = None,
+    ) -> CoachContext:
+        key = (self.user_id, capsule_id, granule_order, molecule_order)
+        return _COACH_CONTEXT_CACHE.get_or_set(
+            key, lambda: self._build_context(capsule_id, granule_order, molecule_order)
+        )
+
+    @classmethod
+    def invalidate_user_cache(cls, user_id: int) -> None:
+        _COACH_CONTEXT_CACHE.invalidate_where(lambda key: key[0] == user_id)
+
+    # ------------------------------------------------------------------
+    # Internal helpers
+    # ------------------------------------------------------------------
+    def _build_context(
+        self, capsule_id: int, granule_order: int | None, molecule_order: int | None
+    ) -> CoachContext:
+        rows = self.db.execute(self._context_query(capsule_id, granule_order, molecule_order)).all()
+
+        recent_errors: List[Any] = []
+        reviews: List[dict] = []
+        molecules: Dict[int, dict] = {}
+        focus_title: str | None = None
+        now = datetime.utcnow()
+
+        for row in rows:
+            if row.kind == "recent_error":
+                recent_errors.append(row)
+            elif row.kind == "review":
+                next_review = _as_naive_utc(row.at)
+                reviews.append(
+                    {
+                        "molecule_title": row.label,
+                        "due_in_hours": (
+                            round((next_review - now).total_seconds() / 3600, 2)
+                            if next_review
+                            else None
+                        ),
+                    }
+                )
+            elif row.kind == "error_type":
+                entry = molecules.setdefault(
+                    row.molecule_id,
+                    {
+                        "molecule_title": row.label,
+                        "total_errors": 0,
+                        "error_types": [],
+                        "last_error_at": row.at,
+                    },
+                )
+                entry["total_errors"] += row.count
+                entry["error_types"].append(
+                    {"error_type": row.detail, "count": row.count, "last_error_at": row.at}
+                )
+                entry["last_error_at"] = max(entry["last_error_at"], row.at)
+            elif row.kind == "focus":
+                focus_title = row.label
+
+        # Same ordering as SRSService.build_error_overview: most errors first,
+        # most recent mistake breaking ties.
+        ranked = sorted(
+            molecules.values(),
+            key=lambda entry: (entry["total_errors"], entry["last_error_at"]),
+            reverse=True,
+        )
+        for entry in ranked:
+            entry["error_types"].sort(
+                key=lambda item: (item["count"], item["last_error_at"]), reverse=True
+            )
+
+        weak_topics = [
+            f"{entry['molecule_title']} ({entry['total_errors']} erreurs)"
+            for entry in ranked[:WEAK_TOPICS_LIMIT]
+        ]
+        digest = SRSService.format_coach_digest(reviews, ranked[:DIGEST_LIMIT])
+        return CoachContext(
+            weak_topics="\n".join(weak_topics) or "Aucun sujet faible identifié pour l'instant.",
+            recent_errors=_format_recent_errors(recent_errors),
+            focus_description=(
+                f"Travail en cours sur la leçon '{focus_title}'." if focus_title else ""
+            ),
+            srs_reviews=digest["reviews"],
+            srs_errors=digest["errors"],
+        )
+
+    def _context_query(
+        self, capsule_id: int, granule_order: int | None, molecule_order: int | None
+    ) -> CompoundSelect:
+        """Recent errors, per-type error counts, next reviews and focus lesson.
+
+        Every branch projects ``(kind, molecule_id, label, detail, count, at,
+        payload)``; NULL placeholders are cast so PostgreSQL can match the
+        branch types, and the first branch carries the DateTime/JSON columns
+        whose result processing applies to the whole union.
+        """
+
+        srs = SRSService(db=self.db, user=self.user)
+        recent = srs.recent_errors_query(capsule_id=capsule_id)
+
+        latest = (
+            select(
+                literal("recent_error").label("kind"),
+                recent.c.molecule_id,
+                Atom.title.label("label"),
+                cast(null(), String).label("detail"),
+                cast(null(), Integer).label("count"),
+                recent.c.created_at.label("at"),
+                recent.c.user_answer_json.label("payload"),
+            )
+            .join(Atom, Atom.id == recent.c.atom_id)
+            .order_by(recent.c.created_at.desc(), recent.c.id.desc())
+            .limit(RECENT_ERRORS_LIMIT)
+            .subquery()
+        )
+        error_types = (
+            select(
+                literal("error_type"),
+                recent.c.molecule_id,
+                Molecule.title,
+                recent.c.error_type,
+                func.count(),
+                func.max(recent.c.created_at),
+                cast(null(), JSON),
+            )
+            .join(Molecule, Molecule.id == recent.c.molecule_id)
+            .group_by(recent.c.molecule_id, Molecule.title, recent.c.error_type)
+        )
+        reviews = srs.review_rows_query(limit=DIGEST_LIMIT, capsule_id=capsule_id).subquery()
+        branches = [
+            select(latest),
+            error_types,
+            select(
+                literal("review"),
+                reviews.c.molecule_id,
+                reviews.c.molecule_title,
+                cast(null(), String),
+                cast(null(), Integer),
+                reviews.c.next_review_at,
+                cast(null(), JSON),
+            ),
+        ]
+        if granule_order is not None and molecule_order is not None:
+            branches.append(
+                select(
+                    literal("focus"),
+                    Molecule.id,
+                    Molecule.title,
+                    cast(null(), String),
+                    cast(null(), Integer),
+                    cast(null(), DateTime(timezone=True)),
+                    cast(null(), JSON),
+                )
+                .join(Granule, Granule.id == Molecule.granule_id)
+                .where(
+                    Granule.capsule_id == capsule_id,
+                    Granule.order == granule_order,
+                    Molecule.order == molecule_order,
+                )
+            )
+        return union_all(*branches)
+
+
+def _format_recent_errors(rows: List[Any]) -> str:
+    if not rows:
+        return "Aucune erreur récente détectée."
+    return "\n".join(
+        f"- {row.label or 'Exercice'} → réponse {json.dumps(row.payload, ensure_ascii=False)}"
+        for row in rows
+    )
+
+
+__all__ = ["CoachContext", "CoachContextService"]
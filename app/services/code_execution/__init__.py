@@ -0,0 +1,23 @@
+"""Sandboxed execution of learners' Python snippets.
+
+A pool of warm, pre-started worker processes (:mod:`.pool`) forks a
+resource-limited child per run, confined by rlimits and, where the kernel
+supports them, Landlock and a seccomp filter denying network access and
+process creation (:mod:`.worker`).
+"""
+
+from app.services.code_execution.pool import (
+    CodeExecutionPool,
+    ExecutionLimits,
+    ExecutionRejected,
+    ExecutionResult,
+    code_execution_pool,
+)
+
+__all__ = [
+    "CodeExecutionPool",
+    "ExecutionLimits",
+    "ExecutionRejected",
+    "ExecutionResult",
+    "code_execution_pool",
+]
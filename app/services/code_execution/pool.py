@@ -0,0 +1,431 @@
+"""Pool of pre-started sandbox workers serving ``POST /programming/execute``.
+
+Each worker is a warm interpreter (:mod:`.worker`) that forks one sandboxed
+child per run, so a request costs a ``fork`` instead of an interpreter
+start-up and no state leaks from one run to the next. The pool bounds the
+work it accepts: at most ``CODE_EXEC_PER_USER`` concurrent runs per user
+(429 beyond), at most ``CODE_EXEC_WORKERS + CODE_EXEC_QUEUE_SIZE`` admitted
+runs overall (503 beyond), and a queued run gives up after
+``CODE_EXEC_QUEUE_TIMEOUT_SECONDS``.
+
+The pool fails closed: unless ``CODE_EXEC_ALLOW_UNCONFINED`` is set, it
+refuses to serve (503) when the workers report that seccomp or Landlock is
+unavailable, or that snippets would run as root (no usable
+``CODE_EXEC_SANDBOX_USER``), including for the workers it respawns; the
+workers then also abort any run whose confinement fails.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import pwd
+import queue
+import select
+import signal
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "worker.py")
+# Délai laissé au worker au-delà de la limite d'exécution (fork, collecte, nettoyage)
+_RESPONSE_GRACE_SECONDS = 5.0
+_READY_TIMEOUT_SECONDS = 15.0
+
+
+class ExecutionRejected(RuntimeError):
+    """The run was not executed; ``status_code``/``detail`` are the API error."""
+
+    def __init__(self, status_code: int, detail: str) -> None:
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+@dataclass(frozen=True)
+class ExecutionLimits:
+    timeout_seconds: float
+    cpu_seconds: int
+    memory_bytes: int
+    file_bytes: int
+    output_bytes: int
+
+    @classmethod
+    def from_settings(cls) -> "ExecutionLimits":
+        return cls(
+            timeout_seconds=settings.CODE_EXEC_TIMEOUT_SECONDS,
+            cpu_seconds=settings.CODE_EXEC_CPU_SECONDS,
+            memory_bytes=settings.CODE_EXEC_MEMORY_MB * 1024 * 1024,
+            file_bytes=settings.CODE_EXEC_FILE_BYTES,
+            output_bytes=settings.CODE_EXEC_OUTPUT_BYTES,
+        )
+
+
+@dataclass
+class ExecutionResult:
+    stdout: str
+    stderr: str
+    exit_code: int
+    timed_out: bool
+    truncated: bool
+    duration_ms: float
+
+
+class _WorkerError(RuntimeError):
+    pass
+
+
+def _sandbox_ids() -> Optional[Tuple[int, int]]:
+    """``(uid, gid)`` of ``CODE_EXEC_SANDBOX_USER``, or ``None`` if the account does not exist."""
+
+    name = settings.CODE_EXEC_SANDBOX_USER
+    try:
+        entry = pwd.getpwuid(int(name)) if name.isdigit() else pwd.getpwnam(name)
+    except KeyError:
+        logger.error("[EXEC] Utilisateur de sandbox introuvable: %s", name)
+        return None
+    return entry.pw_uid, entry.pw_gid
+
+
+class _Worker:
+    """One zygote process and its framed pipe protocol."""
+
+    def __init__(self) -> None:
+        ids = _sandbox_ids()
+        flags = ["--allow-unconfined"] if settings.CODE_EXEC_ALLOW_UNCONFINED else []
+        self.process = subprocess.Popen(
+            [sys.executable, "-I", WORKER_SCRIPT, *flags, *(str(value) for value in ids or ())],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            bufsize=0,
+            cwd=tempfile.gettempdir(),
+            env={"PATH": os.defpath, "LANG": "C.UTF-8"},
+            start_new_session=True,
+        )
+        ready = self.receive(time.monotonic() + _READY_TIMEOUT_SECONDS)
+        self.pid: int = ready["pid"]
+        self.seccomp: bool = bool(ready.get("seccomp"))
+        self.landlock: bool = bool(ready.get("landlock"))
+        self.unprivileged: bool = bool(ready.get("unprivileged"))
+        # enfant en cours (sa propre session), à tuer si le worker est perdu
+        self.child: Optional[int] = None
+
+    @property
+    def confined(self) -> bool:
+        return self.seccomp and self.landlock and self.unprivileged
+
+    def kill_child(self) -> None:
+        if self.child is None:
+            return
+        try:
+            os.killpg(self.child, signal.SIGKILL)
+        except OSError:
+            pass
+        self.child = None
+
+    def alive(self) -> bool:
+        return self.process.poll() is None
+
+    def send(self, payload: Dict[str, Any]) -> None:
+        body = json.dumps(payload).encode("utf-8")
+        try:
+            self.process.stdin.write(struct.pack(">I", len(body)) + body)
+        except OSError as exc:
+            raise _WorkerError(f"worker {self.process.pid} unreachable: {exc}") from exc
+
+    def receive(self, deadline: float) -> Dict[str, Any]:
+        (size,) = struct.unpack(">I", self._read(4, deadline))
+        return json.loads(self._read(size, deadline).decode("utf-8"))
+
+    def _read(self, size: int, deadline: float) -> bytes:
+        fd = self.process.stdout.fileno()
+        data = bytearray()
+        while len(data) < size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not select.select([fd], [], [], remaining)[0]:
+                raise _WorkerError(f"worker {self.process.pid} did not answer in time")
+            chunk = os.read(fd, size - len(data))
+            if not chunk:
+                raise _WorkerError(f"worker {self.process.pid} exited")
+            data += chunk
+        return bytes(data)
+
+    def close(self) -> None:
+        try:
+            self.process.stdin.close()
+            self.process.wait(timeout=2)
+        except (OSError, subprocess.TimeoutExpired):
+            self.process.kill()
+            self.process.wait()
+        finally:
+            self.process.stdout.close()
+
+
+class CodeExecutionPool:
+    """Bounded pool of sandbox workers; :meth:`run` blocks until a result is available."""
+
+    def __init__(
+        self,
+        *,
+        size: Optional[int] = None,
+        queue_size: Optional[int] = None,
+        per_user: Optional[int] = None,
+        queue_timeout: Optional[float] = None,
+    ) -> None:
+        self._size = size
+        self._queue_size = queue_size
+        self._per_user = per_user
+        self._queue_timeout = queue_timeout
+        self._lock = threading.Lock()
+        self._idle: "queue.Queue[_Worker]" = queue.Queue()
+        self._workers: List[_Worker] = []
+        self._admitted = 0
+        self._per_user_running: Dict[Any, int] = defaultdict(int)
+        self._counters = {"executions": 0, "rejected": 0, "respawned": 0}
+
+    # Les réglages sont relus à chaque appel pour suivre les changements de settings
+    @property
+    def size(self) -> int:
+        return max(1, self._size if self._size is not None else settings.CODE_EXEC_WORKERS)
+
+    @property
+    def queue_size(self) -> int:
+        return self._queue_size if self._queue_size is not None else settings.CODE_EXEC_QUEUE_SIZE
+
+    @property
+    def per_user(self) -> int:
+        return self._per_user if self._per_user is not None else settings.CODE_EXEC_PER_USER
+
+    @property
+    def queue_timeout(self) -> float:
+        return (
+            self._queue_timeout
+            if self._queue_timeout is not None
+            else settings.CODE_EXEC_QUEUE_TIMEOUT_SECONDS
+        )
+
+    def start(self) -> None:
+        """Start the missing workers (idempotent).
+
+        Raises :class:`ExecutionRejected` (503) when the sandbox cannot be
+        fully confined and ``CODE_EXEC_ALLOW_UNCONFINED`` is not set.
+        """
+
+        with self._lock:
+            while len(self._workers) < self.size:
+                worker = self._spawn()
+                self._workers.append(worker)
+                self._idle.put(worker)
+
+    def run(
+        self,
+        code: str,
+        *,
+        stdin: str = "",
+        user_id: Any = None,
+        limits: Optional[ExecutionLimits] = None,
+    ) -> ExecutionResult:
+        response = self._submit(
+            {"code": code, "stdin": stdin}, user_id, limits or ExecutionLimits.from_settings()
+        )
+        return _to_result(response)
+
+    def grade(
+        self,
+        code: str,
+        inputs: Sequence[str],
+        *,
+        case_timeout: float,
+        user_id: Any = None,
+        limits: Optional[ExecutionLimits] = None,
+    ) -> List[ExecutionResult]:
+        """Run ``code`` once per stdin of ``inputs`` in a single sandboxed child.
+
+        ``limits`` apply to the whole batch (the wall-clock and CPU budgets
+        should cover ``case_timeout`` for every case); each case also stops
+        after ``case_timeout`` seconds. When the child dies before reporting
+        (batch budget exhausted, memory limit), every case gets its outcome.
+        """
+
+        limits = limits or ExecutionLimits.from_settings()
+        payload = {
+            "code": code,
+            "stdin": "",
+            "cases": [{"input": value} for value in inputs],
+            "case_timeout": case_timeout,
+        }
+        response = self._submit(payload, user_id, limits)
+        try:
+            cases = json.loads(response["stdout"]) if response["exit_code"] == 0 else None
+        except ValueError:
+            cases = None
+        if not isinstance(cases, list) or len(cases) != len(inputs):
+            # le lot n'a pas abouti: même issue pour chaque cas
+            failed = {**response, "stdout": "", "exit_code": response["exit_code"] or 1}
+            return [_to_result(failed) for _ in inputs]
+        return [_to_result(case) for case in cases]
+
+    def shutdown(self) -> None:
+        with self._lock:
+            workers, self._workers = self._workers, []
+            self._idle = queue.Queue()
+        for worker in workers:
+            worker.close()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "workers": len(self._workers),
+                "idle": self._idle.qsize(),
+                "admitted": self._admitted,
+                "seccomp": bool(self._workers) and all(worker.seccomp for worker in self._workers),
+                "landlock": bool(self._workers)
+                and all(worker.landlock for worker in self._workers),
+                "unprivileged": bool(self._workers)
+                and all(worker.unprivileged for worker in self._workers),
+                **self._counters,
+            }
+
+    # ------------------------------------------------------------------
+    # Interne
+    # ------------------------------------------------------------------
+    def _admit(self, user_id: Any) -> None:
+        with self._lock:
+            if user_id is not None and self._per_user_running[user_id] >= self.per_user:
+                self._counters["rejected"] += 1
+                raise ExecutionRejected(429, "too_many_executions")
+            if self._admitted >= self.size + self.queue_size:
+                self._counters["rejected"] += 1
+                raise ExecutionRejected(503, "execution_queue_full")
+            self._admitted += 1
+            if user_id is not None:
+                self._per_user_running[user_id] += 1
+
+    def _release(self, user_id: Any) -> None:
+        with self._lock:
+            self._admitted -= 1
+            if user_id is not None:
+                self._per_user_running[user_id] -= 1
+                if self._per_user_running[user_id] <= 0:
+                    del self._per_user_running[user_id]
+
+    def _spawn(self) -> _Worker:
+        worker = _Worker()
+        if not worker.confined and not settings.CODE_EXEC_ALLOW_UNCONFINED:
+            worker.close()
+            logger.error(
+                "[EXEC] Sandbox incomplète (seccomp=%s, landlock=%s, non-root=%s): "
+                "exécutions refusées.",
+                worker.seccomp,
+                worker.landlock,
+                worker.unprivileged,
+            )
+            raise ExecutionRejected(503, "sandbox_unavailable")
+        logger.info(
+            "[EXEC] Worker %s prêt (seccomp=%s, landlock=%s, non-root=%s).",
+            worker.pid,
+            worker.seccomp,
+            worker.landlock,
+            worker.unprivileged,
+        )
+        return worker
+
+    def _reject(self) -> None:
+        with self._lock:
+            self._counters["rejected"] += 1
+
+    def _submit(
+        self, payload: Dict[str, Any], user_id: Any, limits: ExecutionLimits
+    ) -> Dict[str, Any]:
+        self._admit(user_id)
+        try:
+            if len(self._workers) < self.size:
+                try:
+                    self.start()
+                except ExecutionRejected:
+                    self._reject()
+                    raise
+            try:
+                worker = self._idle.get(timeout=self.queue_timeout)
+            except queue.Empty:
+                self._reject()
+                raise ExecutionRejected(503, "execution_queue_timeout") from None
+            try:
+                response = self._execute(worker, payload, limits)
+            except _WorkerError:
+                logger.exception("[EXEC] Worker %s perdu, remplacement.", worker.pid)
+                try:
+                    worker = self._replace(worker)
+                except ExecutionRejected:
+                    worker = None
+                    self._reject()
+                    raise
+                except _WorkerError:
+                    worker = None
+                    logger.exception("[EXEC] Remplaçant indisponible.")
+                raise ExecutionRejected(503, "execution_unavailable") from None
+            finally:
+                if worker is not None:
+                    self._idle.put(worker)
+        finally:
+            self._release(user_id)
+        with self._lock:
+            self._counters["executions"] += 1
+        return response
+
+    def _execute(
+        self, worker: _Worker, payload: Dict[str, Any], limits: ExecutionLimits
+    ) -> Dict[str, Any]:
+        if not worker.alive():
+            raise _WorkerError(f"worker {worker.pid} exited")
+        worker.send({**payload, "limits": asdict(limits)})
+        deadline = time.monotonic() + limits.timeout_seconds + _RESPONSE_GRACE_SECONDS
+        response = worker.receive(deadline)
+        if "child" in response:
+            worker.child = response["child"]
+            response = worker.receive(deadline)
+            worker.child = None
+        if "error" in response:
+            raise _WorkerError(response["error"])
+        return response
+
+    def _replace(self, worker: _Worker) -> _Worker:
+        """Kill ``worker`` and the run it was supervising, then start a confined replacement.
+
+        Raises :class:`ExecutionRejected` (the lost worker is dropped from the
+        pool) when the replacement cannot be confined.
+        """
+
+        worker.kill_child()
+        worker.process.kill()
+        worker.close()
+        try:
+            replacement = self._spawn()
+        except (ExecutionRejected, _WorkerError):
+            with self._lock:
+                if worker in self._workers:
+                    self._workers.remove(worker)
+            raise
+        with self._lock:
+            self._counters["respawned"] += 1
+            if worker in self._workers:
+                self._workers[self._workers.index(worker)] = replacement
+        return replacement
+
+
+def _to_result(response: Dict[str, Any]) -> ExecutionResult:
+    return ExecutionResult(**{key: response[key] for key in ExecutionResult.__dataclass_fields__})
+
+
+code_execution_pool = CodeExecutionPool()
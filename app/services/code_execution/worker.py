@@ -0,0 +1,741 @@
+"""Sandbox worker ("zygote") process of :mod:`app.services.code_execution`.
+
+Started as ``python -I worker.py [--allow-unconfined] [UID GID]`` by the pool,
+it only depends on the standard library. It preloads the modules snippets commonly import, then
+serves one request at a time over its stdin/stdout: each request is run in a
+child forked from this warm interpreter, so every run starts from the same
+clean state without paying for interpreter start-up.
+
+Before running the snippet, the child:
+
+* switches to the unprivileged sandbox user (uid/gid given on the command
+  line) when the zygote runs as root;
+* gets rlimits on CPU time, address space, file size, open files and
+  processes (no core dumps);
+* is confined by Landlock, where the kernel supports it, to reading the
+  Python installation and writing its own scratch directory (no ``/proc``,
+  no application files or secrets);
+* installs a seccomp filter, where available, denying sockets (including
+  through io_uring), ``execve``, process creation (threads stay allowed),
+  ``ptrace``, signals to other processes and x32 system calls.
+
+Unless ``--allow-unconfined`` is given, a child whose Landlock ruleset or
+seccomp filter cannot be applied exits before running the snippet. The child
+runs in its own session; the zygote reports its pid (``{"child": pid}``)
+before the result so that the pool can kill it if the zygote itself is lost,
+and never waits for it past the run's deadline.
+
+A request carrying ``cases`` runs the grading harness (:func:`_grade`)
+instead: the submission is compiled once and run on every test case's stdin
+within the same child.
+
+Frames are a 4-byte big-endian length followed by UTF-8 JSON.
+"""
+
+from __future__ import annotations
+
+import builtins
+import ctypes
+import io
+import json
+import linecache
+import os
+import platform
+import select
+import selectors
+import shutil
+import signal
+import struct
+import sys
+import tempfile
+import time
+import traceback
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - plateformes non POSIX
+    resource = None
+
+# Modules chargés une fois dans le zygote et hérités par chaque exécution
+PRELOAD = (
+    "bisect",
+    "collections",
+    "copy",
+    "dataclasses",
+    "datetime",
+    "decimal",
+    "enum",
+    "fractions",
+    "functools",
+    "heapq",
+    "itertools",
+    "json",
+    "math",
+    "operator",
+    "random",
+    "re",
+    "statistics",
+    "string",
+    "textwrap",
+    "typing",
+)
+SCRIPT_NAME = "main.py"
+
+# ----------------------------------------------------------------------
+# seccomp (BPF)
+# ----------------------------------------------------------------------
+_PR_SET_NO_NEW_PRIVS = 38
+_PR_GET_SECCOMP = 21
+_PR_SET_SECCOMP = 22
+_SECCOMP_MODE_FILTER = 2
+_RET_ALLOW = 0x7FFF0000
+_RET_KILL_PROCESS = 0x80000000
+_RET_ERRNO_EPERM = 0x00050000 | 1
+_CLONE_THREAD = 0x00010000
+# Numéros d'appel de l'ABI x32 (bit 30), que le filtre ne sait pas lire: refusés en bloc
+_X32_SYSCALL_BIT = 0x40000000
+_LD_W_ABS, _JEQ_K, _JGE_K, _JSET_K, _RET_K = 0x20, 0x15, 0x35, 0x45, 0x06
+
+# (architecture d'audit, appels refusés, clone, clone3, appels de signal vérifiés sur le pid)
+_SYSCALLS = {
+    "x86_64": (
+        0xC000003E,
+        # socket connect accept bind listen accept4 fork vfork execve execveat ptrace tkill
+        # process_vm_readv process_vm_writev io_uring_setup io_uring_enter io_uring_register
+        # (io_uring ouvrirait des sockets sans passer par socket())
+        # rt_sigqueueinfo rt_tgsigqueueinfo pidfd_open pidfd_send_signal (les snippets partagent
+        # l'utilisateur de la sandbox: aucun signal vers une autre exécution)
+        (
+            41,
+            42,
+            43,
+            49,
+            50,
+            288,
+            57,
+            58,
+            59,
+            322,
+            101,
+            200,
+            310,
+            311,
+            425,
+            426,
+            427,
+            129,
+            297,
+            434,
+            424,
+        ),
+        56,
+        435,
+        (62, 234),  # kill, tgkill
+    ),
+    "aarch64": (
+        0xC00000B7,
+        (
+            198,
+            203,
+            202,
+            200,
+            201,
+            242,
+            221,
+            281,
+            117,
+            130,
+            270,
+            271,
+            425,
+            426,
+            427,
+            138,
+            240,
+            434,
+            424,
+        ),
+        220,
+        435,
+        (129, 131),
+    ),
+}
+
+
+class _SockFilter(ctypes.Structure):
+    _fields_ = [
+        ("code", ctypes.c_ushort),
+        ("jt", ctypes.c_ubyte),
+        ("jf", ctypes.c_ubyte),
+        ("k", ctypes.c_uint),
+    ]
+
+
+class _SockFprog(ctypes.Structure):
+    _fields_ = [("len", ctypes.c_ushort), ("filter", ctypes.POINTER(_SockFilter))]
+
+
+def _libc():
+    try:
+        return ctypes.CDLL(None, use_errno=True)
+    except OSError:  # pragma: no cover
+        return None
+
+
+def _seccomp_program(pid: int):
+    spec = _SYSCALLS.get(platform.machine())
+    if spec is None:
+        return None
+    arch, denied, clone, clone3, signals = spec
+    program = [
+        (_LD_W_ABS, 0, 0, 4),  # arch
+        (_JEQ_K, 1, 0, arch),
+        (_RET_K, 0, 0, _RET_KILL_PROCESS),
+        (_LD_W_ABS, 0, 0, 0),  # nr
+        (_JGE_K, 0, 1, _X32_SYSCALL_BIT),
+        (_RET_K, 0, 0, _RET_KILL_PROCESS),
+    ]
+    for number in denied:
+        program += [(_JEQ_K, 0, 1, number), (_RET_K, 0, 0, _RET_ERRNO_EPERM)]
+    # clone3 ne laisse pas inspecter ses drapeaux: ENOSYS fait repasser la libc par clone
+    program += [(_JEQ_K, 0, 1, clone3), (_RET_K, 0, 0, 0x00050000 | 38)]
+    # clone: threads uniquement
+    program += [
+        (_JEQ_K, 0, 4, clone),
+        (_LD_W_ABS, 0, 0, 16),  # args[0] (drapeaux, mot bas)
+        (_JSET_K, 1, 0, _CLONE_THREAD),
+        (_RET_K, 0, 0, _RET_ERRNO_EPERM),
+        (_RET_K, 0, 0, _RET_ALLOW),
+    ]
+    # kill/tgkill: uniquement vers soi-même
+    for number in signals:
+        program += [
+            (_JEQ_K, 0, 4, number),
+            (_LD_W_ABS, 0, 0, 16),
+            (_JEQ_K, 1, 0, pid),
+            (_RET_K, 0, 0, _RET_ERRNO_EPERM),
+            (_RET_K, 0, 0, _RET_ALLOW),
+        ]
+    program.append((_RET_K, 0, 0, _RET_ALLOW))
+    return program
+
+
+def seccomp_available() -> bool:
+    libc = _libc()
+    if libc is None or platform.machine() not in _SYSCALLS:
+        return False
+    return libc.prctl(_PR_GET_SECCOMP, 0, 0, 0, 0) >= 0
+
+
+def _install_seccomp(pid: int) -> bool:
+    libc = _libc()
+    program = _seccomp_program(pid)
+    if libc is None or program is None:
+        return False
+    filters = (_SockFilter * len(program))(*[_SockFilter(*instruction) for instruction in program])
+    fprog = _SockFprog(len(program), filters)
+    if libc.prctl(_PR_SET_NO_NEW_PRIVS, 1, 0, 0, 0) != 0:
+        return False
+    return libc.prctl(_PR_SET_SECCOMP, _SECCOMP_MODE_FILTER, ctypes.byref(fprog), 0, 0) == 0
+
+
+# ----------------------------------------------------------------------
+# Landlock
+# ----------------------------------------------------------------------
+_LANDLOCK_CREATE_RULESET, _LANDLOCK_ADD_RULE, _LANDLOCK_RESTRICT_SELF = 444, 445, 446
+_LANDLOCK_CREATE_RULESET_VERSION = 1
+_LANDLOCK_RULE_PATH_BENEATH = 1
+_FS_EXECUTE, _FS_WRITE_FILE, _FS_READ_FILE, _FS_READ_DIR = 1 << 0, 1 << 1, 1 << 2, 1 << 3
+_FS_ALL_V1 = (1 << 13) - 1
+_FS_FILE_RIGHTS = _FS_EXECUTE | _FS_WRITE_FILE | _FS_READ_FILE
+_FS_READ = _FS_EXECUTE | _FS_READ_FILE | _FS_READ_DIR
+
+
+class _RulesetAttr(ctypes.Structure):
+    _fields_ = [("handled_access_fs", ctypes.c_uint64)]
+
+
+class _PathBeneathAttr(ctypes.Structure):
+    _pack_ = 1
+    _fields_ = [("allowed_access", ctypes.c_uint64), ("parent_fd", ctypes.c_int32)]
+
+
+def landlock_available() -> bool:
+    libc = _libc()
+    if libc is None or not sys.platform.startswith("linux"):
+        return False
+    return libc.syscall(_LANDLOCK_CREATE_RULESET, None, 0, _LANDLOCK_CREATE_RULESET_VERSION) >= 1
+
+
+def _install_landlock(read_paths, write_paths) -> bool:
+    libc = _libc()
+    if libc is None or not landlock_available():
+        return False
+    attr = _RulesetAttr(_FS_ALL_V1)
+    ruleset = libc.syscall(_LANDLOCK_CREATE_RULESET, ctypes.byref(attr), ctypes.sizeof(attr), 0)
+    if ruleset < 0:
+        return False
+    try:
+        for paths, access in ((read_paths, _FS_READ), (write_paths, _FS_ALL_V1)):
+            for path in paths:
+                try:
+                    fd = os.open(path, os.O_PATH | os.O_CLOEXEC)
+                except OSError:
+                    continue
+                try:
+                    allowed = access if os.path.isdir(path) else access & _FS_FILE_RIGHTS
+                    rule = _PathBeneathAttr(allowed, fd)
+                    libc.syscall(
+                        _LANDLOCK_ADD_RULE,
+                        ruleset,
+                        _LANDLOCK_RULE_PATH_BENEATH,
+                        ctypes.byref(rule),
+                        0,
+                    )
+                finally:
+                    os.close(fd)
+        if libc.prctl(_PR_SET_NO_NEW_PRIVS, 1, 0, 0, 0) != 0:
+            return False
+        return libc.syscall(_LANDLOCK_RESTRICT_SELF, ruleset, 0) == 0
+    finally:
+        os.close(ruleset)
+
+
+# ----------------------------------------------------------------------
+# Utilisateur de la sandbox
+# ----------------------------------------------------------------------
+ALLOW_UNCONFINED_FLAG = "--allow-unconfined"
+
+
+def _sandbox_ids(argv):
+    """``(uid, gid)`` passed by the pool as ``worker.py UID GID``, or ``None``."""
+
+    if len(argv) < 2:
+        return None
+    return int(argv[0]), int(argv[1])
+
+
+def _parse_argv(argv):
+    """``(ids, strict)``: sandbox user and whether confinement failures abort the run."""
+
+    strict = ALLOW_UNCONFINED_FLAG not in argv
+    return _sandbox_ids([value for value in argv if value != ALLOW_UNCONFINED_FLAG]), strict
+
+
+def runs_unprivileged(ids) -> bool:
+    """Whether snippets run without root: the zygote is not root, or drops to a non-root user."""
+
+    return os.geteuid() != 0 or (ids is not None and ids[0] != 0 and ids[1] != 0)
+
+
+def _drop_privileges(ids, workdir: str) -> None:
+    if os.geteuid() != 0:
+        return
+    if ids is None:
+        raise PermissionError("no sandbox user configured for a root zygote")
+    uid, gid = ids
+    os.chown(workdir, uid, gid)
+    os.setgroups([])
+    os.setgid(gid)
+    os.setuid(uid)
+    if (os.geteuid(), os.getegid()) != (uid, gid):  # pragma: no cover - défensif
+        raise PermissionError("privileges were not dropped")
+
+
+# ----------------------------------------------------------------------
+# Exécution
+# ----------------------------------------------------------------------
+def _set_limits(limits: dict) -> None:
+    if resource is None:
+        return
+    cpu = int(limits["cpu_seconds"])
+    for name, value in (
+        ("RLIMIT_CPU", (cpu, cpu + 1)),
+        ("RLIMIT_AS", (limits["memory_bytes"],) * 2),
+        ("RLIMIT_FSIZE", (limits["file_bytes"],) * 2),
+        ("RLIMIT_NOFILE", (64, 64)),
+        ("RLIMIT_NPROC", (0, 0)),
+        ("RLIMIT_CORE", (0, 0)),
+    ):
+        if hasattr(resource, name):
+            try:
+                resource.setrlimit(getattr(resource, name), value)
+            except (ValueError, OSError):
+                pass
+
+
+class _CaseInterrupted(BaseException):
+    """Stops the current test case (raised by the harness, never by the snippet)."""
+
+
+class _CaseTimeout(_CaseInterrupted):
+    pass
+
+
+class _OutputLimit(_CaseInterrupted):
+    pass
+
+
+class _CappedOutput(io.StringIO):
+    """In-memory stdout/stderr of one test case, interrupting the case past ``limit`` characters."""
+
+    def __init__(self, limit: int) -> None:
+        super().__init__()
+        self.limit = limit
+
+    def write(self, text: str) -> int:
+        room = self.limit - self.tell()
+        if len(text) > room:
+            super().write(text[: max(0, room)])
+            raise _OutputLimit()
+        return super().write(text)
+
+
+def _exec_main(compiled) -> int:
+    """Run ``compiled`` as ``__main__`` in a fresh namespace; return its exit status."""
+
+    namespace = {"__name__": "__main__", "__builtins__": builtins, "__file__": SCRIPT_NAME}
+    try:
+        exec(compiled, namespace)
+        return 0
+    except _CaseInterrupted:
+        raise
+    except SystemExit as exc:
+        if exc.code is None:
+            return 0
+        if isinstance(exc.code, int):
+            return exc.code & 0xFF
+        print(exc.code, file=sys.stderr)
+        return 1
+    except BaseException as exc:  # noqa: BLE001 - la trace est la sortie attendue
+        # la première frame est celle du worker: seule celle du snippet intéresse l'élève
+        traceback.print_exception(type(exc), exc, exc.__traceback__.tb_next)
+        return 1
+
+
+def _on_alarm(signum, frame):
+    raise _CaseTimeout()
+
+
+def _grade(code: str, cases: list, case_timeout: float, output_bytes: int) -> None:
+    """Test harness: compile the submission once, then run it on each case's stdin.
+
+    Each case runs the program as ``__main__`` in a fresh namespace (modules
+    imported by a previous case stay loaded) with its own stdin, captured
+    output and ``case_timeout`` wall-clock budget. The outputs are written to
+    the real stdout as one JSON list; comparing them with the expected ones is
+    left to the caller, so the expected outputs never enter the sandbox.
+    """
+
+    real_stdout = sys.stdout
+    per_case_limit = max(256, output_bytes // (2 * max(1, len(cases))))
+    try:
+        compiled = compile(code, SCRIPT_NAME, "exec")
+    except SyntaxError as exc:
+        message = "".join(traceback.format_exception(type(exc), exc, None))
+        results = [
+            {
+                "stdout": "",
+                "stderr": message,
+                "exit_code": 1,
+                "timed_out": False,
+                "truncated": False,
+                "duration_ms": 0.0,
+            }
+            for _ in cases
+        ]
+    else:
+        signal.signal(signal.SIGALRM, _on_alarm)
+        results = []
+        for case in cases:
+            stdout, stderr = _CappedOutput(per_case_limit), _CappedOutput(per_case_limit)
+            sys.stdin, sys.stdout, sys.stderr = io.StringIO(case.get("input") or ""), stdout, stderr
+            exit_code, timed_out, truncated = 1, False, False
+            started = time.monotonic()
+            try:
+                try:
+                    signal.setitimer(signal.ITIMER_REAL, case_timeout)
+                    exit_code = _exec_main(compiled)
+                finally:
+                    signal.setitimer(signal.ITIMER_REAL, 0)
+            except _CaseTimeout:
+                timed_out = True
+            except _OutputLimit:
+                truncated = True
+            results.append(
+                {
+                    "stdout": stdout.getvalue(),
+                    "stderr": stderr.getvalue(),
+                    "exit_code": exit_code,
+                    "timed_out": timed_out,
+                    "truncated": truncated,
+                    "duration_ms": round((time.monotonic() - started) * 1000, 2),
+                }
+            )
+    sys.stdout = real_stdout
+    real_stdout.write(json.dumps(results))
+
+
+def _confine(limits: dict, workdir: str, read_paths, ids, strict: bool) -> None:
+    _drop_privileges(ids, workdir)
+    if not _install_landlock(read_paths, [workdir, "/dev/null"]) and strict:
+        raise PermissionError("landlock ruleset could not be applied")
+    _set_limits(limits)
+    if not _install_seccomp(os.getpid()) and strict:
+        raise PermissionError("seccomp filter could not be installed")
+
+
+def _run_child(
+    request: dict,
+    stdin_fd: int,
+    out_fd: int,
+    err_fd: int,
+    workdir: str,
+    read_paths,
+    ids,
+    strict: bool,
+) -> None:
+    """Body of the forked child; never returns."""
+
+    status = 1
+    try:
+        os.setsid()
+        os.dup2(stdin_fd, 0)
+        os.dup2(out_fd, 1)
+        os.dup2(err_fd, 2)
+        os.closerange(3, os.sysconf("SC_OPEN_MAX"))
+        os.chdir(workdir)
+        os.environ.clear()
+        os.environ.update({"HOME": workdir, "TMPDIR": workdir, "LANG": "C.UTF-8"})
+        tempfile.tempdir = workdir
+        sys.stdin = open(0, "r", encoding="utf-8", errors="replace", closefd=False)
+        sys.stdout = open(1, "w", encoding="utf-8", errors="replace", closefd=False)
+        sys.stderr = open(2, "w", encoding="utf-8", errors="replace", closefd=False)
+        sys.argv = [SCRIPT_NAME]
+
+        limits = request["limits"]
+        try:
+            _confine(limits, workdir, read_paths, ids, strict)
+        except OSError as exc:
+            # jamais d'exécution avec les droits du zygote ni sans confinement
+            # (sauf repli explicite)
+            os.write(2, f"sandbox: {exc}\n".encode("utf-8"))
+            raise
+
+        code = request["code"]
+        linecache.cache[SCRIPT_NAME] = (len(code), None, code.splitlines(True), SCRIPT_NAME)
+        if request.get("cases") is not None:
+            _grade(
+                code, request["cases"], float(request["case_timeout"]), int(limits["output_bytes"])
+            )
+            status = 0
+        else:
+            try:
+                compiled = compile(code, SCRIPT_NAME, "exec")
+            except SyntaxError as exc:
+                traceback.print_exception(type(exc), exc, None)
+            else:
+                status = _exec_main(compiled)
+        for stream in (sys.stdout, sys.stderr):
+            try:
+                stream.flush()
+            except Exception:
+                pass
+    finally:
+        os._exit(status)
+
+
+def _stdin_fd(data: str) -> int:
+    raw = data.encode("utf-8")
+    if hasattr(os, "memfd_create"):
+        fd = os.memfd_create("stdin")
+    else:  # pragma: no cover
+        fd, path = tempfile.mkstemp()
+        os.unlink(path)
+    os.write(fd, raw)
+    os.lseek(fd, 0, os.SEEK_SET)
+    return fd
+
+
+def _wait_child(pid: int, deadline: float):
+    """``(wait status, killed)`` of ``pid``, killing its session once ``deadline`` has passed."""
+
+    pidfd = None
+    if hasattr(os, "pidfd_open"):
+        try:
+            pidfd = os.pidfd_open(pid)
+        except OSError:  # noyau sans pidfd
+            pidfd = None
+    try:
+        while True:
+            waited, status = os.waitpid(pid, os.WNOHANG)
+            if waited:
+                return status, False
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            if pidfd is not None:
+                select.select([pidfd], [], [], remaining)
+            else:
+                time.sleep(min(remaining, 0.01))
+    finally:
+        if pidfd is not None:
+            os.close(pidfd)
+    # pipes fermés mais enfant toujours là (p. ex. os.close(1); time.sleep(...)): tué au délai
+    try:
+        os.killpg(pid, signal.SIGKILL)
+    except OSError:
+        pass
+    return os.waitpid(pid, 0)[1], True
+
+
+def execute(request: dict, read_paths, ids=None, strict: bool = True, on_started=None) -> dict:
+    """Fork a child for ``request`` and collect its capped output.
+
+    ``on_started`` is called with the child's pid right after the fork.
+    """
+
+    limits = request["limits"]
+    output_limit = int(limits["output_bytes"])
+    timeout = float(limits["timeout_seconds"])
+    workdir = tempfile.mkdtemp(prefix="sandbox-")
+    stdin_fd = _stdin_fd(request.get("stdin") or "")
+    out_r, out_w = os.pipe()
+    err_r, err_w = os.pipe()
+    started = time.monotonic()
+    pid = os.fork()
+    if pid == 0:  # pragma: no cover - exécuté dans l'enfant
+        _run_child(request, stdin_fd, out_w, err_w, workdir, read_paths, ids, strict)
+    for fd in (stdin_fd, out_w, err_w):
+        os.close(fd)
+    if on_started is not None:
+        on_started(pid)
+
+    buffers = {out_r: bytearray(), err_r: bytearray()}
+    truncated = timed_out = False
+    selector = selectors.DefaultSelector()
+    for fd in buffers:
+        selector.register(fd, selectors.EVENT_READ)
+    deadline = started + timeout
+    try:
+        while selector.get_map():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                timed_out = True
+                break
+            for key, _ in selector.select(remaining):
+                chunk = os.read(key.fd, 65536)
+                if not chunk:
+                    selector.unregister(key.fd)
+                    continue
+                buffer = buffers[key.fd]
+                room = output_limit - len(buffers[out_r]) - len(buffers[err_r])
+                buffer += chunk[: max(0, room)]
+                if len(chunk) > room:
+                    truncated = True
+                    break
+            if truncated:
+                break
+    finally:
+        selector.close()
+        if timed_out or truncated:
+            try:
+                os.killpg(pid, signal.SIGKILL)
+            except OSError:
+                pass
+            _, wait_status = os.waitpid(pid, 0)
+        else:
+            wait_status, killed = _wait_child(pid, deadline)
+            timed_out = killed
+        for fd in buffers:
+            os.close(fd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if os.WIFSIGNALED(wait_status):
+        signum = os.WTERMSIG(wait_status)
+        exit_code = -signum
+        # SIGXCPU: temps CPU épuisé (RLIMIT_CPU)
+        timed_out = timed_out or signum == getattr(signal, "SIGXCPU", -1)
+    else:
+        exit_code = os.WEXITSTATUS(wait_status)
+    return {
+        "stdout": buffers[out_r].decode("utf-8", errors="replace"),
+        "stderr": buffers[err_r].decode("utf-8", errors="replace"),
+        "exit_code": exit_code,
+        "timed_out": timed_out,
+        "truncated": truncated,
+        "duration_ms": round((time.monotonic() - started) * 1000, 2),
+    }
+
+
+# ----------------------------------------------------------------------
+# Boucle du zygote
+# ----------------------------------------------------------------------
+def _read_frame(fd: int):
+    header = _read_exact(fd, 4)
+    if header is None:
+        return None
+    (size,) = struct.unpack(">I", header)
+    body = _read_exact(fd, size)
+    return None if body is None else json.loads(body.decode("utf-8"))
+
+
+def _read_exact(fd: int, size: int):
+    data = bytearray()
+    while len(data) < size:
+        chunk = os.read(fd, size - len(data))
+        if not chunk:
+            return None
+        data += chunk
+    return bytes(data)
+
+
+def _write_frame(fd: int, payload: dict) -> None:
+    body = json.dumps(payload).encode("utf-8")
+    os.write(fd, struct.pack(">I", len(body)) + body)
+
+
+def main() -> None:
+    # le canal avec le pool quitte les fd 0/1: une impression parasite ne peut pas le corrompre
+    channel_in, channel_out = os.dup(0), os.dup(1)
+    null = os.open(os.devnull, os.O_RDWR)
+    os.dup2(null, 0)
+    os.dup2(null, 1)
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    sys.path[:] = [path for path in sys.path if path and os.path.abspath(path) != script_dir]
+    for module in PRELOAD:
+        __import__(module)
+    read_paths = sorted({os.path.realpath(path) for path in sys.path if os.path.isdir(path)}) + [
+        "/dev/null"
+    ]
+    ids, strict = _parse_argv(sys.argv[1:])
+
+    _write_frame(
+        channel_out,
+        {
+            "ready": True,
+            "pid": os.getpid(),
+            "seccomp": seccomp_available(),
+            "landlock": landlock_available(),
+            "unprivileged": runs_unprivileged(ids),
+        },
+    )
+    while True:
+        request = _read_frame(channel_in)
+        if request is None:
+            return
+        try:
+            response = execute(
+                request,
+                read_paths,
+                ids,
+                strict,
+                on_started=lambda pid: _write_frame(channel_out, {"child": pid}),
+            )
+        except Exception as exc:  # pragma: no cover - erreur du zygote lui-même
+            response = {"error": f"{type(exc).__name__}: {exc}"}
+        _write_frame(channel_out, response)
+
+
+if __name__ == "__main__":
+    main()
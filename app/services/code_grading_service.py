@@ -0,0 +1,143 @@
+"""Grading of code challenge submissions against the atom's test cases.
+
+``POST /programming/grade`` runs a submission on every test case of a
+``CODE_CHALLENGE`` atom in one sandboxed process (see
+:meth:`CodeExecutionPool.grade`): the program is compiled once and each
+case gets its own stdin and ``CODE_GRADE_CASE_TIMEOUT_SECONDS``. Outputs are
+compared here, outside the sandbox, and the outcome is recorded as the
+learner's answer to the atom, exactly as ``/progress/log-answer`` would.
+"""
+
+from __future__ import annotations
+
+import math
+from dataclasses import replace
+from typing import Any, Dict, List
+
+from app.core.config import settings
+from app.models.capsule.atom_model import Atom, AtomContentType
+from app.models.user.user_model import User
+from app.services.answer_recording_service import AnswerRecordingService
+from app.services.atom_service import normalize_sample_tests
+from app.services.code_execution import (
+    ExecutionLimits,
+    ExecutionRejected,
+    ExecutionResult,
+    code_execution_pool,
+)
+from fastapi import HTTPException, status
+from sqlalchemy.orm import Session
+
+_SUPPORTED_LANGUAGES = {"python", "py"}
+
+
+def normalize_output(text: str) -> str:
+    """Compare outputs modulo trailing whitespace of each line and trailing blank lines."""
+
+    return "\n".join(line.rstrip() for line in (text or "").rstrip().splitlines())
+
+
+class CodeGradingService:
+    """Run one user's submissions against code challenge tests and record the outcome."""
+
+    def __init__(self, db: Session, user: User):
+        self.db = db
+        self.user = user
+
+    def grade(self, atom_id: int, code: str) -> Dict[str, Any]:
+        atom = self.db.get(Atom, atom_id)
+        if atom is None or not self._can_access(atom):
+            # même réponse qu'un atome inexistant: ni les tests ni l'existence ne fuitent
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Atome introuvable")
+        if atom.content_type != AtomContentType.CODE_CHALLENGE:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST, detail="not_a_code_challenge"
+            )
+        content = dict(atom.content or {})
+        if (content.get("language") or "python").lower() not in _SUPPORTED_LANGUAGES:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Seul Python est supporté pour le moment.",
+            )
+
+        tests = self._test_cases(atom, content)
+        if not tests:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="no_test_cases"
+            )
+
+        runs = self._run(code, [test["input"] for test in tests])
+        cases: List[Dict[str, Any]] = []
+        for index, (test, run) in enumerate(zip(tests, runs)):
+            passed = (
+                run.exit_code == 0
+                and not run.timed_out
+                and not run.truncated
+                and normalize_output(run.stdout) == normalize_output(test["output"])
+            )
+            cases.append(
+                {
+                    "index": index,
+                    "input": test["input"],
+                    "expected": test["output"],
+                    "stdout": run.stdout,
+                    "stderr": run.stderr,
+                    "exit_code": run.exit_code,
+                    "passed": passed,
+                    "timed_out": run.timed_out,
+                    "truncated": run.truncated,
+                    "duration_ms": run.duration_ms,
+                }
+            )
+
+        passed_count = sum(case["passed"] for case in cases)
+        is_correct = passed_count == len(cases)
+        answer = {
+            "code": code,
+            "passed": passed_count,
+            "total": len(cases),
+            "cases": [{"passed": case["passed"], "timed_out": case["timed_out"]} for case in cases],
+        }
+        progress = AnswerRecordingService(db=self.db, user=self.user).record_answer(
+            atom.id, is_correct, answer
+        )
+        return {
+            "atom_id": atom.id,
+            "passed": passed_count,
+            "total": len(cases),
+            "is_correct": is_correct,
+            "cases": cases,
+            "progress": progress,
+        }
+
+    def _can_access(self, atom: Atom) -> bool:
+        """Same rule as the capsule endpoints: public capsules, or the user's own."""
+
+        molecule = atom.molecule
+        capsule = (
+            molecule.granule.capsule
+            if molecule is not None and molecule.granule is not None
+            else None
+        )
+        return capsule is not None and (capsule.is_public or capsule.creator_id == self.user.id)
+
+    def _test_cases(self, atom: Atom, content: Dict[str, Any]) -> List[Dict[str, str]]:
+        # les atomes plus anciens peuvent contenir des tests au format brut du modèle
+        tests = normalize_sample_tests(content.get("sample_tests"), [])
+        return tests[: settings.CODE_GRADE_MAX_CASES]
+
+    def _run(self, code: str, inputs: List[str]) -> List[ExecutionResult]:
+        case_timeout = settings.CODE_GRADE_CASE_TIMEOUT_SECONDS
+        budget = case_timeout * len(inputs) + 1.0
+        limits = replace(
+            ExecutionLimits.from_settings(), timeout_seconds=budget, cpu_seconds=math.ceil(budget)
+        )
+        try:
+            return code_execution_pool.grade(
+                code, inputs, case_timeout=case_timeout, user_id=self.user.id, limits=limits
+            )
+        except ExecutionRejected as exc:
+            raise HTTPException(status_code=exc.status_code, detail=exc.detail) from exc
+
+
+__all__ = ["CodeGradingService", "normalize_output"]
@@ -7,7 +7,7 @@ from app.models.email.email_token import EmailToken, EmailTokenPurpose
 #from .resend_client import send_email
 from .provider import send_email
 
-from .templates import render_confirm, render_reset, render_report_ack
+from .templates import render_confirm, render_notification_digest, render_reset, render_report_ack
 
 
 # Helpers TTL
@@ -49,6 +49,12 @@ async def send_report_ack_email(report_payload: dict, lang: str = 'fr'):
         raise ValueError("Report payload missing reporter email")
     return await send_email(recipient, subject, html)
 
+
+async def send_notification_digest(email: str, notifications: list, lang: str = 'fr'):
+    """Un seul e-mail regroupant les notifications d'une rafale."""
+    subject, html = render_notification_digest(notifications, f"{settings.FRONTEND_BASE_URL}/notifications", lang)
+    return await send_email(email, subject, html)
+
 # Vérifications
 
 def get_valid_token(db: Session, token: str, purpose: EmailTokenPurpose) -> EmailToken:
@@ -1,3 +1,5 @@
+from html import escape
+
 from jinja2 import Template
 
 BASE_WRAPPER = """
@@ -13,6 +15,8 @@ RESET_HTML = Template(BASE_WRAPPER)
 
 REPORT_ACK_HTML = Template(BASE_WRAPPER)
 
+NOTIFICATION_DIGEST_HTML = Template(BASE_WRAPPER)
+
 L = {
   "fr": {
     "confirm": {
@@ -39,6 +43,11 @@ L = {
       "good_faith_no": "Non fournie",
       "anonymous": "Anonyme",
       "closing": "Tu recevras un suivi si des informations complémentaires sont nécessaires."
+    },
+    "notification_digest": {
+      "subject": "Tes nouvelles notifications",
+      "lead": "Voici ce qui s’est passé sur Nanshe :",
+      "cta": "Voir mes notifications"
     }
   },
   "en": {
@@ -66,6 +75,11 @@ L = {
       "good_faith_no": "Missing",
       "anonymous": "Anonymous",
       "closing": "We will reach out if we need more information."
+    },
+    "notification_digest": {
+      "subject": "Your new notifications",
+      "lead": "Here is what happened on Nanshe:",
+      "cta": "See my notifications"
     }
   },
   "nl": {
@@ -93,6 +107,11 @@ L = {
       "good_faith_no": "Ontbreekt",
       "anonymous": "Anoniem",
       "closing": "We nemen contact op als we bijkomende informatie nodig hebben."
+    },
+    "notification_digest": {
+      "subject": "Je nieuwe meldingen",
+      "lead": "Dit is er gebeurd op Nanshe:",
+      "cta": "Mijn meldingen bekijken"
     }
   }
 }
@@ -129,3 +148,15 @@ def render_report_ack(payload: dict, lang: str):
   <p>{messages['closing']}</p>
   """
   return messages['subject'], REPORT_ACK_HTML.render(body=body)
+
+def render_notification_digest(notifications: list, url: str, lang: str):
+  m = L.get(lang, L["fr"])['notification_digest']
+  items = "".join(
+    f"<li><strong>{escape(n['title'])}</strong> — {escape(n['message'])}</li>" for n in notifications
+  )
+  body = f"""
+  <p>{m['lead']}</p>
+  <ul style=\"padding-left:20px;margin:0 0 16px\">{items}</ul>
+  <p><a href=\"{url}\" style=\"display:inline-block;padding:10px 16px;border-radius:8px;background:#7c3aed;color:#fff;text-decoration:none\">{m['cta']}</a></p>
+  """
+  return m['subject'], NOTIFICATION_DIGEST_HTML.render(body=body)
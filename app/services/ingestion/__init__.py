@@ -0,0 +1,50 @@
+"""Ingestion of the documents (PDF, text) capsules are generated from.
+
+Pages are extracted in parallel and cached by content hash (:mod:`.pdf`), grouped into overlapping
+heading/paragraph chunks (:mod:`.chunking`), embedded in batches and stored
+with their page offsets (:mod:`.store`). The plan prompt receives the outline
+and a digest sampled over the whole document; each chapter's atoms then
+retrieve only the few chunks relevant to it.
+"""
+
+from app.services.ingestion.chunking import Chunk, chunk_pages, chunk_text
+from app.services.ingestion.pdf import (
+    InvalidPdfError,
+    PageText,
+    PdfTimeoutError,
+    PdfTooLargeError,
+    PdfUnavailableError,
+    ProgressCallback,
+    extract_pdf_pages,
+    iter_pdf_pages,
+    shutdown_pdf_pool,
+)
+from app.services.ingestion.store import (
+    IngestReport,
+    delete_chunks,
+    format_passages,
+    ingest_chunks,
+    load_chunk_retriever,
+    retrieve_passages,
+)
+
+__all__ = [
+    "Chunk",
+    "IngestReport",
+    "InvalidPdfError",
+    "PageText",
+    "PdfTimeoutError",
+    "PdfTooLargeError",
+    "PdfUnavailableError",
+    "ProgressCallback",
+    "chunk_pages",
+    "chunk_text",
+    "delete_chunks",
+    "extract_pdf_pages",
+    "format_passages",
+    "ingest_chunks",
+    "iter_pdf_pages",
+    "load_chunk_retriever",
+    "retrieve_passages",
+    "shutdown_pdf_pool",
+]
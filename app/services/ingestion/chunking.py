@@ -0,0 +1,229 @@
+"""Heading/paragraph-aware chunking with overlap, streaming over pages."""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from typing import Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from .pdf import PageText
+
+DEFAULT_CHUNK_CHARS = 1200
+DEFAULT_OVERLAP_CHARS = 200
+MAX_HEADING_CHARS = 90
+
+_SECTION_WORD = re.compile(
+    r"^(chapitre|chapter|partie|part|section|annexe|appendix|leçon|lesson|module|unit[ée]?)\b",
+    re.IGNORECASE,
+)
+_NUMBERED = re.compile(r"^(\d+(\.\d+)*|[IVXLC]+)[.)]?\s+\S")
+_SENTENCE_END = re.compile(r"(?<=[.!?…])\s+")
+_HYPHENATED = re.compile(r"(\w)-\n\s*(\w)")
+_SPACES = re.compile(r"\s+")
+_LINE = re.compile(r"[^\n]*\n?")
+
+
+@dataclass(frozen=True)
+class Chunk:
+    position: int
+    text: str
+    heading: Optional[str]
+    page_start: int
+    page_end: int
+    char_start: int
+    char_end: int
+
+    @property
+    def index_text(self) -> str:
+        """Text embedded and indexed: the section title helps both rankings."""
+
+        return f"{self.heading}\n{self.text}" if self.heading else self.text
+
+
+class _Span(NamedTuple):
+    page: int
+    start: int
+    end: int
+    raw: str
+
+    @property
+    def text(self) -> str:
+        return normalize_text(self.raw)
+
+
+def normalize_text(raw: str) -> str:
+    """Join hyphenated line breaks and collapse whitespace."""
+
+    return _SPACES.sub(" ", _HYPHENATED.sub(r"\1\2", raw)).strip()
+
+
+def is_heading(line: str) -> bool:
+    line = line.strip()
+    if not 3 <= len(line) <= MAX_HEADING_CHARS or line[-1] in ".,;!?":
+        return False
+    if _SECTION_WORD.match(line) or _NUMBERED.match(line):
+        return len(line.split()) <= 12
+    letters = [ch for ch in line if ch.isalpha()]
+    return len(letters) >= 4 and all(ch.isupper() for ch in letters) and len(line.split()) <= 10
+
+
+def _blocks(page: PageText) -> Iterator[Tuple[bool, _Span]]:
+    """``(is_heading, span)`` for each heading line and paragraph of a page."""
+
+    text = page.text
+    start: Optional[int] = None
+    end = 0
+    for match in _LINE.finditer(text):
+        line = match.group().rstrip("\n")
+        if not match.group():
+            break
+        stripped = line.strip()
+        if not stripped or is_heading(stripped):
+            if start is not None:
+                yield False, _Span(page.number, start, end, text[start:end])
+                start = None
+            if stripped:
+                offset = match.start() + line.index(stripped)
+                yield True, _Span(page.number, offset, offset + len(stripped), stripped)
+            continue
+        if start is None:
+            start = match.start() + line.index(stripped)
+        end = match.start() + len(line.rstrip())
+    if start is not None:
+        yield False, _Span(page.number, start, end, text[start:end])
+
+
+def _split_long(span: _Span, limit: int) -> Iterator[_Span]:
+    """Cut a paragraph longer than ``limit`` at sentence (or word) boundaries."""
+
+    if len(span.raw) <= limit:
+        yield span
+        return
+    cursor = 0
+    pieces: List[Tuple[int, int]] = []
+    for match in _SENTENCE_END.finditer(span.raw):
+        pieces.append((cursor, match.start()))
+        cursor = match.end()
+    pieces.append((cursor, len(span.raw)))
+
+    current: Optional[Tuple[int, int]] = None
+    for start, end in pieces:
+        while end - start > limit:  # phrase géante: coupe sur un espace
+            cut = span.raw.rfind(" ", start, start + limit)
+            cut = cut if cut > start else start + limit
+            if current:
+                yield _piece(span, *current)
+                current = None
+            yield _piece(span, start, cut)
+            start = cut + 1 if span.raw[cut : cut + 1] == " " else cut
+        if current and end - current[0] > limit:
+            yield _piece(span, *current)
+            current = None
+        current = (current[0], end) if current else (start, end)
+    if current:
+        yield _piece(span, *current)
+
+
+def _piece(span: _Span, start: int, end: int) -> _Span:
+    return _Span(span.page, span.start + start, span.start + end, span.raw[start:end])
+
+
+def _tail(span: _Span, budget: int) -> Optional[_Span]:
+    """The last ``budget`` characters of ``span``, starting on a word boundary."""
+
+    if len(span.raw) <= budget:
+        return span
+    cut = span.raw.find(" ", len(span.raw) - budget)
+    if cut < 0:
+        return None
+    return _piece(span, cut + 1, len(span.raw))
+
+
+def chunk_pages(
+    pages: Iterable[PageText],
+    *,
+    chunk_chars: int = DEFAULT_CHUNK_CHARS,
+    overlap_chars: int = DEFAULT_OVERLAP_CHARS,
+) -> Iterator[Chunk]:
+    """Group paragraphs into chunks of about ``chunk_chars`` characters.
+
+    A heading always starts a new chunk (and becomes its ``heading``); inside
+    a section, each chunk repeats the last ``overlap_chars`` characters of the
+    previous one so that no passage is cut without context. Pages are consumed
+    one at a time, so a whole textbook is never held in memory.
+    """
+
+    if overlap_chars >= chunk_chars:
+        raise ValueError("overlap_chars must be smaller than chunk_chars")
+
+    heading: Optional[str] = None
+    heading_open = False  # plusieurs lignes de titre consécutives forment un seul titre
+    buffer: List[_Span] = []
+    carried = 0  # nombre de spans du buffer repris du chunk précédent
+    size = 0
+    position = 0
+
+    def emit() -> Chunk:
+        nonlocal position
+        position += 1
+        first, last = buffer[0], buffer[-1]
+        return Chunk(
+            position=position,
+            text="\n".join(span.text for span in buffer),
+            heading=heading,
+            page_start=first.page,
+            page_end=last.page,
+            char_start=first.start,
+            char_end=last.end,
+        )
+
+    for page in pages:
+        for heading_line, block in _blocks(page):
+            if heading_line:
+                if len(buffer) > carried:
+                    yield emit()
+                buffer, carried, size = [], 0, 0
+                title = normalize_text(block.raw)
+                heading = f"{heading} — {title}"[:255] if heading_open and heading else title[:255]
+                heading_open = True
+                continue
+            heading_open = False
+            for span in _split_long(block, chunk_chars - overlap_chars):
+                length = len(span.text)
+                if not length:
+                    continue
+                if len(buffer) > carried and size + length > chunk_chars:
+                    yield emit()
+                    tail: List[_Span] = []
+                    budget = overlap_chars
+                    for previous in reversed(buffer):
+                        piece = _tail(previous, budget)
+                        if piece is None:
+                            break
+                        tail.insert(0, piece)
+                        budget -= len(piece.raw) + 1
+                        if piece is not previous or budget <= 0:
+                            break
+                    buffer, carried = tail, len(tail)
+                    size = sum(len(piece.text) + 1 for piece in tail)
+                buffer.append(span)
+                size += length + 1
+    if len(buffer) > carried:
+        yield emit()
+
+
+def chunk_text(text: str, **kwargs) -> Iterator[Chunk]:
+    """Chunk a plain text document (a single "page")."""
+
+    return chunk_pages([PageText(1, text or "")], **kwargs)
+
+
+__all__ = [
+    "Chunk",
+    "DEFAULT_CHUNK_CHARS",
+    "DEFAULT_OVERLAP_CHARS",
+    "chunk_pages",
+    "chunk_text",
+    "is_heading",
+    "normalize_text",
+]
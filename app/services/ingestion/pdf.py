@@ -0,0 +1,243 @@
+"""Page-by-page text extraction of uploaded PDFs.
+
+:func:`iter_pdf_pages` reads pages serially in the calling thread.
+:func:`extract_pdf_pages` is what uploads use: large documents are split into
+page ranges extracted by a shared process pool, pages are yielded in order as
+soon as their range is done (so chunking and embedding overlap extraction),
+and the extracted text is cached under the document's SHA-256 so that
+re-uploading the same file costs nothing.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import io
+import logging
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Callable, Deque, Iterator, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.pdf_text import (
+    InvalidPdfError,
+    PdfUnavailableError,
+    extract_page,
+    extract_range,
+    open_reader,
+    page_count,
+)
+from app.core.ttl_cache import TTLCache
+
+if TYPE_CHECKING:  # pragma: no cover
+    from pypdf import PdfReader
+
+logger = logging.getLogger(__name__)
+
+ProgressCallback = Callable[[int, int], None]  # (pages traitées, pages totales)
+
+
+class PdfTooLargeError(ValueError):
+    """The document has more pages than ``PDF_MAX_PAGES``."""
+
+
+class PdfTimeoutError(TimeoutError):
+    """Extraction did not finish within ``PDF_EXTRACT_TIMEOUT_SECONDS``."""
+
+
+@dataclass(frozen=True)
+class PageText:
+    number: int  # 1-based
+    text: str
+
+
+# Par empreinte SHA-256 du document: (nombre de pages, pages avec du texte)
+_PAGE_CACHE: TTLCache[Tuple[int, Tuple[PageText, ...]]] = TTLCache(
+    ttl_seconds=settings.PDF_TEXT_CACHE_TTL_SECONDS, maxsize=settings.PDF_TEXT_CACHE_SIZE
+)
+
+
+def iter_pdf_pages(pdf_bytes: bytes) -> Iterator[PageText]:
+    """Yield the text of each page as it is extracted.
+
+    Pages are parsed lazily by the reader, so only the current page's text is
+    held in memory; pages without extractable text are skipped.
+    """
+
+    reader = open_reader(io.BytesIO(pdf_bytes))
+    total = page_count(reader)
+    extracted = 0
+    for index in range(total):
+        text = extract_page(reader, index)
+        if text is None:
+            continue
+        extracted += 1
+        yield PageText(index + 1, text)
+    logger.info("[PDF] Pages lues: %s / %s", extracted, total)
+
+
+# ----------------------------------------------------------------------
+# Extraction parallèle
+# ----------------------------------------------------------------------
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _worker_count() -> int:
+    return settings.PDF_EXTRACT_WORKERS or min(4, os.cpu_count() or 1)
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    """Shared pool, started on first use.
+
+    ``forkserver`` (or ``spawn``) rather than ``fork``: the API process runs
+    threads (event loop, DB pools) that must not be duplicated into workers.
+    Workers only import :mod:`app.core.pdf_text`.
+    """
+
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            methods = multiprocessing.get_all_start_methods()
+            context = multiprocessing.get_context(
+                "forkserver" if "forkserver" in methods else "spawn"
+            )
+            _executor = ProcessPoolExecutor(max_workers=_worker_count(), mp_context=context)
+        return _executor
+
+
+def shutdown_pdf_pool() -> None:
+    """Stop the extraction workers (application shutdown, tests)."""
+
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+
+
+def _extract_serially(
+    reader: "PdfReader", total: int, deadline: float, progress: Optional[ProgressCallback]
+) -> Iterator[PageText]:
+    for index in range(total):
+        if time.time() > deadline:
+            raise PdfTimeoutError(f"extraction stopped after {index} / {total} pages")
+        text = extract_page(reader, index)
+        if text is not None:
+            yield PageText(index + 1, text)
+        if progress:
+            progress(index + 1, total)
+
+
+def _extract_in_pool(
+    pdf_bytes: bytes, key: str, total: int, deadline: float, progress: Optional[ProgressCallback]
+) -> Iterator[PageText]:
+    executor = _get_executor()
+    step = max(1, settings.PDF_PAGES_PER_TASK)
+    ranges = deque((start, min(start + step, total)) for start in range(0, total, step))
+    # Fenêtre bornée: un consommateur lent (embeddings) ne fait pas gonfler la mémoire
+    window = 2 * _worker_count()
+    pending: Deque[Tuple[int, Future]] = deque()
+
+    handle, path = tempfile.mkstemp(suffix=".pdf")
+    try:
+        with os.fdopen(handle, "wb") as file:
+            file.write(pdf_bytes)
+
+        def submit() -> None:
+            while ranges and len(pending) < window:
+                start, end = ranges.popleft()
+                pending.append(
+                    (end, executor.submit(extract_range, path, key, start, end, deadline))
+                )
+
+        submit()
+        while pending:
+            end, future = pending.popleft()
+            try:
+                pages, complete = future.result(timeout=max(0.0, deadline - time.time()))
+            except FutureTimeoutError:
+                complete = False
+            if not complete:
+                raise PdfTimeoutError(f"extraction stopped before page {end} / {total}")
+            submit()
+            for number, text in pages:
+                yield PageText(number, text)
+            if progress:
+                progress(end, total)
+    finally:
+        for _, future in pending:
+            future.cancel()
+        try:
+            os.unlink(path)
+        except OSError:  # pragma: no cover - déjà supprimé
+            pass
+
+
+def extract_pdf_pages(
+    pdf_bytes: bytes,
+    *,
+    progress: Optional[ProgressCallback] = None,
+    max_pages: Optional[int] = None,
+    timeout: Optional[float] = None,
+) -> Iterator[PageText]:
+    """Yield page texts in order, extracting large documents in parallel.
+
+    Raises :class:`PdfTooLargeError` before any work when the document has
+    more than ``max_pages`` pages, and :class:`PdfTimeoutError` while
+    iterating once ``timeout`` seconds have elapsed. ``progress(done, total)``
+    is called as pages are extracted. Only complete extractions are cached.
+    """
+
+    max_pages = max_pages or settings.PDF_MAX_PAGES
+    timeout = timeout or settings.PDF_EXTRACT_TIMEOUT_SECONDS
+    key = hashlib.sha256(pdf_bytes).hexdigest()
+    cached = _PAGE_CACHE.get(key)
+    if cached is not None:
+        total, pages = cached
+        logger.info("[PDF] Texte déjà extrait (%s pages, cache %s…)", total, key[:12])
+        if progress:
+            progress(total, total)
+        yield from pages
+        return
+
+    reader = open_reader(io.BytesIO(pdf_bytes))
+    total = page_count(reader)
+    if total > max_pages:
+        raise PdfTooLargeError(f"{total} pages (max {max_pages})")
+
+    started = time.perf_counter()
+    deadline = time.time() + timeout
+    if total < settings.PDF_PARALLEL_MIN_PAGES or _worker_count() < 2:
+        pages = _extract_serially(reader, total, deadline, progress)
+    else:
+        del reader  # les workers rouvrent le document depuis un fichier temporaire
+        pages = _extract_in_pool(pdf_bytes, key, total, deadline, progress)
+
+    extracted: List[PageText] = []
+    for page in pages:
+        extracted.append(page)
+        yield page
+    _PAGE_CACHE.set(key, (total, tuple(extracted)))
+    logger.info(
+        "[PDF] Pages lues: %s / %s en %.2fs", len(extracted), total, time.perf_counter() - started
+    )
+
+
+__all__ = [
+    "InvalidPdfError",
+    "PageText",
+    "PdfTimeoutError",
+    "PdfTooLargeError",
+    "PdfUnavailableError",
+    "ProgressCallback",
+    "extract_pdf_pages",
+    "iter_pdf_pages",
+    "shutdown_pdf_pool",
+]
@@ -0,0 +1,220 @@
+"""Persist embedded chunks of a capsule's source document and retrieve them per chapter."""
+
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass, field
+from itertools import islice
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from app.core.config import settings
+from app.core.embeddings import get_text_embedding, get_text_embeddings
+from app.models.capsule.document_chunk_model import DocumentChunk
+from app.services.retrieval import Document, HybridRetriever, RetrievalHit, fusion_weights
+from sqlalchemy import delete, insert, select
+from sqlalchemy.orm import Session
+
+from .chunking import Chunk
+
+logger = logging.getLogger(__name__)
+
+# Budget du condensé envoyé au prompt de plan (cf. generate_learning_plan_from_document)
+DIGEST_CHARS = 12_000
+_SECTION_LEAD_CHARS = 600
+MAX_OUTLINE_ENTRIES = 80
+
+
+def _batched(items: Iterable[Chunk], size: int) -> Iterator[List[Chunk]]:
+    iterator = iter(items)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def _spread(size: int, count: int) -> List[int]:
+    """``count`` indices evenly spread over ``range(size)``, first and last included."""
+
+    if size <= count:
+        return list(range(size))
+    if count == 1:
+        return [0]
+    return sorted({round(index * (size - 1) / (count - 1)) for index in range(count)})
+
+
+@dataclass
+class IngestReport:
+    """What the plan generator needs from a document, gathered while streaming."""
+
+    chunk_count: int = 0
+    page_count: int = 0
+    outline: List[str] = field(default_factory=list)
+    section_leads: List[Tuple[Optional[str], str]] = field(default_factory=list)
+    _last_heading: Optional[str] = None
+
+    def add(self, chunk: Chunk) -> None:
+        self.chunk_count += 1
+        self.page_count = max(self.page_count, chunk.page_end)
+        if chunk.position == 1 or chunk.heading != self._last_heading:
+            self._last_heading = chunk.heading
+            if chunk.heading:
+                self.outline.append(f"{chunk.heading} (p. {chunk.page_start})")
+            self.section_leads.append((chunk.heading, chunk.text[:_SECTION_LEAD_CHARS]))
+
+    def digest(self, max_chars: int = DIGEST_CHARS) -> str:
+        """Opening passage of each section, sampled evenly over the whole document."""
+
+        leads = self.section_leads
+        if not leads:
+            return ""
+        keep = max(1, max_chars // (_SECTION_LEAD_CHARS + 80))
+        picked = [leads[index] for index in _spread(len(leads), keep)]
+        text = "\n\n".join(f"## {heading}\n{lead}" if heading else lead for heading, lead in picked)
+        return text[:max_chars]
+
+    def outline_entries(self, limit: int = MAX_OUTLINE_ENTRIES) -> List[str]:
+        return [self.outline[index] for index in _spread(len(self.outline), limit)]
+
+
+def ingest_chunks(
+    db: Session,
+    capsule_id: int,
+    chunks: Iterable[Chunk],
+    *,
+    batch_size: Optional[int] = None,
+    commit: bool = False,
+) -> IngestReport:
+    """Embed and insert ``chunks`` batch by batch.
+
+    The caller commits, unless ``commit`` is set: each batch is then committed
+    as soon as it is inserted, which keeps transactions short while a long
+    document is still being extracted.
+    """
+
+    batch_size = batch_size or settings.PDF_EMBED_BATCH_SIZE
+    report = IngestReport()
+    for batch in _batched(chunks, batch_size):
+        embeddings = get_text_embeddings([chunk.index_text for chunk in batch])
+        db.execute(
+            insert(DocumentChunk),
+            [
+                {
+                    "capsule_id": capsule_id,
+                    "position": chunk.position,
+                    "heading": chunk.heading,
+                    "text": chunk.text,
+                    "page_start": chunk.page_start,
+                    "page_end": chunk.page_end,
+                    "char_start": chunk.char_start,
+                    "char_end": chunk.char_end,
+                    "embedding": embedding,
+                }
+                for chunk, embedding in zip(batch, embeddings)
+            ],
+        )
+        if commit:
+            db.commit()
+        for chunk in batch:
+            report.add(chunk)
+    logger.info(
+        "[PDF] %s passages indexés pour la capsule %s (%s pages).",
+        report.chunk_count,
+        capsule_id,
+        report.page_count,
+    )
+    return report
+
+
+def delete_chunks(db: Session, capsule_id: int) -> None:
+    db.execute(delete(DocumentChunk).where(DocumentChunk.capsule_id == capsule_id))
+
+
+def load_chunk_retriever(db: Session, capsule_id: int) -> Optional[HybridRetriever]:
+    """Index of a capsule's chunks, or ``None`` when it was not built from a document."""
+
+    rows = db.execute(
+        select(
+            DocumentChunk.id,
+            DocumentChunk.heading,
+            DocumentChunk.text,
+            DocumentChunk.page_start,
+            DocumentChunk.page_end,
+            DocumentChunk.embedding,
+        )
+        .where(DocumentChunk.capsule_id == capsule_id)
+        .order_by(DocumentChunk.position)
+    ).all()
+    if not rows:
+        return None
+    documents = [
+        Document(
+            id=row.id,
+            text=f"{row.heading}\n{row.text}" if row.heading else row.text,
+            metadata={
+                "heading": row.heading,
+                "page_start": row.page_start,
+                "page_end": row.page_end,
+                "body": row.text,
+            },
+        )
+        for row in rows
+    ]
+    return HybridRetriever(documents, [row.embedding for row in rows], embed=get_text_embedding)
+
+
+def retrieve_passages(
+    retriever: HybridRetriever, query: str, *, limit: Optional[int] = None
+) -> List[RetrievalHit]:
+    """Top chunks for a chapter query, diversified, in document order.
+
+    The chunks are taken from the section of the best match: overlapping
+    chunks of one section look redundant to MMR, which would otherwise fill
+    the budget with weakly related passages from neighbouring chapters.
+    """
+
+    weights = fusion_weights()
+    best = retriever.search(query, limit=1, weights=weights)
+    if not best:
+        return []
+    heading = best[0].document.metadata.get("heading")
+    hits = retriever.search(
+        query,
+        limit=limit or settings.PDF_CHUNKS_PER_ATOM,
+        filters={"heading": heading} if heading else None,
+        weights=weights,
+        mmr_lambda=settings.RAG_MMR_LAMBDA,
+    )
+    return sorted(hits, key=lambda hit: hit.document.id)
+
+
+def format_passages(hits: Sequence[RetrievalHit], max_chars: int) -> str:
+    """Render passages with their page range, within ``max_chars``."""
+
+    blocks: List[str] = []
+    used = 0
+    for hit in hits:
+        meta = hit.document.metadata
+        pages = (
+            f"p. {meta['page_start']}"
+            if meta["page_start"] == meta["page_end"]
+            else f"p. {meta['page_start']}-{meta['page_end']}"
+        )
+        label = f"[{pages} — {meta['heading']}]" if meta.get("heading") else f"[{pages}]"
+        block = f"{label}\n{meta['body']}"
+        if used + len(block) > max_chars:
+            remaining = max_chars - used - len(label) - 1
+            if remaining > 200:
+                blocks.append(f"{label}\n{meta['body'][:remaining]}")
+            break
+        blocks.append(block)
+        used += len(block) + 2
+    return "\n\n".join(blocks)
+
+
+__all__ = [
+    "DIGEST_CHARS",
+    "IngestReport",
+    "delete_chunks",
+    "format_passages",
+    "ingest_chunks",
+    "load_chunk_retriever",
+    "retrieve_passages",
+]
@@ -109,6 +109,27 @@ def calculate_capsule_xp_distribution(capsule: Capsule) -> tuple[dict[int, int],
 
     return atom_xp, molecule_totals
 
+def award_completion_badges(db: Session, user_id: int) -> None:
+    """Débloque les badges liés au nombre d'atomes complétés."""
+    try:
+        badge_crud.award_badge(db, user_id, "explorateur-premiere-lecon")
+        # Seuils multi-leçons
+        total_completed = (
+            db.query(UserAtomProgress)
+            .filter(
+                UserAtomProgress.user_id == user_id,
+                UserAtomProgress.status == 'completed'
+            )
+            .count()
+        )
+        if total_completed >= 10:
+            badge_crud.award_badge(db, user_id, "explorateur-dix-lecons")
+        if total_completed >= 50:
+            badge_crud.award_badge(db, user_id, "explorateur-cinquante-lecons")
+    except Exception:
+        pass
+
+
 class ProgressService:
     def __init__(self, db: Session, user_id: int):
         self.db = db
@@ -499,24 +520,7 @@ class ProgressService:
                 progress.xp,
                 getattr(progress, "bonus_xp", 0),
             )
-            # Badges liés à la complétion
-            try:
-                badge_crud.award_badge(self.db, self.user_id, "explorateur-premiere-lecon")
-                # Seuils multi-leçons
-                total_completed = (
-                    self.db.query(UserAtomProgress)
-                    .filter(
-                        UserAtomProgress.user_id == self.user_id,
-                        UserAtomProgress.status == 'completed'
-                    )
-                    .count()
-                )
-                if total_completed >= 10:
-                    badge_crud.award_badge(self.db, self.user_id, "explorateur-dix-lecons")
-                if total_completed >= 50:
-                    badge_crud.award_badge(self.db, self.user_id, "explorateur-cinquante-lecons")
-            except Exception:
-                pass
+            award_completion_badges(self.db, self.user_id)
         else:
             # assurer statut cohérent même sans nouvel XP
             atom_progress.status = 'completed'
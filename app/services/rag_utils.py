@@ -1,17 +1,13 @@
 # Fichier: backend/app/services/rag_utils.py (VERSION CORRIGÉE)
 
 import logging
-from typing import List, Tuple
+from typing import Any, Dict, Optional
 
 from sqlalchemy.orm import Session
 
 from app.core import ai_service
-from app.core.embeddings import (
-    cosine_similarity,
-    ensure_dimension,
-    normalize_vector,
-)
-from app.models.analytics.vector_store_model import VectorStore
+from app.core.config import settings
+from app.services.retrieval import fusion_weights, vector_store_index
 
 logger = logging.getLogger(__name__)
 
@@ -24,37 +20,33 @@ def get_embedding(text: str):
 # -------------------------
 
 
-def _find_similar_examples(db: Session, topic: str, language: str, content_type: str, limit: int = 3) -> str:
+def _find_similar_examples(
+    db: Session,
+    topic: str,
+    language: str,
+    content_type: str,
+    limit: int = 3,
+    filters: Optional[Dict[str, Any]] = None,
+) -> str:
     """
-    Cherche des exemples similaires dans la base vectorielle et les formate pour un prompt.
+    Cherche des exemples similaires (BM25 + embeddings, fusion RRF puis MMR)
+    dans la base vectorielle et les formate pour un prompt.
+    ``filters`` restreint en plus sur domain / area / skill.
     """
     try:
         # Utilise maintenant la fonction get_embedding locale pour la cohérence
-        topic_embedding = normalize_vector(get_embedding(topic))
-        if not any(topic_embedding):
-            logger.info("Embedding vide pour le sujet '%s', aucun contexte RAG retourné.", topic)
-            return ""
-
-        candidates: List[VectorStore] = (
-            db.query(VectorStore)
-            .filter(VectorStore.source_language == language)
-            .filter(VectorStore.content_type == content_type)
-            .all()
+        topic_embedding = get_embedding(topic)
+        retriever = vector_store_index.retriever(db)
+        top_matches = retriever.search(
+            topic,
+            limit=limit,
+            filters={**(filters or {}), "source_language": language, "content_type": content_type},
+            query_embedding=topic_embedding,
+            weights=fusion_weights(),
+            mmr_lambda=settings.RAG_MMR_LAMBDA,
         )
 
-        scored: List[Tuple[VectorStore, float]] = []
-        for entry in candidates:
-            raw_embedding = entry.embedding or []
-            if not raw_embedding:
-                continue
-
-            aligned = normalize_vector(ensure_dimension(raw_embedding, len(topic_embedding)))
-            similarity = cosine_similarity(topic_embedding, aligned)
-            if similarity <= 0:
-                continue
-            scored.append((entry, similarity))
-
-        if not scored:
+        if not top_matches:
             logger.info(
                 "Aucun exemple RAG trouvé pour '%s' avec le type '%s'.",
                 topic,
@@ -62,14 +54,12 @@ def _find_similar_examples(db: Session, topic: str, language: str, content_type:
             )
             return ""
 
-        top_matches = [entry for entry, _ in sorted(scored, key=lambda item: item[1], reverse=True)[:limit]]
-
         context = "Voici des exemples de haute qualité pour t'inspirer. Suis leur style, leur ton et leur structure :\n\n"
-        for i, ex in enumerate(top_matches):
-            context += f"--- EXEMPLE {i+1} ---\n{ex.chunk_text}\n\n"
+        for i, hit in enumerate(top_matches):
+            context += f"--- EXEMPLE {i+1} ---\n{hit.document.text}\n\n"
 
         logger.info("%s exemples RAG trouvés pour '%s'.", len(top_matches), topic)
         return context
     except Exception as e:
         logger.error(f"Erreur lors de la recherche RAG pour '{topic}': {e}", exc_info=True)
-        return ""
\ No newline at end of file
+        return ""
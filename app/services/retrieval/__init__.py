@@ -0,0 +1,45 @@
+"""Hybrid lexical + vector retrieval for the RAG prompts.
+
+A :class:`HybridRetriever` keeps a BM25 inverted index and a normalised
+embedding matrix over the same documents, fuses both rankings with
+reciprocal rank fusion, applies metadata filters as masks before ranking and
+can diversify the result with maximal marginal relevance. The indexes over
+``vector_store`` and ``golden_examples`` are cached per database
+(:mod:`app.services.retrieval.sources`); recall is measured offline with
+``scripts/benchmarks/rag_retrieval``.
+"""
+
+from app.services.retrieval.hybrid import (
+    MODES,
+    Document,
+    HybridRetriever,
+    RetrievalHit,
+    maximal_marginal_relevance,
+    reciprocal_rank_fusion,
+)
+from app.services.retrieval.lexical import BM25Index, tokenize
+from app.services.retrieval.sources import (
+    IndexedTable,
+    fusion_weights,
+    golden_example_index,
+    invalidate_indexes,
+    vector_store_index,
+)
+from app.services.retrieval.vector import VectorIndex
+
+__all__ = [
+    "BM25Index",
+    "Document",
+    "HybridRetriever",
+    "IndexedTable",
+    "MODES",
+    "RetrievalHit",
+    "VectorIndex",
+    "fusion_weights",
+    "golden_example_index",
+    "invalidate_indexes",
+    "maximal_marginal_relevance",
+    "reciprocal_rank_fusion",
+    "tokenize",
+    "vector_store_index",
+]
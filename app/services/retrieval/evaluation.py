@@ -0,0 +1,141 @@
+"""Offline recall@k evaluation on the labeled JSONL files of ``app/data``.
+
+Each line holds a query ``text`` and its ``main_skill`` label. Every
+``holdout_every``-th distinct text of a file becomes a query, the others
+become indexed documents; a query is recalled at ``k`` when one of its
+first ``k`` hits carries the same label.
+"""
+
+from __future__ import annotations
+
+import json
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .hybrid import Document, Embedder, HybridRetriever
+
+DATA_DIR = Path(__file__).resolve().parents[2] / "data"
+
+
+@dataclass(frozen=True)
+class LabeledText:
+    text: str
+    label: str
+
+
+@dataclass
+class RecallReport:
+    mode: str
+    queries: int
+    recall: Dict[int, float] = field(default_factory=dict)
+    mean_latency_ms: float = 0.0
+
+
+def labeled_files(directory: Path = DATA_DIR) -> List[Path]:
+    """JSONL files of ``directory`` whose first record has ``text`` and ``main_skill``."""
+
+    files = []
+    for path in sorted(directory.glob("*.jsonl")):
+        with path.open(encoding="utf-8") as handle:
+            first = handle.readline()
+        try:
+            record = json.loads(first)
+        except json.JSONDecodeError:
+            continue
+        if (
+            isinstance(record, dict)
+            and isinstance(record.get("text"), str)
+            and record.get("main_skill")
+        ):
+            files.append(path)
+    return files
+
+
+def load_labeled(path: Path) -> List[LabeledText]:
+    """Distinct ``(text, main_skill)`` pairs of a JSONL file, in file order."""
+
+    seen = set()
+    rows: List[LabeledText] = []
+    with path.open(encoding="utf-8") as handle:
+        for line in handle:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            text = (record.get("text") or "").strip()
+            label = str(record.get("main_skill") or "").strip().casefold()
+            if text and label and text not in seen:
+                seen.add(text)
+                rows.append(LabeledText(text, label))
+    return rows
+
+
+def split_holdout(
+    rows: Sequence[LabeledText], holdout_every: int = 5
+) -> Tuple[List[LabeledText], List[LabeledText]]:
+    """Deterministic ``(documents, queries)`` split."""
+
+    if holdout_every < 2:
+        raise ValueError("holdout_every must be at least 2")
+    documents = [row for index, row in enumerate(rows) if index % holdout_every]
+    queries = [row for index, row in enumerate(rows) if not index % holdout_every]
+    return documents, queries
+
+
+def build_retriever(documents: Sequence[LabeledText], embed: Embedder) -> HybridRetriever:
+    return HybridRetriever.from_texts(
+        [
+            Document(id=index, text=row.text, metadata={"label": row.label})
+            for index, row in enumerate(documents)
+        ],
+        embed,
+    )
+
+
+def recall_at_k(
+    retriever: HybridRetriever,
+    queries: Iterable[LabeledText],
+    *,
+    ks: Sequence[int] = (1, 3, 5),
+    mode: str = "hybrid",
+    weights: Tuple[float, float] = (1.0, 1.0),
+    mmr_lambda: Optional[float] = None,
+) -> RecallReport:
+    depth = max(ks)
+    hits = {k: 0 for k in ks}
+    total = 0
+    elapsed = 0.0
+    for query in queries:
+        total += 1
+        started = time.perf_counter()
+        results = retriever.search(
+            query.text, limit=depth, mode=mode, weights=weights, mmr_lambda=mmr_lambda
+        )
+        elapsed += time.perf_counter() - started
+        labels = [hit.document.metadata.get("label") for hit in results]
+        for k in ks:
+            if query.label in labels[:k]:
+                hits[k] += 1
+    return RecallReport(
+        mode=mode if mmr_lambda is None else f"{mode}+mmr",
+        queries=total,
+        recall={k: hits[k] / total if total else 0.0 for k in ks},
+        mean_latency_ms=1000.0 * elapsed / total if total else 0.0,
+    )
+
+
+__all__ = [
+    "DATA_DIR",
+    "LabeledText",
+    "RecallReport",
+    "build_retriever",
+    "labeled_files",
+    "load_labeled",
+    "recall_at_k",
+    "split_holdout",
+]
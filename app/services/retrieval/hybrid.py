@@ -0,0 +1,206 @@
+"""Hybrid retriever: BM25 + vector ranking fused with RRF, optional MMR re-rank."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .lexical import BM25Index, tokenize
+from .vector import VectorIndex
+
+Embedder = Callable[[str], Sequence[float]]
+Filters = Mapping[str, Any]
+
+MODES = ("hybrid", "lexical", "vector")
+# Constante de lissage usuelle de la reciprocal rank fusion
+RRF_K = 60
+# Nombre minimal de candidats demandés à chaque index avant fusion
+MIN_CANDIDATES = 50
+
+
+@dataclass(frozen=True)
+class Document:
+    id: int
+    text: str
+    metadata: Mapping[str, Any] = field(default_factory=dict)
+
+
+@dataclass(frozen=True)
+class RetrievalHit:
+    document: Document
+    score: float
+    lexical_rank: Optional[int] = None
+    vector_rank: Optional[int] = None
+
+
+def reciprocal_rank_fusion(
+    rankings: Sequence[Sequence[int]], k: int = RRF_K, weights: Optional[Sequence[float]] = None
+) -> List[Tuple[int, float]]:
+    """Fuse ranked position lists: ``score(d) = sum(w / (k + rank(d)))``, best first."""
+
+    fused: Dict[int, float] = {}
+    for ranking, weight in zip(rankings, weights or [1.0] * len(rankings)):
+        for rank, position in enumerate(ranking, start=1):
+            fused[position] = fused.get(position, 0.0) + weight / (k + rank)
+    return sorted(fused.items(), key=lambda item: (-item[1], item[0]))
+
+
+def maximal_marginal_relevance(
+    relevance: Sequence[float], similarities: np.ndarray, limit: int, lambda_: float
+) -> List[int]:
+    """Greedy MMR selection; returns indices into ``relevance``.
+
+    ``relevance`` is rescaled to [0, 1] so that ``lambda_`` weighs it against
+    cosine similarities on the same scale.
+    """
+
+    if not len(relevance) or limit <= 0:
+        return []
+    rel = np.asarray(relevance, dtype=np.float32)
+    rel = rel / rel.max() if rel.max() > 0 else rel
+    selected: List[int] = []
+    remaining = list(range(len(rel)))
+    redundancy = np.zeros(len(rel), dtype=np.float32)
+    while remaining and len(selected) < limit:
+        scores = lambda_ * rel[remaining] - (1.0 - lambda_) * redundancy[remaining]
+        chosen = remaining.pop(int(np.argmax(scores)))
+        selected.append(chosen)
+        redundancy = np.maximum(redundancy, similarities[chosen])
+    return selected
+
+
+class HybridRetriever:
+    """Immutable index over a list of documents and their embeddings.
+
+    Filters are equality tests on document metadata (a collection value means
+    "any of"); they are applied as boolean masks before ranking, so a filtered
+    query never returns fewer hits than it could.
+    """
+
+    def __init__(
+        self,
+        documents: Sequence[Document],
+        embeddings: Sequence[Optional[Sequence[float]]],
+        *,
+        embed: Optional[Embedder] = None,
+    ) -> None:
+        if len(documents) != len(embeddings):
+            raise ValueError("documents and embeddings must have the same length")
+        self.documents = list(documents)
+        self.embed = embed
+        self.lexical = BM25Index(tokenize(doc.text) for doc in self.documents)
+        self.vector = VectorIndex(embeddings)
+        self._facets: Dict[str, Dict[Any, np.ndarray]] = {}
+
+    @classmethod
+    def from_texts(cls, documents: Sequence[Document], embed: Embedder) -> "HybridRetriever":
+        """Build an index embedding every document with ``embed``."""
+
+        return cls(documents, [embed(doc.text) for doc in documents], embed=embed)
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+    # ------------------------------------------------------------------
+    # Filters
+    # ------------------------------------------------------------------
+    def _facet(self, name: str) -> Dict[Any, np.ndarray]:
+        facet = self._facets.get(name)
+        if facet is None:
+            positions: Dict[Any, List[int]] = {}
+            for position, doc in enumerate(self.documents):
+                positions.setdefault(doc.metadata.get(name), []).append(position)
+            facet = {value: np.asarray(ids, dtype=np.int32) for value, ids in positions.items()}
+            self._facets[name] = facet
+        return facet
+
+    def mask(self, filters: Optional[Filters]) -> Optional[np.ndarray]:
+        if not filters:
+            return None
+        mask = np.ones(len(self.documents), dtype=bool)
+        for name, wanted in filters.items():
+            values = wanted if isinstance(wanted, (list, tuple, set, frozenset)) else (wanted,)
+            allowed = np.zeros(len(self.documents), dtype=bool)
+            facet = self._facet(name)
+            for value in values:
+                positions = facet.get(value)
+                if positions is not None:
+                    allowed[positions] = True
+            mask &= allowed
+        return mask
+
+    # ------------------------------------------------------------------
+    # Search
+    # ------------------------------------------------------------------
+    def search(
+        self,
+        query: str,
+        *,
+        limit: int = 5,
+        filters: Optional[Filters] = None,
+        query_embedding: Optional[Sequence[float]] = None,
+        mode: str = "hybrid",
+        weights: Tuple[float, float] = (1.0, 1.0),
+        mmr_lambda: Optional[float] = None,
+    ) -> List[RetrievalHit]:
+        """Rank the documents for ``query``.
+
+        ``query_embedding`` defaults to ``embed(query)``; an empty or all-zero
+        embedding simply leaves the lexical ranking alone. ``weights`` are the
+        ``(lexical, vector)`` RRF weights of the hybrid mode; a zero weight
+        skips that index. ``mmr_lambda`` (0..1, 1 = pure relevance) enables
+        the diversity re-rank.
+        """
+
+        if mode not in MODES:
+            raise ValueError(f"Unknown retrieval mode: {mode}")
+        if limit <= 0 or not self.documents:
+            return []
+        mask = self.mask(filters)
+        if mask is not None and not mask.any():
+            return []
+        depth = max(limit * 4, MIN_CANDIDATES)
+
+        lexical: List[int] = []
+        if mode == "lexical" or (mode == "hybrid" and weights[0] > 0):
+            lexical = [
+                pos for pos, _ in self.lexical.search(tokenize(query), limit=depth, mask=mask)
+            ]
+        vector: List[int] = []
+        if mode == "vector" or (mode == "hybrid" and weights[1] > 0):
+            if query_embedding is None and self.embed is not None:
+                query_embedding = self.embed(query)
+            if query_embedding is not None and any(query_embedding):
+                vector = [
+                    pos for pos, _ in self.vector.search(query_embedding, limit=depth, mask=mask)
+                ]
+
+        fused = reciprocal_rank_fusion([lexical, vector], weights=weights)
+        if mmr_lambda is not None and len(fused) > 1:
+            positions = [pos for pos, _ in fused]
+            order = maximal_marginal_relevance(
+                [score for _, score in fused],
+                self.vector.similarities(positions),
+                limit,
+                mmr_lambda,
+            )
+            fused = [fused[index] for index in order]
+
+        lexical_rank = {pos: rank for rank, pos in enumerate(lexical, start=1)}
+        vector_rank = {pos: rank for rank, pos in enumerate(vector, start=1)}
+        return [
+            RetrievalHit(self.documents[pos], score, lexical_rank.get(pos), vector_rank.get(pos))
+            for pos, score in fused[:limit]
+        ]
+
+
+__all__ = [
+    "Document",
+    "HybridRetriever",
+    "MODES",
+    "RetrievalHit",
+    "maximal_marginal_relevance",
+    "reciprocal_rank_fusion",
+]
@@ -0,0 +1,106 @@
+"""In-memory BM25 inverted index."""
+
+from __future__ import annotations
+
+import math
+import re
+import unicodedata
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+# Au-delà, un document n'apporte plus rien au classement (plans JSON stockés dans le VectorStore)
+MAX_INDEXED_CHARS = 20_000
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase, accent-insensitive word tokens (``"Itérateur"`` -> ``"iterateur"``)."""
+
+    if not text:
+        return []
+    decomposed = unicodedata.normalize("NFKD", text[:MAX_INDEXED_CHARS].lower())
+    stripped = "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return _TOKEN.findall(stripped)
+
+
+class BM25Index:
+    """Okapi BM25 over a fixed corpus.
+
+    Postings are stored per term as two NumPy arrays (document positions and
+    term frequencies), so a query only touches the postings of its own terms.
+    """
+
+    def __init__(
+        self, documents: Iterable[Sequence[str]], *, k1: float = 1.2, b: float = 0.75
+    ) -> None:
+        self.k1 = k1
+        self.b = b
+        lengths: List[int] = []
+        postings: Dict[str, Tuple[List[int], List[int]]] = {}
+        for position, tokens in enumerate(documents):
+            lengths.append(len(tokens))
+            for term, frequency in Counter(tokens).items():
+                ids, tfs = postings.setdefault(term, ([], []))
+                ids.append(position)
+                tfs.append(frequency)
+
+        self.size = len(lengths)
+        self.doc_lengths = np.asarray(lengths, dtype=np.float32)
+        self.avg_length = float(self.doc_lengths.mean()) if self.size else 0.0
+        self._postings = {
+            term: (np.asarray(ids, dtype=np.int32), np.asarray(tfs, dtype=np.float32))
+            for term, (ids, tfs) in postings.items()
+        }
+
+    def __len__(self) -> int:
+        return self.size
+
+    def idf(self, term: str) -> float:
+        posting = self._postings.get(term)
+        frequency = len(posting[0]) if posting else 0
+        return math.log(1.0 + (self.size - frequency + 0.5) / (frequency + 0.5))
+
+    def scores(self, query_tokens: Sequence[str]) -> np.ndarray:
+        """BM25 score of every document (0 for documents sharing no term)."""
+
+        scores = np.zeros(self.size, dtype=np.float32)
+        if not self.size:
+            return scores
+        norm = self.k1 * (1.0 - self.b + self.b * self.doc_lengths / max(self.avg_length, 1e-9))
+        for term in set(query_tokens):
+            posting = self._postings.get(term)
+            if posting is None:
+                continue
+            ids, tfs = posting
+            scores[ids] += self.idf(term) * tfs * (self.k1 + 1.0) / (tfs + norm[ids])
+        return scores
+
+    def search(
+        self, query_tokens: Sequence[str], *, limit: int, mask: Optional[np.ndarray] = None
+    ) -> List[Tuple[int, float]]:
+        """Top ``limit`` ``(position, score)`` pairs among the allowed documents."""
+
+        return top_positive(self.scores(query_tokens), limit, mask)
+
+
+def top_positive(
+    scores: np.ndarray, limit: int, mask: Optional[np.ndarray] = None
+) -> List[Tuple[int, float]]:
+    """Indices of the ``limit`` best strictly positive ``scores``, best first."""
+
+    if mask is not None:
+        scores = np.where(mask, scores, 0.0)
+    candidates = np.flatnonzero(scores > 0)
+    if limit <= 0 or not len(candidates):
+        return []
+    if len(candidates) > limit:
+        best = np.argpartition(-scores[candidates], limit - 1)[:limit]
+        candidates = candidates[best]
+    # tri stable: à score égal, l'ordre d'insertion (id croissant) départage
+    order = sorted(candidates.tolist(), key=lambda idx: (-float(scores[idx]), idx))
+    return [(idx, float(scores[idx])) for idx in order]
+
+
+__all__ = ["BM25Index", "MAX_INDEXED_CHARS", "tokenize", "top_positive"]
@@ -0,0 +1,111 @@
+"""Cached retrievers over the ``vector_store`` and ``golden_examples`` tables.
+
+Each index is built once per database from a single projected ``SELECT`` and
+reused without touching the database for ``RAG_INDEX_TTL_SECONDS``. The write
+paths of this process call :func:`invalidate_indexes` after their commit; the
+TTL only bounds how long another worker's writes stay invisible.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+from typing import Any, Optional, Sequence, Tuple
+
+from app.core.config import settings
+from app.core.ttl_cache import TTLCache
+from app.models.analytics.golden_examples_model import GoldenExample
+from app.models.analytics.vector_store_model import VectorStore
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from .hybrid import Document, HybridRetriever
+
+logger = logging.getLogger(__name__)
+
+
+class IndexedTable:
+    """A table whose rows are indexed by a :class:`HybridRetriever`."""
+
+    def __init__(self, name: str, model: Any, text_column: Any, fields: Sequence[str]) -> None:
+        self.name = name
+        self.model = model
+        self.text_column = text_column
+        self.fields = tuple(fields)
+        self._lock = threading.Lock()
+        # une entrée par base (URL du moteur)
+        self._cache: "TTLCache[HybridRetriever]" = TTLCache(
+            settings.RAG_INDEX_TTL_SECONDS, maxsize=16
+        )
+
+    def _build(self, db: Session) -> HybridRetriever:
+        columns = [getattr(self.model, name) for name in self.fields]
+        rows = db.execute(
+            select(self.model.id, self.text_column, self.model.embedding, *columns).order_by(
+                self.model.id
+            )
+        ).all()
+        documents = [
+            Document(
+                id=row[0],
+                text=row[1] if isinstance(row[1], str) else "",
+                metadata={name: row[3 + index] for index, name in enumerate(self.fields)},
+            )
+            for row in rows
+        ]
+        return HybridRetriever(documents, [row[2] for row in rows])
+
+    def retriever(self, db: Session) -> HybridRetriever:
+        key = str(db.get_bind().url)
+        retriever = self._cache.get(key)
+        if retriever is not None:
+            return retriever
+        with self._lock:
+            retriever = self._cache.get(key)
+            if retriever is None:
+                retriever = self._build(db)
+                self._cache.set(key, retriever)
+                logger.info(
+                    "[RAG] Index '%s' reconstruit (%s documents).", self.name, len(retriever)
+                )
+            return retriever
+
+    def invalidate(self) -> None:
+        self._cache.clear()
+
+
+vector_store_index = IndexedTable(
+    "vector_store",
+    VectorStore,
+    VectorStore.chunk_text,
+    ("source_language", "content_type", "domain", "area", "skill"),
+)
+golden_example_index = IndexedTable(
+    "golden_examples", GoldenExample, GoldenExample.content, ("example_type",)
+)
+
+
+def fusion_weights() -> Tuple[float, float]:
+    """``(lexical, vector)`` RRF weights of the RAG prompts (see ``RAG_VECTOR_WEIGHT``)."""
+
+    vector = settings.RAG_VECTOR_WEIGHT
+    if vector is None:
+        vector = 1.0 if settings.USE_REMOTE_EMBEDDINGS else 0.0
+    return 1.0, vector
+
+
+def invalidate_indexes(name: Optional[str] = None) -> None:
+    """Drop the cached index of table ``name`` (all of them by default); call it after a commit."""
+
+    for table in (vector_store_index, golden_example_index):
+        if name is None or table.name == name:
+            table.invalidate()
+
+
+__all__ = [
+    "IndexedTable",
+    "fusion_weights",
+    "golden_example_index",
+    "invalidate_indexes",
+    "vector_store_index",
+]
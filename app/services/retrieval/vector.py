@@ -0,0 +1,65 @@
+"""Dense cosine index over stored embeddings."""
+
+from __future__ import annotations
+
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+from app.core.embeddings import EMBEDDING_DIMENSION, ensure_dimension
+
+from .lexical import top_positive
+
+
+def _unit_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return np.divide(matrix, norms, out=np.zeros_like(matrix), where=norms > 0)
+
+
+class VectorIndex:
+    """Row-normalised embedding matrix; a query is one matrix-vector product.
+
+    Stored embeddings of another size are projected with
+    :func:`app.core.embeddings.ensure_dimension`, exactly like the per-row loop
+    this replaces. Missing embeddings become zero rows that never match.
+    """
+
+    def __init__(
+        self, embeddings: Sequence[Optional[Sequence[float]]], dimension: int = EMBEDDING_DIMENSION
+    ) -> None:
+        self.dimension = dimension
+        matrix = np.zeros((len(embeddings), dimension), dtype=np.float32)
+        for position, embedding in enumerate(embeddings):
+            if embedding:
+                matrix[position] = ensure_dimension(list(embedding), dimension)
+        self.matrix = _unit_rows(matrix)
+
+    def __len__(self) -> int:
+        return len(self.matrix)
+
+    def encode_query(self, embedding: Sequence[float]) -> np.ndarray:
+        vector = np.zeros(self.dimension, dtype=np.float32)
+        if embedding:
+            vector[:] = ensure_dimension(list(embedding), self.dimension)
+        norm = float(np.linalg.norm(vector))
+        return vector / norm if norm else vector
+
+    def scores(self, embedding: Sequence[float]) -> np.ndarray:
+        return self.matrix @ self.encode_query(embedding)
+
+    def search(
+        self, embedding: Sequence[float], *, limit: int, mask: Optional[np.ndarray] = None
+    ) -> List[Tuple[int, float]]:
+        """Top ``limit`` ``(position, cosine)`` pairs with a positive similarity."""
+
+        if not len(self.matrix):
+            return []
+        return top_positive(self.scores(embedding), limit, mask)
+
+    def similarities(self, positions: Sequence[int]) -> np.ndarray:
+        """Pairwise cosine similarities between the given rows."""
+
+        rows = self.matrix[list(positions)]
+        return rows @ rows.T
+
+
+__all__ = ["VectorIndex"]
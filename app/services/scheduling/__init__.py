@@ -0,0 +1,42 @@
+"""Pluggable spaced-repetition scheduling engine.
+
+The live answer path keeps using :meth:`SRSService.apply_answer`; this package
+mirrors those rules as the ``legacy`` algorithm next to SM-2 and FSRS so that
+schedules can be recomputed, per-learner parameters fitted offline and the
+algorithms compared on recorded answers (``scripts/benchmarks/srs_algorithms``).
+"""
+
+from app.services.scheduling.algorithms import (
+    ALGORITHMS,
+    FSRSAlgorithm,
+    LegacyAlgorithm,
+    SM2Algorithm,
+    get_algorithm,
+)
+from app.services.scheduling.base import SchedulingAlgorithm
+from app.services.scheduling.fitting import FitResult, fit_parameters
+from app.services.scheduling.simulation import (
+    ReviewHistory,
+    SimulationResult,
+    evaluate,
+    load_user_history,
+    recompute_schedules,
+    simulate,
+)
+
+__all__ = [
+    "ALGORITHMS",
+    "FSRSAlgorithm",
+    "FitResult",
+    "LegacyAlgorithm",
+    "ReviewHistory",
+    "SM2Algorithm",
+    "SchedulingAlgorithm",
+    "SimulationResult",
+    "evaluate",
+    "fit_parameters",
+    "get_algorithm",
+    "load_user_history",
+    "recompute_schedules",
+    "simulate",
+]
@@ -0,0 +1,257 @@
+"""Concrete scheduling algorithms: current rules, SM-2 and FSRS."""
+
+from __future__ import annotations
+
+from typing import ClassVar, Dict, Mapping, Type
+
+import numpy as np
+from app.services.scheduling.base import SchedulingAlgorithm, State
+
+
+def _counter(size: int) -> np.ndarray:
+    return np.zeros(size, dtype=np.int64)
+
+
+class LegacyAlgorithm(SchedulingAlgorithm):
+    """Vectorised copy of :meth:`SRSService.apply_answer` (the live rules)."""
+
+    name = "legacy"
+    DEFAULT_PARAMS: ClassVar[Mapping[str, float]] = {
+        "initial_ease": 2.5,
+        "min_ease": 1.3,
+        "max_ease": 3.0,
+        "ease_bonus": 0.1,
+        "ease_penalty": 0.2,
+        "first_interval": 1.0,
+        "second_interval": 3.0,
+        "error_interval": 1.0 / 3.0,
+    }
+    PARAM_BOUNDS: ClassVar[Mapping[str, tuple[float, float]]] = {
+        "initial_ease": (1.3, 3.0),
+        "ease_bonus": (0.0, 0.5),
+        "ease_penalty": (0.0, 0.8),
+        "second_interval": (1.0, 10.0),
+        "error_interval": (0.05, 2.0),
+    }
+
+    def init_state(self, size: int) -> State:
+        return {
+            "review_count": _counter(size),
+            "success_count": _counter(size),
+            "streak": _counter(size),
+            "ease_factor": np.full(size, self.params["initial_ease"]),
+            "interval_days": np.ones(size),
+        }
+
+    def step(self, state: State, correct: np.ndarray, elapsed_days: np.ndarray) -> State:
+        p = self.params
+        review_count = state["review_count"] + 1
+        ease_up = np.minimum(state["ease_factor"] + p["ease_bonus"], p["max_ease"])
+        ease_down = np.maximum(p["min_ease"], state["ease_factor"] - p["ease_penalty"])
+        success_interval = np.where(
+            review_count == 1,
+            p["first_interval"],
+            np.where(
+                review_count == 2,
+                p["second_interval"],
+                np.maximum(1.0, state["interval_days"] * ease_up),
+            ),
+        )
+        return {
+            "review_count": review_count,
+            "success_count": state["success_count"] + correct,
+            "streak": np.where(correct, state["streak"] + 1, 0),
+            "ease_factor": np.where(correct, ease_up, ease_down),
+            "interval_days": np.where(correct, success_interval, max(0.25, p["error_interval"])),
+        }
+
+
+class SM2Algorithm(SchedulingAlgorithm):
+    """SuperMemo-2 with binary answers mapped onto its 0-5 grade scale."""
+
+    name = "sm2"
+    DEFAULT_PARAMS: ClassVar[Mapping[str, float]] = {
+        "initial_ease": 2.5,
+        "min_ease": 1.3,
+        "first_interval": 1.0,
+        "second_interval": 6.0,
+        "correct_grade": 4.0,
+        "incorrect_grade": 1.0,
+    }
+    PARAM_BOUNDS: ClassVar[Mapping[str, tuple[float, float]]] = {
+        "initial_ease": (1.3, 3.5),
+        "first_interval": (0.25, 3.0),
+        "second_interval": (1.0, 15.0),
+        "correct_grade": (3.0, 5.0),
+    }
+
+    def init_state(self, size: int) -> State:
+        return {
+            "review_count": _counter(size),
+            "success_count": _counter(size),
+            "repetitions": _counter(size),
+            "ease_factor": np.full(size, self.params["initial_ease"]),
+            "interval_days": np.ones(size),
+        }
+
+    def step(self, state: State, correct: np.ndarray, elapsed_days: np.ndarray) -> State:
+        p = self.params
+        grade = np.where(correct, p["correct_grade"], p["incorrect_grade"])
+        penalty = 5.0 - grade
+        ease = np.maximum(
+            p["min_ease"],
+            state["ease_factor"] + 0.1 - penalty * (0.08 + penalty * 0.02),
+        )
+        repetitions = state["repetitions"]
+        # The interval uses the ease factor *before* this review, as in SM-2.
+        success_interval = np.where(
+            repetitions == 0,
+            p["first_interval"],
+            np.where(
+                repetitions == 1,
+                p["second_interval"],
+                state["interval_days"] * state["ease_factor"],
+            ),
+        )
+        passed = grade >= 3.0
+        return {
+            "review_count": state["review_count"] + 1,
+            "success_count": state["success_count"] + correct,
+            "repetitions": np.where(passed, repetitions + 1, 0),
+            "ease_factor": ease,
+            "interval_days": np.where(passed, success_interval, p["first_interval"]),
+        }
+
+
+class FSRSAlgorithm(SchedulingAlgorithm):
+    """Free Spaced Repetition Scheduler (FSRS-4.5 formulas, 17 weights).
+
+    Answers are binary here, so only the *Again* (1) and *Good* (3) ratings
+    occur and the hard/easy modifiers never apply.
+    """
+
+    name = "fsrs"
+    DECAY = -0.5
+    FACTOR = 19.0 / 81.0
+    DEFAULT_WEIGHTS = (
+        0.4872,
+        1.4003,
+        3.7145,
+        13.8206,
+        5.1618,
+        1.2298,
+        0.8975,
+        0.031,
+        1.6474,
+        0.1367,
+        1.0461,
+        2.1072,
+        0.0793,
+        0.3246,
+        1.587,
+        0.2272,
+        2.8755,
+    )
+    DEFAULT_PARAMS: ClassVar[Mapping[str, float]] = {
+        **{f"w{index}": weight for index, weight in enumerate(DEFAULT_WEIGHTS)},
+        "request_retention": 0.9,
+    }
+    PARAM_BOUNDS: ClassVar[Mapping[str, tuple[float, float]]] = {
+        "w0": (0.1, 100.0),
+        "w2": (0.1, 100.0),
+        "w4": (1.0, 10.0),
+        "w8": (0.0, 6.0),
+        "w9": (0.0, 0.8),
+        "w10": (0.01, 5.0),
+        "w11": (0.2, 6.0),
+    }
+
+    def init_state(self, size: int) -> State:
+        return {
+            "review_count": _counter(size),
+            "success_count": _counter(size),
+            "stability": np.ones(size),
+            "difficulty": np.full(size, self._initial_difficulty(3.0)),
+            "interval_days": np.ones(size),
+        }
+
+    def predict_recall(self, state: State, elapsed_days: np.ndarray) -> np.ndarray:
+        elapsed = np.maximum(np.asarray(elapsed_days, dtype=float), 0.0)
+        return (1.0 + self.FACTOR * elapsed / state["stability"]) ** self.DECAY
+
+    def step(self, state: State, correct: np.ndarray, elapsed_days: np.ndarray) -> State:
+        p = self.params
+        rating = np.where(correct, 3.0, 1.0)
+        is_new = state["review_count"] == 0
+        stability = state["stability"]
+        difficulty = state["difficulty"]
+        recall = self.predict_recall(state, elapsed_days)
+
+        recall_stability = stability * (
+            1.0
+            + np.exp(p["w8"])
+            * (11.0 - difficulty)
+            * stability ** (-p["w9"])
+            * (np.exp(p["w10"] * (1.0 - recall)) - 1.0)
+        )
+        forget_stability = np.minimum(
+            stability,
+            p["w11"]
+            * difficulty ** (-p["w12"])
+            * ((stability + 1.0) ** p["w13"] - 1.0)
+            * np.exp(p["w14"] * (1.0 - recall)),
+        )
+        next_difficulty = difficulty - p["w6"] * (rating - 3.0)
+        next_difficulty = (
+            p["w7"] * self._initial_difficulty(3.0) + (1.0 - p["w7"]) * next_difficulty
+        )
+
+        new_stability = np.where(
+            is_new,
+            np.where(correct, p["w2"], p["w0"]),
+            np.where(correct, recall_stability, forget_stability),
+        )
+        new_stability = np.maximum(new_stability, 0.01)
+        new_difficulty = np.clip(
+            np.where(is_new, self._initial_difficulty(rating), next_difficulty), 1.0, 10.0
+        )
+        return {
+            "review_count": state["review_count"] + 1,
+            "success_count": state["success_count"] + correct,
+            "stability": new_stability,
+            "difficulty": new_difficulty,
+            "interval_days": self._interval(new_stability),
+        }
+
+    def _initial_difficulty(self, rating):
+        return np.clip(self.params["w4"] - (rating - 3.0) * self.params["w5"], 1.0, 10.0)
+
+    def _interval(self, stability: np.ndarray) -> np.ndarray:
+        retention = self.params["request_retention"]
+        return stability / self.FACTOR * (retention ** (1.0 / self.DECAY) - 1.0)
+
+
+ALGORITHMS: Dict[str, Type[SchedulingAlgorithm]] = {
+    algorithm.name: algorithm for algorithm in (LegacyAlgorithm, SM2Algorithm, FSRSAlgorithm)
+}
+
+
+def get_algorithm(name: str, params: Mapping[str, float] | None = None) -> SchedulingAlgorithm:
+    """Instantiate the algorithm registered under ``name``."""
+
+    try:
+        algorithm_class = ALGORITHMS[name]
+    except KeyError:
+        raise ValueError(
+            f"Unknown scheduling algorithm {name!r} (expected one of {sorted(ALGORITHMS)})"
+        ) from None
+    return algorithm_class(params)
+
+
+__all__ = [
+    "ALGORITHMS",
+    "FSRSAlgorithm",
+    "LegacyAlgorithm",
+    "SM2Algorithm",
+    "get_algorithm",
+]
@@ -0,0 +1,90 @@
+"""Common interface of the spaced-repetition scheduling algorithms.
+
+Every algorithm works on *arrays of items*: its state is a mapping of
+equally-sized NumPy arrays (one slot per molecule) and :meth:`step` advances
+all items by one review at once. Re-simulating a learner's whole history is
+then one ``step`` per review rank instead of one Python call per answer, and
+the single-answer API (:meth:`update`) is a thin wrapper over a one-item batch
+so both paths always share the same formulas.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+from typing import ClassVar, Dict, Mapping
+
+import numpy as np
+
+State = Dict[str, np.ndarray]
+
+# Interval-based algorithms (legacy, SM-2) do not model memory explicitly; for
+# evaluation they are assumed to schedule a review when recall drops to 90 %.
+TARGET_RETENTION = 0.9
+
+
+class SchedulingAlgorithm:
+    """Base class of the vectorised schedulers."""
+
+    name: ClassVar[str]
+    DEFAULT_PARAMS: ClassVar[Mapping[str, float]] = {}
+    # Parameters explored by :func:`app.services.scheduling.fitting.fit_parameters`.
+    PARAM_BOUNDS: ClassVar[Mapping[str, tuple[float, float]]] = {}
+
+    def __init__(self, params: Mapping[str, float] | None = None) -> None:
+        params = dict(params or {})
+        unknown = set(params) - set(self.DEFAULT_PARAMS)
+        if unknown:
+            raise ValueError(f"Unknown {self.name} parameters: {sorted(unknown)}")
+        self.params: Dict[str, float] = {**self.DEFAULT_PARAMS, **params}
+
+    # ------------------------------------------------------------------
+    # Vectorised API
+    # ------------------------------------------------------------------
+    def init_state(self, size: int) -> State:
+        """Return the state of ``size`` never-reviewed items."""
+
+        raise NotImplementedError
+
+    def step(self, state: State, correct: np.ndarray, elapsed_days: np.ndarray) -> State:
+        """Return the state after one review of every item.
+
+        ``elapsed_days`` is the time since the previous review (ignored for the
+        first one). Implementations must not mutate ``state``.
+        """
+
+        raise NotImplementedError
+
+    def predict_recall(self, state: State, elapsed_days: np.ndarray) -> np.ndarray:
+        """Probability of a correct answer ``elapsed_days`` after the last review."""
+
+        interval = np.maximum(state["interval_days"], 1e-6)
+        return TARGET_RETENTION ** (np.asarray(elapsed_days, dtype=float) / interval)
+
+    # ------------------------------------------------------------------
+    # Single-item API
+    # ------------------------------------------------------------------
+    def update(
+        self,
+        state: Mapping[str, float] | None,
+        is_correct: bool,
+        elapsed_days: float = 0.0,
+    ) -> Dict[str, float]:
+        """Apply one answer to a single item described by plain floats."""
+
+        batch = self.init_state(1)
+        for key, value in (state or {}).items():
+            if key in batch and value is not None:
+                batch[key] = np.array([value], dtype=batch[key].dtype)
+        new_state = self.step(
+            batch,
+            np.array([bool(is_correct)]),
+            np.array([float(elapsed_days)]),
+        )
+        return {key: value[0].item() for key, value in new_state.items()}
+
+    @staticmethod
+    def next_review_at(state: Mapping[str, float], reviewed_at: datetime) -> datetime:
+        return reviewed_at + timedelta(days=float(state["interval_days"]))
+
+
+__all__ = ["SchedulingAlgorithm", "State", "TARGET_RETENTION"]
@@ -0,0 +1,220 @@
+"""Replay recorded answers through a scheduling algorithm.
+
+:class:`ReviewHistory` packs a learner's ``UserAnswerLog`` rows into padded
+``(molecules, reviews)`` arrays; :func:`simulate` then walks the review ranks
+and advances every molecule at once. The same replay serves three purposes:
+recomputing stored schedules after an algorithm change, scoring an algorithm
+against what the learner actually remembered, and fitting its parameters.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+from app.models.capsule.atom_model import Atom
+from app.models.progress.user_answer_log_model import UserAnswerLog
+from app.models.progress.user_molecule_review_model import UserMoleculeReview
+from app.services.scheduling.base import SchedulingAlgorithm, State
+from app.services.srs_service import SRSService, _as_naive_utc
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+_EPOCH = datetime(1970, 1, 1)
+_SECONDS_PER_DAY = 86400.0
+
+
+@dataclass
+class ReviewHistory:
+    """Padded review matrix, one row per molecule in chronological order."""
+
+    molecule_ids: np.ndarray  # (n,)
+    correct: np.ndarray  # (n, T) bool
+    elapsed_days: np.ndarray  # (n, T) days since the previous review, 0 first
+    mask: np.ndarray  # (n, T) True where a review exists
+    last_review_at: List[datetime]
+
+    @property
+    def size(self) -> int:
+        return int(self.molecule_ids.shape[0])
+
+    @property
+    def review_count(self) -> int:
+        return int(self.mask.sum())
+
+    @property
+    def error_counts(self) -> np.ndarray:
+        """Wrong answers per molecule, ``(n,)``."""
+
+        return (self.mask & ~self.correct).sum(axis=1)
+
+    @property
+    def last_correct(self) -> np.ndarray:
+        """Outcome of each molecule's latest review, ``(n,)``."""
+
+        return self.correct[np.arange(self.size), self.mask.sum(axis=1) - 1]
+
+    @classmethod
+    def from_events(cls, events: Iterable[Tuple[int, datetime, bool]]) -> "ReviewHistory":
+        """Build the matrix from ``(molecule_id, answered_at, is_correct)`` tuples."""
+
+        rows = sorted(
+            (molecule_id, _as_naive_utc(answered_at), bool(is_correct))
+            for molecule_id, answered_at, is_correct in events
+        )
+        if not rows:
+            empty = np.zeros((0, 0))
+            return cls(
+                np.zeros(0, dtype=np.int64), empty.astype(bool), empty, empty.astype(bool), []
+            )
+
+        molecules = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+        days = np.fromiter(
+            ((row[1] - _EPOCH).total_seconds() / _SECONDS_PER_DAY for row in rows),
+            dtype=float,
+            count=len(rows),
+        )
+        outcomes = np.fromiter((row[2] for row in rows), dtype=bool, count=len(rows))
+
+        molecule_ids, starts, counts = np.unique(molecules, return_index=True, return_counts=True)
+        group = np.repeat(np.arange(len(molecule_ids)), counts)
+        rank = np.arange(len(rows)) - starts[group]
+        elapsed = np.diff(days, prepend=days[0])
+        elapsed[starts] = 0.0
+
+        shape = (len(molecule_ids), int(counts.max()))
+        correct = np.zeros(shape, dtype=bool)
+        elapsed_days = np.zeros(shape)
+        mask = np.zeros(shape, dtype=bool)
+        correct[group, rank] = outcomes
+        elapsed_days[group, rank] = np.maximum(elapsed, 0.0)
+        mask[group, rank] = True
+        last_review_at = [rows[start + count - 1][1] for start, count in zip(starts, counts)]
+        return cls(molecule_ids, correct, elapsed_days, mask, last_review_at)
+
+
+@dataclass
+class SimulationResult:
+    state: State
+    # Recall predicted before each review (NaN for first reviews and padding).
+    predictions: np.ndarray
+
+
+def load_user_history(db: Session, user_id: int) -> ReviewHistory:
+    """Fetch every answer of ``user_id`` grouped by molecule."""
+
+    rows = db.execute(
+        select(Atom.molecule_id, UserAnswerLog.created_at, UserAnswerLog.is_correct)
+        .join(Atom, Atom.id == UserAnswerLog.atom_id)
+        .where(UserAnswerLog.user_id == user_id)
+    ).all()
+    return ReviewHistory.from_events(rows)
+
+
+def simulate(algorithm: SchedulingAlgorithm, history: ReviewHistory) -> SimulationResult:
+    """Replay ``history`` through ``algorithm``, one vectorised step per review rank."""
+
+    state = algorithm.init_state(history.size)
+    predictions = np.full(history.mask.shape, np.nan)
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        for rank in range(history.mask.shape[1]):
+            active = history.mask[:, rank]
+            elapsed = history.elapsed_days[:, rank]
+            seen = active & (state["review_count"] > 0)
+            predictions[:, rank] = np.where(seen, algorithm.predict_recall(state, elapsed), np.nan)
+            stepped = algorithm.step(state, history.correct[:, rank], elapsed)
+            state = {key: np.where(active, stepped[key], value) for key, value in state.items()}
+    return SimulationResult(state=state, predictions=predictions)
+
+
+def evaluate(algorithm: SchedulingAlgorithm, history: ReviewHistory) -> Dict[str, float]:
+    """Score recall predictions against the recorded outcomes (repeat reviews only)."""
+
+    predictions = simulate(algorithm, history).predictions
+    scored = ~np.isnan(predictions)
+    reviews = int(scored.sum())
+    if not reviews:
+        return {
+            "algorithm": algorithm.name,
+            "reviews": 0,
+            "log_loss": float("nan"),
+            "rmse": float("nan"),
+        }
+    predicted = np.clip(predictions[scored], 1e-6, 1.0 - 1e-6)
+    actual = history.correct[scored].astype(float)
+    log_loss = -np.mean(actual * np.log(predicted) + (1.0 - actual) * np.log(1.0 - predicted))
+    rmse = np.sqrt(np.mean((predicted - actual) ** 2))
+    return {
+        "algorithm": algorithm.name,
+        "reviews": reviews,
+        "log_loss": round(float(log_loss), 5),
+        "rmse": round(float(rmse), 5),
+    }
+
+
+def recompute_schedules(db: Session, user_id: int, algorithm: SchedulingAlgorithm) -> int:
+    """Rewrite the user's ``UserMoleculeReview`` plans from their answer history.
+
+    The fields derived from answers are rewritten: interval, review dates,
+    review/success/error counts, ease and streak (when the algorithm tracks
+    them) and ``last_outcome``, except that a reset recorded after the latest
+    answer stays the last outcome. ``total_resets`` and ``last_error_at`` are
+    left alone. The caller commits. Returns the number of schedules written.
+    """
+
+    history = load_user_history(db, user_id)
+    if not history.size:
+        return 0
+    state = simulate(algorithm, history).state
+    existing = {
+        review.molecule_id: review
+        for review in db.scalars(
+            select(UserMoleculeReview).where(
+                UserMoleculeReview.user_id == user_id,
+                UserMoleculeReview.molecule_id.in_(history.molecule_ids.tolist()),
+            )
+        )
+    }
+
+    now = datetime.utcnow()
+    error_counts = history.error_counts.tolist()
+    last_correct = history.last_correct.tolist()
+    for index, molecule_id in enumerate(history.molecule_ids.tolist()):
+        schedule = existing.get(molecule_id)
+        if schedule is None:
+            schedule = UserMoleculeReview(user_id=user_id, molecule_id=molecule_id)
+            db.add(schedule)
+        last_review_at = history.last_review_at[index]
+        reset_since = schedule.last_outcome == "reset" and (
+            schedule.updated_at is not None and _as_naive_utc(schedule.updated_at) >= last_review_at
+        )
+        if not reset_since:
+            schedule.last_outcome = "success" if last_correct[index] else "error"
+        schedule.total_errors = int(error_counts[index])
+        interval = float(state["interval_days"][index])
+        schedule.interval_days = interval
+        schedule.last_review_at = last_review_at
+        schedule.next_review_at = last_review_at + timedelta(days=interval)
+        schedule.review_count = int(state["review_count"][index])
+        schedule.success_count = int(state["success_count"][index])
+        if "ease_factor" in state:
+            schedule.ease_factor = float(state["ease_factor"][index])
+        if "streak" in state:
+            schedule.streak = int(state["streak"][index])
+        schedule.updated_at = now
+
+    db.flush()
+    SRSService.invalidate_user_cache(user_id)
+    return history.size
+
+
+__all__ = [
+    "ReviewHistory",
+    "SimulationResult",
+    "evaluate",
+    "load_user_history",
+    "recompute_schedules",
+    "simulate",
+]
@@ -15,6 +15,7 @@ from app.models.capsule.capsule_model import Capsule, GenerationStatus
 from app.models.analytics.vector_store_model import VectorStore
 from app.models.user.user_model import User
 from app.services.rag_utils import get_embedding
+from app.services.retrieval import invalidate_indexes
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -112,6 +113,7 @@ def seed_golden_learning_plans():
                     logger.warning(f"Ligne JSON malformée ignorée : {line.strip()[:100]}...")
 
         db.commit()
+        invalidate_indexes("vector_store")
         logger.info(f"✅ SUCCÈS : {count_added} nouveaux plans ont été ajoutés, {count_skipped} ont été mis à jour.")
 
     except Exception as e:
@@ -1,18 +1,11 @@
 import importlib
-import io
+import itertools
 import logging
 import json
-from typing import Dict, List, Optional
+from contextlib import nullcontext
+from typing import TYPE_CHECKING, ContextManager, Dict, Iterable, List, Optional
 
 from fastapi import BackgroundTasks, HTTPException
-from openai import OpenAI
-try:  # pragma: no cover - dépendance facultative en environnement de test
-    from pypdf import PdfReader  # type: ignore
-except ImportError:  # pragma: no cover
-    try:
-        from PyPDF2 import PdfReader  # type: ignore
-    except ImportError:
-        PdfReader = None
 from sqlalchemy.orm import Session, selectinload
 
 from app.models.analytics.vector_store_model import VectorStore
@@ -34,6 +27,20 @@ from app.models.user.user_model import User, SubscriptionStatus
 from app.crud import notification_crud
 from app.schemas.user import notification_schema
 from app.services.rag_utils import get_embedding
+from app.services.retrieval import invalidate_indexes
+from app.services.ingestion import (
+    Chunk,
+    InvalidPdfError,
+    PdfTimeoutError,
+    PdfTooLargeError,
+    PdfUnavailableError,
+    ProgressCallback,
+    chunk_pages,
+    chunk_text,
+    delete_chunks,
+    extract_pdf_pages,
+    ingest_chunks,
+)
 from app.services.services.capsules.base_builder import BaseCapsuleBuilder
 from app.services.services.capsules.languages.foreign_builder import ForeignBuilder
 from app.services.services.capsules.others.default_builder import DefaultBuilder
@@ -45,18 +52,12 @@ from app.core.config import settings
 from app.db.session import SessionLocal
 from app.models.analytics.feedback_model import ContentFeedback
 
-PDF_MAX_CHARS = 40000
-
+if TYPE_CHECKING:
+    from app.services.capsule_job_service import CapsuleJobProgress
 
 # --- Configuration ---
 logger = logging.getLogger(__name__)
 
-try:
-    openai_client = OpenAI(api_key=settings.OPENAI_API_KEY)
-except Exception as e:
-    openai_client = None
-    logger.error(f"❌ Erreur de configuration pour OpenAI: {e}")
-
 # ==============================================================================
 # SECTION 1: FONCTION D'AIGUILLAGE (Dispatcher)
 # ==============================================================================
@@ -112,9 +113,11 @@ class CapsuleService:
     Service principal pour orchestrer les opérations liées aux capsules.
     Il utilise un système de "Builders" pour déléguer la logique spécifique à chaque type de capsule.
     """
-    def __init__(self, db: Session, user: User):
+    def __init__(self, db: Session, user: User, stages: Optional["CapsuleJobProgress"] = None):
         self.db = db
         self.user = user
+        # Suivi des étapes d'un job de génération (None hors job asynchrone)
+        self.stages = stages
         self._progress_cache: Dict[int, UserAtomProgress] | None = None
         self._progress_cache_capsule_id: Optional[int] = None
         self._is_superuser = bool(getattr(user, "is_superuser", False))
@@ -123,6 +126,9 @@ class CapsuleService:
     # ------------------------------------------------------------------
     # Internal helpers for capsule bootstrap
     # ------------------------------------------------------------------
+    def _stage(self, name: str) -> ContextManager:
+        return self.stages.stage(name) if self.stages else nullcontext()
+
     def _create_capsule_shell(
         self,
         *,
@@ -204,7 +210,8 @@ class CapsuleService:
             "--- [SERVICE] Lancement de generate_learning_plan() pour la capsule %s. ---",
             capsule.id,
         )
-        plan_json = builder.generate_learning_plan(db=self.db, capsule=capsule)
+        with self._stage("plan"):
+            plan_json = builder.generate_learning_plan(db=self.db, capsule=capsule)
 
         if not plan_json:
             capsule.generation_status = GenerationStatus.FAILED
@@ -249,8 +256,9 @@ class CapsuleService:
 
         if first_molecule:
             try:
-                builder.build_molecule_content(first_molecule)
-                self.db.commit()
+                with self._stage("first_molecule"):
+                    builder.build_molecule_content(first_molecule)
+                    self.db.commit()
             except Exception as exc:
                 logger.error(
                     "--- [SERVICE] Échec de génération du contenu initial pour la capsule %s: %s ---",
@@ -274,41 +282,55 @@ class CapsuleService:
 
         return capsule
 
-    def _prepare_source_material(self, text: str | None) -> Optional[dict]:
-        if not text:
-            return None
-        cleaned = text.strip()
-        if not cleaned:
+    def _prepare_source_material(self, capsule: Capsule, chunks: Iterable[Chunk]) -> Optional[dict]:
+        """Stocke les passages du document et résume celui-ci pour le prompt de plan."""
+        # validé lot par lot: l'extraction d'un long document ne garde pas de transaction ouverte
+        report = ingest_chunks(self.db, capsule.id, chunks, commit=True)
+        if not report.chunk_count:
             return None
-        truncated = cleaned[:PDF_MAX_CHARS]
-        logger.info("[PDF] Longueur du texte extrait: %s caractères (après nettoyage)", len(truncated))
-        if len(truncated) < 500:
+        digest = report.digest()
+        logger.info(
+            "[PDF] %s passages sur %s pages, condensé de %s caractères pour le plan",
+            report.chunk_count,
+            report.page_count,
+            len(digest),
+        )
+        if report.chunk_count < 2 and len(digest) < 500:
             logger.warning("[PDF] Texte très court (<500 caractères). La capsule risque d'être générique.")
-        return {"text": truncated}
-
-    def _extract_text_from_pdf(self, pdf_bytes: bytes) -> str:
-        if PdfReader is None:
-            raise HTTPException(
-                status_code=503,
-                detail="pdf_support_unavailable",
-            )
+        return {"text": digest, "outline": report.outline_entries(), "chunked": True}
 
+    @staticmethod
+    def _pdf_chunks(
+        pdf_bytes: bytes,
+        progress: Optional[ProgressCallback],
+        stages: Optional["CapsuleJobProgress"] = None,
+    ) -> Iterable[Chunk]:
+        """Découpe le PDF au fil de l'extraction en traduisant les erreurs en HTTPException."""
         try:
-            reader = PdfReader(io.BytesIO(pdf_bytes))
-        except Exception as exc:
+            pages = extract_pdf_pages(pdf_bytes, progress=progress)
+            yield from chunk_pages(
+                stages.timed("extract", pages) if stages else pages,
+                chunk_chars=settings.PDF_CHUNK_CHARS,
+                overlap_chars=settings.PDF_CHUNK_OVERLAP_CHARS,
+            )
+        except PdfUnavailableError:
+            raise HTTPException(status_code=503, detail="pdf_support_unavailable")
+        except InvalidPdfError as exc:
             logger.error("[PDF] Lecture impossible: %s", exc, exc_info=True)
             raise HTTPException(status_code=400, detail="invalid_pdf") from exc
-
-        pages_text: List[str] = []
-        for idx, page in enumerate(reader.pages):
-            page_text = page.extract_text() or ""
-            if page_text:
-                pages_text.append(page_text)
-            else:
-                logger.debug("[PDF] Page %s sans texte exploitable.", idx + 1)
-        logger.info("[PDF] Pages lues: %s / %s", len(pages_text), len(getattr(reader, 'pages', [])))
-        full_text = "\n".join(pages_text).strip()
-        return full_text
+        except PdfTooLargeError as exc:
+            logger.warning("[PDF] Document refusé: %s", exc)
+            raise HTTPException(status_code=413, detail="pdf_too_many_pages") from exc
+        except PdfTimeoutError as exc:
+            logger.warning("[PDF] Extraction interrompue: %s", exc)
+            raise HTTPException(status_code=422, detail="pdf_extraction_timeout") from exc
+
+    def _chunk_pdf(self, pdf_bytes: bytes, progress: Optional[ProgressCallback] = None) -> Iterable[Chunk]:
+        chunks = self._pdf_chunks(pdf_bytes, progress, self.stages)
+        first = next(chunks, None)
+        if first is None:
+            raise HTTPException(status_code=400, detail="empty_pdf")
+        return itertools.chain([first], chunks)
 
     # ------------------------------------------------------------------
     # Helpers de progression
@@ -594,6 +616,49 @@ class CapsuleService:
             "next_granule_unlocked": next_granule_unlocked,
         }
 
+    def completion_snapshot_from_state(
+        self,
+        molecule: Molecule,
+        progress_map: Dict[int, UserAtomProgress],
+    ) -> Dict[str, bool | str]:
+        """Même résultat que :meth:`completion_snapshot`, sans aucune requête.
+
+        ``molecule`` doit donner accès à ``granule.capsule.granules`` déjà chargés
+        (graphe ORM ou projection en mémoire) et ``progress_map`` refléter l'état
+        à jour des atomes de la capsule.
+        """
+        granule = molecule.granule
+        capsule = granule.capsule
+        molecule_completed = self._is_molecule_completed(molecule, progress_map)
+        granule_completed = self._is_granule_completed(granule, progress_map)
+        progress_status = self._compute_molecule_progress_status(molecule, progress_map)
+
+        next_molecule = next(
+            (item for item in granule.molecules if item.order == molecule.order + 1),
+            None,
+        )
+        next_molecule_unlocked = False
+        if next_molecule is not None:
+            next_molecule_unlocked = True
+            if not self._is_superuser:
+                if granule.order > 1:
+                    previous_granule = next(
+                        (item for item in capsule.granules if item.order == granule.order - 1),
+                        None,
+                    )
+                    if previous_granule and not self._is_granule_completed(previous_granule, progress_map):
+                        next_molecule_unlocked = False
+                if next_molecule.order > 1 and not molecule_completed:
+                    next_molecule_unlocked = False
+
+        return {
+            "progress_status": progress_status,
+            "molecule_completed": molecule_completed,
+            "granule_completed": granule_completed,
+            "next_molecule_unlocked": next_molecule_unlocked,
+            "next_granule_unlocked": granule_completed,
+        }
+
     # ------------------------------------------------------------------
     # Notifications utilitaires
     # ------------------------------------------------------------------
@@ -628,24 +693,27 @@ class CapsuleService:
     ):
         """Diffuse une notification à tous les inscrits d'une capsule."""
         try:
-            enrollments = (
-                self.db.query(UserCapsuleEnrollment)
+            user_ids = (
+                self.db.query(UserCapsuleEnrollment.user_id)
                 .filter(UserCapsuleEnrollment.capsule_id == capsule.id)
+                .distinct()
                 .all()
             )
-            for enrollment in enrollments:
-                if exclude_user_ids and enrollment.user_id in exclude_user_ids:
-                    continue
-                notification_crud.create_notification(
-                    self.db,
+            # Un seul INSERT + une seule transaction; la diffusion est faite par l'outbox
+            notification_crud.create_notifications(
+                self.db,
+                [
                     notification_schema.NotificationCreate(
-                        user_id=enrollment.user_id,
+                        user_id=user_id,
                         title=title,
                         message=message,
                         category=NotificationCategory.CAPSULE,
                         link=link,
-                    ),
-                )
+                    )
+                    for (user_id,) in user_ids
+                    if not (exclude_user_ids and user_id in exclude_user_ids)
+                ],
+            )
         except Exception as exc:
             logger.error("[NOTIFY] Diffusion bonus échouée: %s", exc, exc_info=True)
             try:
@@ -754,6 +822,40 @@ class CapsuleService:
         domain: str,
         area: str,
         main_skill: str,
+    ) -> Capsule:
+        chunks = chunk_text(
+            (source_text or "").strip(),
+            chunk_chars=settings.PDF_CHUNK_CHARS,
+            overlap_chars=settings.PDF_CHUNK_OVERLAP_CHARS,
+        )
+        return self._create_capsule_from_chunks(
+            chunks, title=title, domain=domain, area=area, main_skill=main_skill
+        )
+
+    def create_capsule_from_pdf_bytes(
+        self,
+        *,
+        pdf_bytes: bytes,
+        title: str,
+        domain: str,
+        area: str,
+        main_skill: str,
+        progress: Optional[ProgressCallback] = None,
+    ) -> Capsule:
+        if not (self._is_superuser or self._is_premium):
+            raise HTTPException(status_code=403, detail="premium_required")
+        return self._create_capsule_from_chunks(
+            self._chunk_pdf(pdf_bytes, progress), title=title, domain=domain, area=area, main_skill=main_skill
+        )
+
+    def _create_capsule_from_chunks(
+        self,
+        chunks: Iterable[Chunk],
+        *,
+        title: str,
+        domain: str,
+        area: str,
+        main_skill: str,
     ) -> Capsule:
         if not (self._is_superuser or self._is_premium):
             raise HTTPException(status_code=403, detail="premium_required")
@@ -766,7 +868,20 @@ class CapsuleService:
             main_skill=main_skill,
         )
 
-        source_material = self._prepare_source_material(source_text)
+        if self.stages:
+            self.stages.attach_capsule(capsule.id)
+
+        # Les pages sont extraites, découpées et indexées au fil de l'eau
+        try:
+            with self._stage("chunk"):
+                source_material = self._prepare_source_material(capsule, chunks)
+        except HTTPException:
+            # extraction interrompue (délai dépassé…): pas de capsule à moitié indexée
+            self.db.rollback()
+            delete_chunks(self.db, capsule.id)
+            capsule.generation_status = GenerationStatus.FAILED
+            self.db.commit()
+            raise
         if source_material is not None:
             source_material.setdefault("origin", "uploaded_document")
 
@@ -777,26 +892,6 @@ class CapsuleService:
             source_material=source_material,
         )
         return self._build_plan_and_content(capsule, builder)
-
-    def create_capsule_from_pdf_bytes(
-        self,
-        *,
-        pdf_bytes: bytes,
-        title: str,
-        domain: str,
-        area: str,
-        main_skill: str,
-    ) -> Capsule:
-        text = self._extract_text_from_pdf(pdf_bytes)
-        if not text:
-            raise HTTPException(status_code=400, detail="empty_pdf")
-        return self.create_capsule_from_document(
-            source_text=text,
-            title=title,
-            domain=domain,
-            area=area,
-            main_skill=main_skill,
-        )
     
 
     def generate_next_molecule_content(self, completed_molecule_id: int) -> List[Atom]:
@@ -1110,6 +1205,7 @@ class CapsuleService:
                 skill=capsule.main_skill
             ))
             db.commit()
+            invalidate_indexes("vector_store")
 
 # ==============================================================================
 # SECTION 3: FONCTIONS AUTONOMES (si nécessaire)
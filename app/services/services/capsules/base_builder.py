@@ -5,9 +5,8 @@ import json
 from abc import ABC, abstractmethod
 from typing import List, Dict, Any, Optional
 from sqlalchemy.orm import Session
-from openai import OpenAI
 
-from app.core.config import settings
+from app.core.llm_clients import LLMClientRegistry, llm_clients
 from app.models.user.user_model import User
 from app.models.capsule.capsule_model import Capsule
 from app.models.capsule.granule_model import Granule
@@ -17,14 +16,10 @@ from app.models.analytics.vector_store_model import VectorStore
 from app.models.capsule.language_roadmap_model import LanguageRoadmap # <-- Importer le bon modèle
 
 from app.services.rag_utils import get_embedding
+from app.services.retrieval import invalidate_indexes
 
 logger = logging.getLogger(__name__)
 
-try:
-    openai_client = OpenAI(api_key=settings.OPENAI_API_KEY)
-except Exception as e:
-    openai_client = None
-
 class BaseCapsuleBuilder(ABC): # <-- On le transforme en classe abstraite
     """
     Builder de base abstrait. Gère la création de capsules, la génération de plans
@@ -41,14 +36,22 @@ class BaseCapsuleBuilder(ABC): # <-- On le transforme en classe abstraite
         user: User,
         *,
         source_material: Optional[dict] = None,
+        clients: Optional[LLMClientRegistry] = None,
     ):
         """
         Initialise le builder avec la session de base de données et la capsule cible.
+        ``clients`` remplace le registre partagé des clients LLM (tests).
         """
         self.db = db
         self.capsule = capsule
         self.user = user
         self.source_material: Optional[dict] = source_material or None
+        self.clients: LLMClientRegistry = clients or llm_clients
+
+    @property
+    def openai_client(self):
+        """Client OpenAI partagé (construit au premier appel), ``None`` s'il n'est pas configuré."""
+        return self.clients.openai()
 
 
     def get_details(self, db: Session, user, capsule: Capsule, **kwargs) -> dict:
@@ -131,6 +134,7 @@ class BaseCapsuleBuilder(ABC): # <-- On le transforme en classe abstraite
         )
         db.add(new_vector_entry)
         db.commit()
+        invalidate_indexes("vector_store")
         
     def _find_atom_in_vector_store(self, db: Session, capsule: Capsule, molecule: Molecule, content_type: str) -> dict | None:
         # ... (code existant inchangé)
@@ -161,6 +165,7 @@ class BaseCapsuleBuilder(ABC): # <-- On le transforme en classe abstraite
             skill=skill_identifier
         )
         db.add(new_vector_entry)
+        invalidate_indexes("vector_store")
 
     def _find_inspirational_examples(self, db: Session, domain: str, area: str, limit: int = 3) -> List[Dict[str, Any]]:
         """
@@ -194,6 +199,7 @@ class BaseCapsuleBuilder(ABC): # <-- On le transforme en classe abstraite
     
     def _generate_plan_with_openai(self, capsule: Capsule, rag_examples: list[dict]) -> dict | None:
         # ... (code existant inchangé)
+        openai_client = self.openai_client
         if not openai_client: return None
         system_prompt = (
             "Tu es un expert en ingénierie pédagogique. Ta mission est de créer un plan de cours JSON complet et très détaillé. "
@@ -6,8 +6,7 @@ from app.models.capsule.capsule_model import Capsule
 from app.models.capsule.molecule_model import Molecule
 from app.models.capsule.atom_model import Atom, AtomContentType
 from app.services.services.capsules.base_builder import BaseCapsuleBuilder
-from openai import OpenAI
-from app.core.config import settings
+from app.core.llm_clients import LLMClientRegistry
 from app.models.user.user_model import User
 from app.services.atom_service import AtomService
 from app.core import ai_service
@@ -26,22 +25,18 @@ class ForeignBuilder(BaseCapsuleBuilder):
         user: User,
         *,
         source_material: Optional[dict] = None,
+        clients: Optional[LLMClientRegistry] = None,
     ):
         """
         Constructeur qui accepte db et capsule et les passe au parent.
         """
-        super().__init__(db=db, capsule=capsule, user=user, source_material=source_material)
+        super().__init__(db=db, capsule=capsule, user=user, source_material=source_material, clients=clients)
         self.atom_service = AtomService(
             db=db,
             user=user,
             capsule=capsule,
             source_material=source_material,
         )
-        try:
-            self.openai_client = OpenAI(api_key=settings.OPENAI_API_KEY)
-        except Exception as e:
-            self.openai_client = None
-            logger.error(f"❌ Erreur de configuration OpenAI dans ForeignBuilder: {e}")
 
     def generate_learning_plan(self, db: Session, capsule: Capsule) -> dict | None:
         """
@@ -98,6 +93,7 @@ class ForeignBuilder(BaseCapsuleBuilder):
                 area=capsule.area,
                 main_skill=capsule.main_skill,
                 model_choice="gpt-5-mini-2025-08-07",
+                outline=(source_material or {}).get("outline"),
             )
         except Exception as exc:
             logger.error("Erreur lors de la génération du plan contextualisé pour la capsule de langue : %s", exc, exc_info=True)
@@ -10,6 +10,7 @@ from app.models.capsule.atom_model import Atom, AtomContentType
 from app.services.atom_service import AtomService
 from app.core import ai_service
 from app.services.services.capsules.base_builder import BaseCapsuleBuilder
+from app.core.llm_clients import LLMClientRegistry
 
 class DefaultBuilder(BaseCapsuleBuilder):
     """
@@ -24,9 +25,10 @@ class DefaultBuilder(BaseCapsuleBuilder):
         user: User,
         *,
         source_material: Optional[dict] = None,
+        clients: Optional[LLMClientRegistry] = None,
     ):
         """ Initialise le builder et le service d'atomes associé. """
-        super().__init__(db=db, capsule=capsule, user=user, source_material=source_material)
+        super().__init__(db=db, capsule=capsule, user=user, source_material=source_material, clients=clients)
         self.atom_service = AtomService(
             db=db,
             user=user,
@@ -80,6 +82,7 @@ class DefaultBuilder(BaseCapsuleBuilder):
                 area=capsule.area,
                 main_skill=capsule.main_skill,
                 model_choice="gpt-5-mini-2025-08-07",
+                outline=(source_material or {}).get("outline"),
             )
         except Exception as exc:
             logger = logging.getLogger(__name__)
@@ -11,6 +11,7 @@ from app.models.user.user_model import User
 from app.services.atom_service import AtomService
 from app.services.services.capsules.base_builder import BaseCapsuleBuilder
 from app.core import ai_service
+from app.core.llm_clients import LLMClientRegistry
 
 
 class ProgrammingBuilder(BaseCapsuleBuilder):
@@ -23,8 +24,9 @@ class ProgrammingBuilder(BaseCapsuleBuilder):
         user: User,
         *,
         source_material: Optional[dict] = None,
+        clients: Optional[LLMClientRegistry] = None,
     ):
-        super().__init__(db=db, capsule=capsule, user=user, source_material=source_material)
+        super().__init__(db=db, capsule=capsule, user=user, source_material=source_material, clients=clients)
         self.atom_service = AtomService(
             db=db,
             user=user,
@@ -121,6 +123,7 @@ class ProgrammingBuilder(BaseCapsuleBuilder):
                 area=capsule.area,
                 main_skill=capsule.main_skill,
                 model_choice="gpt-5-mini-2025-08-07",
+                outline=(source_material or {}).get("outline"),
             )
         except Exception:
             return None
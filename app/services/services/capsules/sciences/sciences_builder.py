@@ -12,6 +12,7 @@ from app.models.capsule.molecule_model import Molecule
 from app.models.user.user_model import User
 from app.services.atom_service import AtomService
 from app.services.services.capsules.base_builder import BaseCapsuleBuilder
+from app.core.llm_clients import LLMClientRegistry
 
 
 SCIENCE_DOMAINS = {
@@ -46,8 +47,9 @@ class ScienceBuilder(BaseCapsuleBuilder):
         user: User,
         *,
         source_material: Optional[dict] = None,
+        clients: Optional[LLMClientRegistry] = None,
     ):
-        super().__init__(db=db, capsule=capsule, user=user, source_material=source_material)
+        super().__init__(db=db, capsule=capsule, user=user, source_material=source_material, clients=clients)
         self.atom_service = AtomService(
             db=db,
             user=user,
@@ -2,14 +2,30 @@
 
 from __future__ import annotations
 
+import base64
 import json
-from datetime import datetime, timedelta
-from typing import Any, Dict, Iterable, List
-
-from sqlalchemy import func
-from sqlalchemy.orm import Session, selectinload
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict
+
+from fastapi import HTTPException
+from sqlalchemy import (
+    ColumnElement,
+    Row,
+    Select,
+    Subquery,
+    and_,
+    false,
+    func,
+    literal,
+    or_,
+    select,
+)
+from sqlalchemy.orm import Session
+
+from app.core.ttl_cache import TTLCache
 
 from app.models.capsule.atom_model import Atom
+from app.models.capsule.capsule_model import Capsule
 from app.models.capsule.molecule_model import Molecule
 from app.models.capsule.granule_model import Granule
 from app.models.progress.user_answer_log_model import UserAnswerLog
@@ -18,12 +34,25 @@ from app.models.progress.user_molecule_review_model import UserMoleculeReview
 from app.models.user.user_model import SubscriptionStatus, User
 
 
+# Retention ratios only move when answers are logged (which invalidates them):
+# a short TTL bounds staleness if another worker logged the answer.
+_RETENTION_CACHE: TTLCache[float | None] = TTLCache(ttl_seconds=60)
+
+# Error journal window: the last ERROR_WINDOW_SIZE mistakes of the last
+# ERROR_WINDOW_DAYS days, whichever is smaller.
+ERROR_WINDOW_DAYS = 90
+ERROR_WINDOW_SIZE = 500
+
+
 class SRSService:
     """High level helper combining SRS scheduling and error analytics."""
 
     DEFAULT_EASE_FACTOR = 2.5
     MIN_EASE_FACTOR = 1.3
     ERROR_REVIEW_DELAY_HOURS = 8
+    ERROR_TYPE_KEYS = ("error_type", "type", "category", "reason")
+    DEFAULT_ERROR_TYPE = "autre"
+    ERROR_EXAMPLES_PER_MOLECULE = 3
 
     def __init__(self, db: Session, user: User):
         self.db = db
@@ -42,7 +71,20 @@ class SRSService:
 
         molecule = atom.molecule
         schedule = self._get_or_create_schedule(molecule.id)
-        now = datetime.utcnow()
+        self.apply_answer(schedule, is_correct, datetime.utcnow())
+
+        self.db.add(schedule)
+        self.db.flush([schedule])
+        return schedule
+
+    @classmethod
+    def apply_answer(cls, schedule: Any, is_correct: bool, now: datetime) -> None:
+        """Apply the scheduling rules to ``schedule`` in memory.
+
+        ``schedule`` may be an ORM row or any object exposing the same
+        attributes, which lets batched write paths compute the new plan without
+        touching the database.
+        """
 
         schedule.review_count = (schedule.review_count or 0) + 1
         schedule.last_review_at = now
@@ -51,7 +93,7 @@ class SRSService:
             schedule.streak = (schedule.streak or 0) + 1
             schedule.success_count = (schedule.success_count or 0) + 1
             schedule.ease_factor = min(
-                (schedule.ease_factor or self.DEFAULT_EASE_FACTOR) + 0.1,
+                (schedule.ease_factor or cls.DEFAULT_EASE_FACTOR) + 0.1,
                 3.0,
             )
             if schedule.review_count == 1:
@@ -66,11 +108,11 @@ class SRSService:
             schedule.streak = 0
             schedule.total_errors = (schedule.total_errors or 0) + 1
             schedule.ease_factor = max(
-                self.MIN_EASE_FACTOR,
-                (schedule.ease_factor or self.DEFAULT_EASE_FACTOR) - 0.2,
+                cls.MIN_EASE_FACTOR,
+                (schedule.ease_factor or cls.DEFAULT_EASE_FACTOR) - 0.2,
             )
             schedule.interval_days = max(
-                0.25, self.ERROR_REVIEW_DELAY_HOURS / 24.0
+                0.25, cls.ERROR_REVIEW_DELAY_HOURS / 24.0
             )
             schedule.last_outcome = "error"
             schedule.last_error_at = now
@@ -79,10 +121,6 @@ class SRSService:
         schedule.next_review_at = now + timedelta(days=delay)
         schedule.updated_at = now
 
-        self.db.add(schedule)
-        self.db.flush([schedule])
-        return schedule
-
     def register_reset(self, molecule: Molecule) -> UserMoleculeReview:
         """Penalise schedule when the learner resets a molecule."""
 
@@ -108,62 +146,19 @@ class SRSService:
     def build_overview(self, limit: int | None = None) -> dict:
         """Return SRS plan summary suitable for API responses."""
 
-        schedules = (
-            self.db.query(UserMoleculeReview)
-            .options(
-                selectinload(UserMoleculeReview.molecule)
-                .selectinload(Molecule.granule)
-                .selectinload(Granule.capsule)
-            )
-            .filter(UserMoleculeReview.user_id == self.user_id)
-            .order_by(UserMoleculeReview.next_review_at.asc().nullsfirst())
-            .all()
-        )
-
         now = datetime.utcnow()
-        due_count = 0
-        overdue_count = 0
-        entries: List[dict] = []
-
-        for schedule in schedules:
-            molecule = schedule.molecule
-            capsule = getattr(getattr(molecule, "granule", None), "capsule", None)
-            next_review = schedule.next_review_at
-            due_in_hours = None
-            if next_review:
-                delta = next_review - now
-                due_in_hours = round(delta.total_seconds() / 3600, 2)
-                if next_review <= now:
-                    due_count += 1
-                    if (schedule.last_outcome or "") != "success":
-                        overdue_count += 1
-
-            entries.append(
-                {
-                    "molecule_id": molecule.id,
-                    "molecule_title": molecule.title,
-                    "capsule_id": getattr(capsule, "id", None),
-                    "capsule_title": getattr(capsule, "title", None),
-                    "next_review_at": next_review.isoformat() if next_review else None,
-                    "due_in_hours": due_in_hours,
-                    "interval_days": round(schedule.interval_days or 0, 2),
-                    "streak": schedule.streak or 0,
-                    "review_count": schedule.review_count or 0,
-                    "total_errors": schedule.total_errors or 0,
-                    "total_resets": schedule.total_resets or 0,
-                    "last_outcome": schedule.last_outcome,
-                }
-            )
-
-        if limit is not None:
-            entries = entries[:limit]
+        counters = self._review_counters(now)
+        entries = [
+            self.serialize_review(row, now)
+            for row in self.db.execute(self.review_rows_query(limit=limit))
+        ]
 
         overview = {
-            "due_count": due_count,
-            "overdue_count": overdue_count,
+            "due_count": counters.due_count,
+            "overdue_count": counters.overdue_count,
             "next_reviews": entries,
-            "retention_7_days": self._compute_retention_ratio(7),
-            "retention_30_days": self._compute_retention_ratio(30),
+            "retention_7_days": self._get_retention_ratio(7),
+            "retention_30_days": self._get_retention_ratio(30),
             "settings": {
                 "default_interval_days": 1.0,
                 "default_ease_factor": self.DEFAULT_EASE_FACTOR,
@@ -172,97 +167,122 @@ class SRSService:
         }
 
         if self._is_premium:
+            total_reviews = int(counters.total_reviews or 0)
             overview["advanced_stats"] = {
-                "average_interval_days": self._calculate_average_interval(schedules),
-                "success_rate": self._compute_success_rate(schedules),
+                "average_interval_days": (
+                    round(float(counters.average_interval), 2)
+                    if counters.average_interval is not None
+                    else None
+                ),
+                "success_rate": (
+                    round(int(counters.total_success or 0) / total_reviews, 3)
+                    if total_reviews
+                    else None
+                ),
             }
 
         return overview
 
-    def build_error_overview(
+    def due_queue(
         self,
-        limit: int | None = None,
-        include_examples: bool = False,
+        limit: int = 20,
+        cursor: str | None = None,
+        capsule_id: int | None = None,
     ) -> dict:
-        """Aggregate recent mistakes per molecule and error type."""
-
-        error_logs = (
-            self.db.query(UserAnswerLog)
-            .options(
-                selectinload(UserAnswerLog.atom)
-                .selectinload(Atom.molecule)
-                .selectinload(Molecule.granule)
-                .selectinload(Granule.capsule)
-            )
-            .filter(
-                UserAnswerLog.user_id == self.user_id,
-                UserAnswerLog.is_correct.is_(False),
-            )
-            .order_by(UserAnswerLog.created_at.desc())
-            .all()
-        )
+        """Return one page of due/overdue reviews, oldest first.
 
-        reset_map = self._build_reset_map()
-        aggregated: Dict[int, dict] = {}
+        Pagination is keyset-based on ``(next_review_at, id)`` so each page is a
+        bounded range scan on ``ix_user_molecule_reviews_user_next_review``
+        whatever the size of the learner's history.
+        """
 
-        for log in error_logs:
-            atom = log.atom
-            molecule = atom.molecule
-            if molecule is None:
-                continue
-
-            bucket = aggregated.setdefault(
-                molecule.id,
-                {
-                    "molecule_id": molecule.id,
-                    "molecule_title": molecule.title,
-                    "capsule_id": getattr(
-                        getattr(getattr(molecule, "granule", None), "capsule", None),
-                        "id",
-                        None,
+        now = datetime.utcnow()
+        query = self.review_rows_query(limit=limit + 1, capsule_id=capsule_id).where(
+            UserMoleculeReview.next_review_at <= now
+        )
+        if cursor:
+            after_review_at, after_id = self._decode_cursor(cursor)
+            query = query.where(
+                or_(
+                    UserMoleculeReview.next_review_at > after_review_at,
+                    and_(
+                        UserMoleculeReview.next_review_at == after_review_at,
+                        UserMoleculeReview.id > after_id,
                     ),
-                    "total_errors": 0,
-                    "error_types": {},
-                    "examples": [],
-                    "last_error_at": None,
-                    "resets": reset_map.get(molecule.id, 0),
-                },
+                )
             )
 
-            bucket["total_errors"] += 1
-            bucket["last_error_at"] = max(
-                bucket["last_error_at"], log.created_at
-            ) if bucket["last_error_at"] else log.created_at
-
-            error_type = self._resolve_error_type(log.user_answer_json)
-            bucket["error_types"][error_type] = bucket["error_types"].get(error_type, 0) + 1
-
-            if include_examples and len(bucket["examples"]) < 3:
-                bucket["examples"].append(
-                    {
-                        "atom_id": atom.id,
-                        "atom_title": atom.title,
-                        "submitted_answer": self._compact_json(log.user_answer_json),
-                        "created_at": log.created_at.isoformat() if log.created_at else None,
-                    }
-                )
+        rows = self.db.execute(query).all()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        counters = self._review_counters(now)
 
-        entries = sorted(
-            aggregated.values(), key=lambda item: item["total_errors"], reverse=True
-        )
-        if limit is not None:
-            entries = entries[:limit]
+        return {
+            "items": [self.serialize_review(row, now) for row in rows],
+            "next_cursor": self._encode_cursor(rows[-1]) if has_more else None,
+            "due_count": counters.due_count,
+            "overdue_count": counters.overdue_count,
+        }
 
-        for entry in entries:
-            entry["error_types"] = [
-                {"error_type": key, "count": value}
-                for key, value in sorted(
-                    entry["error_types"].items(), key=lambda item: item[1], reverse=True
-                )
-            ]
-            if entry["last_error_at"]:
-                entry["last_error_at"] = entry["last_error_at"].isoformat()
+    @classmethod
+    def invalidate_user_cache(cls, user_id: int) -> None:
+        """Drop cached statistics of ``user_id`` (called when answers are logged)."""
+
+        _RETENTION_CACHE.invalidate_where(lambda key: key[0] == user_id)
+
+    def build_error_overview(
+        self,
+        limit: int | None = None,
+        include_examples: bool = False,
+        capsule_id: int | None = None,
+        window_days: int = ERROR_WINDOW_DAYS,
+        max_errors: int = ERROR_WINDOW_SIZE,
+    ) -> dict:
+        """Aggregate recent mistakes per molecule and error type.
+
+        Only the last ``max_errors`` mistakes of the last ``window_days`` days
+        are considered, so the cost is bounded whatever the learner's history.
+        """
+
+        recent = self.recent_errors_query(window_days, max_errors, capsule_id)
+        molecule_rows = self.db.execute(
+            select(
+                recent.c.molecule_id,
+                Molecule.title.label("molecule_title"),
+                Granule.capsule_id,
+                func.count().label("total_errors"),
+                func.max(recent.c.created_at).label("last_error_at"),
+            )
+            .join(Molecule, Molecule.id == recent.c.molecule_id)
+            .outerjoin(Granule, Granule.id == Molecule.granule_id)
+            .group_by(recent.c.molecule_id, Molecule.title, Granule.capsule_id)
+            .order_by(
+                func.count().desc(),
+                func.max(recent.c.created_at).desc(),
+                recent.c.molecule_id,
+            )
+            .limit(limit)
+        ).all()
+
+        molecule_ids = [row.molecule_id for row in molecule_rows]
+        error_types = self._error_type_counts(recent, molecule_ids)
+        reset_map = self._build_reset_map(molecule_ids)
+        examples = self._error_examples(recent, molecule_ids) if include_examples else {}
+
+        entries = []
+        for row in molecule_rows:
+            entry = {
+                "molecule_id": row.molecule_id,
+                "molecule_title": row.molecule_title,
+                "capsule_id": row.capsule_id,
+                "total_errors": row.total_errors,
+                "error_types": error_types.get(row.molecule_id, []),
+                "examples": examples.get(row.molecule_id, []),
+                "last_error_at": row.last_error_at.isoformat() if row.last_error_at else None,
+                "resets": reset_map.get(row.molecule_id, 0),
+            }
             entry["suggested_action"] = self._build_suggestion(entry)
+            entries.append(entry)
 
         overview = {
             "total_errors": sum(entry["total_errors"] for entry in entries),
@@ -284,20 +304,19 @@ class SRSService:
     def coach_digest(self, capsule_id: int | None = None) -> dict:
         """Return concise strings summarising schedule and errors for coach prompts."""
 
-        plan = self.build_overview()
-        errors = self.build_error_overview(limit=5)
-
+        now = datetime.utcnow()
         next_reviews = [
-            entry
-            for entry in plan["next_reviews"]
-            if capsule_id is None or entry["capsule_id"] == capsule_id
-        ][:3]
-
-        molecules_with_errors = [
-            entry
-            for entry in errors["molecules"]
-            if capsule_id is None or entry["capsule_id"] == capsule_id
-        ][:3]
+            self.serialize_review(row, now)
+            for row in self.db.execute(self.review_rows_query(limit=3, capsule_id=capsule_id))
+        ]
+        molecules_with_errors = self.build_error_overview(limit=3, capsule_id=capsule_id)[
+            "molecules"
+        ]
+        return self.format_coach_digest(next_reviews, molecules_with_errors)
+
+    @staticmethod
+    def format_coach_digest(reviews: list[dict], errors: list[dict]) -> dict:
+        """Render serialized reviews and error-journal entries as prompt snippets."""
 
         def _format_review(entry: dict) -> str:
             due = entry.get("due_in_hours")
@@ -313,8 +332,8 @@ class SRSService:
             top_type = entry["error_types"][0]["error_type"]
             return f"{entry['molecule_title']} ({entry['total_errors']} erreurs, axe {top_type})"
 
-        reviews_text = "\n".join(_format_review(entry) for entry in next_reviews)
-        errors_text = "\n".join(_format_error(entry) for entry in molecules_with_errors)
+        reviews_text = "\n".join(_format_review(entry) for entry in reviews)
+        errors_text = "\n".join(_format_error(entry) for entry in errors)
 
         return {
             "reviews": reviews_text or "Aucune révision urgente.",
@@ -357,27 +376,125 @@ class SRSService:
         )
         return int(total or 0)
 
-    def _build_reset_map(self) -> Dict[int, int]:
-        rows = (
-            self.db.query(UserAtomProgress, Atom)
+    def _build_reset_map(self, molecule_ids: list[int]) -> Dict[int, int]:
+        if not molecule_ids:
+            return {}
+        rows = self.db.execute(
+            select(Atom.molecule_id, func.sum(UserAtomProgress.reset_count))
             .join(Atom, Atom.id == UserAtomProgress.atom_id)
-            .filter(UserAtomProgress.user_id == self.user_id)
-            .all()
-        )
-        reset_map: Dict[int, int] = {}
-        for progress, atom in rows:
-            reset_map[atom.molecule_id] = reset_map.get(atom.molecule_id, 0) + (
-                progress.reset_count or 0
+            .where(
+                UserAtomProgress.user_id == self.user_id,
+                Atom.molecule_id.in_(molecule_ids),
             )
-        return reset_map
+            .group_by(Atom.molecule_id)
+        ).all()
+        return {molecule_id: int(total or 0) for molecule_id, total in rows}
 
-    def _resolve_error_type(self, payload: Any) -> str:
-        if isinstance(payload, dict):
-            for key in ("error_type", "type", "category", "reason"):
-                value = payload.get(key)
-                if isinstance(value, str) and value.strip():
-                    return value.strip().lower()
-        return "autre"
+    def recent_errors_query(
+        self,
+        window_days: int = ERROR_WINDOW_DAYS,
+        max_errors: int = ERROR_WINDOW_SIZE,
+        capsule_id: int | None = None,
+    ) -> Subquery:
+        """Bounded window of the learner's latest mistakes with their molecule.
+
+        Served by ``ix_user_answer_log_user_correct_created``.
+        """
+
+        query = (
+            select(
+                UserAnswerLog.id,
+                UserAnswerLog.atom_id,
+                UserAnswerLog.created_at,
+                UserAnswerLog.user_answer_json,
+                Atom.molecule_id,
+                self._error_type_expression().label("error_type"),
+            )
+            .join(Atom, Atom.id == UserAnswerLog.atom_id)
+            .where(
+                UserAnswerLog.user_id == self.user_id,
+                UserAnswerLog.is_correct == false(),
+                UserAnswerLog.created_at >= datetime.utcnow() - timedelta(days=window_days),
+            )
+            .order_by(UserAnswerLog.created_at.desc(), UserAnswerLog.id.desc())
+            .limit(max_errors)
+        )
+        if capsule_id is not None:
+            query = (
+                query.join(Molecule, Molecule.id == Atom.molecule_id)
+                .join(Granule, Granule.id == Molecule.granule_id)
+                .where(Granule.capsule_id == capsule_id)
+            )
+        return query.subquery("recent_errors")
+
+    def _error_type_expression(self) -> ColumnElement[str]:
+        """SQL equivalent of picking the first non-empty error label of the payload."""
+
+        payload = UserAnswerLog.user_answer_json
+        candidates = [
+            func.nullif(func.lower(func.trim(payload[key].as_string())), "")
+            for key in self.ERROR_TYPE_KEYS
+        ]
+        return func.coalesce(*candidates, literal(self.DEFAULT_ERROR_TYPE))
+
+    def _error_type_counts(self, recent: Subquery, molecule_ids: list[int]) -> Dict[int, list]:
+        if not molecule_ids:
+            return {}
+        rows = self.db.execute(
+            select(recent.c.molecule_id, recent.c.error_type, func.count().label("count"))
+            .where(recent.c.molecule_id.in_(molecule_ids))
+            .group_by(recent.c.molecule_id, recent.c.error_type)
+            .order_by(
+                recent.c.molecule_id,
+                func.count().desc(),
+                func.max(recent.c.created_at).desc(),
+            )
+        ).all()
+        counts: Dict[int, list] = {}
+        for row in rows:
+            counts.setdefault(row.molecule_id, []).append(
+                {"error_type": row.error_type, "count": row.count}
+            )
+        return counts
+
+    def _error_examples(self, recent: Subquery, molecule_ids: list[int]) -> Dict[int, list]:
+        """Latest ``ERROR_EXAMPLES_PER_MOLECULE`` mistakes per molecule (ROW_NUMBER)."""
+
+        if not molecule_ids:
+            return {}
+        ranked = (
+            select(
+                recent.c.molecule_id,
+                recent.c.atom_id,
+                recent.c.created_at,
+                recent.c.user_answer_json,
+                func.row_number()
+                .over(
+                    partition_by=recent.c.molecule_id,
+                    order_by=(recent.c.created_at.desc(), recent.c.id.desc()),
+                )
+                .label("rank"),
+            )
+            .where(recent.c.molecule_id.in_(molecule_ids))
+            .subquery("ranked_errors")
+        )
+        rows = self.db.execute(
+            select(ranked, Atom.title.label("atom_title"))
+            .join(Atom, Atom.id == ranked.c.atom_id)
+            .where(ranked.c.rank <= self.ERROR_EXAMPLES_PER_MOLECULE)
+            .order_by(ranked.c.molecule_id, ranked.c.rank)
+        ).all()
+        examples: Dict[int, list] = {}
+        for row in rows:
+            examples.setdefault(row.molecule_id, []).append(
+                {
+                    "atom_id": row.atom_id,
+                    "atom_title": row.atom_title,
+                    "submitted_answer": self._compact_json(row.user_answer_json),
+                    "created_at": row.created_at.isoformat() if row.created_at else None,
+                }
+            )
+        return examples
 
     def _compact_json(self, payload: Any) -> str:
         try:
@@ -403,37 +520,120 @@ class SRSService:
             "et suivre la progression dans le carnet premium."
         )
 
+    def review_rows_query(self, limit: int | None = None, capsule_id: int | None = None) -> Select:
+        """Projection of the learner's schedules with molecule/capsule labels."""
+
+        query = (
+            select(
+                UserMoleculeReview.id,
+                UserMoleculeReview.next_review_at,
+                UserMoleculeReview.interval_days,
+                UserMoleculeReview.streak,
+                UserMoleculeReview.review_count,
+                UserMoleculeReview.total_errors,
+                UserMoleculeReview.total_resets,
+                UserMoleculeReview.last_outcome,
+                Molecule.id.label("molecule_id"),
+                Molecule.title.label("molecule_title"),
+                Capsule.id.label("capsule_id"),
+                Capsule.title.label("capsule_title"),
+            )
+            .join(Molecule, Molecule.id == UserMoleculeReview.molecule_id)
+            .outerjoin(Granule, Granule.id == Molecule.granule_id)
+            .outerjoin(Capsule, Capsule.id == Granule.capsule_id)
+            .where(UserMoleculeReview.user_id == self.user_id)
+            .order_by(
+                UserMoleculeReview.next_review_at.asc().nullsfirst(),
+                UserMoleculeReview.id.asc(),
+            )
+        )
+        if capsule_id is not None:
+            query = query.where(Capsule.id == capsule_id)
+        if limit is not None:
+            query = query.limit(limit)
+        return query
+
+    def _review_counters(self, now: datetime) -> Row:
+        """Due/overdue counters and premium aggregates in a single query."""
+
+        is_due = UserMoleculeReview.next_review_at <= now
+        return self.db.execute(
+            select(
+                func.count().filter(is_due).label("due_count"),
+                func.count()
+                .filter(is_due, func.coalesce(UserMoleculeReview.last_outcome, "") != "success")
+                .label("overdue_count"),
+                func.avg(UserMoleculeReview.interval_days)
+                .filter(UserMoleculeReview.interval_days > 0)
+                .label("average_interval"),
+                func.sum(UserMoleculeReview.review_count).label("total_reviews"),
+                func.sum(UserMoleculeReview.success_count).label("total_success"),
+            ).where(UserMoleculeReview.user_id == self.user_id)
+        ).one()
+
+    @staticmethod
+    def serialize_review(row: Row, now: datetime) -> dict:
+        next_review = _as_naive_utc(row.next_review_at)
+        due_in_hours = None
+        if next_review:
+            due_in_hours = round((next_review - now).total_seconds() / 3600, 2)
+        return {
+            "molecule_id": row.molecule_id,
+            "molecule_title": row.molecule_title,
+            "capsule_id": row.capsule_id,
+            "capsule_title": row.capsule_title,
+            "next_review_at": next_review.isoformat() if next_review else None,
+            "due_in_hours": due_in_hours,
+            "interval_days": round(row.interval_days or 0, 2),
+            "streak": row.streak or 0,
+            "review_count": row.review_count or 0,
+            "total_errors": row.total_errors or 0,
+            "total_resets": row.total_resets or 0,
+            "last_outcome": row.last_outcome,
+        }
+
+    @staticmethod
+    def _encode_cursor(row: Row) -> str:
+        payload = json.dumps([_as_naive_utc(row.next_review_at).isoformat(), row.id])
+        return base64.urlsafe_b64encode(payload.encode()).decode()
+
+    @staticmethod
+    def _decode_cursor(cursor: str) -> tuple[datetime, int]:
+        try:
+            review_at, review_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            return datetime.fromisoformat(review_at), int(review_id)
+        except (ValueError, TypeError) as exc:
+            raise HTTPException(status_code=400, detail="invalid_cursor") from exc
+
+    def _get_retention_ratio(self, days: int) -> float | None:
+        return _RETENTION_CACHE.get_or_set(
+            (self.user_id, days), lambda: self._compute_retention_ratio(days)
+        )
+
     def _compute_retention_ratio(self, days: int) -> float | None:
         cutoff = datetime.utcnow() - timedelta(days=days)
-        logs = (
-            self.db.query(UserAnswerLog)
+        total, successes = self.db.execute(
+            select(
+                func.count(),
+                func.count().filter(UserAnswerLog.is_correct.is_(True)),
+            )
             .join(Atom, Atom.id == UserAnswerLog.atom_id)
-            .filter(
+            .where(
                 UserAnswerLog.user_id == self.user_id,
                 UserAnswerLog.created_at >= cutoff,
             )
-            .all()
-        )
-        if not logs:
+        ).one()
+        if not total:
             return None
-        successes = sum(1 for log in logs if log.is_correct)
-        return round(successes / len(logs), 3)
+        return round(successes / total, 3)
 
-    def _calculate_average_interval(self, schedules: Iterable[UserMoleculeReview]) -> float | None:
-        intervals = [schedule.interval_days for schedule in schedules if schedule.interval_days]
-        if not intervals:
-            return None
-        return round(sum(intervals) / len(intervals), 2)
-
-    def _compute_success_rate(self, schedules: Iterable[UserMoleculeReview]) -> float | None:
-        total_reviews = 0
-        total_success = 0
-        for schedule in schedules:
-            total_reviews += schedule.review_count or 0
-            total_success += schedule.success_count or 0
-        if total_reviews == 0:
-            return None
-        return round(total_success / total_reviews, 3)
+
+def _as_naive_utc(value: datetime | None) -> datetime | None:
+    """Postgres returns aware datetimes, SQLite naive ones: compare in naive UTC."""
+
+    if value is not None and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
 
 
 __all__ = ["SRSService"]
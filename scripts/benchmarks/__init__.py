@@ -0,0 +1,15 @@
+"""Reproducible micro-benchmarks for performance-sensitive code paths.
+
+Each module is runnable with ``python -m scripts.benchmarks.<name>``. The
+defaults below let the benchmarks import :mod:`app` against a throw-away SQLite
+database without a ``.env`` file.
+"""
+
+import os
+
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+os.environ.setdefault("RESEND_API_KEY", "bench")
+os.environ.setdefault("FRONTEND_BASE_URL", "http://localhost:5173")
+os.environ.setdefault("BACKEND_BASE_URL", "http://localhost:8000")
+os.environ.setdefault("EMAIL_FROM", "bench@example.com")
+os.environ.setdefault("SECRET_KEY", "bench-secret")
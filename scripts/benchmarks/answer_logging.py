@@ -0,0 +1,204 @@
+"""Count database round-trips per logged answer.
+
+Usage::
+
+    python -m scripts.benchmarks.answer_logging [--answers 50]
+
+Compares the historical ``/progress/log-answer`` sequence (kept below as
+``legacy_log_answer``) with :class:`AnswerRecordingService` on an in-memory
+SQLite database. Every executed statement and every COMMIT counts as one
+round-trip; reads and writes are reported separately.
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+from datetime import datetime
+
+import app.db.base  # noqa: F401  (registers every model on the metadata)
+from app.db.base_class import Base
+from app.models.capsule.atom_model import Atom, AtomContentType
+from app.models.capsule.capsule_model import Capsule
+from app.models.capsule.granule_model import Granule
+from app.models.capsule.language_roadmap_model import Skill, SkillType, Unit
+from app.models.capsule.molecule_model import Molecule
+from app.models.progress.user_answer_log_model import UserAnswerLog
+from app.models.progress.user_atomic_progress import UserAtomProgress
+from app.models.user.user_model import User
+from app.services.answer_recording_service import AnswerRecordingService
+from app.services.progress_service import ProgressService
+from app.services.services.capsule_service import CapsuleService
+from app.services.srs_service import SRSService
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from scripts import benchmarks  # noqa: F401  (environment defaults)
+
+
+class RoundTripCounter:
+    """Engine listener counting statements and commits."""
+
+    def __init__(self, engine) -> None:
+        self.reads = 0
+        self.writes = 0
+        self.commits = 0
+        event.listen(engine, "before_cursor_execute", self._on_execute)
+        event.listen(engine, "commit", self._on_commit)
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        if statement.lstrip().upper().startswith("SELECT"):
+            self.reads += 1
+        else:
+            self.writes += 1
+
+    def _on_commit(self, conn) -> None:
+        self.commits += 1
+
+    def reset(self) -> None:
+        self.reads = self.writes = self.commits = 0
+
+    @property
+    def total(self) -> int:
+        return self.reads + self.writes + self.commits
+
+
+def legacy_log_answer(db, user: User, atom_id: int, is_correct: bool, answer: dict) -> dict:
+    """Former body of ``log_user_answer``, one helper call per round-trip."""
+
+    atom = db.get(Atom, atom_id)
+    answer_log = UserAnswerLog(
+        user_id=user.id, atom_id=atom_id, is_correct=is_correct, user_answer_json=answer
+    )
+    db.add(answer_log)
+    db.flush()
+
+    srs_service = SRSService(db=db, user=user)
+    progress_entry = db.query(UserAtomProgress).filter_by(user_id=user.id, atom_id=atom_id).first()
+    if not progress_entry:
+        progress_entry = UserAtomProgress(user_id=user.id, atom_id=atom_id)
+        db.add(progress_entry)
+        db.flush([progress_entry])
+
+    progress_entry.attempts = (progress_entry.attempts or 0) + 1
+    progress_entry.last_attempt_at = datetime.utcnow()
+    capsule_service = CapsuleService(db=db, user=user)
+    if is_correct:
+        progress_entry.success_count = (progress_entry.success_count or 0) + 1
+        progress_entry.status = "completed"
+        if not progress_entry.completed_at:
+            progress_entry.completed_at = datetime.utcnow()
+        ProgressService(db=db, user_id=user.id).record_atom_completion(atom_id)
+        srs_service.register_answer(atom, True)
+    else:
+        progress_entry.failure_count = (progress_entry.failure_count or 0) + 1
+        progress_entry.status = "failed"
+        progress_entry.completed_at = None
+        srs_service.register_answer(atom, False)
+
+    db.commit()
+    db.refresh(progress_entry)
+    snapshot = capsule_service.completion_snapshot(atom.molecule)
+    return {"status": progress_entry.status, "is_correct": is_correct, **snapshot}
+
+
+BENCH_TABLES = (
+    "users",
+    "skills",
+    "capsules",
+    "granules",
+    "molecules",
+    "atoms",
+    "user_capsule_enrollments",
+    "user_capsule_progress",
+    "user_answer_log",
+    "user_atom_progress",
+    "user_molecule_reviews",
+    "badges",
+    "user_badges",
+    "notifications",
+    "molecule_notes",
+)
+
+
+def _seed(db) -> tuple[User, list[int]]:
+    db.add(Skill(code="generic", name="Generic", type=SkillType.core, unit=Unit.items))
+    user = User(username="bench", email="bench@example.com", hashed_password="x", is_active=True)
+    capsule = Capsule(
+        title="Bench", domain="programming", area="python", main_skill="python", creator_id=1
+    )
+    atom_ids: list[Atom] = []
+    for granule_order in range(1, 4):
+        granule = Granule(order=granule_order, title=f"G{granule_order}")
+        for molecule_order in range(1, 6):
+            molecule = Molecule(order=molecule_order, title=f"M{molecule_order}")
+            for atom_order in range(1, 5):
+                atom = Atom(
+                    order=atom_order,
+                    title=f"A{atom_order}",
+                    content_type=AtomContentType.QUIZ,
+                    content={},
+                )
+                molecule.atoms.append(atom)
+                atom_ids.append(atom)
+            granule.molecules.append(molecule)
+        capsule.granules.append(granule)
+    db.add_all([user, capsule])
+    db.commit()
+    return user, [atom.id for atom in atom_ids]
+
+
+def _run(label: str, answers: int, log_answer) -> None:
+    engine = create_engine("sqlite:///:memory:", poolclass=StaticPool)
+    Base.metadata.create_all(engine, tables=[Base.metadata.tables[name] for name in BENCH_TABLES])
+    SessionLocal = sessionmaker(bind=engine)
+    with SessionLocal() as db:
+        user, atom_ids = _seed(db)
+        user_id = user.id
+    counter = RoundTripCounter(engine)
+
+    elapsed = 0.0
+    totals = {"reads": 0, "writes": 0, "commits": 0}
+    for index in range(answers):
+        # One session per answer, like one HTTP request; the authentication
+        # lookup is not part of the measured path.
+        with SessionLocal() as db:
+            user = db.get(User, user_id)
+            counter.reset()
+            started = time.perf_counter()
+            atom_id = atom_ids[index % len(atom_ids)]
+            log_answer(db, user, atom_id, index % 3 != 0, {"choice": index})
+            elapsed += time.perf_counter() - started
+            totals["reads"] += counter.reads
+            totals["writes"] += counter.writes
+            totals["commits"] += counter.commits
+
+    round_trips = sum(totals.values())
+    print(
+        f"{label:<10} reads/answer={totals['reads'] / answers:5.2f} "
+        f"writes/answer={totals['writes'] / answers:5.2f} "
+        f"commits/answer={totals['commits'] / answers:4.2f} "
+        f"round-trips/answer={round_trips / answers:5.2f} "
+        f"ms/answer={elapsed * 1000 / answers:6.2f}"
+    )
+    engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--answers", type=int, default=50)
+    args = parser.parse_args()
+
+    _run("legacy", args.answers, legacy_log_answer)
+    _run(
+        "batched",
+        args.answers,
+        lambda db, user, atom_id, ok, answer: AnswerRecordingService(db, user).record_answer(
+            atom_id, ok, answer
+        ),
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""Latency of ``/programming/execute`` runs: one interpreter per request vs the sandbox pool.
+
+Usage::
+
+    python -m scripts.benchmarks.code_execution [--requests 200] [--concurrency 4] [--workers 2]
+
+For a hello-world snippet and a CPU-bound one, the script sends ``--requests``
+runs from ``--concurrency`` client threads, first through the previous
+implementation (``python3`` started on a temporary file for each request),
+then through :class:`CodeExecutionPool`, and reports p50/p95 latency (queue
+wait included) and throughput. Per-user caps are disabled: each request
+plays a different user.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List
+
+from app.core.config import settings
+from app.services.code_execution import CodeExecutionPool, ExecutionLimits
+
+from scripts import benchmarks  # noqa: F401  (environment defaults)
+
+SNIPPETS = {
+    "hello-world": "print('Hello, world!')\n",
+    "cpu-bound": "total = 0\nfor i in range(300_000):\n    total += i * i % 7\nprint(total)\n",
+}
+
+
+def run_subprocess(code: str) -> None:
+    with tempfile.NamedTemporaryFile(mode="w", suffix=".py", delete=False) as tmp:
+        tmp.write(code)
+    try:
+        subprocess.run(
+            [sys.executable, tmp.name],
+            capture_output=True,
+            timeout=settings.CODE_EXEC_TIMEOUT_SECONDS,
+        )
+    finally:
+        os.unlink(tmp.name)
+
+
+def _percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def _measure(label: str, call: Callable[[], None], requests: int, concurrency: int) -> None:
+    def timed(_: int) -> float:
+        started = time.perf_counter()
+        call()
+        return time.perf_counter() - started
+
+    call()  # échauffement
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        latencies = list(executor.map(timed, range(requests)))
+    elapsed = time.perf_counter() - started
+    print(
+        f"  {label:<26}{statistics.median(latencies) * 1000:>10.1f}"
+        f"{_percentile(latencies, 0.95) * 1000:>10.1f}{requests / elapsed:>10.1f}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--workers", type=int, default=settings.CODE_EXEC_WORKERS)
+    args = parser.parse_args()
+
+    pool = CodeExecutionPool(size=args.workers, queue_size=args.requests, per_user=args.requests)
+    pool.start()
+    limits = ExecutionLimits.from_settings()
+    stats = pool.stats()
+    print(
+        f"{args.requests} requests, concurrency={args.concurrency}, pool workers={args.workers}, "
+        f"seccomp={stats['seccomp']}, landlock={stats['landlock']}, "
+        f"unprivileged={stats['unprivileged']}"
+    )
+    print(f"  {'run':<26}{'p50 ms':>10}{'p95 ms':>10}{'req/s':>10}")
+    try:
+        for name, code in SNIPPETS.items():
+            _measure(
+                f"{name} subprocess", lambda: run_subprocess(code), args.requests, args.concurrency
+            )
+            _measure(
+                f"{name} pool",
+                lambda: pool.run(code, limits=limits),
+                args.requests,
+                args.concurrency,
+            )
+    finally:
+        pool.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Recall@k of the RAG retriever on the labeled JSONL files of ``app/data``.
+
+Usage::
+
+    python -m scripts.benchmarks.rag_retrieval [--holdout-every 5] [--max-queries 500] [--k 1 3 5]
+    python -m scripts.benchmarks.rag_retrieval --file "app/data/Dutch Queries.jsonl"
+
+For every file, the held-out texts are used as queries against an index of
+the remaining ones (see :mod:`app.services.retrieval.evaluation`). The script
+reports recall@k and the mean query latency of the lexical, vector and hybrid
+(``--vector-weight`` in the fusion) rankings, and of the configuration used
+by the RAG prompts (``fusion_weights()`` + MMR). Embeddings are the local
+hashed ones, so the run is offline and reproducible.
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+from pathlib import Path
+
+from app.core.config import settings
+from app.core.embeddings import get_text_embedding
+from app.services.retrieval import fusion_weights
+from app.services.retrieval.evaluation import (
+    build_retriever,
+    labeled_files,
+    load_labeled,
+    recall_at_k,
+    split_holdout,
+)
+
+from scripts import benchmarks  # noqa: F401  (environment defaults)
+
+
+def _embed(text: str) -> list[float]:
+    return get_text_embedding(text, allow_remote=False)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "--file", type=Path, action="append", help="labeled JSONL file (repeatable)"
+    )
+    parser.add_argument("--holdout-every", type=int, default=5)
+    parser.add_argument("--max-queries", type=int, default=500, help="queries evaluated per file")
+    parser.add_argument("--k", type=int, nargs="+", default=[1, 3, 5])
+    parser.add_argument("--vector-weight", type=float, default=1.0)
+    parser.add_argument("--mmr-lambda", type=float, default=settings.RAG_MMR_LAMBDA)
+    args = parser.parse_args()
+
+    for path in args.file or labeled_files():
+        documents, queries = split_holdout(load_labeled(path), args.holdout_every)
+        queries = queries[: args.max_queries]
+        if not documents or not queries:
+            continue
+        started = time.perf_counter()
+        retriever = build_retriever(documents, _embed)
+        build_seconds = time.perf_counter() - started
+        labels = len({row.label for row in documents})
+        print(
+            f"\n{path.name}: {len(documents)} documents, {labels} labels, {len(queries)} queries "
+            f"(index built in {build_seconds:.2f}s)"
+        )
+        print(
+            f"  {'mode':<12}" + "".join(f"{'R@' + str(k):>8}" for k in args.k) + f"{'ms/query':>10}"
+        )
+        runs = [
+            ("lexical", "lexical", (1.0, 0.0), None),
+            ("vector", "vector", (0.0, 1.0), None),
+            ("hybrid", "hybrid", (1.0, args.vector_weight), None),
+            ("rag", "hybrid", fusion_weights(), args.mmr_lambda),
+        ]
+        for label, mode, weights, mmr_lambda in runs:
+            report = recall_at_k(
+                retriever, queries, ks=args.k, mode=mode, weights=weights, mmr_lambda=mmr_lambda
+            )
+            print(
+                f"  {label:<12}"
+                + "".join(f"{report.recall[k]:>8.3f}" for k in args.k)
+                + f"{report.mean_latency_ms:>10.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
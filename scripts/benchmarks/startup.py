@@ -0,0 +1,131 @@
+"""Cold-start cost of the API: ``import app.main`` and the first request.
+
+Usage::
+
+    python -m scripts.benchmarks.startup [--runs 3] [--top 15]
+
+Each run starts a fresh interpreter with ``python -X importtime -c "import
+app.main"`` and parses its report: the script prints the median import time,
+the most expensive top-level imports (cumulative, as in the report) and
+whether the heavy optional subsystems (back-office, Stripe, PDF, tiktoken,
+OpenAI SDK) were imported, which they should not be until a request needs
+them. It then measures, in another fresh interpreter, the time from the first
+import to the response of ``GET /`` (startup hooks excluded: they need the
+database), which is what a cold serverless function pays before answering.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from dataclasses import dataclass, field
+from typing import Dict, List, Set, Tuple
+
+from scripts import benchmarks  # noqa: F401  (environment defaults)
+
+# Sous-systèmes chargés à la première requête qui en a besoin, jamais au démarrage
+HEAVY_MODULES = ("app.admin", "sqladmin", "stripe", "pypdf", "PyPDF2", "tiktoken", "openai")
+
+_FIRST_REQUEST = """
+import time
+started = time.perf_counter()
+from fastapi.testclient import TestClient
+import app.main
+response = TestClient(app.main.app).get("/")
+assert response.status_code == 200, response.text
+print(time.perf_counter() - started)
+"""
+
+
+@dataclass
+class ImportProfile:
+    total_seconds: float
+    # (module, cumulatif en secondes, profondeur dans l'arbre d'import)
+    modules: List[Tuple[str, float, int]] = field(default_factory=list)
+
+    @property
+    def loaded(self) -> Dict[str, float]:
+        return {name: seconds for name, seconds, _ in self.modules}
+
+    def heavy_modules(self) -> List[str]:
+        return [name for name in HEAVY_MODULES if name in self.loaded]
+
+    def top(self, limit: int, depth: int = 2) -> List[Tuple[str, float]]:
+        """Most expensive imports down to ``depth`` levels below ``app.main``."""
+
+        rows = [(name, seconds) for name, seconds, level in self.modules if level <= depth]
+        return sorted(rows, key=lambda row: row[1], reverse=True)[:limit]
+
+
+def _run(args: List[str]) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, *args],
+        capture_output=True,
+        text=True,
+        env=dict(os.environ),
+        check=True,
+    )
+
+
+def profile_import(module: str = "app.main") -> ImportProfile:
+    """``-X importtime`` report of ``import module`` in a fresh interpreter."""
+
+    completed = _run(["-X", "importtime", "-c", f"import {module}"])
+    modules: List[Tuple[str, float, int]] = []
+    total = 0.0
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        _, cumulative, name = line.split(":", 1)[1].split("|")
+        level = (len(name) - len(name.lstrip()) - 1) // 2
+        seconds = int(cumulative) / 1_000_000
+        modules.append((name.strip(), seconds, level))
+        if name.strip() == module:
+            total = seconds
+    return ImportProfile(total_seconds=total, modules=modules)
+
+
+def imported_modules(module: str = "app.main") -> Set[str]:
+    """Names in ``sys.modules`` after ``import module`` in a fresh interpreter."""
+
+    completed = _run(["-c", f"import sys, {module}\nprint('\\n'.join(sys.modules))"])
+    return set(completed.stdout.split())
+
+
+def time_to_first_request() -> float:
+    return float(_run(["-c", _FIRST_REQUEST]).stdout.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    profiles = [profile_import() for _ in range(args.runs)]
+    profile = min(profiles, key=lambda item: item.total_seconds)
+    median = statistics.median(p.total_seconds for p in profiles)
+    print(
+        f"import app.main: median {median * 1000:.0f} ms, "
+        f"best {profile.total_seconds * 1000:.0f} ms over {args.runs} runs"
+    )
+    print(f"  {'module (best run)':<48}{'cumul. ms':>10}")
+    for name, seconds in profile.top(args.top):
+        print(f"  {name:<48}{seconds * 1000:>10.1f}")
+
+    heavy = profile.heavy_modules()
+    print(f"heavy modules imported at startup: {', '.join(heavy) if heavy else 'none'}")
+
+    first_requests = [time_to_first_request() for _ in range(args.runs)]
+    print(
+        f"time to first request (GET /): median {statistics.median(first_requests) * 1000:.0f} ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""Load test of the conversation websocket fan-out.
+
+Usage::
+
+    python -m scripts.benchmarks.websocket_fanout [--sockets 1000] [--slow 5] [--messages 20]
+
+Simulates one channel with ``--sockets`` subscribers, ``--slow`` of which take
+``--slow-delay`` seconds per frame, and compares the historical sequential
+``await send_text`` loop (kept below as ``sequential_broadcast``) with the
+queued fan-out of :class:`ConversationWebSocketManager`. Reported: time until
+every fast socket holds every message, plus the fan-out metrics.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import time
+from datetime import datetime, timezone
+
+from app.conversations.manager import ConversationWebSocketManager
+from app.conversations.schemas import ChannelDescriptor, ConversationMessage, UserPublicInfo
+from app.core.websocket_fanout import FanoutMetrics
+from starlette.websockets import WebSocketState
+
+from scripts import benchmarks  # noqa: F401  (environment defaults)
+
+
+class SimulatedSocket:
+    def __init__(self, delay: float) -> None:
+        self.delay = delay
+        self.received = 0
+        self.application_state = WebSocketState.CONNECTED
+
+    async def accept(self) -> None:
+        pass
+
+    async def send_text(self, data: str) -> None:
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        self.received += 1
+
+    async def close(self, code: int = 1000) -> None:
+        self.application_state = WebSocketState.DISCONNECTED
+
+
+def _sockets(total: int, slow: int, delay: float) -> list[SimulatedSocket]:
+    return [SimulatedSocket(delay if index < slow else 0.0) for index in range(total)]
+
+
+def _message(index: int) -> ConversationMessage:
+    return ConversationMessage(
+        id=f"bench-{index}",
+        scope="general",
+        content="x" * 200,
+        created_at=datetime.now(timezone.utc),
+        user=UserPublicInfo(id=1, username="bench"),
+    )
+
+
+async def sequential_broadcast(sockets: list[SimulatedSocket], messages: int) -> float:
+    started = time.perf_counter()
+    for index in range(messages):
+        text = json.dumps({"type": "message", "payload": _message(index).model_dump(mode="json")})
+        for socket in sockets:
+            await socket.send_text(text)
+    return time.perf_counter() - started
+
+
+async def queued_broadcast(
+    sockets: list[SimulatedSocket], messages: int, max_queue: int
+) -> tuple[float, dict]:
+    metrics = FanoutMetrics("bench")
+    manager = ConversationWebSocketManager(metrics=metrics, max_queue=max_queue)
+    channel = ChannelDescriptor.from_params()
+    for socket in sockets:
+        await manager.connect(channel, socket)
+    fast = [socket for socket in sockets if not socket.delay]
+
+    started = time.perf_counter()
+    for index in range(messages):
+        await manager.broadcast_message(channel, _message(index))
+    while any(socket.received < messages for socket in fast):
+        await asyncio.sleep(0)
+    elapsed = time.perf_counter() - started
+    for socket in sockets:
+        await manager.disconnect(channel, socket)
+    return elapsed, metrics.snapshot()
+
+
+async def run(args: argparse.Namespace) -> None:
+    sequential = await sequential_broadcast(
+        _sockets(args.sockets, args.slow, args.slow_delay), args.messages
+    )
+    queued, snapshot = await queued_broadcast(
+        _sockets(args.sockets, args.slow, args.slow_delay), args.messages, args.max_queue
+    )
+    print(
+        f"{args.sockets} sockets ({args.slow} slow, {args.slow_delay * 1000:.0f} ms/frame), "
+        f"{args.messages} messages"
+    )
+    print(f"sequential send loop : {sequential * 1000:9.1f} ms")
+    print(f"queued fan-out       : {queued * 1000:9.1f} ms")
+    print(
+        "metrics: sent={sent} dropped={dropped} evictions={evictions} "
+        "peak_queue_depth={peak_queue_depth}".format(**snapshot)
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sockets", type=int, default=1000)
+    parser.add_argument("--slow", type=int, default=5)
+    parser.add_argument("--slow-delay", type=float, default=0.05)
+    parser.add_argument("--messages", type=int, default=20)
+    parser.add_argument("--max-queue", type=int, default=8)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""Per-message CPU of the websocket serialization paths.
+
+Usage::
+
+    python -m scripts.benchmarks.websocket_serialization [--repeat 200]
+
+For 1, 100 and 10,000 recipients, measures the CPU time spent encoding one
+event and handing the frame to every recipient (``list.append`` stands in for
+the connection queue). Compared paths:
+
+* ``per-recipient`` — ``send_json`` style, one encode per socket;
+* ``legacy`` — former managers: ``model_dump`` + ``jsonable_encoder`` (with a
+  custom encoder dict built per call) + ``json.dumps``, once per event;
+* ``encode-once`` — :mod:`app.core.serialization` (compiled pydantic
+  serializer for messages, orjson when installed), once per event.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import time
+from datetime import datetime, timezone
+from decimal import Decimal
+from enum import Enum
+from uuid import UUID, uuid4
+
+from app.conversations.schemas import ConversationMessage, MessageOptions, UserPublicInfo
+from app.core import serialization
+from fastapi.encoders import jsonable_encoder
+
+from scripts import benchmarks  # noqa: F401  (environment defaults)
+
+RECIPIENTS = (1, 100, 10_000)
+
+
+def _message() -> ConversationMessage:
+    return ConversationMessage(
+        id=str(uuid4()),
+        scope="domain",
+        domain="programming",
+        area="python",
+        content="Quelqu'un a compris les générateurs ? " * 4,
+        created_at=datetime.now(timezone.utc),
+        user=UserPublicInfo(id=42, username="élève", level=7, xp_points=1234),
+        options=MessageOptions(citation_count=2),
+    )
+
+
+def _badge_event() -> dict:
+    return {
+        "type": "badge_awarded",
+        "badge": {
+            "name": "Explorateur",
+            "description": "Tu as franchi une étape clé !",
+            "icon": "trophy",
+        },
+        "awarded_at": datetime.now(timezone.utc),
+        "reward_xp": Decimal("25"),
+        "request_id": uuid4(),
+    }
+
+
+def _legacy_encode(payload: dict) -> str:
+    encoded = jsonable_encoder(
+        payload,
+        custom_encoder={
+            Enum: lambda e: getattr(e, "value", str(e)),
+            datetime: lambda d: d.isoformat(),
+            UUID: str,
+            Decimal: float,
+        },
+    )
+    return json.dumps(encoded, ensure_ascii=False, separators=(",", ":"))
+
+
+def _legacy_message(message: ConversationMessage) -> str:
+    return _legacy_encode({"type": "message", "payload": message.model_dump(mode="json")})
+
+
+def _new_message(message: ConversationMessage) -> str:
+    fragment = serialization.model_encoder(ConversationMessage)(message).decode("utf-8")
+    return '{"type":"message","payload":' + fragment + "}"
+
+
+def _cpu_per_message(
+    encode, build_event, recipients: int, per_recipient: bool, repeat: int
+) -> float:
+    events = [build_event() for _ in range(repeat)]
+    queue: list[str] = []
+    started = time.process_time()
+    for event in events:
+        if per_recipient:
+            for _ in range(recipients):
+                queue.append(encode(event))
+        else:
+            frame = encode(event)
+            for _ in range(recipients):
+                queue.append(frame)
+        queue.clear()
+    return (time.process_time() - started) / repeat * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"serialization backend: {serialization.BACKEND}")
+    cases = {
+        "conversation message": (_message, _legacy_message, _new_message),
+        "notification event": (_badge_event, _legacy_encode, serialization.dumps_text),
+    }
+    for name, (build, legacy, new) in cases.items():
+        print(f"\n{name} — CPU µs per message")
+        print(f"{'recipients':>10} {'per-recipient':>14} {'legacy':>10} {'encode-once':>12}")
+        for recipients in RECIPIENTS:
+            repeat = max(3, args.repeat // max(1, recipients // 100))
+            naive = _cpu_per_message(legacy, build, recipients, True, repeat)
+            before = _cpu_per_message(legacy, build, recipients, False, args.repeat)
+            after = _cpu_per_message(new, build, recipients, False, args.repeat)
+            print(f"{recipients:>10} {naive:>14.1f} {before:>10.1f} {after:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
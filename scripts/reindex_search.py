@@ -0,0 +1,49 @@
+"""Rebuild the full-text search index from the content tables.
+
+Usage::
+
+    python -m scripts.reindex_search [--if-empty]
+
+Creates the index structures if needed, then re-indexes every capsule,
+molecule, lesson and note and drops documents whose source is gone. The API
+start-up only creates the structures and indexes the writes made afterwards:
+run this once when the search index is first deployed (``--if-empty`` makes it
+a no-op once the index holds documents, so it can sit in the release step),
+and after restoring a backup or importing content outside the ORM.
+"""
+
+import argparse
+import logging
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from app.db.base import Base  # noqa: F401 - charge tous les modèles
+from app.db.session import SessionLocal, sync_engine
+from app.search import ensure_search_schema, reindex_all, reindex_if_empty
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "--if-empty", action="store_true", help="only fill an index without documents"
+    )
+    args = parser.parse_args()
+
+    with sync_engine.begin() as connection:
+        ensure_search_schema(connection)
+    with SessionLocal() as db:
+        total = reindex_if_empty(db) if args.if_empty else reindex_all(db)
+    if total is None:
+        logger.info("Index de recherche déjà rempli: rien à faire.")
+    else:
+        logger.info("✅ Index de recherche reconstruit: %s sources indexées.", total)
+
+
+if __name__ == "__main__":
+    main()
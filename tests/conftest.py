@@ -20,6 +20,7 @@ os.environ.setdefault("STRIPE_SECRET_KEY", "sk_test")
 os.environ.setdefault("STRIPE_PREMIUM_PRICE_ID", "price_test")
 os.environ.setdefault("STRIPE_WEBHOOK_SECRET", "whsec_test")
 
+from app.core.ttl_cache import clear_all_caches
 from app.db.base_class import Base
 from app.models.analytics.feedback_model import (
     ContentFeedback,
@@ -27,6 +28,7 @@ from app.models.analytics.feedback_model import (
 )
 from app.models.analytics.classification_feedback_model import ClassificationFeedback
 from app.models.analytics.vector_store_model import VectorStore
+from app.models.analytics.ai_token_log_model import AITokenLog
 from sqlalchemy.dialects.sqlite import JSON as SQLiteJSON
 
 # SQLite used in tests does not support PostgreSQL's JSONB type.
@@ -34,12 +36,14 @@ VectorStore.__table__.c.embedding.type = SQLiteJSON()
 VectorStore.__table__.c.metadata_.type = SQLiteJSON()
 from app.models.capsule.atom_model import Atom
 from app.models.capsule.capsule_model import Capsule
+from app.models.capsule.capsule_job_model import CapsuleJob
+from app.models.capsule.document_chunk_model import DocumentChunk
 from app.models.capsule.granule_model import Granule
 from app.models.capsule.language_roadmap_model import Skill
 from app.models.capsule.molecule_model import Molecule
 from app.models.capsule.utility_models import UserCapsuleEnrollment, UserCapsuleProgress
 from app.models.user.user_model import User
-from app.models.user.notification_model import Notification
+from app.models.user.notification_model import Notification, NotificationOutbox
 from app.models.user.badge_model import Badge, UserBadge
 from app.models.progress.user_activity_log_model import UserActivityLog
 from app.models.progress.user_answer_log_model import UserAnswerLog
@@ -48,12 +52,15 @@ from app.models.progress.user_course_progress_model import UserCourseProgress
 from app.models.progress.user_molecule_review_model import UserMoleculeReview
 from app.models.toolbox.coach_energy_model import CoachEnergyWallet
 from app.models.toolbox.coach_conversation_model import (
+    CoachConversationMemory,
     CoachConversationMessage,
     CoachConversationThread,
 )
 from app.models.toolbox.molecule_note_model import MoleculeNote
 from app.models.vote.feature_vote_model import FeaturePoll, FeaturePollOption, FeaturePollVote
 from app.models.email.email_token import EmailToken
+from app.models.conversation.chat_message_model import ChatMessage
+from app.models.search.search_document_model import SearchDocument
 
 
 # Ensure the backend/app package is importable when tests run from the repo root.
@@ -81,18 +88,32 @@ TABLES = [
     CoachEnergyWallet.__table__,
     CoachConversationThread.__table__,
     CoachConversationMessage.__table__,
+    CoachConversationMemory.__table__,
     MoleculeNote.__table__,
     EmailToken.__table__,
     Notification.__table__,
+    NotificationOutbox.__table__,
     Badge.__table__,
     UserBadge.__table__,
     FeaturePoll.__table__,
     FeaturePollOption.__table__,
     FeaturePollVote.__table__,
     VectorStore.__table__,
+    AITokenLog.__table__,
+    ChatMessage.__table__,
+    SearchDocument.__table__,
+    DocumentChunk.__table__,
+    CapsuleJob.__table__,
 ]
 
 
+@pytest.fixture(autouse=True)
+def _clear_ttl_caches():
+    """In-memory databases reuse primary keys: never leak cached per-user data."""
+    yield
+    clear_all_caches()
+
+
 @pytest.fixture()
 def engine():
     engine = create_engine("sqlite:///:memory:", future=True)
@@ -0,0 +1,177 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from app.models.capsule.utility_models import UserCapsuleProgress
+from app.models.progress.user_answer_log_model import UserAnswerLog
+from app.models.progress.user_atomic_progress import UserAtomProgress
+from app.models.progress.user_molecule_review_model import UserMoleculeReview
+from app.models.user.user_model import User
+from app.schemas.progress.progress_schema import AnswerBatchCreate
+from app.services.answer_recording_service import AnswerRecordingService
+from app.services.progress_service import calculate_capsule_xp_distribution
+from app.services.services.capsule_service import CapsuleService
+from fastapi import HTTPException
+from tests.utils import create_capsule_graph, create_user, record_statements
+
+
+def test_record_answer_updates_progress_schedule_and_xp(db_session):
+    user = create_user(db_session, username="answerer", email="answerer@example.com")
+    capsule, molecule, lesson_atom, quiz_atom = create_capsule_graph(db_session, user.id)
+    expected_xp, _ = calculate_capsule_xp_distribution(capsule)
+
+    service = AnswerRecordingService(db_session, user)
+    result = service.record_answer(quiz_atom.id, False, {"error_type": "concept"})
+    assert result["status"] == "failed"
+    assert result["progress_status"] == "failed"
+    assert result["molecule_completed"] is False
+
+    result = service.record_answer(quiz_atom.id, True, {"choice": 1})
+    assert result["status"] == "completed"
+    assert result["is_correct"] is True
+
+    assert db_session.query(UserAnswerLog).filter_by(user_id=user.id).count() == 2
+
+    progress = (
+        db_session.query(UserAtomProgress).filter_by(user_id=user.id, atom_id=quiz_atom.id).one()
+    )
+    assert (progress.attempts, progress.success_count, progress.failure_count) == (2, 1, 1)
+    assert progress.status == "completed"
+    assert progress.xp_awarded is True
+    assert progress.completed_at is not None
+
+    schedule = (
+        db_session.query(UserMoleculeReview)
+        .filter_by(user_id=user.id, molecule_id=molecule.id)
+        .one()
+    )
+    assert schedule.review_count == 2
+    assert schedule.total_errors == 1
+    assert schedule.streak == 1
+    assert schedule.last_outcome == "success"
+
+    capsule_progress = db_session.query(UserCapsuleProgress).filter_by(user_id=user.id).one()
+    assert capsule_progress.xp == expected_xp[quiz_atom.id]
+
+    # Answering again must not farm XP.
+    service.record_answer(quiz_atom.id, True, {"choice": 1})
+    db_session.refresh(capsule_progress)
+    assert capsule_progress.xp == expected_xp[quiz_atom.id]
+
+
+def test_snapshot_matches_capsule_service(db_session):
+    user = create_user(db_session, username="snap", email="snap@example.com")
+    capsule, molecule, lesson_atom, quiz_atom = create_capsule_graph(db_session, user.id)
+
+    service = AnswerRecordingService(db_session, user)
+    service.record_answer(lesson_atom.id, True, {})
+    result = service.record_answer(quiz_atom.id, True, {})
+
+    expected = CapsuleService(db_session, user).completion_snapshot(molecule)
+    assert {key: result[key] for key in expected} == expected
+    assert result["molecule_completed"] is True
+
+
+def test_record_answer_round_trips(db_session, engine):
+    user = create_user(db_session, username="rt", email="rt@example.com")
+    _, _, _, quiz_atom = create_capsule_graph(db_session, user.id)
+    quiz_atom_id = quiz_atom.id
+    AnswerRecordingService(db_session, user).record_answer(quiz_atom_id, False, {})
+
+    # New request: the authenticated user is loaded before the measured path.
+    service = AnswerRecordingService(db_session, db_session.get(User, user.id))
+
+    with record_statements(engine) as statements:
+        service.record_answer(quiz_atom_id, False, {})
+
+    reads = [sql for sql in statements if sql.lstrip().upper().startswith("SELECT")]
+    assert len(reads) == 2
+    assert len(statements) - len(reads) == 3
+
+
+def test_record_answer_unknown_atom(db_session):
+    user = create_user(db_session, username="ghost", email="ghost@example.com")
+    with pytest.raises(HTTPException) as exc:
+        AnswerRecordingService(db_session, user).record_answer(999, True, {})
+    assert exc.value.status_code == 404
+
+
+def test_record_answers_batch_matches_sequential_semantics(db_session):
+    batch_user = create_user(db_session, username="batch", email="batch@example.com")
+    solo_user = create_user(db_session, username="solo", email="solo@example.com")
+    _, molecule, lesson_atom, quiz_atom = create_capsule_graph(db_session, batch_user.id)
+    molecule_id, lesson_id, quiz_id = molecule.id, lesson_atom.id, quiz_atom.id
+    sequence = [(quiz_id, False), (quiz_id, True), (lesson_id, True), (quiz_id, True)]
+
+    answered_at = datetime(2024, 1, 1, 12, 0, tzinfo=timezone.utc)
+    payload = AnswerBatchCreate(
+        answers=[
+            {
+                "atom_id": atom_id,
+                "is_correct": ok,
+                "answer": {"index": index},
+                "answered_at": answered_at + timedelta(minutes=index),
+            }
+            for index, (atom_id, ok) in enumerate(sequence)
+        ]
+    )
+    result = AnswerRecordingService(db_session, batch_user).record_answers(payload.answers)
+
+    assert result["processed"] == 4
+    assert [item["status"] for item in result["answers"]] == [
+        "failed",
+        "completed",
+        "completed",
+        "completed",
+    ]
+    assert len(result["molecules"]) == 1
+    assert result["molecules"][0]["molecule_id"] == molecule_id
+    assert result["molecules"][0]["molecule_completed"] is True
+
+    solo_service = AnswerRecordingService(db_session, solo_user)
+    for atom_id, ok in sequence:
+        solo_service.record_answer(atom_id, ok, {})
+
+    def schedule_for(user_id):
+        return (
+            db_session.query(UserMoleculeReview)
+            .filter_by(user_id=user_id, molecule_id=molecule_id)
+            .one()
+        )
+
+    batch_schedule, solo_schedule = schedule_for(batch_user.id), schedule_for(solo_user.id)
+    for name in (
+        "review_count",
+        "streak",
+        "success_count",
+        "total_errors",
+        "ease_factor",
+        "interval_days",
+    ):
+        assert getattr(batch_schedule, name) == getattr(solo_schedule, name)
+    assert batch_schedule.last_review_at.replace(tzinfo=None) == datetime(2024, 1, 1, 12, 3)
+
+    progress = (
+        db_session.query(UserAtomProgress).filter_by(user_id=batch_user.id, atom_id=quiz_id).one()
+    )
+    assert (progress.attempts, progress.success_count, progress.failure_count) == (3, 2, 1)
+    assert db_session.query(UserAnswerLog).filter_by(user_id=batch_user.id).count() == 4
+
+
+def test_record_answers_clamps_future_timestamps(db_session):
+    user = create_user(db_session, username="future", email="future@example.com")
+    _, _, _, quiz_atom = create_capsule_graph(db_session, user.id)
+    payload = AnswerBatchCreate(
+        answers=[
+            {
+                "atom_id": quiz_atom.id,
+                "is_correct": True,
+                "answered_at": datetime.utcnow() + timedelta(days=3),
+            }
+        ]
+    )
+    AnswerRecordingService(db_session, user).record_answers(payload.answers)
+
+    log = db_session.query(UserAnswerLog).filter_by(user_id=user.id).one()
+    assert log.created_at <= datetime.utcnow()
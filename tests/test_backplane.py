@@ -0,0 +1,311 @@
+"""Cross-worker fan-out through the realtime backplane."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+from datetime import datetime, timezone
+
+import pytest
+from app.conversations.manager import ConversationWebSocketManager
+from app.conversations.schemas import ChannelDescriptor, ConversationMessage, UserPublicInfo
+from app.core.backplane import (
+    InProcessBackplane,
+    PostgresBackplane,
+    RedisBackplane,
+    create_backplane,
+)
+from app.notifications.websocket_manager import NotificationWebSocketManager
+from tests.test_conversation_manager import DummyWebSocket
+
+
+class _RedisStandIn:
+    """Local stand-in for a Redis server: ``publish`` and ``pubsub()`` only."""
+
+    def __init__(self) -> None:
+        self._queues: dict[str, list[asyncio.Queue]] = {}
+
+    def pubsub(self) -> "_PubSubStandIn":
+        return _PubSubStandIn(self)
+
+    async def publish(self, channel: str, data: str) -> int:
+        queues = self._queues.get(channel, [])
+        for queue in queues:
+            queue.put_nowait(
+                {"type": "message", "channel": channel.encode(), "data": data.encode()}
+            )
+        return len(queues)
+
+
+class _PubSubStandIn:
+    def __init__(self, server: _RedisStandIn) -> None:
+        self._server = server
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self.closed = False
+
+    async def subscribe(self, channel: str) -> None:
+        self._server._queues.setdefault(channel, []).append(self._queue)
+        self._queue.put_nowait({"type": "subscribe", "channel": channel.encode(), "data": 1})
+
+    async def unsubscribe(self, channel: str) -> None:
+        self._server._queues[channel].remove(self._queue)
+
+    async def listen(self):
+        while True:
+            message = await self._queue.get()
+            if isinstance(message, Exception):
+                raise message
+            yield message
+
+    async def aclose(self) -> None:
+        self.closed = True
+        for queues in self._server._queues.values():
+            if self._queue in queues:
+                queues.remove(self._queue)
+
+
+class _PgConnectionStandIn:
+    """Local stand-in for an asyncpg LISTEN connection."""
+
+    def __init__(self, notified: list) -> None:
+        self.notified = notified
+        self.fail_next_execute = False
+        self.closed = False
+        self._termination_listeners: list = []
+
+    async def add_listener(self, channel, callback) -> None:
+        self.channel, self.callback = channel, callback
+
+    def add_termination_listener(self, callback) -> None:
+        self._termination_listeners.append(callback)
+
+    def is_closed(self) -> bool:
+        return self.closed
+
+    async def execute(self, query, channel, payload) -> None:
+        if self.fail_next_execute:
+            import asyncpg
+
+            self.closed = True
+            raise asyncpg.ConnectionDoesNotExistError(
+                "connection was closed in the middle of operation"
+            )
+        self.notified.append(payload)
+
+    def drop(self) -> None:
+        """Server-side disconnect: asyncpg calls the termination listeners."""
+        self.closed = True
+        for callback in self._termination_listeners:
+            callback(self)
+
+    def terminate(self) -> None:
+        self.closed = True
+
+    async def close(self) -> None:
+        self.drop()
+
+
+async def _settle() -> None:
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def _message(channel: ChannelDescriptor, message_id: str) -> ConversationMessage:
+    return ConversationMessage(
+        id=message_id,
+        scope=channel.scope,
+        domain=channel.domain,
+        area=channel.area,
+        content="Bonjour",
+        created_at=datetime.now(timezone.utc),
+        user=UserPublicInfo(id=1, username="tester"),
+    )
+
+
+@pytest.mark.asyncio
+async def test_notification_reaches_socket_held_by_another_worker() -> None:
+    server = _RedisStandIn()
+    worker_a = NotificationWebSocketManager(RedisBackplane(client=server))
+    worker_b = NotificationWebSocketManager(RedisBackplane(client=server))
+    for worker in (worker_a, worker_b):
+        await worker.backplane.start()
+
+    socket = DummyWebSocket()
+    await worker_b.connect(7, socket)
+    await worker_a.notify_async(7, {"type": "badge_awarded", "at": datetime(2026, 1, 1)})
+    await _settle()
+
+    assert [json.loads(text) for text in socket.sent] == [
+        {"type": "badge_awarded", "at": "2026-01-01T00:00:00"}
+    ]
+    for worker in (worker_a, worker_b):
+        await worker.backplane.close()
+
+
+@pytest.mark.asyncio
+async def test_conversation_history_is_shared_across_workers() -> None:
+    server = _RedisStandIn()
+    worker_a = ConversationWebSocketManager(backplane=RedisBackplane(client=server))
+    worker_b = ConversationWebSocketManager(backplane=RedisBackplane(client=server))
+    for worker in (worker_a, worker_b):
+        await worker.backplane.start()
+    channel = ChannelDescriptor.from_params(domain="Sciences")
+    socket_a, socket_b = DummyWebSocket(), DummyWebSocket()
+    await worker_a.connect(channel, socket_a)
+    await worker_b.connect(channel, socket_b)
+
+    await worker_a.broadcast_message(channel, _message(channel, "msg-1"))
+    await _settle()
+
+    for worker, socket in ((worker_a, socket_a), (worker_b, socket_b)):
+        assert [message.id for message in await worker.history(channel)] == ["msg-1"]
+        assert json.loads(socket.sent[-1])["payload"]["id"] == "msg-1"
+    for worker in (worker_a, worker_b):
+        await worker.backplane.close()
+
+
+@pytest.mark.asyncio
+async def test_in_process_backplane_isolates_topics() -> None:
+    backplane = InProcessBackplane()
+    received: list[dict] = []
+
+    async def _handler(data: dict) -> None:
+        received.append(data)
+
+    backplane.subscribe("a", _handler)
+    await backplane.publish("a", {"n": 1})
+    await backplane.publish("b", {"n": 2})
+    backplane.unsubscribe("a", _handler)
+    await backplane.publish("a", {"n": 3})
+
+    assert received == [{"n": 1}]
+
+
+@pytest.mark.asyncio
+async def test_postgres_backplane_dispatches_notifications() -> None:
+    backplane = PostgresBackplane("postgresql+asyncpg://user:pw@localhost/db")
+    received: list[dict] = []
+
+    async def _handler(data: dict) -> None:
+        received.append(data)
+
+    backplane.subscribe("notifications", _handler)
+    backplane._on_notify(
+        None, 1, backplane.channel, backplane._encode("notifications", {"user_id": 3})
+    )
+    backplane._on_notify(None, 1, backplane.channel, "not json")
+    await _settle()
+    # Over the NOTIFY limit: delivered locally without touching the database.
+    await backplane.publish("notifications", {"blob": "x" * 9000})
+
+    assert received == [{"user_id": 3}, {"blob": "x" * 9000}]
+
+
+@pytest.mark.asyncio
+async def test_postgres_backplane_reconnects_after_connection_loss(monkeypatch) -> None:
+    pytest.importorskip("asyncpg")
+    backplane = PostgresBackplane("postgresql+asyncpg://user:pw@localhost/db")
+    backplane.reconnect_delay = 0.01
+    notified: list[str] = []
+    connections: list[_PgConnectionStandIn] = []
+    failures = [OSError("connection refused")]
+
+    async def _open_connection():
+        if len(connections) == 1 and failures:
+            raise failures.pop()
+        connections.append(_PgConnectionStandIn(notified))
+        return connections[-1]
+
+    monkeypatch.setattr(backplane, "_open_connection", _open_connection)
+    await backplane.start()
+
+    # coupure côté serveur: reconnexion en arrière-plan, malgré un premier échec
+    connections[0].drop()
+    for _ in range(100):
+        if len(connections) == 2:
+            break
+        await asyncio.sleep(0.01)
+    assert len(connections) == 2 and not failures
+    await backplane.publish("notifications", {"n": 1})
+
+    # connexion perdue sans notification de fin: publish reconnecte et réessaie
+    connections[1].fail_next_execute = True
+    await backplane.publish("notifications", {"n": 2})
+    assert len(connections) == 3
+    assert [json.loads(payload)["data"] for payload in notified] == [{"n": 1}, {"n": 2}]
+
+    await backplane.close()
+    await asyncio.sleep(0.02)
+    assert len(connections) == 3 and connections[2].closed
+
+
+@pytest.mark.asyncio
+async def test_postgres_backplane_keeps_dispatch_tasks_referenced() -> None:
+    backplane = PostgresBackplane("postgresql+asyncpg://user:pw@localhost/db")
+    release = asyncio.Event()
+
+    async def _handler(data: dict) -> None:
+        await release.wait()
+
+    backplane.subscribe("notifications", _handler)
+    backplane._on_notify(None, 1, backplane.channel, backplane._encode("notifications", {}))
+    assert len(backplane._tasks) == 1
+    release.set()
+    await _settle()
+    assert backplane._tasks == set()
+
+
+@pytest.mark.asyncio
+async def test_redis_backplane_resubscribes_after_a_read_error() -> None:
+    server = _RedisStandIn()
+    backplane = RedisBackplane(client=server)
+    backplane.reconnect_delay = 0.01
+    received: list[dict] = []
+
+    async def _handler(data: dict) -> None:
+        received.append(data)
+
+    backplane.subscribe("notifications", _handler)
+    await backplane.start()
+    first = backplane._pubsub
+    first._queue.put_nowait(ConnectionError("Connection reset by peer"))
+    for _ in range(100):
+        if backplane._pubsub is not None and backplane._pubsub is not first:
+            break
+        await asyncio.sleep(0.01)
+    assert first.closed
+
+    await backplane.publish("notifications", {"n": 1})
+    await _settle()
+    assert received == [{"n": 1}]
+    await backplane.close()
+
+
+@pytest.mark.asyncio
+async def test_redis_backplane_closes_the_client_it_created() -> None:
+    server = _RedisStandIn()
+    server.closed = False
+
+    async def _aclose() -> None:
+        server.closed = True
+
+    server.aclose = _aclose
+    owned = RedisBackplane("redis://localhost")
+    owned._client = server  # comme après redis.from_url()
+    await owned.start()
+    await owned.close()
+    assert server.closed and owned._client is None
+
+    server.closed = False
+    shared = RedisBackplane(client=server)
+    await shared.start()
+    await shared.close()
+    assert not server.closed
+
+
+def test_create_backplane_from_settings() -> None:
+    assert isinstance(create_backplane("memory"), InProcessBackplane)
+    assert isinstance(create_backplane("postgres", "postgresql+asyncpg://db"), PostgresBackplane)
+    assert isinstance(create_backplane("redis", "redis://localhost"), RedisBackplane)
+    with pytest.raises(ValueError):
+        create_backplane("kafka")
@@ -0,0 +1,174 @@
+"""Capsule catalog: projected rows, keyset pagination, SQL filters."""
+
+from __future__ import annotations
+
+import pytest
+from app.api.v2.endpoints.capsule_router import (
+    get_my_capsules,
+    get_my_capsules_page,
+    get_public_capsules,
+    get_public_capsules_page,
+    router,
+)
+from app.models.capsule.capsule_model import Capsule
+from app.models.capsule.utility_models import UserCapsuleEnrollment, UserCapsuleProgress
+from app.schemas.capsule.capsule_schema import CapsuleRead
+from app.services.capsule_catalog_service import CapsuleCatalogService
+from app.services.progress_service import TOTAL_XP
+from fastapi import HTTPException
+from starlette.routing import Match
+from tests.utils import create_capsule_graph, create_user, ensure_skill, record_statements
+
+
+def _capsules(db, user_id: int, count: int, **kwargs) -> list[Capsule]:
+    capsules = [
+        Capsule(
+            title=f"Capsule {index:02d}",
+            domain=kwargs.get("domain", "programming"),
+            area=kwargs.get("area", "python"),
+            main_skill="python",
+            creator_id=user_id,
+            is_public=kwargs.get("is_public", True),
+        )
+        for index in range(count)
+    ]
+    db.add_all(capsules)
+    db.commit()
+    return capsules
+
+
+def test_enrolled_page_projects_counts_and_progress(db_session) -> None:
+    user = create_user(db_session)
+    capsule, *_ = create_capsule_graph(db_session, user.id)
+    skill = ensure_skill(db_session)
+    db_session.add(UserCapsuleEnrollment(user_id=user.id, capsule_id=capsule.id))
+    db_session.add(
+        UserCapsuleProgress(
+            user_id=user.id, capsule_id=capsule.id, skill_id=skill.id, xp=TOTAL_XP // 4
+        )
+    )
+    db_session.commit()
+
+    page = get_my_capsules_page(
+        domain=None,
+        area=None,
+        sort="recent",
+        cursor=None,
+        limit=20,
+        db=db_session,
+        current_user=user,
+    )
+
+    (item,) = page.items
+    assert page.next_cursor is None
+    assert (item.id, item.granule_count, item.molecule_count) == (capsule.id, 1, 1)
+    assert item.user_xp == TOTAL_XP // 4
+    assert item.xp_percent == pytest.approx(0.25)
+
+
+def test_public_route_hides_only_the_callers_enrollments(db_session) -> None:
+    author = create_user(db_session)
+    other = create_user(db_session, username="other", email="other@example.com")
+    visible, enrolled, enrolled_by_other = _capsules(db_session, author.id, 3)
+    _capsules(db_session, author.id, 1, is_public=False)
+    db_session.add(UserCapsuleEnrollment(user_id=author.id, capsule_id=enrolled.id))
+    db_session.add(UserCapsuleEnrollment(user_id=other.id, capsule_id=enrolled_by_other.id))
+    db_session.commit()
+
+    def public_ids(user) -> list[int]:
+        page = get_public_capsules_page(
+            domain=None,
+            area=None,
+            sort="recent",
+            cursor=None,
+            limit=20,
+            db=db_session,
+            current_user=user,
+        )
+        return [item.id for item in page.items]
+
+    assert public_ids(author) == [enrolled_by_other.id, visible.id]
+    assert public_ids(other) == [enrolled.id, visible.id]
+
+
+def test_public_pages_walk_the_catalog_with_one_query_each(db_session, engine) -> None:
+    user = create_user(db_session)
+    capsules = _capsules(db_session, user.id, 7)
+    _capsules(db_session, user.id, 2, is_public=False)
+    db_session.add(UserCapsuleEnrollment(user_id=user.id, capsule_id=capsules[0].id))
+    db_session.commit()
+    db_session.refresh(user)
+
+    service = CapsuleCatalogService(db_session, user)
+    seen: list[int] = []
+    cursor = None
+    with record_statements(engine) as statements:
+        while True:
+            page = service.list_public(cursor=cursor, limit=3)
+            seen.extend(item.id for item in page.items)
+            cursor = page.next_cursor
+            if cursor is None:
+                break
+
+    assert seen == sorted((c.id for c in capsules[1:]), reverse=True)
+    assert len(statements) == 2
+    assert all("learning_plan_json" not in statement for statement in statements)
+
+
+def test_title_sort_and_filters_are_applied_in_sql(db_session) -> None:
+    user = create_user(db_session)
+    _capsules(db_session, user.id, 3, domain="languages", area="japanese")
+    _capsules(db_session, user.id, 3, domain="programming", area="python")
+    service = CapsuleCatalogService(db_session, user)
+
+    first = service.list_public(domain="languages", sort="title", limit=2)
+    second = service.list_public(
+        domain="languages", sort="title", cursor=first.next_cursor, limit=2
+    )
+
+    titles = [item.title for item in first.items + second.items]
+    assert titles == ["Capsule 00", "Capsule 01", "Capsule 02"]
+    assert {item.domain for item in first.items + second.items} == {"languages"}
+    assert second.next_cursor is None
+    assert service.list_public(area="japanese", domain="programming").items == []
+
+
+def test_invalid_cursor_and_sort_are_rejected(db_session) -> None:
+    user = create_user(db_session)
+    service = CapsuleCatalogService(db_session, user)
+
+    with pytest.raises(HTTPException) as exc:
+        service.list_enrolled(cursor="not-a-cursor")
+    assert exc.value.detail == "invalid_cursor"
+    with pytest.raises(HTTPException) as exc:
+        service.list_public(sort="popular")
+    assert exc.value.detail == "invalid_sort"
+
+
+def test_legacy_list_routes_keep_their_shape_next_to_the_paged_ones(db_session) -> None:
+    user = create_user(db_session)
+    capsule, *_ = create_capsule_graph(db_session, user.id)
+    public, private = _capsules(db_session, user.id, 2)
+    private.is_public = False
+    db_session.add(UserCapsuleEnrollment(user_id=user.id, capsule_id=capsule.id))
+    db_session.commit()
+    db_session.refresh(user)
+
+    (mine,) = [
+        CapsuleRead.model_validate(item)
+        for item in get_my_capsules(db=db_session, current_user=user)
+    ]
+    assert (mine.id, len(mine.granules)) == (capsule.id, 1)
+    public_ids = {
+        CapsuleRead.model_validate(item).id
+        for item in get_public_capsules(db=db_session, current_user=user)
+    }
+    assert capsule.id not in public_ids and public.id in public_ids
+
+    def endpoint_for(path: str):
+        scope = {"type": "http", "path": path, "method": "GET"}
+        return next(r.endpoint for r in router.routes if r.matches(scope)[0] == Match.FULL)
+
+    assert endpoint_for("/me") is get_my_capsules
+    assert endpoint_for("/me/page") is get_my_capsules_page
+    assert endpoint_for("/public/page") is get_public_capsules_page
@@ -0,0 +1,163 @@
+"""Asynchronous PDF-to-capsule jobs: immediate upload response, background pipeline, polling."""
+
+from __future__ import annotations
+
+import io
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from app.api.v2.endpoints import capsule_router
+from app.db.base_class import Base
+from app.models.capsule.atom_model import AtomContentType
+from app.models.capsule.capsule_job_model import CapsuleJob, CapsuleJobStatus
+from app.models.capsule.capsule_model import Capsule, GenerationStatus
+from app.models.capsule.document_chunk_model import DocumentChunk
+from app.models.user.notification_model import NotificationOutbox
+from app.models.user.user_model import SubscriptionStatus
+from app.services.capsule_job_service import JOB_EVENT, STAGES, CapsuleJobService, run_pdf_job
+from app.services.services.capsule_service import CapsuleService
+from app.services.services.capsules.base_builder import BaseCapsuleBuilder
+from fastapi import BackgroundTasks, HTTPException, UploadFile
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+from starlette.datastructures import Headers
+from tests.conftest import TABLES
+from tests.utils import create_user, make_pdf
+
+
+@pytest.fixture()
+def file_sessionmaker(tmp_path):
+    # Le pipeline et le suivi du job écrivent par des sessions distinctes: base fichier.
+    engine = create_engine(f"sqlite:///{tmp_path / 'jobs.db'}")
+    Base.metadata.create_all(bind=engine, tables=TABLES)
+    yield sessionmaker(bind=engine)
+    engine.dispose()
+
+
+@pytest.fixture()
+def stub_builder(monkeypatch):
+    monkeypatch.setattr(CapsuleService, "_notify", lambda *args, **kwargs: None)
+    monkeypatch.setattr(CapsuleService, "_award_creation_badges", lambda *args, **kwargs: None)
+
+    class StubBuilder(BaseCapsuleBuilder):
+        def _generate_plan_from_source(self, db, capsule, source_material):
+            return {
+                "levels": [
+                    {"level_title": "Niveau 1", "chapters": [{"chapter_title": "Chapitre 1"}]}
+                ]
+            }
+
+        def _get_molecule_recipe(self, molecule):
+            return [{"type": AtomContentType.LESSON}]
+
+        def _build_atom_content(self, atom_type, molecule, context_atoms, difficulty=None):
+            return {"text": "ok"}
+
+    monkeypatch.setattr(
+        "app.services.services.capsule_service._get_builder_for_capsule",
+        lambda db, capsule, user, source_material=None: StubBuilder(
+            db=db, capsule=capsule, user=user, source_material=source_material
+        ),
+    )
+
+
+def _upload(pdf_bytes: bytes) -> UploadFile:
+    return UploadFile(
+        file=io.BytesIO(pdf_bytes),
+        filename="cours.pdf",
+        headers=Headers({"content-type": "application/pdf"}),
+    )
+
+
+@pytest.mark.asyncio
+async def test_upload_returns_job_and_pipeline_records_every_stage(
+    file_sessionmaker, stub_builder
+) -> None:
+    pdf_bytes = make_pdf(
+        [[f"SECTION {index}", f"Texte de la section {index}."] for index in range(1, 6)]
+    )
+    with file_sessionmaker() as db:
+        user = create_user(db, subscription_status=SubscriptionStatus.PREMIUM)
+        background_tasks = BackgroundTasks()
+        job = await capsule_router.create_capsule_from_pdf(
+            background_tasks=background_tasks,
+            pdf_file=_upload(pdf_bytes),
+            title="Manuel",
+            domain="others",
+            area="custom",
+            main_skill="manuel",
+            db=db,
+            current_user=user,
+        )
+        # la réponse part avant toute extraction
+        assert job.status == CapsuleJobStatus.QUEUED and job.capsule_id is None
+        ((task),) = background_tasks.tasks
+        assert task.func is run_pdf_job and task.args == (job.id, pdf_bytes)
+        job_id, user_id = job.id, user.id
+
+    run_pdf_job(job_id, pdf_bytes, file_sessionmaker)
+
+    with file_sessionmaker() as db:
+        user = db.get(type(user), user_id)
+        job = capsule_router.get_capsule_job(job_id, db=db, current_user=user)
+        assert job.status == CapsuleJobStatus.COMPLETED and job.error is None
+        assert (job.pages_done, job.pages_total) == (5, 5)
+        assert set(job.timings) == set(STAGES) and all(value >= 0 for value in job.timings.values())
+        capsule = db.get(Capsule, job.capsule_id)
+        assert capsule.generation_status == GenerationStatus.COMPLETED
+        assert (
+            db.scalar(select(DocumentChunk.id).where(DocumentChunk.capsule_id == capsule.id))
+            is not None
+        )
+
+        events = [
+            row.payload["job"]
+            for row in db.scalars(select(NotificationOutbox).order_by(NotificationOutbox.id))
+            if row.kind == JOB_EVENT
+        ]
+        stages = [event["stage"] for event in events]
+        assert [
+            stage for index, stage in enumerate(stages) if stage and stage not in stages[:index]
+        ] == list(STAGES)
+        assert events[-1]["status"] == "completed" and events[-1]["capsule_id"] == capsule.id
+
+        other = create_user(db, username="other", email="other@example.com")
+        with pytest.raises(HTTPException) as exc:
+            capsule_router.get_capsule_job(job_id, db=db, current_user=other)
+        assert exc.value.status_code == 404
+
+
+def test_failed_interrupted_and_forbidden_jobs(file_sessionmaker, stub_builder) -> None:
+    with file_sessionmaker() as db:
+        user = create_user(db, subscription_status=SubscriptionStatus.PREMIUM)
+        service = CapsuleJobService(db, user)
+        broken = service.create_pdf_job(title="x", domain="d", area="a", main_skill="s")
+        stale = service.create_pdf_job(title="y", domain="d", area="a", main_skill="s")
+        stale.updated_at = datetime.now(timezone.utc) - timedelta(hours=2)
+        db.commit()
+        broken_id, stale_id, user_id = broken.id, stale.id, user.id
+
+        free_user = create_user(db, username="free", email="free@example.com")
+        with pytest.raises(HTTPException) as exc:
+            CapsuleJobService(db, free_user).create_pdf_job(
+                title="z", domain="d", area="a", main_skill="s"
+            )
+        assert exc.value.status_code == 403
+
+    run_pdf_job(broken_id, b"not a pdf", file_sessionmaker)
+
+    with file_sessionmaker() as db:
+        service = CapsuleJobService(db, db.get(type(user), user_id))
+        broken = service.get_job(broken_id)
+        assert (broken.status, broken.error, broken.capsule_id) == (
+            CapsuleJobStatus.FAILED,
+            "invalid_pdf",
+            None,
+        )
+        assert db.query(Capsule).count() == 0
+        interrupted = service.get_job(stale_id)
+        assert (interrupted.status, interrupted.error) == (
+            CapsuleJobStatus.FAILED,
+            "job_interrupted",
+        )
+        assert db.get(CapsuleJob, stale_id).finished_at is not None
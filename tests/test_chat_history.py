@@ -0,0 +1,139 @@
+"""Persistent chat history: batched store, cursor pages, cached history frame."""
+
+from __future__ import annotations
+
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from app.api.v2.endpoints.chat_router import read_chat_history
+from app.conversations.manager import ConversationWebSocketManager
+from app.conversations.schemas import ChannelDescriptor, ConversationMessage, UserPublicInfo
+from app.conversations.store import ConversationStore
+from app.db.base_class import Base
+from app.models.conversation.chat_message_model import ChatMessage
+from app.models.user.user_model import User
+from fastapi import HTTPException
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from tests.test_websocket_fanout import FakeSocket, _settle
+from tests.utils import create_user, record_statements
+
+START = datetime(2026, 5, 1, 10, 0, tzinfo=timezone.utc)
+
+
+def _message(
+    channel: ChannelDescriptor, index: int, created_at: datetime | None = None
+) -> ConversationMessage:
+    return ConversationMessage(
+        id=f"msg-{index:03d}",
+        scope=channel.scope,
+        domain=channel.domain,
+        area=channel.area,
+        content=f"Message {index}",
+        created_at=created_at or START + timedelta(seconds=index),
+        user=UserPublicInfo(id=1, username="tester"),
+    )
+
+
+@pytest.fixture()
+def file_engine(tmp_path):
+    # The store writes from a worker thread: use a file database shared by threads.
+    engine = create_engine(f"sqlite:///{tmp_path / 'chat.db'}")
+    Base.metadata.create_all(bind=engine, tables=[User.__table__, ChatMessage.__table__])
+    yield engine
+    engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_store_batches_inserts(file_engine) -> None:
+    def inserts() -> list[int]:
+        return [
+            statement.rows
+            for statement in statements
+            if statement.startswith("INSERT INTO chat_messages")
+        ]
+
+    with record_statements(file_engine) as statements:
+        store = ConversationStore(sessionmaker(bind=file_engine), batch_size=3, flush_interval=0.01)
+        channel = ChannelDescriptor.from_params(domain="Sciences")
+        for index in range(4):
+            await store.append(channel.key, _message(channel, index))
+        assert inserts() == [3]
+        assert [message.id for message in await store.latest(channel.key, 10)] == [
+            "msg-000",
+            "msg-001",
+            "msg-002",
+            "msg-003",
+        ]
+
+        await store.flush()
+        assert inserts() == [3, 1]
+
+
+@pytest.mark.asyncio
+async def test_history_survives_restart_and_is_sent_from_cache(file_engine) -> None:
+    store = ConversationStore(sessionmaker(bind=file_engine))
+    channel = ChannelDescriptor.from_params(domain="Sciences", area="physique")
+    first = ConversationWebSocketManager(store=store)
+    for index in range(3):
+        await first.broadcast_message(channel, _message(channel, index))
+    await store.flush()
+
+    restarted = ConversationWebSocketManager(history_size=2, store=store)
+    assert [message.id for message in await restarted.history(channel)] == ["msg-001", "msg-002"]
+
+    sockets = [FakeSocket(), FakeSocket()]
+    for socket in sockets:
+        await restarted.connect(channel, socket)
+        await restarted.send_history(channel, socket)
+    await _settle()
+
+    assert sockets[0].sent[0] is sockets[1].sent[0]
+    frame = json.loads(sockets[0].sent[0])
+    assert frame["type"] == "history"
+    assert [message["id"] for message in frame["payload"]] == ["msg-001", "msg-002"]
+
+    await restarted.broadcast_message(channel, _message(channel, 3))
+    await _settle()
+    late = FakeSocket()
+    await restarted.connect(channel, late)
+    await restarted.send_history(channel, late)
+    assert [m["id"] for m in json.loads(late.sent[0])["payload"]] == ["msg-002", "msg-003"]
+
+
+def test_history_endpoint_pages_with_a_cursor(db_session) -> None:
+    user = create_user(db_session)
+    channel = ChannelDescriptor.from_params(domain="Sciences")
+    messages = [_message(channel, index) for index in range(4)]
+    # Same timestamp: the id breaks the tie.
+    messages.append(_message(channel, 4, created_at=messages[-1].created_at))
+    db_session.add_all(
+        ChatMessage(
+            id=message.id,
+            channel_key=channel.key,
+            user_id=user.id,
+            content=message.content,
+            payload=message.model_dump(mode="json"),
+            created_at=message.created_at,
+        )
+        for message in messages
+    )
+    db_session.commit()
+
+    pages, cursor = [], None
+    while True:
+        page = read_chat_history(
+            domain="Sciences", area=None, before=cursor, limit=2, current_user=user, db=db_session
+        )
+        pages.append([message.id for message in page.messages])
+        cursor = page.next_cursor
+        if cursor is None:
+            break
+
+    assert pages == [["msg-003", "msg-004"], ["msg-001", "msg-002"], ["msg-000"]]
+    with pytest.raises(HTTPException) as exc:
+        read_chat_history(
+            domain="Sciences", area=None, before="%%%", limit=2, current_user=user, db=db_session
+        )
+    assert exc.value.status_code == 400
@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+
+from app.core import ai_service
+from app.crud import toolbox_crud
+from app.models.progress.user_answer_log_model import UserAnswerLog
+from app.models.progress.user_molecule_review_model import UserMoleculeReview
+from app.services.answer_recording_service import AnswerRecordingService
+from app.services.coach_context_service import CoachContextService
+from tests.utils import create_capsule_graph, create_user, record_statements
+
+
+def _seed(db_session):
+    user = create_user(db_session, username="coach-ctx", email="coach-ctx@example.com")
+    capsule, molecule, lesson_atom, quiz_atom = create_capsule_graph(db_session, user.id)
+    now = datetime.utcnow()
+    db_session.add_all(
+        [
+            UserAnswerLog(
+                user_id=user.id,
+                atom_id=quiz_atom.id,
+                is_correct=False,
+                user_answer_json={"error_type": "syntax", "choice": index},
+                created_at=now - timedelta(hours=index + 1),
+            )
+            for index in range(2)
+        ]
+        + [
+            UserMoleculeReview(
+                user_id=user.id,
+                molecule_id=molecule.id,
+                next_review_at=now - timedelta(hours=1),
+                interval_days=1.0,
+            )
+        ]
+    )
+    db_session.commit()
+    return user, capsule, molecule, quiz_atom
+
+
+def test_context_is_built_in_one_query_and_cached(db_session):
+    user, capsule, molecule, quiz_atom = _seed(db_session)
+    service = CoachContextService(db_session, user)
+    capsule_id = capsule.id
+    with record_statements(db_session.get_bind()) as statements:
+        context = service.get_context(capsule_id, granule_order=1, molecule_order=1)
+        assert len(statements) == 1
+        cached = service.get_context(capsule_id, granule_order=1, molecule_order=1)
+        assert len(statements) == 1
+
+    assert cached is context
+    assert context.weak_topics == f"{molecule.title} (2 erreurs)"
+    assert context.recent_errors.splitlines()[0] == (
+        '- Quiz → réponse {"error_type": "syntax", "choice": 0}'
+    )
+    assert context.focus_description == f"Travail en cours sur la leçon '{molecule.title}'."
+    assert context.srs_reviews == f"{molecule.title} — en retard"
+    assert context.srs_errors == f"{molecule.title} (2 erreurs, axe syntax)"
+
+
+def test_answer_logging_invalidates_the_context(db_session):
+    user, capsule, molecule, quiz_atom = _seed(db_session)
+    service = CoachContextService(db_session, user)
+    assert service.get_context(capsule.id).weak_topics.endswith("(2 erreurs)")
+
+    AnswerRecordingService(db_session, user).record_answer(quiz_atom.id, False, {"choice": 9})
+
+    assert service.get_context(capsule.id).weak_topics.endswith("(3 erreurs)")
+
+
+def test_ask_coach_prompt_uses_cached_context(db_session, monkeypatch):
+    user, capsule, molecule, _ = _seed(db_session)
+    prompts: list[str] = []
+
+    def _fake_call_ai_and_log(**kwargs):
+        prompts.append(kwargs["system_prompt"])
+        return {"response": "ok"}
+
+    monkeypatch.setattr(ai_service, "call_ai_and_log", _fake_call_ai_and_log)
+    for _ in range(2):
+        toolbox_crud.ask_coach(
+            db=db_session,
+            user=user,
+            message="Aide-moi",
+            context={"capsuleId": capsule.id, "granuleOrder": 1, "moleculeOrder": 1},
+            history=[],
+        )
+
+    for prompt in prompts:
+        assert f"{molecule.title} (2 erreurs, axe syntax)" in prompt
+        assert f"Travail en cours sur la leçon '{molecule.title}'." in prompt
@@ -1,8 +1,9 @@
 from __future__ import annotations
 
 from app.core import ai_service
-from app.crud import coach_conversation_crud, toolbox_crud
+from app.crud import coach_conversation_crud, coach_memory_crud, toolbox_crud
 from app.models.toolbox.coach_conversation_model import CoachConversationLocation
+from app.models.user.user_model import SubscriptionStatus
 from tests.utils import create_capsule_graph, create_user
 
 
@@ -128,3 +129,69 @@ def test_conversations_are_partitioned_by_location(db_session, monkeypatch) -> N
     molecule_stats = stats[molecule_thread.id]
     assert molecule_stats[0] == 4
     assert molecule_stats[1] == molecule_messages[-1].created_at
+
+
+def test_coach_prompt_history_is_bounded_by_rolling_summary(db_session, monkeypatch) -> None:
+    user = create_user(
+        db_session, username="long_talk", subscription_status=SubscriptionStatus.PREMIUM
+    )
+    prompts: list[str] = []
+    summaries: list[str] = []
+
+    def _fake_call_ai_and_log(**kwargs):
+        if kwargs["feature_name"] == "coach_memory":
+            summaries.append(kwargs["system_prompt"])
+            return {"summary": f"Résumé n°{len(summaries)}"}
+        prompts.append(kwargs["system_prompt"])
+        return {"response": f"Réponse {len(prompts)}"}
+
+    monkeypatch.setattr(ai_service, "call_ai_and_log", _fake_call_ai_and_log)
+
+    turns = 20
+    for index in range(turns):
+        toolbox_crud.ask_coach(
+            db=db_session,
+            user=user,
+            message=f"Question {index}",
+            context={"path": "/dashboard"},
+            history=[{"author": "user", "message": "ignoré"}],
+        )
+
+    # 40 messages: a summary every SUMMARY_EVERY messages leaving the window.
+    assert len(summaries) == (2 * turns - coach_memory_crud.RECENT_MESSAGES) // coach_memory_crud.SUMMARY_EVERY
+    assert "Résumé précédent : Résumé n°1" in summaries[1]
+
+    last_prompt = prompts[-1]
+    assert f"Résumé des échanges précédents : Résumé n°{len(summaries)}" in last_prompt
+    assert "user: Question 18" in last_prompt
+    assert "user: Question 2\n" not in last_prompt
+    assert "ignoré" not in last_prompt
+    history_lines = [
+        line for line in last_prompt.splitlines() if line.startswith(("user: ", "coach: "))
+    ]
+    assert len(history_lines) < coach_memory_crud.RECENT_MESSAGES + coach_memory_crud.SUMMARY_EVERY
+
+    thread = coach_conversation_crud.list_threads_for_user(db_session, user)[0]
+    assert thread.memory.summarized_messages == len(summaries) * coach_memory_crud.SUMMARY_EVERY
+    assert len(coach_conversation_crud.list_messages_for_thread(db_session, thread)) == 2 * turns
+
+
+def test_failed_summary_keeps_messages_for_a_later_turn(db_session, monkeypatch) -> None:
+    user = create_user(
+        db_session, username="flaky_summary", subscription_status=SubscriptionStatus.PREMIUM
+    )
+
+    def _fake_call_ai_and_log(**kwargs):
+        if kwargs["feature_name"] == "coach_memory":
+            raise RuntimeError("LLM indisponible")
+        return {"response": "ok"}
+
+    monkeypatch.setattr(ai_service, "call_ai_and_log", _fake_call_ai_and_log)
+    for index in range(8):
+        toolbox_crud.ask_coach(
+            db=db_session, user=user, message=f"Q{index}", context={}, history=[]
+        )
+
+    thread = coach_conversation_crud.list_threads_for_user(db_session, user)[0]
+    assert thread.memory is None
+    assert "user: Q7" in coach_memory_crud.build_prompt_history(db_session, thread)
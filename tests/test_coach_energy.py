@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+from app.core.config import settings
+from app.crud import coach_energy_crud
+from app.models.toolbox.coach_energy_model import CoachEnergyWallet
+from app.models.user.user_model import SubscriptionStatus
+from sqlalchemy.dialects import postgresql
+from tests.utils import create_user, record_statements
+
+NOW = datetime(2026, 3, 2, 12, 0, tzinfo=timezone.utc)
+
+
+def _wallet(db_session, user_id) -> CoachEnergyWallet | None:
+    db_session.expire_all()
+    return db_session.query(CoachEnergyWallet).filter_by(user_id=user_id).one_or_none()
+
+
+def test_consume_is_a_single_statement(db_session):
+    user = create_user(db_session, username="energy-one")
+    for _ in range(2):
+        db_session.refresh(user)
+        with record_statements(db_session.get_bind()) as statements:
+            status = coach_energy_crud.consume_energy(db_session, user, now=NOW)
+        assert len(statements) == 1
+        assert statements[0].lstrip().startswith("INSERT INTO coach_energy_wallets")
+
+    assert status["current"] == pytest.approx(settings.COACH_ENERGY_MAX - 2)
+    assert _wallet(db_session, user.id).current_energy == pytest.approx(
+        settings.COACH_ENERGY_MAX - 2
+    )
+
+
+def test_depleted_wallet_is_left_untouched(db_session):
+    user = create_user(db_session, username="energy-empty")
+    coach_energy_crud.consume_energy(
+        db_session, user, cost=float(settings.COACH_ENERGY_MAX), now=NOW
+    )
+
+    with pytest.raises(coach_energy_crud.CoachEnergyDepleted) as exc:
+        coach_energy_crud.consume_energy(db_session, user, now=NOW + timedelta(seconds=1))
+
+    assert exc.value.status["current"] < 1
+    assert exc.value.status["seconds_until_next_message"] > 0
+    wallet = _wallet(db_session, user.id)
+    assert wallet.current_energy == 0.0
+    assert wallet.updated_at.replace(tzinfo=timezone.utc) == NOW
+
+
+def test_energy_regenerates_in_the_database(db_session):
+    user = create_user(db_session, username="energy-regen")
+    coach_energy_crud.consume_energy(
+        db_session, user, cost=float(settings.COACH_ENERGY_MAX), now=NOW
+    )
+    per_message = settings.COACH_ENERGY_RECOVERY_MINUTES * 60 / settings.COACH_ENERGY_MAX
+
+    later = NOW + timedelta(seconds=2 * per_message)
+    status = coach_energy_crud.consume_energy(db_session, user, now=later)
+
+    assert status["current"] == pytest.approx(1.0, abs=1e-3)
+    with pytest.raises(coach_energy_crud.CoachEnergyDepleted):
+        coach_energy_crud.consume_energy(db_session, user, cost=1.5, now=later)
+
+
+def test_status_is_read_only(db_session):
+    user = create_user(db_session, username="energy-status")
+    with record_statements(db_session.get_bind()) as statements:
+        fresh = coach_energy_crud.get_energy_status(db_session, user, now=NOW)
+    assert fresh["current"] == settings.COACH_ENERGY_MAX
+    assert [statement.lstrip().split()[0].upper() for statement in statements] == ["SELECT"]
+    assert _wallet(db_session, user.id) is None
+
+    coach_energy_crud.consume_energy(db_session, user, cost=5.0, now=NOW)
+    status = coach_energy_crud.get_energy_status(db_session, user, now=NOW + timedelta(hours=1))
+    assert status["current"] == pytest.approx(
+        settings.COACH_ENERGY_MAX - 5 + 3600 * coach_energy_crud._regen_rate_per_second()
+    )
+    assert _wallet(db_session, user.id).current_energy == pytest.approx(
+        settings.COACH_ENERGY_MAX - 5
+    )
+
+
+def test_unlimited_users_skip_the_database(db_session):
+    premium = create_user(
+        db_session, username="energy-premium", subscription_status=SubscriptionStatus.PREMIUM
+    )
+    with record_statements(db_session.get_bind()) as statements:
+        coach_energy_crud.consume_energy(db_session, premium, now=NOW)
+        coach_energy_crud.refund_energy(db_session, premium, now=NOW)
+        status = coach_energy_crud.get_energy_status(db_session, premium, now=NOW)
+    assert status["is_unlimited"] is True
+    assert statements == []
+
+
+def test_refund_is_capped_at_max(db_session):
+    user = create_user(db_session, username="energy-refund")
+    coach_energy_crud.consume_energy(db_session, user, cost=3.0, now=NOW)
+    assert coach_energy_crud.refund_energy(db_session, user, cost=2.0, now=NOW)[
+        "current"
+    ] == pytest.approx(settings.COACH_ENERGY_MAX - 1)
+    assert (
+        coach_energy_crud.refund_energy(db_session, user, cost=5.0, now=NOW)["current"]
+        == settings.COACH_ENERGY_MAX
+    )
+
+
+def test_postgres_statement_regenerates_with_least():
+    dialect = postgresql.dialect()
+    db = SimpleNamespace(get_bind=lambda: SimpleNamespace(dialect=dialect))
+
+    stmt = coach_energy_crud._delta_statement(db, 1, NOW, -1.0, require_available=True)
+    sql = str(stmt.compile(dialect=dialect))
+
+    assert "ON CONFLICT (user_id) DO UPDATE" in sql
+    assert "least(" in sql and "greatest(" in sql and "EXTRACT(epoch" in sql
+    assert "RETURNING coach_energy_wallets.current_energy" in sql
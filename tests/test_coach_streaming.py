@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import json
+
+import pytest
+from app.api.v2.endpoints.toolbox_router import CoachRequest, stream_coach_request
+from app.core import ai_service
+from app.core.config import settings
+from app.crud import coach_conversation_crud, coach_energy_crud, coach_memory_crud, toolbox_crud
+from app.models.analytics.ai_token_log_model import AITokenLog
+from app.models.toolbox.coach_energy_model import CoachEnergyWallet
+from fastapi import HTTPException
+from sqlalchemy.orm import sessionmaker
+from tests.utils import create_user
+
+
+def _events(chunks) -> list[tuple[str, dict]]:
+    events = []
+    for chunk in chunks:
+        lines = chunk.strip().split("\n")
+        events.append(
+            (lines[0].removeprefix("event: "), json.loads(lines[1].removeprefix("data: ")))
+        )
+    return events
+
+
+def _stub_stream(monkeypatch, deltas, fail_after: int | None = None) -> list[dict]:
+    calls: list[dict] = []
+
+    def _fake_stream(**kwargs):
+        calls.append(kwargs)
+        for index, delta in enumerate(deltas):
+            if fail_after is not None and index == fail_after:
+                raise ConnectionError("provider down")
+            yield delta
+
+    monkeypatch.setattr(ai_service, "stream_ai_text", _fake_stream)
+    return calls
+
+
+def _prepare(db_session, user, message="Explique-moi"):
+    return toolbox_crud.prepare_coach_turn(
+        db_session, user, message, context={}, history=[], streaming=True
+    )
+
+
+def _energy(db_session, user_id) -> float:
+    db_session.expire_all()
+    return db_session.query(CoachEnergyWallet).filter_by(user_id=user_id).one().current_energy
+
+
+def test_stream_persists_exchange_once_complete(db_session, engine, monkeypatch):
+    user = create_user(db_session, username="streamer")
+    calls = _stub_stream(monkeypatch, ["Bonjour", " à", " toi"])
+    turn = _prepare(db_session, user)
+    assert "texte brut" in turn.system_prompt
+
+    events = _events(
+        toolbox_crud.stream_coach_reply(turn, session_factory=sessionmaker(bind=engine))
+    )
+
+    assert [name for name, _ in events] == ["meta", "token", "token", "token", "done"]
+    assert events[0][1]["thread_id"] == turn.thread_id
+    assert events[-1][1]["response"] == "Bonjour à toi"
+    assert calls[0]["user_prompt"] == "Explique-moi"
+
+    thread = coach_conversation_crud.get_thread_for_user(db_session, user, turn.thread_id)
+    messages = coach_conversation_crud.list_messages_for_thread(db_session, thread)
+    assert [(m.role.value, m.content) for m in messages] == [
+        ("user", "Explique-moi"),
+        ("coach", "Bonjour à toi"),
+    ]
+    assert db_session.query(AITokenLog).filter_by(feature="coach_ia").count() == 1
+    assert _energy(db_session, user.id) == pytest.approx(
+        settings.COACH_ENERGY_MAX - settings.COACH_ENERGY_MESSAGE_COST, abs=0.01
+    )
+
+
+def test_done_is_sent_before_the_summary_refresh(db_session, engine, monkeypatch):
+    user = create_user(db_session, username="stream-summary")
+    _stub_stream(monkeypatch, ["Réponse"])
+    refreshed: list[int] = []
+    monkeypatch.setattr(
+        coach_memory_crud, "refresh_summary", lambda db, user, thread: refreshed.append(thread.id)
+    )
+    turn = _prepare(db_session, user)
+    session_factory = sessionmaker(bind=engine)
+
+    events = _events(toolbox_crud.stream_coach_reply(turn, session_factory=session_factory))
+    assert events[-1][0] == "done" and refreshed == []
+
+    toolbox_crud.refresh_coach_memory(turn, session_factory=session_factory)
+    assert refreshed == [turn.thread_id]
+
+    request = CoachRequest(message="Encore", context={}, history=[])
+    response = stream_coach_request(request, db=db_session, current_user=user)
+    assert response.background.func is toolbox_crud.refresh_coach_memory
+
+
+def test_failed_turn_preparation_refunds_energy(db_session, monkeypatch):
+    user = create_user(db_session, username="stream-broken")
+
+    def _broken(*args, **kwargs):
+        raise RuntimeError("historique illisible")
+
+    monkeypatch.setattr(coach_memory_crud, "build_prompt_history", _broken)
+    with pytest.raises(RuntimeError):
+        _prepare(db_session, user)
+
+    assert _energy(db_session, user.id) == pytest.approx(settings.COACH_ENERGY_MAX, abs=0.01)
+
+
+def test_stream_failure_refunds_energy_and_persists_nothing(db_session, engine, monkeypatch):
+    user = create_user(db_session, username="stream-fail")
+    _stub_stream(monkeypatch, ["Début", "suite"], fail_after=1)
+    turn = _prepare(db_session, user)
+
+    events = _events(
+        toolbox_crud.stream_coach_reply(turn, session_factory=sessionmaker(bind=engine))
+    )
+
+    assert [name for name, _ in events] == ["meta", "token", "error"]
+    assert events[-1][1]["code"] == "coach_unavailable"
+    assert _energy(db_session, user.id) == pytest.approx(settings.COACH_ENERGY_MAX, abs=0.01)
+    thread = coach_conversation_crud.get_thread_for_user(db_session, user, turn.thread_id)
+    assert coach_conversation_crud.list_messages_for_thread(db_session, thread) == []
+
+
+def test_client_disconnect_refunds_energy(db_session, engine, monkeypatch):
+    user = create_user(db_session, username="stream-gone")
+    _stub_stream(monkeypatch, ["un", "deux", "trois"])
+    turn = _prepare(db_session, user)
+
+    stream = toolbox_crud.stream_coach_reply(turn, session_factory=sessionmaker(bind=engine))
+    next(stream)
+    next(stream)
+    stream.close()
+
+    assert _energy(db_session, user.id) == pytest.approx(settings.COACH_ENERGY_MAX, abs=0.01)
+
+
+def test_stream_endpoint_rejects_depleted_energy_before_streaming(db_session, monkeypatch):
+    user = create_user(db_session, username="stream-empty")
+    calls = _stub_stream(monkeypatch, ["jamais"])
+    coach_energy_crud.consume_energy(db_session, user, cost=float(settings.COACH_ENERGY_MAX))
+
+    request = CoachRequest(message="Encore ?", context={}, history=[])
+    with pytest.raises(HTTPException) as exc:
+        stream_coach_request(request, db=db_session, current_user=user)
+
+    assert exc.value.status_code == 429
+    assert exc.value.detail["code"] == "coach_energy_depleted"
+    assert calls == []
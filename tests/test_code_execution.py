@@ -0,0 +1,433 @@
+"""Sandboxed code execution: warm worker pool, isolation, limits, admission control, grading."""
+
+from __future__ import annotations
+
+import os
+import platform
+import signal
+import stat
+import sys
+import threading
+import time
+from dataclasses import asdict
+
+import pytest
+from app.api.v2.endpoints import programming_router
+from app.core.config import settings
+from app.models.capsule.atom_model import Atom, AtomContentType
+from app.models.progress.user_answer_log_model import UserAnswerLog
+from app.models.progress.user_atomic_progress import UserAtomProgress
+from app.services import code_grading_service
+from app.services.code_execution import (
+    CodeExecutionPool,
+    ExecutionLimits,
+    ExecutionRejected,
+    worker,
+)
+from app.services.code_execution import pool as pool_module
+from fastapi import HTTPException
+from tests.utils import create_capsule_graph, create_user
+
+pytestmark = pytest.mark.skipif(
+    not sys.platform.startswith("linux"), reason="sandbox Linux (fork, rlimits)"
+)
+
+LIMITS = ExecutionLimits(
+    timeout_seconds=2.0,
+    cpu_seconds=2,
+    memory_bytes=256 * 1024 * 1024,
+    file_bytes=10_000,
+    output_bytes=4_000,
+)
+
+
+def _interpreter_readable_by_others() -> bool:
+    path = os.path.realpath(sys.prefix)
+    while path != os.path.dirname(path):
+        if not os.stat(path).st_mode & stat.S_IXOTH:
+            return False
+        path = os.path.dirname(path)
+    return True
+
+
+def _use_runnable_sandbox_user(patch) -> None:
+    if os.geteuid() == 0 and not _interpreter_readable_by_others():
+        # Python installé dans un $HOME privé: le compte de sandbox ne pourrait rien importer
+        patch.setattr(settings, "CODE_EXEC_SANDBOX_USER", "0")
+        patch.setattr(settings, "CODE_EXEC_ALLOW_UNCONFINED", True)
+
+
+@pytest.fixture(scope="module")
+def pool():
+    with pytest.MonkeyPatch.context() as patch:
+        _use_runnable_sandbox_user(patch)
+        pool = CodeExecutionPool(size=1, queue_size=1, per_user=1, queue_timeout=5.0)
+        pool.start()
+    yield pool
+    pool.shutdown()
+
+
+def _process_gone(pid: int) -> bool:
+    try:
+        with open(f"/proc/{pid}/stat") as handle:
+            # zombie: tué, en attente d'être réclamé par init
+            return handle.read().rsplit(")", 1)[1].split()[0] == "Z"
+    except FileNotFoundError:
+        return True
+
+
+def _run(pool, code, stdin="", limits=LIMITS):
+    return pool.run(code, stdin=stdin, limits=limits)
+
+
+def test_execute_endpoint_runs_snippet_with_fresh_state(db_session, pool, monkeypatch) -> None:
+    monkeypatch.setattr(programming_router, "code_execution_pool", pool)
+    user = create_user(db_session)
+
+    def execute(code, stdin=None):
+        payload = programming_router.CodeExecutionRequest(language="python", code=code, stdin=stdin)
+        return programming_router.execute_code(payload, db=db_session, current_user=user)
+
+    ok = execute("    name = input()\n    print(f'Bonjour {name}')\n", stdin="Ada")
+    assert (ok.stdout, ok.stderr, ok.exit_code, ok.timed_out) == ("Bonjour Ada\n", "", 0, False)
+
+    # rien ne survit d'une exécution à l'autre: ni variables, ni modules modifiés
+    assert execute("import math\nmath.pi = 3\nleak = 1").exit_code == 0
+    fresh = execute("import math\nprint(math.pi, 'leak' in globals())")
+    assert fresh.stdout == "3.141592653589793 False\n"
+
+    failed = execute("def f():\n    return 1 / 0\nf()")
+    assert failed.exit_code == 1
+    assert 'File "main.py", line 2, in f' in failed.stderr and "ZeroDivisionError" in failed.stderr
+    assert "worker.py" not in failed.stderr
+    assert execute("import sys\nsys.exit(3)").exit_code == 3
+
+    with pytest.raises(HTTPException) as exc:
+        programming_router.execute_code(
+            programming_router.CodeExecutionRequest(language="ruby", code="puts 1"),
+            db=db_session,
+            current_user=user,
+        )
+    assert exc.value.status_code == 400
+
+
+def test_timeout_output_memory_and_file_limits(pool) -> None:
+    looping = _run(pool, "while True:\n    pass")
+    assert looping.timed_out and looping.exit_code < 0
+
+    sleeping = _run(pool, "import time\nprint('avant', flush=True)\ntime.sleep(30)")
+    assert sleeping.timed_out and sleeping.stdout == "avant\n" and sleeping.duration_ms < 5000
+
+    # sorties fermées: le worker n'attend pas l'enfant au-delà du délai
+    respawned = pool.stats()["respawned"]
+    silent = _run(pool, "import os, time\nos.close(1)\nos.close(2)\ntime.sleep(30)")
+    assert silent.timed_out and silent.exit_code == -signal.SIGKILL and silent.duration_ms < 5000
+    assert pool.stats()["respawned"] == respawned
+
+    noisy = _run(pool, "while True:\n    print('x' * 100)")
+    assert noisy.truncated and not noisy.timed_out and len(noisy.stdout) <= LIMITS.output_bytes
+
+    memory = _run(pool, "data = bytearray(1024 * 1024 * 1024)")
+    assert memory.exit_code != 0 and "MemoryError" in memory.stderr
+
+    big_file = _run(pool, "with open('out.txt', 'w') as f:\n    f.write('a' * 50_000)")
+    assert big_file.exit_code != 0 and "File too large" in big_file.stderr
+
+    scratch = _run(pool, "open('note.txt', 'w').write('ok')\nprint(open('note.txt').read())")
+    assert scratch.stdout == "ok\n"
+    assert _run(pool, "import os\nprint(os.listdir('.'))").stdout == "[]\n"
+
+
+def test_network_processes_and_host_files_are_blocked(pool) -> None:
+    sandbox = pool.stats()
+    if not sandbox["seccomp"]:
+        pytest.skip("seccomp indisponible")
+    for code in (
+        "import socket\nsocket.create_connection(('127.0.0.1', 80), timeout=1)",
+        "import os\nos.fork()",
+        "import subprocess\nsubprocess.run(['ls'])",
+        "import os, signal\nos.kill(1, signal.SIGTERM)",
+    ):
+        result = _run(pool, code)
+        assert result.exit_code == 1 and "PermissionError" in result.stderr, code
+
+    assert _run(pool, "import os\nprint(os.system('echo evade'))").stdout.strip() not in (
+        "0",
+        "evade",
+    )
+
+    # io_uring (IORING_OP_SOCKET) contournerait le refus de socket()
+    io_uring = _run(
+        pool,
+        "import ctypes\n"
+        "libc = ctypes.CDLL(None, use_errno=True)\n"
+        "params = ctypes.create_string_buffer(120)\n"
+        "print(libc.syscall(425, 8, params), ctypes.get_errno())",
+    )
+    assert io_uring.stdout == "-1 1\n"
+    # pidfd_open(1) et pidfd_send_signal: pas de signal vers une autre exécution du même uid
+    pidfd = _run(
+        pool,
+        "import ctypes\n"
+        "libc = ctypes.CDLL(None, use_errno=True)\n"
+        "print(libc.syscall(434, 1, 0), ctypes.get_errno(), "
+        "libc.syscall(424, 0, 15, None, 0), ctypes.get_errno())",
+    )
+    assert pidfd.stdout == "-1 1 -1 1\n"
+    if platform.machine() == "x86_64":
+        # getpid via l'ABI x32: le processus est tué (SIGSYS)
+        x32 = _run(
+            pool, "import ctypes\nctypes.CDLL(None).syscall(0x40000000 + 39)\nprint('alive')"
+        )
+        assert x32.stdout == "" and x32.exit_code == -signal.SIGSYS
+
+    threads = _run(
+        pool,
+        "import threading\n"
+        "t = threading.Thread(target=print, args=('thread',))\nt.start()\nt.join()",
+    )
+    assert threads.stdout == "thread\n"
+
+    if sandbox["landlock"]:
+        for path in ("/proc/self/environ", "/etc/passwd", programming_router.__file__):
+            result = _run(pool, f"print(open({path!r}).read())")
+            assert "PermissionError" in result.stderr, path
+
+
+def test_snippets_run_unprivileged_and_pool_fails_closed(monkeypatch) -> None:
+    confined = CodeExecutionPool(size=1)
+    try:
+        try:
+            confined.start()
+        except ExecutionRejected:
+            pytest.skip("seccomp ou Landlock indisponible")
+        assert confined.stats()["unprivileged"]
+        ids = confined.run(
+            "import os\nprint(os.getuid(), os.getgid(), os.getgroups())", limits=LIMITS
+        )
+        uid, gid, groups = ids.stdout.split(" ", 2)
+        assert uid != "0" and gid != "0" and groups == "[]\n"
+    finally:
+        confined.shutdown()
+
+    if os.geteuid() != 0:
+        return
+    # zygote root sans compte de sandbox utilisable: refus, sauf repli explicite
+    monkeypatch.setattr(settings, "CODE_EXEC_SANDBOX_USER", "0")
+    as_root = CodeExecutionPool(size=1)
+    try:
+        with pytest.raises(ExecutionRejected) as refused:
+            as_root.run("print(1)", limits=LIMITS)
+        assert (refused.value.status_code, refused.value.detail) == (503, "sandbox_unavailable")
+        assert as_root.stats()["workers"] == 0 and as_root.stats()["rejected"] == 1
+
+        monkeypatch.setattr(settings, "CODE_EXEC_ALLOW_UNCONFINED", True)
+        assert as_root.run("print(1)", limits=LIMITS).stdout == "1\n"
+    finally:
+        as_root.shutdown()
+
+
+def test_child_fails_closed_when_its_confinement_fails(monkeypatch) -> None:
+    monkeypatch.setattr(worker, "_install_landlock", lambda read_paths, write_paths: True)
+    monkeypatch.setattr(worker, "_install_seccomp", lambda pid: False)
+    request = {"code": "print('ran')", "stdin": "", "limits": asdict(LIMITS)}
+    ids = (os.geteuid(), os.getegid())
+
+    refused = worker.execute(request, [], ids)
+    assert (refused["stdout"], refused["exit_code"]) == ("", 1)
+    assert refused["stderr"] == "sandbox: seccomp filter could not be installed\n"
+
+    allowed = worker.execute(request, [], ids, strict=False)
+    assert (allowed["stdout"], allowed["exit_code"]) == ("ran\n", 0)
+
+
+def test_lost_worker_takes_its_child_down_and_respawns_confined(monkeypatch) -> None:
+    children = []
+    kill_child = pool_module._Worker.kill_child
+
+    def record(self):
+        children.append(self.child)
+        kill_child(self)
+
+    monkeypatch.setattr(pool_module._Worker, "kill_child", record)
+    _use_runnable_sandbox_user(monkeypatch)
+    lossy = CodeExecutionPool(size=1)
+    try:
+        lossy.start()
+    except ExecutionRejected:
+        pytest.skip("seccomp ou Landlock indisponible")
+    try:
+        # le pool cesse d'attendre avant le délai d'exécution: worker considéré comme perdu
+        monkeypatch.setattr(pool_module, "_RESPONSE_GRACE_SECONDS", -1.5)
+        with pytest.raises(ExecutionRejected) as lost:
+            lossy.run("import time\ntime.sleep(30)", limits=LIMITS)
+        assert lost.value.detail == "execution_unavailable"
+        assert len(children) == 1 and children[0] is not None
+        for _ in range(100):
+            if _process_gone(children[0]):
+                break
+            time.sleep(0.01)
+        assert _process_gone(children[0])
+        monkeypatch.setattr(pool_module, "_RESPONSE_GRACE_SECONDS", 5.0)
+        assert lossy.stats()["respawned"] == 1
+        assert lossy.run("print('again')", limits=LIMITS).stdout == "again\n"
+
+        # un remplaçant non confiné n'est pas remis en service
+        monkeypatch.setattr(settings, "CODE_EXEC_ALLOW_UNCONFINED", False)
+        monkeypatch.setattr(pool_module._Worker, "confined", property(lambda self: False))
+        monkeypatch.setattr(pool_module._Worker, "alive", lambda self: False)
+        with pytest.raises(ExecutionRejected) as refused:
+            lossy.run("print(1)", limits=LIMITS)
+        assert (refused.value.status_code, refused.value.detail) == (503, "sandbox_unavailable")
+        assert lossy.stats()["workers"] == 0
+    finally:
+        lossy.shutdown()
+
+
+def test_admission_control(pool) -> None:
+    started = threading.Event()
+    results = {}
+
+    def slow():
+        started.set()
+        results["slow"] = pool.run("import time\ntime.sleep(1)", user_id="alice", limits=LIMITS)
+
+    thread = threading.Thread(target=slow)
+    thread.start()
+    started.wait()
+    try:
+        # laisse la première exécution occuper le worker
+        for _ in range(100):
+            if pool.stats()["idle"] == 0:
+                break
+            time.sleep(0.01)
+
+        with pytest.raises(ExecutionRejected) as per_user:
+            pool.run("print(1)", user_id="alice", limits=LIMITS)
+        assert (per_user.value.status_code, per_user.value.detail) == (429, "too_many_executions")
+
+        queued = {}
+        waiter = threading.Thread(
+            target=lambda: queued.update(
+                r=pool.run("print('queued')", user_id="bob", limits=LIMITS)
+            )
+        )
+        waiter.start()
+        for _ in range(100):
+            if pool.stats()["admitted"] == 2:
+                break
+            time.sleep(0.01)
+        with pytest.raises(ExecutionRejected) as full:
+            pool.run("print(1)", user_id="carol", limits=LIMITS)
+        assert (full.value.status_code, full.value.detail) == (503, "execution_queue_full")
+        waiter.join()
+    finally:
+        thread.join()
+
+    assert results["slow"].exit_code == 0 and queued["r"].stdout == "queued\n"
+    assert pool.stats()["admitted"] == 0
+    assert (
+        pool.run("print('alice again')", user_id="alice", limits=LIMITS).stdout == "alice again\n"
+    )
+
+
+SOLUTION = """
+import sys
+
+def solve(numbers):
+    return sum(n for n in numbers if n % 2 == 0)
+
+if __name__ == "__main__":
+    print(solve([int(part) for part in sys.stdin.read().split()]))
+"""
+
+
+def test_grade_runs_every_case_in_one_process_and_logs_the_answer(
+    db_session, pool, monkeypatch
+) -> None:
+    monkeypatch.setattr(code_grading_service, "code_execution_pool", pool)
+    monkeypatch.setattr(settings, "CODE_GRADE_CASE_TIMEOUT_SECONDS", 0.5)
+    user = create_user(db_session)
+    _, molecule, _, quiz_atom = create_capsule_graph(db_session, user.id)
+    challenge = Atom(
+        order=3,
+        title="Challenge",
+        content_type=AtomContentType.CODE_CHALLENGE,
+        content={
+            "language": "python",
+            # format brut du modèle: normalisé comme à la génération
+            "sample_tests": [
+                {"stdin": "1 2 3 4 5", "expected": 6},
+                {"input": "10 11 12", "output": "22\n"},
+                ["", "0"],
+            ],
+        },
+    )
+    molecule.atoms.append(challenge)
+    db_session.commit()
+
+    def grade(code):
+        payload = programming_router.CodeGradeRequest(atom_id=challenge.id, code=code)
+        return programming_router.grade_code(payload, db=db_session, current_user=user)
+
+    failing = grade(
+        "import json, sys\n"
+        "json.runs = getattr(json, 'runs', 0) + 1  # modules importés conservés entre cas\n"
+        "data = sys.stdin.read()\n"
+        "if not data:\n"
+        "    while True:\n"
+        "        pass\n"
+        "print(sum(int(part) for part in data.split()), json.runs, file=sys.stderr)\n"
+        "print(sum(int(part) for part in data.split()))\n"
+    )
+    assert (failing["passed"], failing["total"], failing["is_correct"]) == (0, 3, False)
+    first, second, third = failing["cases"]
+    assert (first["stdout"], first["expected"], first["stderr"]) == ("15\n", "6", "15 1\n")
+    assert second["stderr"] == "33 2\n"
+    assert third["timed_out"] and not third["passed"] and third["duration_ms"] < 2000
+    assert failing["progress"]["status"] == "failed"
+
+    passing = grade(SOLUTION)
+    assert (passing["passed"], passing["total"], passing["is_correct"]) == (3, 3, True)
+    assert passing["progress"]["status"] == "completed"
+
+    logs = (
+        db_session.query(UserAnswerLog)
+        .filter_by(user_id=user.id, atom_id=challenge.id)
+        .order_by(UserAnswerLog.id)
+        .all()
+    )
+    assert [log.is_correct for log in logs] == [False, True]
+    assert (
+        logs[-1].user_answer_json["passed"] == 3 and logs[-1].user_answer_json["code"] == SOLUTION
+    )
+    progress = (
+        db_session.query(UserAtomProgress).filter_by(user_id=user.id, atom_id=challenge.id).one()
+    )
+    assert (progress.attempts, progress.success_count) == (2, 1)
+
+    broken = grade("print(")
+    assert broken["passed"] == 0 and all(
+        "SyntaxError" in case["stderr"] for case in broken["cases"]
+    )
+
+    with pytest.raises(HTTPException) as exc:
+        programming_router.grade_code(
+            programming_router.CodeGradeRequest(atom_id=quiz_atom.id, code=SOLUTION),
+            db=db_session,
+            current_user=user,
+        )
+    assert exc.value.status_code == 400
+
+    # capsule privée d'un autre utilisateur: comme un atome inexistant, rien n'est exécuté
+    molecule.granule.capsule.is_public = False
+    db_session.commit()
+    outsider = create_user(db_session, username="outsider", email="outsider@example.com")
+    with pytest.raises(HTTPException) as hidden:
+        programming_router.grade_code(
+            programming_router.CodeGradeRequest(atom_id=challenge.id, code=SOLUTION),
+            db=db_session,
+            current_user=outsider,
+        )
+    assert hidden.value.status_code == 404
+    assert grade(SOLUTION)["is_correct"]
@@ -0,0 +1,214 @@
+"""Source document ingestion: streaming chunking, stored page offsets, per-chapter retrieval."""
+
+from __future__ import annotations
+
+import pytest
+from app.core.config import settings
+from app.models.capsule.atom_model import AtomContentType
+from app.models.capsule.document_chunk_model import DocumentChunk
+from app.models.capsule.granule_model import Granule
+from app.models.capsule.molecule_model import Molecule
+from app.models.user.user_model import SubscriptionStatus
+from app.services.atom_service import AtomService
+from app.services.ingestion import (
+    PageText,
+    PdfTimeoutError,
+    PdfTooLargeError,
+    chunk_pages,
+    extract_pdf_pages,
+    ingest_chunks,
+    iter_pdf_pages,
+    shutdown_pdf_pool,
+)
+from app.services.ingestion import pdf as pdf_module
+from app.services.services.capsule_service import CapsuleService
+from app.services.services.capsules.base_builder import BaseCapsuleBuilder
+from fastapi import HTTPException
+from sqlalchemy import select
+from tests.utils import create_capsule_graph, create_user, make_pdf, record_statements
+
+
+def _sentences(topic: str, count: int) -> str:
+    return " ".join(
+        f"Sur {topic}, la remarque {index} précise un détail important." for index in range(count)
+    )
+
+
+def _textbook() -> list[PageText]:
+    return [
+        PageText(1, f"CHAPITRE 1\n\n{_sentences('les boucles for', 30)}\n"),
+        PageText(
+            2,
+            f"{_sentences('les boucles for', 10)}\n\n2. Les dictionnaires\n"
+            f"{_sentences('les dictionnaires et leurs clés', 30)}",
+        ),
+        PageText(3, f"ANNEXE\n{_sentences('la syntaxe des décorateurs', 8)}"),
+    ]
+
+
+def test_chunks_follow_headings_overlap_and_keep_page_offsets() -> None:
+    pages = _textbook()
+    chunks = list(chunk_pages(pages, chunk_chars=500, overlap_chars=120))
+
+    assert [chunk.position for chunk in chunks] == list(range(1, len(chunks) + 1))
+    assert {chunk.heading for chunk in chunks} == {"CHAPITRE 1", "2. Les dictionnaires", "ANNEXE"}
+    assert all(len(chunk.text) <= 500 for chunk in chunks)
+    by_page = {page.number: page.text for page in pages}
+    for chunk in chunks:
+        # les offsets pointent dans le texte extrait des pages de début et de fin
+        assert chunk.text.startswith(by_page[chunk.page_start][chunk.char_start :][:20])
+        assert chunk.text.endswith(by_page[chunk.page_end][: chunk.char_end][-20:])
+
+    loops = [chunk for chunk in chunks if chunk.heading == "CHAPITRE 1"]
+    assert any(chunk.page_start == 1 and chunk.page_end == 2 for chunk in loops)
+    for previous, current in zip(loops, loops[1:]):
+        overlap = current.text.split("\n")[0]
+        assert overlap and overlap in previous.text
+    first_dict = next(chunk for chunk in chunks if chunk.heading == "2. Les dictionnaires")
+    assert "boucles" not in first_dict.text  # pas de reprise d'une section à l'autre
+
+
+def test_atoms_retrieve_only_their_chapter_passages(db_session, engine) -> None:
+    user = create_user(db_session)
+    capsule, molecule, *_ = create_capsule_graph(db_session, user.id)
+    molecule.title = "Les dictionnaires"
+    other = Molecule(order=2, title="Les boucles for", granule_id=molecule.granule_id)
+    db_session.add(other)
+    report = ingest_chunks(
+        db_session,
+        capsule.id,
+        chunk_pages(_textbook(), chunk_chars=500, overlap_chars=120),
+        batch_size=2,
+    )
+    db_session.commit()
+
+    assert (
+        db_session.scalar(select(DocumentChunk.id).where(DocumentChunk.embedding.is_(None))) is None
+    )
+    assert report.page_count == 3
+    assert report.outline == ["CHAPITRE 1 (p. 1)", "2. Les dictionnaires (p. 2)", "ANNEXE (p. 3)"]
+    assert "décorateurs" in report.digest()
+
+    service = AtomService(db_session, user, capsule)
+    with record_statements(engine) as statements:
+        excerpt = service._get_source_excerpt(molecule, max_chars=1500)
+        loops_excerpt = service._get_source_excerpt(other, max_chars=1500)
+        assert service._get_source_excerpt(molecule, max_chars=1500) == excerpt
+
+    assert excerpt.startswith("[p. 2 — 2. Les dictionnaires]")
+    assert "boucles" not in excerpt and len(excerpt) <= 1500
+    assert "[p. 1" in loops_excerpt and "dictionnaires" not in loops_excerpt
+    assert sum("document_chunks" in statement for statement in statements) == 1
+
+
+def test_pdf_upload_is_chunked_and_plan_sees_whole_document(db_session, monkeypatch) -> None:
+    user = create_user(db_session, subscription_status=SubscriptionStatus.PREMIUM)
+    service = CapsuleService(db=db_session, user=user)
+    monkeypatch.setattr(CapsuleService, "_notify", lambda *args, **kwargs: None)
+    monkeypatch.setattr(CapsuleService, "_award_creation_badges", lambda *args, **kwargs: None)
+    captured: dict = {}
+
+    class StubBuilder(BaseCapsuleBuilder):
+        def _generate_plan_from_source(self, db, capsule, source_material):
+            captured.update(source_material)
+            return {
+                "levels": [
+                    {"level_title": "Niveau 1", "chapters": [{"chapter_title": "Chapitre 1"}]}
+                ]
+            }
+
+        def _get_molecule_recipe(self, molecule):
+            return [{"type": AtomContentType.LESSON}]
+
+        def _build_atom_content(self, atom_type, molecule, context_atoms, difficulty=None):
+            return {"text": "ok"}
+
+    monkeypatch.setattr(
+        "app.services.services.capsule_service._get_builder_for_capsule",
+        lambda db, capsule, user, source_material=None: StubBuilder(
+            db=db, capsule=capsule, user=user, source_material=source_material
+        ),
+    )
+
+    sections = [
+        [
+            f"SECTION {index}",
+            *(f"Ligne {line} de la section {index} du manuel." for line in range(40)),
+        ]
+        for index in range(1, 31)
+    ]
+    capsule = service.create_capsule_from_pdf_bytes(
+        pdf_bytes=make_pdf(sections),
+        title="Manuel",
+        domain="others",
+        area="custom",
+        main_skill="manuel",
+    )
+
+    pages = db_session.execute(
+        select(DocumentChunk.page_start, DocumentChunk.heading).where(
+            DocumentChunk.capsule_id == capsule.id
+        )
+    ).all()
+    assert {page for page, _ in pages} == set(range(1, 31))
+    assert captured["chunked"] and captured["origin"] == "uploaded_document"
+    assert len(captured["outline"]) == 30 and captured["outline"][-1] == "SECTION 30 (p. 30)"
+    assert len(captured["text"]) <= 12_000 and "SECTION 30" in captured["text"]
+    assert db_session.query(Granule).filter_by(capsule_id=capsule.id).count() == 1
+
+    with pytest.raises(HTTPException) as exc:
+        service.create_capsule_from_pdf_bytes(
+            pdf_bytes=make_pdf([[""]]), title="x", domain="d", area="a", main_skill="s"
+        )
+    assert exc.value.detail == "empty_pdf"
+    with pytest.raises(HTTPException) as exc:
+        service.create_capsule_from_pdf_bytes(
+            pdf_bytes=b"not a pdf", title="x", domain="d", area="a", main_skill="s"
+        )
+    assert exc.value.detail == "invalid_pdf"
+
+
+def test_parallel_extraction_streams_in_order_and_is_cached(monkeypatch) -> None:
+    monkeypatch.setattr(settings, "PDF_PARALLEL_MIN_PAGES", 4)
+    monkeypatch.setattr(settings, "PDF_PAGES_PER_TASK", 3)
+    monkeypatch.setattr(settings, "PDF_EXTRACT_WORKERS", 2)
+    pdf_bytes = make_pdf(
+        [[f"Page {index}", f"Contenu de la page {index}."] for index in range(1, 12)] + [[""]]
+    )
+    calls: list[tuple[int, int]] = []
+    try:
+        pages = list(
+            extract_pdf_pages(pdf_bytes, progress=lambda done, total: calls.append((done, total)))
+        )
+    finally:
+        shutdown_pdf_pool()
+
+    assert pages == list(iter_pdf_pages(pdf_bytes))
+    assert [page.number for page in pages] == list(range(1, 12))  # page 12 vide: ignorée
+    assert calls == [(3, 12), (6, 12), (9, 12), (12, 12)]
+
+    # même contenu: servi par le cache, sans relire le PDF
+    monkeypatch.setattr(pdf_module, "open_reader", lambda source: pytest.fail("PDF relu"))
+    calls.clear()
+    assert (
+        list(extract_pdf_pages(pdf_bytes, progress=lambda done, total: calls.append((done, total))))
+        == pages
+    )
+    assert calls == [(12, 12)]
+
+
+def test_extraction_enforces_page_and_time_limits(db_session, monkeypatch) -> None:
+    pdf_bytes = make_pdf([[f"Page {index}"] for index in range(1, 6)])
+    with pytest.raises(PdfTooLargeError):
+        next(extract_pdf_pages(pdf_bytes, max_pages=4))
+    with pytest.raises(PdfTimeoutError):
+        list(extract_pdf_pages(pdf_bytes, timeout=1e-9))
+
+    user = create_user(db_session, subscription_status=SubscriptionStatus.PREMIUM)
+    service = CapsuleService(db=db_session, user=user)
+    monkeypatch.setattr(settings, "PDF_MAX_PAGES", 4)
+    with pytest.raises(HTTPException) as exc:
+        service.create_capsule_from_pdf_bytes(
+            pdf_bytes=pdf_bytes, title="x", domain="d", area="a", main_skill="s"
+        )
+    assert exc.value.status_code == 413 and exc.value.detail == "pdf_too_many_pages"
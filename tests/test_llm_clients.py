@@ -0,0 +1,77 @@
+"""Shared LLM client registry: lazy construction, reuse, injection and fakes."""
+
+from __future__ import annotations
+
+import json
+
+from app.core import ai_service
+from app.core.llm_clients import OPENAI, LLMClientRegistry, llm_clients
+from app.services.services.capsules.languages.foreign_builder import ForeignBuilder
+from app.services.services.capsules.others.default_builder import DefaultBuilder
+from tests.utils import FakeOpenAI, create_capsule_graph, create_user
+
+
+class _Client:
+    def __init__(self, **config) -> None:
+        self.config = config
+        self.closed = False
+
+    def close(self) -> None:
+        self.closed = True
+
+
+def test_clients_are_built_lazily_once_per_configuration() -> None:
+    built = []
+
+    def factory(**config):
+        built.append(config)
+        return _Client(**config)
+
+    def broken(**config):
+        built.append("broken")
+        raise RuntimeError("clé API manquante")
+
+    registry = LLMClientRegistry()
+    registry.register(OPENAI, factory)
+    registry.register("broken", broken)
+    assert built == []
+
+    client = registry.openai()
+    assert registry.openai() is client
+    other = registry.openai(timeout=5)
+    assert other is not client and other.config == {"timeout": 5}
+    assert registry.openai(timeout=5) is other
+
+    # un fournisseur non configurable donne None, sans réessayer à chaque appel
+    assert registry.get("broken") is None and registry.get("broken") is None
+    assert built == [{}, {"timeout": 5}, "broken"]
+
+    registry.reset()
+    assert client.closed and other.closed
+    assert registry.openai() is not client
+
+
+def test_builders_and_ai_service_share_the_registry_client(db_session) -> None:
+    user = create_user(db_session)
+    capsule, *_ = create_capsule_graph(db_session, user.id)
+    fake = FakeOpenAI(json.dumps({"text": "Leçon"}), json.dumps({"answer": 42}))
+
+    with llm_clients.override(OPENAI, fake):
+        first = ForeignBuilder(db=db_session, capsule=capsule, user=user)
+        second = ForeignBuilder(db=db_session, capsule=capsule, user=user)
+        assert first.openai_client is fake and second.openai_client is fake
+        assert first._call_openai_for_json("Rédige une leçon.", "Réponds en JSON.") == {
+            "text": "Leçon"
+        }
+        assert json.loads(ai_service._call_openai_llm("Question ?")) == {"answer": 42}
+    assert [call["messages"][-1]["content"] for call in fake.calls] == [
+        "Rédige une leçon.",
+        "Question ?",
+    ]
+
+    # injection explicite d'un registre (sans toucher au registre partagé)
+    injected = FakeOpenAI()
+    registry = LLMClientRegistry()
+    registry.register(OPENAI, lambda **config: injected)
+    builder = DefaultBuilder(db=db_session, capsule=capsule, user=user, clients=registry)
+    assert builder.openai_client is injected
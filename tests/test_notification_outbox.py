@@ -0,0 +1,222 @@
+"""Notification outbox: transactional writes, coalesced asynchronous delivery."""
+
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from app.core.config import settings
+from app.crud import badge_crud, notification_crud
+from app.db.base_class import Base
+from app.models.user.badge_model import Badge, UserBadge
+from app.models.user.notification_model import (
+    Notification,
+    NotificationCategory,
+    NotificationOutbox,
+)
+from app.notifications.outbox import (
+    BATCH_EVENT,
+    NotificationDispatcher,
+    collect_pending,
+    purge_dispatched,
+)
+from app.schemas.user.notification_schema import NotificationCreate
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from tests.conftest import TABLES
+from tests.utils import create_user, record_statements
+
+
+class RecordingManager:
+    def __init__(self) -> None:
+        self.sent: list[tuple[int, dict]] = []
+
+    async def notify_async(self, user_id: int, payload: dict) -> None:
+        self.sent.append((user_id, payload))
+
+
+def _notification(
+    user_id: int, category=NotificationCategory.GENERAL, title: str = "Bonjour"
+) -> NotificationCreate:
+    return NotificationCreate(user_id=user_id, title=title, message="Message", category=category)
+
+
+def test_badge_burst_is_committed_with_the_badges_and_coalesced(db_session) -> None:
+    user = create_user(db_session)
+    for index in range(5):
+        db_session.add(
+            Badge(slug=f"badge-{index}", name=f"Badge {index}", description=f"Desc {index}")
+        )
+    db_session.commit()
+
+    for index in range(5):
+        badge_crud.award_badge(db_session, user.id, f"badge-{index}")
+
+    # Rien n'est livré pendant la requête: tout attend dans l'outbox
+    assert db_session.query(UserBadge).count() == 5
+    assert db_session.query(Notification).count() == 5
+    assert (
+        db_session.query(NotificationOutbox)
+        .filter(NotificationOutbox.dispatched_at.is_(None))
+        .count()
+        == 10
+    )
+
+    deliveries = collect_pending(db_session)
+    assert len(deliveries) == 1
+    event_ = deliveries[0].event
+    assert deliveries[0].user_id == user.id
+    assert event_["type"] == BATCH_EVENT
+    assert event_["unread_count"] == 5
+    types = [item["type"] for item in event_["events"]]
+    assert types.count("notification_created") == 5
+    assert types.count("badge_awarded") == 5
+
+    assert collect_pending(db_session) == []
+
+
+def test_single_event_keeps_its_shape_and_fresh_unread_count(db_session) -> None:
+    user = create_user(db_session)
+    first = notification_crud.create_notification(db_session, _notification(user.id))
+
+    (delivery,) = collect_pending(db_session)
+    assert delivery.event["type"] == "notification_created"
+    assert delivery.event["notification"]["id"] == first.id
+    assert delivery.event["unread_count"] == 1
+
+    notification_crud.create_notification(db_session, _notification(user.id))
+    notification_crud.mark_as_read(db_session, first.id, user.id)
+    (delivery,) = collect_pending(db_session)
+    created, updated = delivery.event["events"]
+    assert created["unread_count"] == 1
+    assert updated == {
+        "type": "notification_updated",
+        "notification_id": first.id,
+        "unread_count": 1,
+    }
+
+
+def test_create_notifications_uses_one_insert_per_table(db_session, engine) -> None:
+    users = [
+        create_user(db_session, username=f"u{i}", email=f"u{i}@example.com") for i in range(20)
+    ]
+    with record_statements(engine) as statements:
+        created = notification_crud.create_notifications(
+            db_session, [_notification(u.id) for u in users]
+        )
+
+    tables = [statement.split(" (")[0] for statement in statements]
+    assert len(created) == 20
+    assert tables.count("INSERT INTO notifications") == 1
+    assert tables.count("INSERT INTO notification_outbox") == 1
+    assert db_session.query(NotificationOutbox).count() == 20
+
+
+@pytest.fixture()
+def file_sessionmaker(tmp_path):
+    # The dispatcher reads from a worker thread: use a file database shared by threads.
+    engine = create_engine(f"sqlite:///{tmp_path / 'outbox.db'}")
+    Base.metadata.create_all(bind=engine, tables=TABLES)
+    yield sessionmaker(bind=engine)
+    engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_dispatcher_delivers_websocket_event_and_email_digest(
+    file_sessionmaker, monkeypatch
+) -> None:
+    monkeypatch.setattr(settings, "NOTIFICATION_EMAIL_CATEGORIES", ["mentor"])
+    manager = RecordingManager()
+    emails: list[tuple[str, list]] = []
+
+    async def _send_digest(email: str, notifications: list) -> None:
+        emails.append((email, notifications))
+
+    dispatcher = NotificationDispatcher(
+        file_sessionmaker,
+        manager=manager,
+        send_digest=_send_digest,
+        interval=5.0,
+        coalesce_window=0.01,
+    )
+    await dispatcher.start()
+    try:
+        with file_sessionmaker() as db:
+            user_id = create_user(db).id
+            notification_crud.create_notifications(
+                db,
+                [
+                    _notification(user_id, NotificationCategory.MENTOR, "Nouveau message"),
+                    _notification(user_id, NotificationCategory.GENERAL, "Info"),
+                ],
+            )
+        for _ in range(200):
+            if manager.sent:
+                break
+            await asyncio.sleep(0.01)
+    finally:
+        await dispatcher.stop()
+
+    ((recipient, payload),) = manager.sent
+    assert recipient == user_id
+    assert payload["type"] == BATCH_EVENT
+    assert [item["notification"]["title"] for item in payload["events"]] == [
+        "Nouveau message",
+        "Info",
+    ]
+    ((email, digest),) = emails
+    assert email == "user@example.com"
+    assert [item["title"] for item in digest] == ["Nouveau message"]
+
+
+def test_dispatched_rows_are_purged_in_batches_after_the_retention(db_session) -> None:
+    user = create_user(db_session)
+    now = datetime(2026, 10, 19, 12, 0, tzinfo=timezone.utc)
+    ages = [None, timedelta(minutes=5)] + [timedelta(days=2)] * 5
+    for age in ages:
+        dispatched_at = None if age is None else now - age
+        db_session.add(
+            NotificationOutbox(user_id=user.id, kind="badge_awarded", dispatched_at=dispatched_at)
+        )
+    db_session.commit()
+
+    with record_statements(db_session.get_bind()) as statements:
+        deleted = purge_dispatched(db_session, older_than=timedelta(days=1), batch_size=2, now=now)
+
+    assert deleted == 5
+    assert (
+        sum(statement.startswith("DELETE FROM notification_outbox") for statement in statements)
+        == 3
+    )
+    remaining = db_session.query(NotificationOutbox).order_by(NotificationOutbox.id).all()
+    # la ligne en attente et la ligne livrée récemment restent
+    assert [row.dispatched_at is None for row in remaining] == [True, False]
+    assert purge_dispatched(db_session, older_than=timedelta(days=1), now=now) == 0
+
+
+@pytest.mark.asyncio
+async def test_dispatcher_loop_purges_expired_rows(file_sessionmaker, monkeypatch) -> None:
+    monkeypatch.setattr(settings, "NOTIFICATION_OUTBOX_RETENTION_SECONDS", 0.0)
+    manager = RecordingManager()
+    dispatcher = NotificationDispatcher(
+        file_sessionmaker, manager=manager, interval=0.05, coalesce_window=0.0, purge_interval=0.0
+    )
+    with file_sessionmaker() as db:
+        user_id = create_user(db).id
+        notification_crud.create_notifications(db, [_notification(user_id)])
+
+    await dispatcher.start()
+    try:
+        for _ in range(200):
+            with file_sessionmaker() as db:
+                if manager.sent and db.query(NotificationOutbox).count() == 0:
+                    break
+            await asyncio.sleep(0.01)
+    finally:
+        await dispatcher.stop()
+
+    assert len(manager.sent) == 1
+    with file_sessionmaker() as db:
+        assert db.query(NotificationOutbox).count() == 0
+        assert db.query(Notification).count() == 1
@@ -0,0 +1,171 @@
+"""Hybrid RAG retriever: BM25, RRF fusion, filters, MMR, cached DB indexes, recall@k."""
+
+from __future__ import annotations
+
+import json
+
+import pytest
+from app.models.analytics.vector_store_model import VectorStore
+from app.services import rag_utils
+from app.services.retrieval import (
+    Document,
+    HybridRetriever,
+    invalidate_indexes,
+    reciprocal_rank_fusion,
+    tokenize,
+    vector_store_index,
+)
+from app.services.retrieval.evaluation import (
+    build_retriever,
+    load_labeled,
+    recall_at_k,
+    split_holdout,
+)
+from tests.utils import record_statements
+
+
+def _retriever() -> HybridRetriever:
+    documents = [
+        Document(1, "Les boucles for en Python", {"lang": "fr", "kind": "lesson"}),
+        Document(2, "Les boucles while en Python", {"lang": "fr", "kind": "lesson"}),
+        Document(3, "Itérer sur une liste avec enumerate", {"lang": "fr", "kind": "exercise"}),
+        Document(4, "Loops in Python", {"lang": "en", "kind": "lesson"}),
+    ]
+    embeddings = [[1.0, 0.0, 0.0], [0.99, 0.1, 0.0], [0.0, 1.0, 0.0], [0.0, 0.0, 1.0]]
+    return HybridRetriever(documents, embeddings)
+
+
+@pytest.fixture(autouse=True)
+def _fresh_indexes():
+    invalidate_indexes()
+    yield
+    invalidate_indexes()
+
+
+def test_tokenize_is_accent_insensitive() -> None:
+    assert tokenize("Itérer sur l'ÉTÉ") == ["iterer", "sur", "l", "ete"]
+
+
+def test_lexical_and_vector_rankings_are_fused() -> None:
+    retriever = _retriever()
+
+    lexical = retriever.search("iterer enumerate", mode="lexical", limit=3)
+    assert [hit.document.id for hit in lexical] == [3]
+
+    # l'embedding ne voit que le document 4, le lexical que le 3: la fusion garde les deux
+    hybrid = retriever.search("iterer", query_embedding=[0.0, 0.0, 1.0], limit=3)
+    assert {hit.document.id for hit in hybrid} == {3, 4}
+    assert all(hit.lexical_rank == 1 or hit.vector_rank == 1 for hit in hybrid)
+
+    assert reciprocal_rank_fusion([[1, 2], [2, 3]], k=1) == [
+        (2, 1 / 3 + 1 / 2),
+        (1, 1 / 2),
+        (3, 1 / 3),
+    ]
+
+
+def test_filters_are_applied_before_ranking_and_mmr_diversifies() -> None:
+    retriever = _retriever()
+
+    hits = retriever.search(
+        "python", filters={"lang": "fr", "kind": ["lesson", "exercise"]}, limit=5
+    )
+    assert {hit.document.id for hit in hits} == {1, 2}
+    assert retriever.search("python", filters={"lang": "de"}) == []
+
+    query = [1.0, 0.0, 0.0]
+    plain = retriever.search("boucles python liste", query_embedding=query, limit=2)
+    diverse = retriever.search(
+        "boucles python liste", query_embedding=query, limit=2, mmr_lambda=0.3
+    )
+    assert [hit.document.id for hit in plain] == [1, 2]
+    assert diverse[0].document.id == 1 and diverse[1].document.id != 2
+
+
+def test_find_similar_examples_uses_cached_index(db_session, monkeypatch) -> None:
+    monkeypatch.setattr(rag_utils, "get_embedding", lambda _text: [0.0, 1.0])
+
+    def _row(text: str, embedding: list[float], language: str = "fr") -> VectorStore:
+        return VectorStore(
+            chunk_text=text,
+            embedding=embedding,
+            domain="dev",
+            area="python",
+            skill="loops",
+            source_language=language,
+            content_type="exercise",
+        )
+
+    db_session.add_all(
+        [
+            _row("Exercice: écrire une boucle for", [1.0, 0.0]),
+            _row("Exercise: write a for loop", [0.0, 1.0], language="en"),
+        ]
+    )
+    db_session.commit()
+
+    # aucune similarité vectorielle en français: seul le mot-clé "boucle" retrouve l'exemple
+    context = rag_utils._find_similar_examples(db_session, "boucle for", "fr", "exercise")
+    assert "--- EXEMPLE 1 ---\nExercice: écrire une boucle for" in context
+    assert "loop" not in context
+    first = vector_store_index.retriever(db_session)
+    with record_statements(db_session.get_bind()) as statements:
+        assert vector_store_index.retriever(db_session) is first
+    assert statements == []
+
+    # écriture de ce worker: l'index est invalidé après le commit
+    db_session.add(_row("Exercice: boucle while", [0.5, 0.5]))
+    db_session.commit()
+    assert vector_store_index.retriever(db_session) is first
+    invalidate_indexes("vector_store")
+    assert vector_store_index.retriever(db_session) is not first
+    assert (
+        rag_utils._find_similar_examples(db_session, "boucle", "fr", "exercise", limit=5).count(
+            "EXEMPLE"
+        )
+        == 2
+    )
+    assert (
+        rag_utils._find_similar_examples(
+            db_session, "boucle", "fr", "exercise", filters={"area": "java"}
+        )
+        == ""
+    )
+
+
+def test_recall_at_k_on_labeled_jsonl(tmp_path) -> None:
+    path = tmp_path / "labeled.jsonl"
+    rows = [
+        {"text": f"{verb} {skill}", "main_skill": skill.title()}
+        for skill in ("python", "japonais", "guitare")
+        for verb in ("apprendre", "cours de", "bases du", "tuto", "maîtriser")
+    ]
+    path.write_text(
+        "\n".join(json.dumps(row, ensure_ascii=False) for row in rows) + "\n", encoding="utf-8"
+    )
+
+    documents, queries = split_holdout(load_labeled(path), holdout_every=5)
+    assert (len(documents), len(queries)) == (12, 3)
+    retriever = build_retriever(documents, embed=lambda _text: [])
+
+    report = recall_at_k(retriever, queries, ks=(1, 3), mode="lexical")
+    assert report.queries == 3
+    assert report.recall == {1: 1.0, 3: 1.0}
+    assert recall_at_k(retriever, queries, ks=(1,), mode="vector").recall == {1: 0.0}
+
+
+def test_cached_index_expires_after_its_ttl(db_session, monkeypatch) -> None:
+    db_session.add(
+        VectorStore(
+            chunk_text="Boucle for", embedding=[1.0], domain="dev", area="python", skill="loops"
+        )
+    )
+    db_session.commit()
+    first = vector_store_index.retriever(db_session)
+
+    # écriture d'un autre worker: visible une fois la durée de vie écoulée
+    monkeypatch.setattr(vector_store_index._cache, "ttl_seconds", 0.0)
+    vector_store_index.invalidate()
+    expiring = vector_store_index.retriever(db_session)
+    assert expiring is not first
+    assert vector_store_index.retriever(db_session) is not expiring
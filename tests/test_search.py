@@ -0,0 +1,271 @@
+"""Search index: incremental indexing, visibility, ranking, Postgres SQL."""
+
+from __future__ import annotations
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from app.api.v2.endpoints.search_router import search_content
+from app.db.base_class import Base
+from app.models.capsule.atom_model import Atom, AtomContentType
+from app.models.capsule.capsule_model import Capsule
+from app.models.capsule.granule_model import Granule
+from app.models.capsule.molecule_model import Molecule
+from app.models.search.search_document_model import SearchDocument
+from app.models.toolbox.molecule_note_model import MoleculeNote
+from app.search import ensure_search_schema, reindex_all, reindex_if_empty, search, search_indexer
+from app.search.backends import PostgresSearchBackend, SqliteSearchBackend
+from app.search.documents import lesson_text
+from fastapi import HTTPException
+from sqlalchemy import create_engine
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import Session
+from tests.conftest import TABLES
+from tests.utils import create_user
+
+
+@pytest.fixture()
+def indexed(engine):
+    with engine.begin() as connection:
+        ensure_search_schema(connection)
+    search_indexer.install()
+    try:
+        yield
+    finally:
+        search_indexer.uninstall()
+
+
+def _capsule(db, creator_id: int, *, title: str, lesson: dict, is_public: bool = True) -> Capsule:
+    capsule = Capsule(
+        title=title,
+        domain="programming",
+        area="python",
+        main_skill="python",
+        creator_id=creator_id,
+        is_public=is_public,
+    )
+    molecule = Molecule(order=1, title="Les boucles for")
+    molecule.atoms.append(
+        Atom(order=1, title="Cours", content_type=AtomContentType.LESSON, content=lesson)
+    )
+    molecule.atoms.append(
+        Atom(order=2, title="Quiz", content_type=AtomContentType.QUIZ, content={"q": "itérateur"})
+    )
+    granule = Granule(order=1, title="Chapitre 1")
+    granule.molecules.append(molecule)
+    capsule.granules.append(granule)
+    db.add(capsule)
+    db.commit()
+    return capsule
+
+
+def _types(page) -> list[tuple[str, str]]:
+    return [(hit.doc_type, hit.title) for hit in page.items]
+
+
+def test_writes_are_indexed_incrementally(db_session, indexed) -> None:
+    user = create_user(db_session)
+    capsule = _capsule(
+        db_session,
+        user.id,
+        title="Python pour débutants",
+        lesson={"text": "Une liste se parcourt avec un itérateur.", "image_url": "generateur.png"},
+    )
+
+    assert db_session.query(SearchDocument).count() == 3  # capsule, molécule, leçon (pas le quiz)
+    page = search(db_session, user, "iterateur")
+    assert _types(page) == [("lesson", "Cours")]
+    assert "<mark>itérateur</mark>" in page.items[0].snippet
+    assert search(db_session, user, "generateur").items == []
+
+    capsule.title = "Python avancé"
+    db_session.commit()
+    assert _types(search(db_session, user, "avance")) == [("capsule", "Python avancé")]
+    assert search(db_session, user, "débutants").items == []
+
+    db_session.delete(capsule.granules[0].molecules[0])
+    db_session.commit()
+    assert db_session.query(SearchDocument.doc_type).all() == [("capsule",)]
+    assert search(db_session, user, "iterateur").items == []
+
+
+def test_notes_are_private_and_catalog_follows_capsule_visibility(db_session, indexed) -> None:
+    author = create_user(db_session)
+    other = create_user(db_session, username="other", email="other@example.com")
+    capsule = _capsule(
+        db_session, author.id, title="Kanji essentiels", lesson={"text": "Le radical de l'eau"}
+    )
+    db_session.add(
+        MoleculeNote(user_id=author.id, title="Mes kanji", content="Réviser le radical du feu")
+    )
+    db_session.commit()
+
+    assert {hit.doc_type for hit in search(db_session, author, "radical").items} == {
+        "lesson",
+        "note",
+    }
+    assert _types(search(db_session, other, "radical")) == [("lesson", "Cours")]
+
+    capsule.is_public = False
+    db_session.commit()
+    assert search(db_session, other, "radical").items == []
+    assert search(db_session, other, "kanji").items == []
+    assert {hit.doc_type for hit in search(db_session, author, "kanji").items} == {
+        "capsule",
+        "note",
+    }
+
+
+def test_ranked_pages_and_type_filter(db_session, indexed) -> None:
+    user = create_user(db_session)
+    for index in range(5):
+        _capsule(
+            db_session, user.id, title=f"Algèbre {index}", lesson={"text": "matrices et vecteurs"}
+        )
+    _capsule(db_session, user.id, title="Matrices", lesson={"text": "matrices matrices matrices"})
+
+    first = search_content(
+        q="matrices",
+        types=["capsule", "lesson"],
+        limit=4,
+        offset=0,
+        db=db_session,
+        current_user=user,
+    )
+    assert first.items[0].title == "Matrices"
+    assert first.next_offset == 4
+    second = search(
+        db_session, user, "matrices", doc_types=["capsule", "lesson"], limit=4, offset=4
+    )
+    assert second.next_offset is None
+    assert len(first.items) + len(second.items) == 7  # 6 leçons + la capsule "Matrices"
+    assert [hit.score for hit in first.items] == sorted(
+        (hit.score for hit in first.items), reverse=True
+    )
+
+    with pytest.raises(HTTPException) as exc:
+        search(db_session, user, "matrices", doc_types=["video"])
+    assert exc.value.detail == "invalid_type"
+
+
+def test_reindex_all_rebuilds_from_scratch(db_session, engine) -> None:
+    with engine.begin() as connection:
+        ensure_search_schema(connection)
+    user = create_user(db_session)
+    _capsule(
+        db_session,
+        user.id,
+        title="Chimie organique",
+        lesson={"sections": [{"body": "Les alcanes"}]},
+    )
+    assert search(db_session, user, "alcanes").items == []
+
+    assert reindex_all(db_session) == 4  # 1 capsule, 1 molécule, 2 atomes, 0 note
+    assert _types(search(db_session, user, "alcane")) == [("lesson", "Cours")]
+
+
+def test_existing_catalog_is_indexed_once_when_the_index_is_empty(db_session, engine) -> None:
+    with engine.begin() as connection:
+        ensure_search_schema(connection)
+    user = create_user(db_session)
+    _capsule(
+        db_session,
+        user.id,
+        title="Chimie organique",
+        lesson={"sections": [{"body": "Les alcanes"}]},
+    )
+
+    assert reindex_if_empty(db_session) == 4
+    assert _types(search(db_session, user, "alcane")) == [("lesson", "Cours")]
+    assert reindex_if_empty(db_session) is None
+
+
+def test_reindex_script_fills_the_index_outside_startup(db_session, engine, monkeypatch) -> None:
+    from scripts import reindex_search
+
+    monkeypatch.setattr(reindex_search, "sync_engine", engine)
+    monkeypatch.setattr(reindex_search, "SessionLocal", lambda: Session(engine))
+    user = create_user(db_session)
+    _capsule(
+        db_session,
+        user.id,
+        title="Chimie organique",
+        lesson={"sections": [{"body": "Les alcanes"}]},
+    )
+
+    monkeypatch.setattr("sys.argv", ["reindex_search", "--if-empty"])
+    reindex_search.main()
+    assert _types(search(db_session, user, "alcane")) == [("lesson", "Cours")]
+
+    # index déjà rempli: --if-empty ne fait rien (indexation incrémentale inactive ici)
+    db_session.add(
+        Molecule(granule_id=db_session.query(Granule.id).scalar(), order=2, title="Les alcènes")
+    )
+    db_session.commit()
+    reindex_search.main()
+    assert search(db_session, user, "alcènes").items == []
+
+    monkeypatch.setattr("sys.argv", ["reindex_search"])
+    reindex_search.main()
+    assert _types(search(db_session, user, "alcènes")) == [("molecule", "Les alcènes")]
+
+
+def test_async_session_writes_are_indexed(tmp_path, indexed) -> None:
+    # sessions de l'admin SQLAdmin (moteur async)
+    pytest.importorskip("aiosqlite")
+    path = tmp_path / "admin.db"
+    sync_engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(sync_engine, tables=TABLES)
+    with sync_engine.begin() as connection:
+        ensure_search_schema(connection)
+    with Session(sync_engine) as db:
+        user = create_user(db)
+
+    async def edit_like_the_admin() -> None:
+        async_engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+        async with AsyncSession(async_engine) as session:
+            capsule = Capsule(
+                title="Chimie organique",
+                domain="science",
+                area="chimie",
+                main_skill="chimie",
+                creator_id=user.id,
+                is_public=True,
+            )
+            session.add(capsule)
+            await session.commit()
+            capsule.title = "Chimie minérale"
+            await session.commit()
+        await async_engine.dispose()
+
+    asyncio.run(edit_like_the_admin())
+    with Session(sync_engine) as db:
+        assert _types(search(db, user, "minérale")) == [("capsule", "Chimie minérale")]
+    sync_engine.dispose()
+
+
+def test_lesson_text_keeps_readable_strings_only() -> None:
+    content = {"title": "Intro", "audio_url": "a.mp3", "items": [{"term": "猫", "id": "x"}, 3]}
+    assert lesson_text(content) == "Intro\n猫"
+
+
+def test_sqlite_match_expression_uses_prefix_terms() -> None:
+    assert SqliteSearchBackend.match_expression('boucle "for" -x') == '"boucle"* "for"* "x"*'
+    assert SqliteSearchBackend.match_expression("  ?! ") == ""
+
+
+def test_postgres_query_uses_tsvector_and_trigram_indexes() -> None:
+    captured = []
+    db = SimpleNamespace(
+        execute=lambda stmt, params=None: captured.append(stmt) or SimpleNamespace(all=lambda: []),
+    )
+    PostgresSearchBackend().search(
+        db, "boucles imbriquées", user_id=7, doc_types=["lesson"], limit=5
+    )
+    sql = str(captured[0].compile(dialect=postgresql.dialect()))
+    assert "search_documents.search_vector @@" in sql
+    assert "websearch_to_tsquery" in sql and "ts_rank_cd" in sql and "ts_headline" in sql
+    assert "search_documents.title %%" in sql or "search_documents.title %" in sql
+    assert "similarity(search_documents.title" in sql
@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import importlib
+import json
+import sys
+from datetime import datetime, timezone
+from decimal import Decimal
+from enum import Enum
+from uuid import UUID
+
+import pytest
+from app.conversations.schemas import ConversationMessage, UserPublicInfo
+from app.core import serialization
+from fastapi.encoders import jsonable_encoder
+
+
+class _Color(str, Enum):
+    RED = "red"
+
+
+PAYLOAD = {
+    "type": "badge_awarded",
+    "color": _Color.RED,
+    "at": datetime(2026, 1, 2, 3, 4, 5, 678, tzinfo=timezone.utc),
+    "id": UUID("12345678-1234-5678-1234-567812345678"),
+    "amount": Decimal("2.5"),
+    "user": UserPublicInfo(id=1, username="élève"),
+    "tags": {"a"},
+}
+
+
+def _legacy(payload: dict) -> str:
+    encoded = jsonable_encoder(
+        payload,
+        custom_encoder={
+            Enum: lambda e: getattr(e, "value", str(e)),
+            datetime: lambda d: d.isoformat(),
+            UUID: str,
+            Decimal: float,
+        },
+    )
+    return json.dumps(encoded, ensure_ascii=False, separators=(",", ":"))
+
+
+@pytest.fixture(params=["orjson", "json"])
+def backend(request, monkeypatch):
+    if request.param == "json":
+        monkeypatch.setitem(sys.modules, "orjson", None)
+    elif serialization.orjson is None and importlib.util.find_spec("orjson") is None:
+        pytest.skip("orjson is not installed")
+    module = importlib.reload(serialization)
+    yield module
+    monkeypatch.undo()
+    importlib.reload(serialization)
+
+
+def test_event_encoding_matches_the_legacy_encoder(backend):
+    assert backend.BACKEND in {"orjson", "json"}
+    frame = backend.dumps(PAYLOAD)
+    assert isinstance(frame, bytes)
+    assert json.loads(frame) == json.loads(_legacy(PAYLOAD))
+    assert backend.dumps_text({"k": "é"}) == '{"k":"é"}'
+
+
+def test_model_encoder_is_compiled_once():
+    encoder = serialization.model_encoder(ConversationMessage)
+    assert serialization.model_encoder(ConversationMessage) is encoder
+
+    message = ConversationMessage(
+        id="m-1",
+        scope="general",
+        content="Salut",
+        created_at=datetime(2026, 1, 1, tzinfo=timezone.utc),
+        user=UserPublicInfo(id=2, username="bob"),
+    )
+    assert json.loads(encoder(message)) == message.model_dump(mode="json")
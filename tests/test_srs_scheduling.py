@@ -0,0 +1,183 @@
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+from app.models.progress.user_answer_log_model import UserAnswerLog
+from app.models.progress.user_molecule_review_model import UserMoleculeReview
+from app.services.scheduling import (
+    FSRSAlgorithm,
+    ReviewHistory,
+    SM2Algorithm,
+    evaluate,
+    fit_parameters,
+    get_algorithm,
+    load_user_history,
+    recompute_schedules,
+    simulate,
+)
+from app.services.srs_service import SRSService
+from tests.utils import create_capsule_graph, create_user
+
+OUTCOMES = [True, True, False, True, True, True, False, False, True]
+
+
+def _random_history(seed: int = 7, molecules: int = 40, reviews: int = 12) -> ReviewHistory:
+    rng = np.random.default_rng(seed)
+    start = datetime(2025, 1, 1)
+    events = []
+    for molecule_id in range(1, molecules + 1):
+        at = start
+        strength = rng.uniform(0.5, 3.0)
+        for _ in range(rng.integers(2, reviews)):
+            gap = rng.uniform(0.2, 10.0)
+            at += timedelta(days=gap)
+            recalled = rng.random() < 0.9 ** (gap / strength)
+            strength *= 2.0 if recalled else 0.5
+            events.append((molecule_id, at, recalled))
+    return ReviewHistory.from_events(events)
+
+
+def test_legacy_algorithm_matches_live_rules():
+    algorithm = get_algorithm("legacy")
+    schedule = SimpleNamespace(
+        review_count=0,
+        streak=0,
+        success_count=0,
+        total_errors=0,
+        ease_factor=None,
+        interval_days=None,
+        last_review_at=None,
+        next_review_at=None,
+        last_outcome=None,
+        last_error_at=None,
+        updated_at=None,
+    )
+    state = None
+    now = datetime(2025, 1, 1)
+    for is_correct in OUTCOMES:
+        SRSService.apply_answer(schedule, is_correct, now)
+        state = algorithm.update(state, is_correct)
+        assert state["interval_days"] == pytest.approx(schedule.interval_days)
+        assert state["ease_factor"] == pytest.approx(schedule.ease_factor)
+        assert state["streak"] == schedule.streak
+        assert algorithm.next_review_at(state, now) == schedule.next_review_at
+
+
+def test_sm2_intervals_follow_the_reference_sequence():
+    algorithm = SM2Algorithm()
+    state = None
+    intervals = []
+    for _ in range(3):
+        state = algorithm.update(state, True)
+        intervals.append(state["interval_days"])
+    assert intervals == pytest.approx([1.0, 6.0, 15.0])
+
+    state = algorithm.update(state, False)
+    assert state["repetitions"] == 0
+    assert state["interval_days"] == 1.0
+    assert state["ease_factor"] == pytest.approx(2.5 - 0.54)
+
+
+def test_fsrs_stability_grows_on_success_and_drops_on_lapse():
+    algorithm = FSRSAlgorithm()
+    state = algorithm.update(None, True)
+    assert state["stability"] == pytest.approx(algorithm.params["w2"])
+    assert state["interval_days"] == pytest.approx(state["stability"], rel=1e-6)
+
+    recalled = algorithm.update(state, True, elapsed_days=state["interval_days"])
+    lapsed = algorithm.update(state, False, elapsed_days=state["interval_days"])
+    assert recalled["stability"] > state["stability"] > lapsed["stability"]
+    assert lapsed["difficulty"] > recalled["difficulty"]
+
+
+@pytest.mark.parametrize("name", ["legacy", "sm2", "fsrs"])
+def test_vectorised_replay_matches_sequential_updates(name):
+    algorithm = get_algorithm(name)
+    history = _random_history()
+    final = simulate(algorithm, history).state
+
+    for row in range(history.size):
+        state = None
+        for rank in np.flatnonzero(history.mask[row]):
+            state = algorithm.update(
+                state, bool(history.correct[row, rank]), float(history.elapsed_days[row, rank])
+            )
+        for key, value in state.items():
+            assert final[key][row] == pytest.approx(value)
+
+
+def test_fit_parameters_does_not_worsen_log_loss():
+    history = _random_history(seed=3, molecules=80)
+    result = fit_parameters("fsrs", history, rounds=2)
+    assert result.reviews == evaluate(FSRSAlgorithm(), history)["reviews"]
+    assert result.log_loss <= result.baseline_log_loss
+    assert evaluate(FSRSAlgorithm(result.params), history)["log_loss"] == pytest.approx(
+        result.log_loss
+    )
+
+
+def test_unknown_algorithm_or_parameter_is_rejected():
+    with pytest.raises(ValueError):
+        get_algorithm("leitner")
+    with pytest.raises(ValueError):
+        get_algorithm("sm2", {"w0": 1.0})
+
+
+def test_recompute_schedules_from_answer_log(db_session):
+    user = create_user(db_session, username="sched-user", email="sched@example.com")
+    _, molecule, lesson_atom, quiz_atom = create_capsule_graph(db_session, user.id)
+    start = datetime(2025, 3, 1, 9, 0)
+    answers = [
+        (lesson_atom, True, 0),
+        (quiz_atom, True, 1),
+        (quiz_atom, True, 4),
+        (lesson_atom, False, 10),
+    ]
+    db_session.add_all(
+        UserAnswerLog(
+            user_id=user.id,
+            atom_id=atom.id,
+            is_correct=is_correct,
+            user_answer_json={},
+            created_at=start + timedelta(days=offset),
+        )
+        for atom, is_correct, offset in answers
+    )
+    db_session.commit()
+
+    history = load_user_history(db_session, user.id)
+    assert history.molecule_ids.tolist() == [molecule.id]
+    assert history.elapsed_days[0].tolist() == [0.0, 1.0, 3.0, 6.0]
+
+    # plan existant aux compteurs périmés
+    stale_error_at = start - timedelta(days=30)
+    db_session.add(
+        UserMoleculeReview(
+            user_id=user.id,
+            molecule_id=molecule.id,
+            total_errors=5,
+            last_outcome="success",
+            total_resets=2,
+            last_error_at=stale_error_at,
+        )
+    )
+    db_session.commit()
+
+    assert recompute_schedules(db_session, user.id, get_algorithm("sm2")) == 1
+    db_session.commit()
+
+    schedule = db_session.query(UserMoleculeReview).filter_by(user_id=user.id).one()
+    assert schedule.review_count == 4
+    assert schedule.success_count == 3
+    assert schedule.interval_days == pytest.approx(1.0)
+    assert schedule.next_review_at == start + timedelta(days=11)
+    assert (schedule.total_errors, schedule.last_outcome) == (1, "error")
+    assert (schedule.total_resets, schedule.last_error_at) == (2, stale_error_at)
+
+    # une remise à zéro postérieure à la dernière réponse reste le dernier résultat
+    schedule.last_outcome = "reset"
+    schedule.updated_at = start + timedelta(days=12)
+    db_session.commit()
+    recompute_schedules(db_session, user.id, get_algorithm("sm2"))
+    assert schedule.last_outcome == "reset"
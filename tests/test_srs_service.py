@@ -1,5 +1,11 @@
 from datetime import datetime, timedelta
 
+import pytest
+from fastapi import HTTPException
+
+from app.models.capsule.atom_model import Atom, AtomContentType
+from app.models.capsule.molecule_model import Molecule
+
 from app.models.progress.user_answer_log_model import UserAnswerLog
 from app.models.progress.user_atomic_progress import UserAtomProgress
 from app.models.progress.user_molecule_review_model import UserMoleculeReview
@@ -82,3 +88,112 @@ def test_srs_overview_and_error_journal(db_session):
 
     digest = service.coach_digest(capsule_id=capsule.id)
     assert "reviews" in digest and "errors" in digest
+
+
+def test_due_queue_is_paginated_and_counts_in_sql(db_session):
+    user = create_user(db_session, username="queue-user", email="queue@example.com")
+    capsule, molecule, _, _ = create_capsule_graph(db_session, user.id)
+    granule = molecule.granule
+
+    now = datetime.utcnow()
+    molecules = [molecule]
+    for order in range(2, 6):
+        extra = Molecule(order=order, title=f"Leçon {order}")
+        granule.molecules.append(extra)
+        molecules.append(extra)
+    db_session.commit()
+
+    for index, item in enumerate(molecules):
+        db_session.add(
+            UserMoleculeReview(
+                user_id=user.id,
+                molecule_id=item.id,
+                # Three due reviews (one successful), two in the future.
+                next_review_at=now + timedelta(hours=index - 2.5),
+                last_outcome="success" if index == 0 else "error",
+                interval_days=1.0,
+                review_count=2,
+                success_count=1,
+            )
+        )
+    db_session.commit()
+
+    service = SRSService(db_session, user)
+    first_page = service.due_queue(limit=2)
+    assert first_page["due_count"] == 3
+    assert first_page["overdue_count"] == 2
+    assert [item["molecule_id"] for item in first_page["items"]] == [molecules[0].id, molecules[1].id]
+    assert first_page["next_cursor"]
+
+    second_page = service.due_queue(limit=2, cursor=first_page["next_cursor"])
+    assert [item["molecule_id"] for item in second_page["items"]] == [molecules[2].id]
+    assert second_page["next_cursor"] is None
+    assert second_page["items"][0]["capsule_id"] == capsule.id
+
+    overview = service.build_overview(limit=2)
+    assert overview["due_count"] == 3
+    assert len(overview["next_reviews"]) == 2
+
+    with pytest.raises(HTTPException) as exc:
+        service.due_queue(cursor="not-a-cursor")
+    assert exc.value.status_code == 400
+
+
+def test_error_overview_is_windowed_and_aggregated_in_sql(db_session):
+    user = create_user(db_session, username="errors-user", email="errors@example.com")
+    capsule, molecule, lesson_atom, quiz_atom = create_capsule_graph(db_session, user.id)
+    other = Molecule(order=2, title="Leçon 2")
+    molecule.granule.molecules.append(other)
+    other_atom = Atom(order=1, title="Exercice", content_type=AtomContentType.QUIZ, content={})
+    other.atoms.append(other_atom)
+    db_session.commit()
+
+    now = datetime.utcnow()
+    payloads = [
+        (quiz_atom, {"error_type": " Syntax "}, 1),
+        (quiz_atom, {"type": "syntax"}, 2),
+        (lesson_atom, {"category": "concept"}, 3),
+        (quiz_atom, {"error_type": ""}, 4),
+        (quiz_atom, {"reason": "syntax"}, 5),
+        (other_atom, {}, 6),
+        # Outside the default 90-day window.
+        (other_atom, {"error_type": "concept"}, 24 * 200),
+        (other_atom, {"error_type": "concept"}, 24 * 201),
+    ]
+    db_session.add_all(
+        UserAnswerLog(
+            user_id=user.id,
+            atom_id=atom.id,
+            is_correct=False,
+            user_answer_json=payload,
+            created_at=now - timedelta(hours=hours),
+        )
+        for atom, payload, hours in payloads
+    )
+    db_session.add(UserAtomProgress(user_id=user.id, atom_id=quiz_atom.id, reset_count=2))
+    db_session.commit()
+
+    service = SRSService(db_session, user)
+    overview = service.build_error_overview(include_examples=True)
+    assert overview["total_errors"] == 6
+    first, second = overview["molecules"]
+    assert first["molecule_id"] == molecule.id
+    assert first["total_errors"] == 5
+    assert first["error_types"] == [
+        {"error_type": "syntax", "count": 3},
+        {"error_type": "concept", "count": 1},
+        {"error_type": "autre", "count": 1},
+    ]
+    assert first["resets"] == 2
+    assert len(first["examples"]) == 3
+    assert first["examples"][0]["submitted_answer"] == '{"error_type": " Syntax "}'
+    assert second["molecule_id"] == other.id
+    assert second["error_types"] == [{"error_type": "autre", "count": 1}]
+
+    # The window bounds the number of errors considered, newest first.
+    bounded = service.build_error_overview(max_errors=2)
+    assert bounded["total_errors"] == 2
+    assert bounded["molecules"][0]["error_types"][0] == {"error_type": "syntax", "count": 2}
+
+    limited = service.build_error_overview(limit=1, capsule_id=capsule.id + 1)
+    assert limited["molecules"] == []
@@ -0,0 +1,30 @@
+"""Cold start of ``import app.main``: heavy subsystems stay unloaded.
+
+Import timings are measured by scripts/benchmarks/startup.py, not asserted
+here: wall-clock budgets flake on loaded CI machines.
+"""
+
+from __future__ import annotations
+
+from fastapi.testclient import TestClient
+from scripts.benchmarks.startup import HEAVY_MODULES, imported_modules
+
+
+def test_heavy_subsystems_are_not_imported_at_startup():
+    loaded = imported_modules("app.main")
+
+    assert "app.main" in loaded
+    assert [name for name in HEAVY_MODULES if name in loaded] == []
+
+
+def test_admin_is_built_on_first_request():
+    from app.main import app
+
+    client = TestClient(app)
+    response = client.get("/admin/", follow_redirects=False)
+    assert response.status_code == 302
+    assert response.headers["location"].endswith("/admin/login")
+
+    login = client.get("/admin/login")
+    assert login.status_code == 200
+    assert "/admin/statics/" in login.text
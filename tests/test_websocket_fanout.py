@@ -0,0 +1,118 @@
+"""Back-pressured websocket fan-out: queues, slow-consumer eviction, metrics."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+from datetime import datetime, timezone
+
+import pytest
+from app.conversations.manager import ConversationWebSocketManager
+from app.conversations.schemas import ChannelDescriptor, ConversationMessage, UserPublicInfo
+from app.core.websocket_fanout import FanoutMetrics
+from app.notifications.websocket_manager import NotificationWebSocketManager
+from starlette import status
+from starlette.websockets import WebSocketState
+
+
+class FakeSocket:
+    """Websocket double; ``slow`` sockets never complete a send."""
+
+    def __init__(self, slow: bool = False) -> None:
+        self.slow = slow
+        self.sent: list[str] = []
+        self.close_code: int | None = None
+        self.application_state = WebSocketState.CONNECTED
+        self._stalled = asyncio.Event()
+
+    async def accept(self) -> None:
+        pass
+
+    async def send_text(self, data: str) -> None:
+        if self.slow:
+            await self._stalled.wait()
+        self.sent.append(data)
+
+    async def close(self, code: int = 1000) -> None:
+        self.close_code = code
+        self.application_state = WebSocketState.DISCONNECTED
+
+
+def _message(channel: ChannelDescriptor, index: int) -> ConversationMessage:
+    return ConversationMessage(
+        id=f"msg-{index}",
+        scope=channel.scope,
+        domain=channel.domain,
+        area=channel.area,
+        content=f"Message {index}",
+        created_at=datetime.now(timezone.utc),
+        user=UserPublicInfo(id=1, username="tester"),
+    )
+
+
+async def _settle() -> None:
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+@pytest.mark.asyncio
+async def test_slow_readers_are_evicted_without_stalling_the_channel() -> None:
+    metrics = FanoutMetrics("test")
+    manager = ConversationWebSocketManager(metrics=metrics, max_queue=4)
+    channel = ChannelDescriptor.from_params(domain="Sciences")
+    sockets = [FakeSocket(slow=index % 400 == 0) for index in range(1000)]
+    for socket in sockets:
+        await manager.connect(channel, socket)
+    slow = [socket for socket in sockets if socket.slow]
+
+    started = time.perf_counter()
+    for index in range(10):
+        await manager.broadcast_message(channel, _message(channel, index))
+    elapsed = time.perf_counter() - started
+    await _settle()
+
+    assert elapsed < 5
+    assert all(len(socket.sent) == 10 for socket in sockets if not socket.slow)
+    assert [socket.close_code for socket in slow] == [status.WS_1013_TRY_AGAIN_LATER] * len(slow)
+    assert await manager.connection_count(channel) == 1000 - len(slow)
+
+    snapshot = metrics.snapshot()
+    assert snapshot["connections"] == 1000 - len(slow)
+    assert snapshot["evictions"] == snapshot["dropped"] == len(slow)
+    assert snapshot["sent"] == 10 * (1000 - len(slow))
+    assert snapshot["queued"] == 0
+    assert snapshot["peak_queue_depth"] == 4
+
+
+@pytest.mark.asyncio
+async def test_history_and_messages_share_the_connection_queue() -> None:
+    manager = ConversationWebSocketManager()
+    channel = ChannelDescriptor.from_params()
+    socket = FakeSocket()
+    await manager.connect(channel, socket)
+
+    await manager.broadcast_message(channel, _message(channel, 1))
+    await manager.send_history(channel, socket)
+    await manager.broadcast_message(channel, _message(channel, 2))
+
+    assert [json.loads(text)["type"] for text in socket.sent] == ["message", "history", "message"]
+    await manager.disconnect(channel, socket)
+    assert await manager.connection_count(channel) == 0
+
+
+@pytest.mark.asyncio
+async def test_notification_slow_socket_does_not_block_other_sockets() -> None:
+    manager = NotificationWebSocketManager(max_queue=2)
+    fast, slow = FakeSocket(), FakeSocket(slow=True)
+    await manager.connect(5, fast)
+    await manager.connect(5, slow)
+
+    for index in range(4):
+        await manager.notify_async(5, {"type": "ping", "n": index})
+    await _settle()
+
+    assert [json.loads(text)["n"] for text in fast.sent] == [0, 1, 2, 3]
+    assert slow.close_code == status.WS_1013_TRY_AGAIN_LATER
+    assert manager.connections[5] == {fast}
+    assert manager.metrics.snapshot()["evictions"] == 1
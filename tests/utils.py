@@ -2,7 +2,10 @@
 
 from __future__ import annotations
 
+from contextlib import contextmanager
 from datetime import datetime
+from types import SimpleNamespace
+from typing import Iterator, List
 
 from app.models.capsule.atom_model import Atom, AtomContentType
 from app.models.capsule.capsule_model import Capsule
@@ -11,6 +14,7 @@ from app.models.capsule.language_roadmap_model import Skill, SkillType, Unit
 from app.models.capsule.molecule_model import Molecule
 from app.models.user.user_model import User
 from app.models.vote.feature_vote_model import FeaturePoll, FeaturePollOption
+from sqlalchemy import event
 
 
 def create_user(db, **kwargs) -> User:
@@ -54,9 +58,7 @@ def create_feature_poll(
 
     titles = option_titles or ["Option A", "Option B", "Option C"]
     for index, option_title in enumerate(titles):
-        poll.options.append(
-            FeaturePollOption(title=option_title, position=index)
-        )
+        poll.options.append(FeaturePollOption(title=option_title, position=index))
 
     db.add(poll)
     db.commit()
@@ -99,3 +101,84 @@ def create_capsule_graph(db, user_id: int):
     db.commit()
     db.refresh(capsule)
     return capsule, molecule, lesson_atom, quiz_atom
+
+
+def make_pdf(pages: list[list[str]]) -> bytes:
+    """Minimal text PDF (Helvetica, one line per entry) readable by pypdf."""
+
+    def _escape(line: str) -> str:
+        return line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", b""]
+    font_id = 3
+    objects.append(
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>"
+    )
+    page_ids = []
+    for lines in pages:
+        ops = ["BT", "/F1 11 Tf", "14 TL", "50 800 Td"]
+        ops += [f"({_escape(line)}) '" for line in lines]
+        ops.append("ET")
+        stream = "\n".join(ops).encode("cp1252")
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        content_id = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            b"/Resources << /Font << /F1 %d 0 R >> >> /Contents %d 0 R >>" % (font_id, content_id)
+        )
+        page_ids.append(len(objects))
+    kids = " ".join(f"{page_id} 0 R" for page_id in page_ids).encode()
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(page_ids))
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (
+        len(objects) + 1,
+        xref,
+    )
+    return bytes(out)
+
+
+class FakeOpenAI:
+    """Local stand-in for the OpenAI client: records chat calls and returns ``replies`` in order."""
+
+    def __init__(self, *replies: str) -> None:
+        self.replies = list(replies) or ["{}"]
+        self.calls: list[dict] = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, **kwargs):
+        self.calls.append(kwargs)
+        content = self.replies[min(len(self.calls), len(self.replies)) - 1]
+        message = SimpleNamespace(content=content)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message, delta=message)])
+
+
+class RecordedStatement(str):
+    """SQL text of one execution; ``rows`` counts its parameter sets (``executemany``)."""
+
+    rows: int = 1
+
+
+@contextmanager
+def record_statements(engine) -> Iterator[List[RecordedStatement]]:
+    """Record the statements ``engine`` sends to the database inside the block."""
+
+    statements: List[RecordedStatement] = []
+
+    def _on_execute(_conn, _cursor, statement, parameters, _context, executemany) -> None:
+        recorded = RecordedStatement(statement)
+        recorded.rows = len(parameters) if executemany else 1
+        statements.append(recorded)
+
+    event.listen(engine, "before_cursor_execute", _on_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", _on_execute)